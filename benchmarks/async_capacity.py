@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+同步 vs 异步执行路径的并发容量对比（固定线程数）
+
+用 load_test 的合成对局模拟器压测 werewolf/app.py 的两种执行路径：
+
+- sync: SDK同步端点（AGENT_ASYNC=false），每个在途LLM调用占一个线程
+- async: async端点（AGENT_ASYNC=true），发言检测在事件循环上并发执行
+
+两种路径使用相同的 AGENT_THREADS（默认4）与桩服务延迟（默认lognormal:400，偏LLM等待），
+按 --ramp 逐级增加并发局数，对比各级吞吐（局/分钟）、延迟分位数与错误率，
+并给出每种路径的容量拐点（吞吐不再随并发增长或p95明显恶化的并发局数）。
+
+用法:
+    python benchmarks/async_capacity.py [--threads 4] [--ramp 2,4,8,16] [--games-per-slot 2]
+        [--days 3] [--llm-latency lognormal:400,0.4] [--json out.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+from load_test import SERVICE_PORT, ProcessSampler, find_knee, launch_service, run_stage, wait_healthy  # noqa: E402
+
+MODES = {
+    'sync': {'AGENT_ASYNC': 'false'},
+    'async': {'AGENT_ASYNC': 'true'},
+}
+
+
+def measure(mode: str, base_env: Dict[str, str], ramp: List[int], args: argparse.Namespace) -> Dict[str, Any]:
+    """启动一种执行路径，热身后逐级压测"""
+    target = f"http://127.0.0.1:{SERVICE_PORT}"
+    env = dict(base_env)
+    env.update(MODES[mode])
+    log_path = os.path.join(env['DATA_DIR'], f"{mode}.log")
+    process = launch_service(env, log_path)
+    try:
+        if not wait_healthy(target, timeout=args.startup_timeout):
+            raise RuntimeError(f"{mode} service did not become healthy, see {log_path}")
+        sampler = ProcessSampler(process.pid)
+        time.sleep(args.settle)
+        run_stage(target, 1, 1, args.days, 0.0, args.timeout, sampler, args.seed + 1)
+        stages = []
+        for concurrency in ramp:
+            stage = run_stage(target, concurrency, args.games_per_slot, args.days, 0.0,
+                              args.timeout, sampler, args.seed)
+            stages.append(stage)
+            all_ms = stage['latency_ms'].get('all', {})
+            print(f"{mode} x{concurrency}: {stage['games_per_minute']:.2f} games/min, "
+                  f"p95 {all_ms.get('p95', 0):.0f}ms, errors {stage['error_rate']:.2%}", flush=True)
+        return {'mode': mode, 'stages': stages, 'knee': find_knee(stages), 'log': log_path}
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=60)
+        except Exception:
+            process.kill()
+
+
+def format_report(results: List[Dict[str, Any]], threads: int) -> str:
+    lines = [f"{'mode':<7}{'games':>7}{'games/min':>11}{'p50 ms':>9}{'p95 ms':>9}{'err%':>7}{'cpu%':>7}"]
+    for result in results:
+        for r in result['stages']:
+            all_ms = r['latency_ms'].get('all', {})
+            lines.append(
+                f"{result['mode']:<7}{r['concurrency']:>7}{r['games_per_minute']:>11.2f}"
+                f"{all_ms.get('p50', 0):>9.1f}{all_ms.get('p95', 0):>9.1f}"
+                f"{r['error_rate'] * 100:>7.2f}{r['cpu_utilization'] * 100:>7.1f}")
+    lines.append('')
+    peaks = {}
+    for result in results:
+        peak = max(result['stages'], key=lambda r: r['games_per_minute'])
+        peaks[result['mode']] = peak['games_per_minute']
+        knee = result['knee']['knee_concurrency']
+        lines.append(f"{result['mode']}: knee at {knee or '-'} concurrent games, "
+                     f"peak {peak['games_per_minute']:.2f} games/min at {peak['concurrency']} "
+                     f"({threads} threads)")
+    if peaks.get('sync') and 'async' in peaks:
+        lines.append(f"Async peak throughput: {peaks['async'] / peaks['sync']:.2f}x sync")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--threads', type=int, default=4, help='AGENT_THREADS（两种路径相同）')
+    parser.add_argument('--ramp', default='2,4,8,16', help='并发局数阶梯')
+    parser.add_argument('--games-per-slot', type=int, default=2)
+    parser.add_argument('--days', type=int, default=3)
+    parser.add_argument('--llm-latency', default='lognormal:400,0.4', help='桩服务延迟分布（越高越偏LLM等待）')
+    parser.add_argument('--timeout', type=float, default=120.0, help='单请求超时（秒）')
+    parser.add_argument('--startup-timeout', type=float, default=180.0)
+    parser.add_argument('--settle', type=float, default=5.0, help='健康后等待后台预热的秒数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default='')
+    args = parser.parse_args(argv)
+    ramp = [int(x) for x in args.ramp.split(',') if x.strip()]
+
+    from fake_llm_server import FakeLLMConfig, FakeLLMServer
+    server = FakeLLMServer(FakeLLMConfig(port=0, mode='synth', latency=args.llm_latency, seed=args.seed)).start()
+    data_dir = tempfile.mkdtemp(prefix='werewolf-async-')
+    base_env = dict(server.client_env())
+    base_env.update({'DATA_DIR': data_dir, 'ML_MODEL_DIR': os.path.join(data_dir, 'ml_models'),
+                     'MODEL_NAME': os.getenv('MODEL_NAME', 'deepseek-chat'),
+                     'METRICS_PORT': '0', 'METRICS_FILE': '', 'AGENT_THREADS': str(args.threads),
+                     'ROLE_AGENT_PREWARM': 'all', 'ROLE_AGENT_PREWARM_DELAY': '0'})
+
+    results = []
+    try:
+        for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+            results.append(measure(mode, base_env, ramp, args))
+    finally:
+        server.stop()
+
+    print()
+    print(format_report(results, args.threads))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'llm_latency': args.llm_latency, 'threads': args.threads,
+                       'cpu_count': os.cpu_count(), 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
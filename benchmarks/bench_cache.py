@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+进程内缓存基准（werewolf.common.cache）
+
+测量 ShardedCache 单线程读写与多线程混合负载的吞吐（单位 万次/秒），对比 functools.lru_cache
+与原 CacheManager（字典+时间戳，无锁、无上限，下面内联一份作为legacy）。
+
+行为正确性（LRU/TTL/命名空间/字节配额、并发击穿合并、多线程压力下的配额与计数）
+由 tests/test_cache.py 覆盖。
+
+用法:
+    python benchmarks/bench_cache.py [--keys 2000] [--ops 200000] [--threads 8] [--json out.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import functools
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from werewolf.common.cache import ShardedCache  # noqa: E402
+
+
+class LegacyCacheManager:
+    """原 werewolf.common.utils.CacheManager 的实现（去掉单例，便于对比）"""
+
+    def __init__(self):
+        self._cache = {}
+        self._timestamps = {}
+
+    def get(self, key, ttl=None):
+        if key not in self._cache:
+            return None
+        if ttl is not None and key in self._timestamps:
+            if time.time() - self._timestamps[key] > ttl:
+                self.delete(key)
+                return None
+        return self._cache[key]
+
+    def set(self, key, value):
+        self._cache[key] = value
+        self._timestamps[key] = time.time()
+
+    def delete(self, key):
+        self._cache.pop(key, None)
+        self._timestamps.pop(key, None)
+
+
+# ==================== 吞吐 ====================
+
+def throughput(fn: Callable[[int], Any], ops: int, threads: int = 1) -> float:
+    """每秒操作数（万次），多线程时每个线程执行 ops/threads 次"""
+    per_thread = max(1, ops // threads)
+    started: List[float] = []
+    start_barrier = threading.Barrier(threads, action=lambda: started.append(time.perf_counter()))
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        keys = [rng.randrange(ops) for _ in range(per_thread)]
+        start_barrier.wait()
+        for key in keys:
+            fn(key)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started[0]
+    return per_thread * threads / elapsed / 1e4
+
+
+def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    keys = args.keys
+    sharded = ShardedCache(max_entries=keys, max_bytes=256 * 1024 * 1024, shards=16)
+    legacy = LegacyCacheManager()
+
+    def compute(key: int) -> int:
+        return key * 2
+
+    cached_compute = functools.lru_cache(maxsize=keys)(compute)
+
+    def sharded_mixed(key: int) -> Any:
+        k = key % (keys * 2)
+        return sharded.get_or_compute(k, lambda: compute(k), size=64)
+
+    def legacy_mixed(key: int) -> Any:
+        k = key % (keys * 2)
+        value = legacy.get(k)
+        if value is None:
+            value = compute(k)
+            legacy.set(k, value)
+        return value
+
+    def lru_mixed(key: int) -> Any:
+        return cached_compute(key % (keys * 2))
+
+    results: Dict[str, Dict[str, float]] = {}
+    for threads in sorted({1, args.threads}):
+        results[f'get_or_compute x{threads}'] = {
+            'sharded': throughput(sharded_mixed, args.ops, threads),
+            'legacy': throughput(legacy_mixed, args.ops, threads),
+            'lru_cache': throughput(lru_mixed, args.ops, threads),
+        }
+    for k in range(keys):
+        sharded.set(k, k, size=64)
+        legacy.set(k, k)
+    results['get hit x1'] = {
+        'sharded': throughput(lambda key: sharded.get(key % keys), args.ops),
+        'legacy': throughput(lambda key: legacy.get(key % keys), args.ops),
+        'lru_cache': throughput(lambda key: cached_compute(key % keys), args.ops),
+    }
+    results['memory'] = {
+        'sharded': float(sharded.size()),
+        'legacy': float(len(legacy._cache)),
+        'lru_cache': float(cached_compute.cache_info().currsize),
+    }
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keys', type=int, default=2000)
+    parser.add_argument('--ops', type=int, default=200000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--json', default='')
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(f"{'workload':<22}{'sharded':>10}{'legacy':>10}{'lru_cache':>11}   (万次/秒; memory=条目数)")
+    for name, row in results.items():
+        print(f"{name:<22}{row['sharded']:>10.1f}{row['legacy']:>10.1f}{row['lru_cache']:>11.1f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
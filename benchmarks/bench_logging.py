@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+日志开销基准测试
+
+在生产级别（INFO）下测量每条日志的调用方开销（调用线程耗时，不含后台IO）：
+
+1. DEBUG记录被级别过滤：f-string（改造前）vs %风格参数（改造后）
+2. INFO记录同步StreamHandler（改造前的basicConfig）vs 队列处理器（文本/JSON）
+3. INFO记录经过采样（10%）与限速（每秒50条）后的开销
+4. 慢输出端（每次写入阻塞0.2ms，模拟日志采集端/网络盘）下同步与队列处理器的对比
+
+CPython下后台线程与调用线程共享GIL，快速输出端时队列处理器的调用方开销
+与同步处理器相当；它的收益在于输出端变慢时热路径不被IO阻塞，以及采样/限速
+在入队前丢弃记录。
+
+用法:
+    python benchmarks/bench_logging.py [--messages 20000]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from werewolf.common.structured_logging import configure_logging, shutdown_logging
+
+
+class SlowStream:
+    """每次写入阻塞固定时间的输出流"""
+
+    def __init__(self, delay: float = 0.0002):
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        time.sleep(self.delay)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def per_message_us(fn, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def sync_basic_config(stream) -> None:
+    """改造前的配置：根日志器上的同步StreamHandler"""
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+def run(messages: int = 20000) -> None:
+    devnull = open(os.devnull, 'w')
+    log = logging.getLogger('werewolf.bench.hot')
+    player, score, confidence = 'No.7', 63, 0.8123
+
+    print(f"Per-message caller overhead, {messages} messages, level=INFO (us/msg)")
+    print("-" * 64)
+
+    sync_basic_config(devnull)
+    rows = [
+        ('DEBUG dropped, f-string',
+         lambda i: log.debug(f"Trust score updated: {player} {score} -> {score + i % 5} (conf {confidence:.2f})")),
+        ('DEBUG dropped, %-style',
+         lambda i: log.debug("Trust score updated: %s %d -> %d (conf %.2f)", player, score, score + i % 5, confidence)),
+        ('INFO sync StreamHandler, f-string',
+         lambda i: log.info(f"Trust score updated: {player} {score} -> {score + i % 5} (conf {confidence:.2f})")),
+    ]
+    for name, fn in rows:
+        print(f"{name:<44} {per_message_us(fn, messages):>8.2f}")
+
+    def info_lazy(i):
+        log.info("Trust score updated: %s %d -> %d (conf %.2f)", player, score, score + i % 5, confidence)
+
+    configure_logging(level='INFO', fmt='text', sample_rules={}, rate_limit=0, stream=devnull)
+    print(f"{'INFO queue handler, text':<44} {per_message_us(info_lazy, messages):>8.2f}")
+    configure_logging(level='INFO', fmt='json', sample_rules={}, rate_limit=0, stream=devnull)
+    print(f"{'INFO queue handler, json':<44} {per_message_us(info_lazy, messages):>8.2f}")
+    configure_logging(level='INFO', fmt='json', sample_rules={'werewolf.bench': 0.1}, rate_limit=0, stream=devnull)
+    print(f"{'INFO queue handler, json, sampled 10%':<44} {per_message_us(info_lazy, messages):>8.2f}")
+    configure_logging(level='INFO', fmt='json', sample_rules={}, rate_limit=50, stream=devnull)
+    print(f"{'INFO queue handler, json, rate-limited 50/s':<44} {per_message_us(info_lazy, messages):>8.2f}")
+
+    # 慢输出端
+    slow_messages = max(200, messages // 20)
+    print("-" * 64)
+    print(f"Slow sink (0.2ms/write), {slow_messages} messages (us/msg)")
+    sync_basic_config(SlowStream())
+    print(f"{'INFO sync StreamHandler':<44} {per_message_us(info_lazy, slow_messages):>8.2f}")
+    configure_logging(level='INFO', fmt='json', sample_rules={}, rate_limit=0, stream=SlowStream())
+    print(f"{'INFO queue handler, json':<44} {per_message_us(info_lazy, slow_messages):>8.2f}")
+
+    shutdown_logging()
+    devnull.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=20000)
+    args = parser.parse_args()
+    run(args.messages)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+ML批量推理基准测试
+
+对比两种ML评分方式在单次决策上的延迟：
+- 逐个候选人调用 predict_wolf_probability（旧路径）
+- 一次性调用 predict_wolf_probabilities（批量路径）
+
+并测量 EnhancedDecisionEngine.decide_vote 在11个候选人时的端到端延迟
+
+用法:
+    python benchmarks/bench_ml_batch.py [--candidates 11] [--rounds 200]
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+from typing import Callable, Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np
+
+from werewolf.ml_agent import LightweightMLAgent
+from werewolf.core.decision_engine import EnhancedDecisionEngine
+
+logger = logging.getLogger(__name__)
+
+
+def make_player(rng: random.Random, is_wolf: bool) -> Dict:
+    """生成一个合成玩家特征字典（狼人特征整体偏可疑）"""
+    bias = 0.25 if is_wolf else 0.0
+    return {
+        'trust_score': rng.uniform(10, 60) if is_wolf else rng.uniform(40, 90),
+        'vote_accuracy': min(1.0, max(0.0, rng.uniform(0.2, 0.8) - bias)),
+        'contradiction_count': rng.randint(0, 4 if is_wolf else 2),
+        'injection_attempts': rng.randint(0, 2 if is_wolf else 0),
+        'false_quotation_count': rng.randint(0, 2 if is_wolf else 1),
+        'speech_lengths': [rng.randint(40, 300) for _ in range(rng.randint(1, 6))],
+        'voting_speed_avg': rng.uniform(1.0, 8.0),
+        'vote_targets': [f"No.{rng.randint(1, 12)}" for _ in range(rng.randint(0, 4))],
+        'mentions_others_count': rng.randint(0, 20),
+        'mentioned_by_others_count': rng.randint(0, 10),
+        'aggressive_score': min(1.0, rng.uniform(0.1, 0.7) + bias),
+        'defensive_score': min(1.0, rng.uniform(0.1, 0.7) + bias),
+        'emotion_keyword_count': rng.randint(0, 15),
+        'logic_keyword_count': rng.randint(0, 10),
+        'night_survival_rate': min(1.0, rng.uniform(0.3, 0.8) + bias),
+        'alliance_strength': rng.uniform(0.0, 1.0),
+        'isolation_score': rng.uniform(0.0, 1.0),
+        'speech_consistency_score': rng.uniform(0.2, 1.0),
+        'avg_response_time': rng.uniform(1.0, 8.0),
+    }
+
+
+def build_agent(rng: random.Random, samples: int = 240) -> LightweightMLAgent:
+    """构建并用合成数据训练ML智能体"""
+    agent = LightweightMLAgent()
+    if not agent.enabled:
+        return agent
+
+    labels = [1 if i % 3 == 0 else 0 for i in range(samples)]
+    training_data = {
+        'player_data_list': [make_player(rng, label == 1) for label in labels],
+        'labels': labels,
+        'sample_weights': [1.0] * samples,
+    }
+    agent.train(training_data)
+    return agent
+
+
+def measure(fn: Callable[[], object], rounds: int) -> Dict[str, float]:
+    """运行fn若干轮，返回延迟分位数（毫秒）"""
+    fn()  # 预热
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    arr = np.array(timings)
+    return {
+        'p50': float(np.percentile(arr, 50)),
+        'p95': float(np.percentile(arr, 95)),
+        'mean': float(arr.mean()),
+    }
+
+
+def run(candidate_count: int = 11, rounds: int = 200, seed: int = 7) -> Dict[str, Dict[str, float]]:
+    """执行基准测试并返回结果"""
+    rng = random.Random(seed)
+    agent = build_agent(rng)
+    if not agent.enabled:
+        print("ML agent not enabled - ML modules not available, nothing to benchmark")
+        return {}
+
+    candidates = [f"No.{i}" for i in range(1, candidate_count + 1)]
+    players: List[Dict] = [make_player(rng, i % 4 == 0) for i in range(candidate_count)]
+    context = {
+        'player_data': dict(zip(candidates, players)),
+        'trust_scores': {c: p['trust_score'] for c, p in zip(candidates, players)},
+        'current_day': 3,
+    }
+    engine = EnhancedDecisionEngine(agent)
+
+    results = {
+        'per_candidate': measure(
+            lambda: [agent.predict_wolf_probability(p) for p in players], rounds
+        ),
+        'batched': measure(lambda: agent.predict_wolf_probabilities(players), rounds),
+        'decide_vote': measure(lambda: engine.decide_vote(candidates, context, 'midgame'), rounds),
+    }
+
+    print("=" * 60)
+    print(f"ML inference latency per decision ({candidate_count} candidates, {rounds} rounds)")
+    print("=" * 60)
+    print(f"{'path':<16} {'p50(ms)':>10} {'p95(ms)':>10} {'mean(ms)':>10}")
+    for name, stats in results.items():
+        print(f"{name:<16} {stats['p50']:>10.3f} {stats['p95']:>10.3f} {stats['mean']:>10.3f}")
+    speedup = results['per_candidate']['p50'] / max(results['batched']['p50'], 1e-9)
+    print(f"batched speedup (p50): {speedup:.1f}x")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="ML batched inference benchmark")
+    parser.add_argument('--candidates', type=int, default=11)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    run(args.candidates, args.rounds)
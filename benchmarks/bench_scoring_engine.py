@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+评分引擎基准：投票与毒药决策
+
+用合成的对局上下文（玩家行为数据、预言家查验、投票历史、ML狼人概率）测量：
+- vote: VoteDecisionMaker.decide（全部候选人打分 + 生成理由）
+- poison: WitchDecisionEngine._calculate_and_decide_poison（全部候选人打分 + 阈值判断）
+
+每种决策报告单次决策的延迟分位数。--save-scores 保存每个上下文的决策结果
+（选中目标、理由、各候选人分数），改动评分代码后用 --check-scores 核对完全一致
+（上下文由种子确定；投票上下文中的整数轮次键经JSON往返会变成字符串，
+decision_replay.py 无法如实重放投票决策点，因此在这里直接对比）。
+
+用法:
+    python benchmarks/bench_scoring_engine.py [--contexts 400] [--candidates 11] [--rounds 3]
+        [--save-scores before_scores.json] [--check-scores before_scores.json]
+        [--baseline before.json] [--json after.json]
+
+另外核对融合计算（同类维度合并为矩阵运算）与逐维度分解在随机权重下一致。
+
+退出码: 0=完成, 1=--check-scores 存在差异或融合核对失败
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+SCORE_EPSILON = 1e-6
+PATTERN_VOTES = ('good', 'wolf', 'abstain', 'first')
+
+
+def make_vote_history(rng: random.Random, days: int, is_wolf: bool) -> List[Dict[str, Any]]:
+    history = []
+    for day in range(1, days + 1):
+        kind = rng.choice(PATTERN_VOTES[:1] * 2 + PATTERN_VOTES if is_wolf else PATTERN_VOTES[1:] * 2 + PATTERN_VOTES)
+        history.append({
+            'round': day,
+            'target': f"No.{rng.randint(1, 12)}",
+            'target_was_good': kind == 'good',
+            'target_was_wolf': kind == 'wolf',
+            'is_abstain': kind == 'abstain',
+            'is_first': kind == 'first' or rng.random() < 0.2,
+        })
+    return history
+
+
+def make_player(rng: random.Random, is_wolf: bool, day: int) -> Dict[str, Any]:
+    """合成一个玩家的行为数据（同时覆盖投票与毒药打分读取的字段）"""
+    suspicious = 0.35 if is_wolf else 0.1
+    injections = rng.randint(1, 3) if rng.random() < suspicious else 0
+    false_quotes = rng.randint(1, 3) if rng.random() < suspicious else 0
+    contradictions = rng.randint(1, 3) if rng.random() < suspicious else 0
+    return {
+        'malicious_injection': injections > 0,
+        'injection_count': injections,
+        'injection_attempts': injections,
+        'false_quotes': false_quotes,
+        'false_quote_count': false_quotes,
+        'contradictions': contradictions,
+        'contradiction_count': contradictions,
+        'logical_speech': rng.random() < (0.3 if is_wolf else 0.5),
+        'helpful_analysis': rng.random() < 0.3,
+        'short_speech': rng.random() < 0.2,
+        'protect_suspicious_count': rng.randint(0, 3) if is_wolf else rng.randint(0, 1),
+        'vote_good_count': rng.randint(0, 4) if is_wolf else rng.randint(0, 1),
+        'claimed_hunter': rng.random() < 0.08,
+        'suspected_wolf_king': is_wolf and rng.random() < 0.2,
+        'killed_at_night': False,
+        'vote_history': make_vote_history(rng, rng.randint(0, day), is_wolf),
+    }
+
+
+def make_context(rng: random.Random, candidate_count: int) -> Dict[str, Any]:
+    """合成一次决策的上下文"""
+    day = rng.randint(1, 6)
+    alive = rng.randint(max(candidate_count, 4), 12)
+    candidates = [f"No.{i}" for i in range(1, candidate_count + 1)]
+    wolves = set(rng.sample(candidates, max(1, candidate_count // 4)))
+    player_data = {c: make_player(rng, c in wolves, day) for c in candidates}
+    seer_checks = {}
+    for c in rng.sample(candidates, rng.randint(0, 2)):
+        seer_checks[c] = 'wolf' if c in wolves else 'good'
+    voting_results = {}
+    for d in range(1, day):
+        out = rng.choice(candidates)
+        voting_results[d] = {'voted_out': out, 'was_wolf': out in wolves, 'was_good': out not in wolves}
+    return {
+        'candidates': candidates,
+        'player_data': player_data,
+        'seer_checks': seer_checks,
+        'trust_scores': {c: rng.uniform(5, 60) if c in wolves else rng.uniform(30, 95) for c in candidates},
+        'ml_wolf_probs': {c: rng.uniform(0.4, 0.95) if c in wolves else rng.uniform(0.05, 0.6)
+                          for c in candidates if rng.random() < 0.8},
+        'game_state': {'current_day': day, 'alive_count': alive},
+        'voting_results': voting_results,
+        'alive_players': alive,
+    }
+
+
+def build_deciders() -> Dict[str, Dict[str, Callable]]:
+    from werewolf.villager.config import VillagerConfig
+    from werewolf.villager.analyzers import TrustScoreCalculator, VotingPatternAnalyzer
+    from werewolf.villager.decision_makers import VoteDecisionMaker
+    from werewolf.witch.config import WitchConfig
+    from werewolf.witch.decision_engine import WitchDecisionEngine
+
+    villager_config = VillagerConfig()
+    vote_maker = VoteDecisionMaker(villager_config, TrustScoreCalculator(villager_config),
+                                   VotingPatternAnalyzer(villager_config))
+    witch_engine = WitchDecisionEngine(WitchConfig(), None)
+    # decide: 一次完整决策；score: 单个候选人的打分（决策点录制/重放的入口）
+    return {
+        'vote': {
+            'decide': lambda candidates, context: vote_maker.decide(candidates, 'No.12', context),
+            'score': vote_maker._calculate_vote_priority,
+        },
+        'poison': {
+            'decide': lambda candidates, context: witch_engine._calculate_and_decide_poison(candidates, context),
+            'score': witch_engine._calculate_poison_score,
+        },
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, float):
+        return float(value)
+    return value
+
+
+def run(args: argparse.Namespace, contexts: List[Dict[str, Any]],
+        deciders: Dict[str, Dict[str, Callable]]) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, decider in deciders.items():
+        timings = []
+        for context in contexts:
+            best = None
+            for _ in range(args.rounds):
+                # 每轮使用新的浅拷贝，避免上一轮写入上下文的内容影响计时
+                ctx = dict(context)
+                start = time.perf_counter()
+                decider['decide'](context['candidates'], ctx)
+                elapsed = (time.perf_counter() - start) * 1e6
+                best = elapsed if best is None else min(best, elapsed)
+            timings.append(best)
+        results[name] = {'p50_us': percentile(timings, 50), 'p95_us': percentile(timings, 95),
+                         'mean_us': sum(timings) / len(timings)}
+    return results
+
+
+def collect_scores(contexts: List[Dict[str, Any]], deciders: Dict[str, Dict[str, Callable]]) -> Dict[str, Any]:
+    """每个上下文的决策结果与逐个候选人打分"""
+    scores: Dict[str, Any] = {}
+    for name, decider in deciders.items():
+        rows = []
+        for context in contexts:
+            candidates = context['candidates']
+            rows.append({
+                'decision': _jsonable(decider['decide'](candidates, dict(context))),
+                'scores': {c: float(decider['score'](c, dict(context))) for c in candidates},
+            })
+        scores[name] = rows
+    return scores
+
+
+def compare_scores(expected: Dict[str, Any], actual: Dict[str, Any], max_diffs: int = 10) -> List[str]:
+    diffs: List[str] = []
+    for name, rows in expected.items():
+        for index, (want, got) in enumerate(zip(rows, actual.get(name, []))):
+            for candidate, score in want['scores'].items():
+                if abs(got['scores'].get(candidate, float('nan')) - score) > SCORE_EPSILON or \
+                        candidate not in got['scores']:
+                    diffs.append(f"{name} #{index} {candidate}: {score} -> {got['scores'].get(candidate)}")
+            if not _same(want['decision'], got['decision']):
+                diffs.append(f"{name} #{index} decision: {want['decision']} -> {got['decision']}")
+    return diffs[:max_diffs] + ([f"... {len(diffs) - max_diffs} more"] if len(diffs) > max_diffs else [])
+
+
+def _same(a: Any, b: Any) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        return isinstance(a, (int, float)) and isinstance(b, (int, float)) and abs(a - b) <= SCORE_EPSILON
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    return a == b
+
+
+def check_fusion(contexts: List[Dict[str, Any]], seed: int) -> List[str]:
+    """融合计算（FeatureCount/Flag维度合并）与逐维度分解在随机权重下结果一致"""
+    import numpy as np
+    from werewolf.optimization.core.scoring_strategy import ADD, MULTIPLY, OVERRIDE
+    from werewolf.witch.config import WitchConfig
+    from werewolf.witch.decision_engine import build_poison_engine
+
+    engine = build_poison_engine(WitchConfig())
+    rng = random.Random(seed)
+    failures = []
+    for index, context in enumerate(contexts):
+        candidates = context['candidates']
+        engine.set_weights({d.name: rng.choice([0.0, 0.5, 1.0, 2.0]) for d in engine.dimensions if d.combine == ADD})
+        got = engine.score_array(engine.context(context, candidates))
+        parts = engine.breakdown(candidates, context)
+        weights = engine.weights
+        want = np.zeros(len(candidates))
+        for dim in engine.dimensions:
+            values = np.array([parts[dim.name][c] for c in candidates])
+            if weights[dim.name] and dim.combine == ADD:
+                want += values
+            elif dim.combine == MULTIPLY:
+                want *= values
+        want = np.clip(want, engine.lower, engine.upper)
+        for dim in engine.dimensions:
+            if dim.combine == OVERRIDE:
+                values = np.array([parts[dim.name][c] for c in candidates])
+                want = np.where(np.isnan(values), want, values)
+        if not np.allclose(got, want):
+            failures.append(f"fusion #{index}: {got.tolist()} != {want.tolist()}")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contexts', type=int, default=400)
+    parser.add_argument('--candidates', type=int, default=11)
+    parser.add_argument('--rounds', type=int, default=3, help='每个上下文重复次数（计时取最小值）')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--save-scores', default='', help='保存决策结果（改动前）')
+    parser.add_argument('--check-scores', default='', help='与保存的决策结果核对（改动后）')
+    parser.add_argument('--baseline', default='')
+    parser.add_argument('--json', default='')
+    parser.add_argument('--log-level', default='CRITICAL')
+    args = parser.parse_args(argv)
+
+    from werewolf.common.structured_logging import configure_logging
+
+    # 先导入角色模块（SDK日志在导入时配置），再统一设置日志级别，避免INFO日志主导计时
+    deciders = build_deciders()
+    configure_logging(level=args.log_level, fmt='text')
+    rng = random.Random(args.seed)
+    contexts = [make_context(rng, args.candidates) for _ in range(args.contexts)]
+
+    exit_code = 0
+    if args.save_scores or args.check_scores:
+        scores = collect_scores(contexts, deciders)
+        if args.save_scores:
+            with open(args.save_scores, 'w', encoding='utf-8') as f:
+                json.dump(scores, f)
+            print(f"Scores for {len(contexts)} contexts written to {args.save_scores}")
+        if args.check_scores:
+            with open(args.check_scores, 'r', encoding='utf-8') as f:
+                diffs = compare_scores(json.load(f), scores)
+            print(f"Score check against {args.check_scores}: {'OK' if not diffs else 'DIFFERENT'}")
+            for diff in diffs:
+                print(f"  {diff}")
+            exit_code = 1 if diffs else 0
+
+    failures = check_fusion(contexts[:100], args.seed)
+    print(f"Fused scoring check: {'OK' if not failures else 'FAILED'}")
+    for failure in failures[:10]:
+        print(f"  {failure}")
+    if failures:
+        exit_code = 1
+
+    results = run(args, contexts, deciders)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print(f"{'decision':<10}{'p50 us':>10}{'p95 us':>10}{'mean us':>10}{'vs base':>10}"
+          f"   ({args.candidates} candidates, {args.contexts} contexts)")
+    for name, row in results.items():
+        base = baseline.get(name, {}).get('p50_us')
+        ratio = f"{base / row['p50_us']:.2f}x" if base else '-'
+        print(f"{name:<10}{row['p50_us']:>10.1f}{row['p95_us']:>10.1f}{row['mean_us']:>10.1f}{ratio:>10}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+验证与配置层基准（werewolf.optimization.models）
+
+测量每次决策的验证开销（单位微秒）：
+- sdk: VoteDecisionInput.from_sdk（SDK边界，完整验证逗号分隔的候选人）
+- trusted: VoteDecisionInput.trusted（内部数据，model_construct快速路径）
+- full: VoteDecisionInput.model_validate 整个上下文（对比：内部数据也完整验证的代价）
+- legacy: DataValidator.validate_player_list（原有的正则校验）
+- config: load_config()（已加载后的访问开销）
+
+并核对行为：非法名字被拒绝、去重与去掉自己、快速路径不复制数据、
+YAML与环境变量的优先级、非法配置退回默认值。
+
+用法:
+    python benchmarks/bench_validation.py [--candidates 11] [--iterations 5000] [--json out.json]
+
+退出码: 0=全部核对通过, 1=存在失败
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from bench_scoring_engine import make_context  # noqa: E402
+
+
+def check_validation() -> List[str]:
+    from werewolf.optimization.models import VoteDecisionInput
+
+    errors = []
+    vote_input = VoteDecisionInput.from_sdk("No.1, No.2,No.2,No.5", "No.5")
+    if vote_input.candidates != ["No.1", "No.2"]:
+        errors.append(f"candidates not normalized: {vote_input.candidates}")
+    for message, my_name in (("No.1,Robert'); DROP", None), ("No.5", "No.5"), ("", None)):
+        try:
+            VoteDecisionInput.from_sdk(message, my_name)
+            errors.append(f"accepted invalid candidates {message!r}")
+        except ValueError:
+            pass
+    if VoteDecisionInput.from_sdk(["No.3", "No.4"], "No.4").candidates != ["No.3"]:
+        errors.append("list choices not accepted")
+
+    context = make_context(random.Random(1), 5)
+    trusted = VoteDecisionInput.trusted(context['candidates'], context)
+    if trusted.player_data is not context['player_data']:
+        errors.append("trusted path copied player_data")
+    if trusted.game_state.current_day != context['game_state']['current_day']:
+        errors.append("trusted game_state wrong")
+    if trusted.player("No.1").injection_attempts != context['player_data']["No.1"]['injection_attempts']:
+        errors.append("trusted player() wrong")
+    return errors
+
+
+def check_config() -> List[str]:
+    from werewolf.optimization.models import OptimizationConfig
+    from werewolf.optimization.config import load_config
+
+    errors = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'optimization.yaml')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("scoring:\n  poison:\n    endgame: 0.5\n    trust: {weight: 2, enabled: false}\n"
+                    "llm:\n  batch_max_size: 4\n  batch_concurrency: 2\n")
+        config = OptimizationConfig.load(path, {'LLM_BATCH_CONCURRENCY': '6', 'CACHE_SHARDS': '4'})
+        if config.scoring.weights('poison') != {'endgame': 0.5, 'trust': 0.0}:
+            errors.append(f"YAML weights wrong: {config.scoring.weights('poison')}")
+        if (config.llm.batch_max_size, config.llm.batch_concurrency, config.cache.shards) != (4, 6, 4):
+            errors.append(f"env did not override YAML: {config.llm} {config.cache}")
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("llm:\n  batch_max_size: 0\n")
+        try:
+            OptimizationConfig.load(path, {})
+            errors.append("out-of-range value accepted")
+        except ValueError:
+            pass
+        previous = os.environ.get('OPTIMIZATION_CONFIG')
+        os.environ['OPTIMIZATION_CONFIG'] = path
+        try:
+            if load_config(reload=True) != OptimizationConfig.load(None, {}):
+                errors.append("invalid config file did not fall back to defaults")
+        finally:
+            if previous is None:
+                os.environ.pop('OPTIMIZATION_CONFIG', None)
+            else:
+                os.environ['OPTIMIZATION_CONFIG'] = previous
+            load_config(reload=True)
+    return errors
+
+
+def measure(fn: Callable[[], Any], iterations: int) -> float:
+    """单次调用的平均耗时（微秒，取3轮最小值）"""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = (time.perf_counter() - start) / iterations * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(args: argparse.Namespace) -> Dict[str, float]:
+    from werewolf.common.utils import DataValidator
+    from werewolf.optimization.models import VoteDecisionInput
+    from werewolf.optimization.config import load_config
+
+    context = make_context(random.Random(args.seed), args.candidates)
+    context['my_name'] = "No.12"
+    candidates = context['candidates']
+    message = ",".join(candidates + ["No.12"])
+    full = {k: context[k] for k in ('player_data', 'trust_scores', 'seer_checks', 'game_state', 'my_name')}
+    full['candidates'] = candidates
+    load_config()
+    return {
+        'sdk': measure(lambda: VoteDecisionInput.from_sdk(message, "No.12"), args.iterations),
+        'trusted': measure(lambda: VoteDecisionInput.trusted(candidates, context), args.iterations),
+        'full': measure(lambda: VoteDecisionInput.model_validate(full), max(1, args.iterations // 10)),
+        'legacy': measure(lambda: DataValidator.validate_player_list(candidates), args.iterations),
+        'config': measure(load_config, args.iterations),
+    }
+
+
+CHECKS: Dict[str, Callable[[], List[str]]] = {
+    'validation': check_validation,
+    'config': check_config,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', type=int, default=11)
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', default='')
+    args = parser.parse_args(argv)
+
+    exit_code = 0
+    for name, check in CHECKS.items():
+        errors = check()
+        print(f"[{'OK' if not errors else 'FAIL'}] {name}")
+        for error in errors:
+            print(f"    {error}")
+        exit_code = exit_code or (1 if errors else 0)
+
+    results = run(args)
+    print(f"{'path':<10}{'us/call':>10}   ({args.candidates} candidates)")
+    for name, value in results.items():
+        print(f"{name:<10}{value:>10.2f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+对局状态检查点开销基准
+
+用模拟器（benchmarks/game_simulator.py）在进程内跑N局，每个请求处理完后
+按线上相同的规则（interact之后、perceive进入新阶段时）调用
+werewolf.core.checkpoints 写入检查点，统计：
+
+- 每次写入的耗时（按阶段分位数）与字节数，每局写入次数与总字节数
+- 检查点耗时占请求处理耗时的比例
+- 恢复耗时：每次写入后把检查点恢复到空白智能体，并核对与在线状态一致
+
+对比两种写入方式：
+- incremental: 全量快照 + 增量帧（CHECKPOINT_COMPACT_EVERY，默认16）
+- full: 每次写入都是全量快照（compact_every=1）
+
+用法:
+    python benchmarks/checkpoint_cost.py [--games 3] [--modes incremental,full]
+        [--compact-every 16] [--fsync] [--json out.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+import game_simulator  # noqa: E402  (设置sys.path)
+
+from werewolf.core.agent_memory import AgentMemory  # noqa: E402
+from werewolf.core.checkpoints import AgentCheckpointer  # noqa: E402
+
+
+class _BlankAgent:
+    """恢复目标（只有memory）"""
+
+    def __init__(self):
+        self.memory = AgentMemory()
+
+
+class CheckpointedGame(game_simulator.GameMaster):
+    """每个请求之后写入检查点的模拟对局"""
+
+    def __init__(self, *args, checkpointer: AgentCheckpointer, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkpointer = checkpointer
+        self.write_ms: Dict[str, List[float]] = defaultdict(list)
+        self.write_bytes: List[int] = []
+        self.request_ms = 0.0
+        self.restore_ms: List[float] = []
+        self.mismatches = 0
+
+    def key(self, seat: game_simulator.Seat) -> str:
+        return f"bench-{self.game_index}-{seat.name}"
+
+    def _call(self, seat, handler, status, name=None, message=None):
+        from agent_build_sdk.model.werewolf_model import AgentReq
+
+        start = time.perf_counter()
+        result = super()._call(seat, handler, status, name=name, message=message)
+        self.request_ms += (time.perf_counter() - start) * 1000.0
+
+        req = AgentReq(status=status, name=name, message=message, role=seat.role, round=self.day)
+        start = time.perf_counter()
+        written = self.checkpointer.after_request(self.key(seat), seat.role, seat.agent, req, handler)
+        if written:
+            self.write_ms[f"{handler}.{status}"].append((time.perf_counter() - start) * 1000.0)
+            self.write_bytes.append(written)
+            self.verify_restore(seat)
+        return result
+
+    def verify_restore(self, seat) -> None:
+        """刚写入的检查点恢复到空白智能体，核对与在线状态一致"""
+        blank = _BlankAgent()
+        start = time.perf_counter()
+        self.checkpointer.restore(self.key(seat), seat.role, blank)
+        self.restore_ms.append((time.perf_counter() - start) * 1000.0)
+        live = seat.agent.memory.memories
+        try:
+            same = blank.memory.memories == live
+        except Exception:
+            same = blank.memory.memories.keys() == live.keys()
+        if not same:
+            self.mismatches += 1
+
+
+def run_mode(mode: str, args: argparse.Namespace, pool: Dict[str, List[Any]], data_dir: str) -> Dict[str, Any]:
+    directory = os.path.join(data_dir, f"checkpoints-{mode}")
+    checkpointer = AgentCheckpointer(directory, max_age=0,
+                                     compact_every=1 if mode == 'full' else args.compact_every,
+                                     fsync=args.fsync)
+    write_ms: Dict[str, List[float]] = defaultdict(list)
+    write_bytes: List[int] = []
+    restore_ms: List[float] = []
+    request_ms = 0.0
+    mismatches = 0
+    for index in range(args.games):
+        game = CheckpointedGame(index, args.seed, args.max_days, agent_pool=pool, checkpointer=checkpointer)
+        game.run()
+        for key, values in game.write_ms.items():
+            write_ms[key].extend(values)
+        write_bytes.extend(game.write_bytes)
+        restore_ms.extend(game.restore_ms)
+        request_ms += game.request_ms
+        mismatches += game.mismatches
+
+    all_ms = [v for values in write_ms.values() for v in values]
+    pct = game_simulator.percentile
+    return {
+        'mode': mode,
+        'games': args.games,
+        'writes': len(all_ms),
+        'writes_per_game': len(all_ms) / max(1, args.games),
+        'write_ms': {'p50': pct(all_ms, 50), 'p95': pct(all_ms, 95), 'max': max(all_ms, default=0.0)},
+        'write_ms_by_phase': {key: {'count': len(v), 'p50': pct(v, 50), 'p95': pct(v, 95)}
+                              for key, v in sorted(write_ms.items())},
+        'bytes_per_write': sum(write_bytes) / max(1, len(write_bytes)),
+        'bytes_per_game': sum(write_bytes) / max(1, args.games),
+        'checkpoint_share': sum(all_ms) / max(1e-9, request_ms),
+        'restore_ms': {'p50': pct(restore_ms, 50), 'p95': pct(restore_ms, 95)},
+        'restore_mismatches': mismatches,
+    }
+
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'mode':<12}{'writes/game':>12}{'p50 ms':>9}{'p95 ms':>9}{'B/write':>10}{'KB/game':>10}"
+             f"{'% of req':>10}{'restore p95':>13}{'mismatch':>10}"]
+    for r in results:
+        lines.append(f"{r['mode']:<12}{r['writes_per_game']:>12.1f}{r['write_ms']['p50']:>9.3f}"
+                     f"{r['write_ms']['p95']:>9.3f}{r['bytes_per_write']:>10.0f}{r['bytes_per_game'] / 1024:>10.1f}"
+                     f"{r['checkpoint_share'] * 100:>9.2f}%{r['restore_ms']['p95']:>11.2f}ms{r['restore_mismatches']:>10}")
+    for r in results:
+        lines += ['', f"{r['mode']} write latency by phase (ms):"]
+        for key, row in r['write_ms_by_phase'].items():
+            lines.append(f"  {key:<32}{row['count']:>6}  p50 {row['p50']:.3f}  p95 {row['p95']:.3f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=3)
+    parser.add_argument('--modes', default='incremental,full')
+    parser.add_argument('--compact-every', type=int, default=16)
+    parser.add_argument('--fsync', action='store_true')
+    parser.add_argument('--max-days', type=int, default=15)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default='')
+    parser.add_argument('--log-level', default='CRITICAL')
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix='werewolf-checkpoint-')
+    os.environ['DATA_DIR'] = data_dir
+    os.environ.setdefault('ML_MODEL_DIR', os.path.join(data_dir, 'ml_models'))
+    os.environ.setdefault('MODEL_NAME', 'deepseek-chat')
+    os.environ['MEMORY_PROFILE'] = 'off'
+
+    from fake_llm_server import FakeLLMConfig, FakeLLMServer
+    from werewolf.common.structured_logging import configure_logging
+
+    server = FakeLLMServer(FakeLLMConfig(port=0, mode='synth', seed=args.seed)).start()
+    os.environ.update(server.client_env())
+    configure_logging(level=args.log_level, fmt='text')
+
+    results = []
+    try:
+        pool = game_simulator.build_agent_pool()
+        for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+            result = run_mode(mode, args, pool, data_dir)
+            results.append(result)
+            print(f"{mode}: {result['writes']} writes, p95 {result['write_ms']['p95']:.3f}ms, "
+                  f"{result['bytes_per_game'] / 1024:.1f}KB/game", flush=True)
+    finally:
+        server.stop()
+
+    print()
+    print(format_report(results))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 1 if any(r['restore_mismatches'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+冷启动基准（部署形态的HTTP服务）
+
+以线上相同方式启动 werewolf/app.py（LLM指向进程内桩服务），测量：
+
+- 冷启动时间：进程启动到 /agent/checkHealth 返回200
+- 空闲RSS：健康后静置 --settle 秒的进程RSS
+- 各角色首个请求延迟：依次向七种角色发送 perceive(STATUS_START)，
+  懒加载时包含该角色智能体的构建耗时
+- 首个请求后的RSS
+
+每种模式重复 --runs 次取中位数，对比 ROLE_AGENT_LAZY=false（启动时构建全部角色）
+与 ROLE_AGENT_LAZY=true（首个请求时构建），可选加上 ROLE_AGENT_PREWARM。
+
+用法:
+    python benchmarks/cold_start.py [--modes eager,lazy,lazy+prewarm] [--runs 3] [--settle 3] [--json out.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+from load_test import SERVICE_PORT, AgentClient, ProcessSampler, launch_service  # noqa: E402
+
+ROLES = ['villager', 'wolf', 'seer', 'witch', 'guard', 'hunter', 'wolf_king']
+
+MODES = {
+    'eager': {'ROLE_AGENT_LAZY': 'false', 'ROLE_AGENT_PREWARM': ''},
+    'lazy': {'ROLE_AGENT_LAZY': 'true', 'ROLE_AGENT_PREWARM': ''},
+    'lazy+prewarm': {'ROLE_AGENT_LAZY': 'true', 'ROLE_AGENT_PREWARM': 'all'},
+}
+
+
+def measure_once(mode_env: Dict[str, str], base_env: Dict[str, str], settle: float,
+                 timeout: float) -> Dict[str, Any]:
+    """启动一次服务并测量，结束后终止进程"""
+    target = f"http://127.0.0.1:{SERVICE_PORT}"
+    env = dict(base_env)
+    env.update(mode_env)
+    log_path = os.path.join(env['DATA_DIR'], f"service-{int(time.time() * 1000)}.log")
+    started = time.perf_counter()
+    process = launch_service(env, log_path)
+    client = AgentClient(target, 5.0)
+    try:
+        healthy_at = None
+        deadline = started + timeout
+        while time.perf_counter() < deadline and process.poll() is None:
+            try:
+                status, _ = client.post('/agent/checkHealth', {})
+                if status == 200:
+                    healthy_at = time.perf_counter()
+                    break
+            except Exception:
+                client.close()
+            time.sleep(0.05)
+        if healthy_at is None:
+            raise RuntimeError(f"service did not become healthy, see {log_path}")
+
+        sampler = ProcessSampler(process.pid)
+        time.sleep(settle)
+        idle_rss = sampler.rss_mb()
+
+        client.timeout = 120.0
+        client.close()
+        first_request_ms = {}
+        for index, role in enumerate(ROLES):
+            req = {'status': 'start', 'name': f"No.{index + 1}", 'message': '', 'role': role, 'round': 0}
+            t0 = time.perf_counter()
+            client.post('/agent/perceive', req)
+            first_request_ms[role] = (time.perf_counter() - t0) * 1000.0
+        return {
+            'cold_start_s': healthy_at - started,
+            'idle_rss_mb': idle_rss,
+            'first_request_ms': first_request_ms,
+            'rss_after_requests_mb': sampler.rss_mb(),
+        }
+    finally:
+        client.close()
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except Exception:
+            process.kill()
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    median = lambda key: round(statistics.median(r[key] for r in runs), 2)  # noqa: E731
+    return {
+        'runs': len(runs),
+        'cold_start_s': median('cold_start_s'),
+        'idle_rss_mb': median('idle_rss_mb'),
+        'rss_after_requests_mb': median('rss_after_requests_mb'),
+        'first_request_ms': {
+            role: round(statistics.median(r['first_request_ms'][role] for r in runs), 1) for role in ROLES
+        },
+    }
+
+
+def format_report(results: Dict[str, Dict[str, Any]]) -> str:
+    lines = [f"{'mode':<14}{'cold start':>12}{'idle RSS':>11}{'RSS after':>11}  first request per role (ms)"]
+    for mode, row in results.items():
+        firsts = ' '.join(f"{role}={ms:.0f}" for role, ms in row['first_request_ms'].items())
+        lines.append(f"{mode:<14}{row['cold_start_s']:>11.2f}s{row['idle_rss_mb']:>9.0f}MB"
+                     f"{row['rss_after_requests_mb']:>9.0f}MB  {firsts}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='eager,lazy,lazy+prewarm')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--settle', type=float, default=3.0, help='健康后静置多久再采样空闲RSS（秒）')
+    parser.add_argument('--timeout', type=float, default=180.0)
+    parser.add_argument('--json', default='')
+    args = parser.parse_args(argv)
+
+    from fake_llm_server import FakeLLMConfig, FakeLLMServer
+    server = FakeLLMServer(FakeLLMConfig(port=0, mode='synth')).start()
+    data_dir = tempfile.mkdtemp(prefix='werewolf-cold-')
+    base_env = dict(server.client_env())
+    base_env.update({'DATA_DIR': data_dir, 'ML_MODEL_DIR': os.path.join(data_dir, 'ml_models'),
+                     'MODEL_NAME': os.getenv('MODEL_NAME', 'deepseek-chat'),
+                     'METRICS_PORT': '0', 'METRICS_FILE': ''})
+
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+            runs = []
+            for run in range(args.runs):
+                result = measure_once(MODES[mode], base_env, args.settle, args.timeout)
+                runs.append(result)
+                print(f"{mode} run {run + 1}: cold start {result['cold_start_s']:.2f}s, "
+                      f"idle RSS {result['idle_rss_mb']:.0f}MB", flush=True)
+            results[mode] = summarize(runs)
+    finally:
+        server.stop()
+
+    print()
+    print(format_report(results))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+决策点重放回归
+
+用 werewolf.common.decision_recorder 录制的决策点（女巫毒药分数、守卫优先级、
+投票优先级）重放当前代码：逐条调用打分函数，对比分数和每次决策选中的目标，
+并对每次调用计时，报告行为差异与延迟变化。
+
+同一局、同一决策点、同一上下文下的各候选人调用视为一次决策，选中目标取
+分数最高者（并列取先出现者，与 max()/稳定排序一致）。
+
+用法:
+    # 录制：跑模拟器对局（参数透传给 game_simulator.py），多进程时路径中用{pid}
+    python benchmarks/decision_replay.py record --out decisions.jsonl.gz -- --games 50 --parallel 4
+
+    # 线上录制：DECISION_RECORD_FILE=/data/decisions-{pid}.jsonl.gz python werewolf/app.py
+
+    # 重放：改动打分代码后运行；--baseline 传入改动前的重放报告以得到同机延迟对比
+    python benchmarks/decision_replay.py replay decisions.jsonl.gz [更多文件...]
+        [--only guard.priority] [--repeat 3] [--baseline before.json] [--json after.json]
+        [--max-diffs 20] [--fail-on-diff]
+
+退出码: 0=完成（或无目标变化）, 1=--fail-on-diff 且存在目标变化
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+for _path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'werewolf'), BENCH_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from werewolf.common import decision_recorder  # noqa: E402
+
+SCORE_EPSILON = 1e-6
+
+
+def _witch_engine(config):
+    from werewolf.witch.decision_engine import WitchDecisionEngine
+    return WitchDecisionEngine(config, None)
+
+
+def _guard_calculator(config):
+    from werewolf.guard.analyzers import GuardPriorityCalculator
+    return GuardPriorityCalculator(config)
+
+
+def _vote_decision_maker(config):
+    from werewolf.villager.analyzers import TrustScoreCalculator, VotingPatternAnalyzer
+    from werewolf.villager.decision_makers import VoteDecisionMaker
+    return VoteDecisionMaker(config, TrustScoreCalculator(config), VotingPatternAnalyzer(config))
+
+
+# 决策点 -> (方法名, 由配置构建调用方实例的工厂)
+REPLAY_POINTS: Dict[str, Tuple[str, Callable[[Any], Any]]] = {
+    'witch.poison_score': ('_calculate_poison_score', _witch_engine),
+    'guard.priority': ('calculate', _guard_calculator),
+    'vote.priority': ('_calculate_vote_priority', _vote_decision_maker),
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _as_score(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _pick(scores: List[Tuple[str, Optional[float]]]) -> Optional[str]:
+    """分数最高者（并列取先出现者）"""
+    best, best_score = None, None
+    for subject, score in scores:
+        if score is not None and (best_score is None or score > best_score):
+            best, best_score = subject, score
+    return best
+
+
+class Replayer:
+    """
+    重放器：为每种（决策点, 配置类）缓存一个调用方实例，逐条重放并计时
+
+    Args:
+        repeat: 每条调用重复次数（计时取最小值）
+        max_diffs: 报告中保留的差异样例数
+    """
+
+    def __init__(self, repeat: int = 1, max_diffs: int = 20):
+        self.repeat = max(1, repeat)
+        self.max_diffs = max_diffs
+        self._owners: Dict[Tuple[str, str], Any] = {}
+        self._configs: Dict[str, Any] = {}
+        self.stats: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
+            'calls': 0, 'errors': 0, 'score_changes': 0, 'max_score_delta': 0.0,
+            'recorded_us': [], 'replay_us': [],
+        })
+        # (point, game_id, role, context_key) -> [(subject, recorded, replayed)]
+        self.decisions: 'OrderedDict[Tuple[str, str, str, str], List[Tuple[str, Any, Any]]]' = OrderedDict()
+        self.score_diffs: List[Dict[str, Any]] = []
+        self.error_samples: List[str] = []
+
+    def _config(self, path: str) -> Any:
+        if path not in self._configs:
+            self._configs[path] = decision_recorder.import_class(path)() if path else None
+        return self._configs[path]
+
+    def _owner(self, point: str, config_path: str) -> Any:
+        key = (point, config_path)
+        if key not in self._owners:
+            _, factory = REPLAY_POINTS[point]
+            self._owners[key] = factory(self._config(config_path))
+        return self._owners[key]
+
+    def replay(self, record: Dict[str, Any]) -> None:
+        point = record['point']
+        stats = self.stats[point]
+        stats['calls'] += 1
+        stats['recorded_us'].append(record.get('elapsed_us', 0.0))
+        subject = record['subject']
+        replayed = None
+        try:
+            owner = self._owner(point, record.get('config', ''))
+            method = getattr(owner, REPLAY_POINTS[point][0])
+            best_ns = None
+            for _ in range(self.repeat):
+                # 每次重放使用新解码的上下文，防止打分函数修改上下文影响下一次
+                context = decision_recorder.decode(record['context'], owner.config)
+                started = time.perf_counter_ns()
+                replayed = method(subject, context)
+                elapsed = time.perf_counter_ns() - started
+                best_ns = elapsed if best_ns is None else min(best_ns, elapsed)
+            stats['replay_us'].append(best_ns / 1000.0)
+        except Exception as e:
+            stats['errors'] += 1
+            if len(self.error_samples) < self.max_diffs:
+                self.error_samples.append(f"{point} {subject}: {type(e).__name__}: {e}")
+
+        recorded_score, replayed_score = _as_score(record.get('result')), _as_score(replayed)
+        if recorded_score is not None and replayed_score is not None:
+            delta = abs(replayed_score - recorded_score)
+            stats['max_score_delta'] = max(stats['max_score_delta'], delta)
+            if delta > SCORE_EPSILON:
+                stats['score_changes'] += 1
+                if len(self.score_diffs) < self.max_diffs:
+                    self.score_diffs.append({
+                        'point': point, 'game_id': record.get('game_id', ''), 'subject': subject,
+                        'recorded': recorded_score, 'replayed': replayed_score,
+                    })
+
+        key = (point, record.get('game_id', ''), record.get('role', ''), record.get('context_key', ''))
+        self.decisions.setdefault(key, []).append((subject, recorded_score, replayed_score))
+
+    def report(self) -> Dict[str, Any]:
+        """汇总：每个决策点的调用数、分数/目标变化与耗时分位数"""
+        points: Dict[str, Dict[str, Any]] = {}
+        target_diffs: List[Dict[str, Any]] = []
+        decision_counts: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        for (point, game_id, role, _), calls in self.decisions.items():
+            seen = OrderedDict()
+            for subject, recorded, replayed in calls:
+                seen.setdefault(subject, (recorded, replayed))
+            before = _pick([(s, r) for s, (r, _) in seen.items()])
+            after = _pick([(s, r) for s, (_, r) in seen.items()])
+            decision_counts[point][0] += 1
+            if before != after:
+                decision_counts[point][1] += 1
+                if len(target_diffs) < self.max_diffs:
+                    target_diffs.append({
+                        'point': point, 'game_id': game_id, 'role': role,
+                        'candidates': list(seen), 'recorded_target': before, 'replayed_target': after,
+                    })
+
+        for point, stats in sorted(self.stats.items()):
+            decisions, changed = decision_counts[point]
+            points[point] = {
+                'calls': stats['calls'],
+                'errors': stats['errors'],
+                'score_changes': stats['score_changes'],
+                'max_score_delta': round(stats['max_score_delta'], 4),
+                'decisions': decisions,
+                'target_changes': changed,
+                'recorded_p50_us': round(percentile(stats['recorded_us'], 50), 2),
+                'recorded_p95_us': round(percentile(stats['recorded_us'], 95), 2),
+                'replay_p50_us': round(percentile(stats['replay_us'], 50), 2),
+                'replay_p95_us': round(percentile(stats['replay_us'], 95), 2),
+                'replay_mean_us': round(sum(stats['replay_us']) / len(stats['replay_us']), 2)
+                if stats['replay_us'] else 0.0,
+            }
+        return {
+            'points': points,
+            'target_diffs': target_diffs,
+            'score_diffs': self.score_diffs,
+            'error_samples': self.error_samples,
+        }
+
+
+def attach_baseline(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """把基线重放报告的耗时并入（同机同数据的前后对比）"""
+    for point, row in report['points'].items():
+        base = baseline.get('points', {}).get(point)
+        if not base:
+            continue
+        for key in ('replay_p50_us', 'replay_p95_us'):
+            row[f'baseline_{key}'] = base.get(key, 0.0)
+            row[f'{key}_delta_pct'] = round((row[key] / base[key] - 1.0) * 100.0, 1) if base.get(key) else 0.0
+        row['baseline_target_changes'] = base.get('target_changes', 0)
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{'point':<22}{'calls':>8}{'decisions':>11}{'score Δ':>9}{'target Δ':>10}{'errors':>8}"
+        f"{'rec p50':>10}{'p50 us':>9}{'p95 us':>9}{'vs base':>10}",
+    ]
+    for point, row in report['points'].items():
+        delta = f"{row['replay_p50_us_delta_pct']:+.1f}%" if 'replay_p50_us_delta_pct' in row else '-'
+        lines.append(
+            f"{point:<22}{row['calls']:>8}{row['decisions']:>11}{row['score_changes']:>9}"
+            f"{row['target_changes']:>10}{row['errors']:>8}{row['recorded_p50_us']:>10.1f}"
+            f"{row['replay_p50_us']:>9.1f}{row['replay_p95_us']:>9.1f}{delta:>10}"
+        )
+    if report['target_diffs']:
+        lines.append("")
+        lines.append("Changed targets:")
+        for diff in report['target_diffs']:
+            lines.append(f"  {diff['point']} [{diff['game_id']}/{diff['role']}] "
+                         f"{diff['recorded_target']} -> {diff['replayed_target']} (of {', '.join(diff['candidates'])})")
+    if report['score_diffs']:
+        lines.append("")
+        lines.append("Changed scores:")
+        for diff in report['score_diffs']:
+            lines.append(f"  {diff['point']} [{diff['game_id']}] {diff['subject']}: "
+                         f"{diff['recorded']:.2f} -> {diff['replayed']:.2f}")
+    if report['error_samples']:
+        lines.append("")
+        lines.append("Errors:")
+        lines.extend(f"  {sample}" for sample in report['error_samples'])
+    return "\n".join(lines)
+
+
+def cmd_record(args: argparse.Namespace) -> int:
+    import game_simulator
+
+    os.environ['DECISION_RECORD_FILE'] = args.out
+    recorder = decision_recorder.configure(args.out, args.max_records)
+    simulator_args = [a for a in args.simulator_args if a != '--']
+    try:
+        game_simulator.main(simulator_args)
+    finally:
+        recorder.close()
+    print(f"\nRecorded {recorder.records_written} decision calls to {recorder.path}"
+          f"{f' ({recorder.records_dropped} dropped)' if recorder.records_dropped else ''}")
+    return 0
+
+
+def cmd_replay(args: argparse.Namespace) -> int:
+    from werewolf.common.structured_logging import configure_logging
+
+    # 打分函数逐条写INFO日志，重放时关闭以免计时被日志主导
+    configure_logging(level=args.log_level, fmt='text')
+    decision_recorder.configure('')
+
+    replayer = Replayer(repeat=args.repeat, max_diffs=args.max_diffs)
+    skipped = 0
+    started = time.perf_counter()
+    for path in args.files:
+        for record in decision_recorder.read_records(path):
+            if record['point'] not in REPLAY_POINTS or (args.only and record['point'] not in args.only):
+                skipped += 1
+                continue
+            replayer.replay(record)
+    report = replayer.report()
+    report['files'] = args.files
+    report['skipped'] = skipped
+    report['wall_seconds'] = round(time.perf_counter() - started, 2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            attach_baseline(report, json.load(f))
+
+    print(format_report(report))
+    print(f"\nReplayed in {report['wall_seconds']}s ({skipped} records skipped)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.json}")
+
+    changed = sum(row['target_changes'] for row in report['points'].values())
+    return 1 if args.fail_on_diff and changed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    record = sub.add_parser('record', help='跑模拟器对局并录制决策点')
+    record.add_argument('--out', default='decisions.jsonl.gz')
+    record.add_argument('--max-records', type=int, default=1000000)
+    record.add_argument('simulator_args', nargs=argparse.REMAINDER, help='透传给 game_simulator.py 的参数')
+    record.set_defaults(func=cmd_record)
+
+    replay = sub.add_parser('replay', help='用当前代码重放录制的决策点')
+    replay.add_argument('files', nargs='+')
+    replay.add_argument('--only', nargs='*', default=[], help='只重放指定决策点')
+    replay.add_argument('--repeat', type=int, default=3, help='每条调用重复次数（计时取最小值）')
+    replay.add_argument('--baseline', default='', help='改动前的重放报告（JSON）')
+    replay.add_argument('--json', default='')
+    replay.add_argument('--max-diffs', type=int, default=20)
+    replay.add_argument('--fail-on-diff', action='store_true', help='存在目标变化时退出码为1')
+    replay.add_argument('--log-level', default='CRITICAL')
+    replay.set_defaults(func=cmd_replay)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+增量学习离线评估
+
+在带概念漂移的合成对局流上做前序评估（prequential：先用当前模型预测
+新一局，再用该局训练），对比：
+- full:        每N局在全部历史上全量重训练（线性时间衰减权重，原实现）
+- incremental: 每局 partial_fit（新样本 + 回放缓冲区指数衰减采样）
+
+输出每个窗口的准确率与累计训练耗时
+
+--deploy-check: 模拟已有全量模型与 collected_data.json 的部署切换到增量模式，
+通过 IncrementalLearningSystem 逐局更新，确认准确率不因切换而退化
+（回放缓冲区由历史数据填充，增量模型样本数达到下限前全量模型继续服务）
+
+用法:
+    python benchmarks/eval_incremental_learning.py [--games 300] [--interval 10]
+    python benchmarks/eval_incremental_learning.py --deploy-check
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+from typing import Any, Dict, List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np
+
+from ml_enhanced.ensemble_detector import WolfDetectionEnsemble
+from ml_enhanced.feature_extractor import StandardFeatureExtractor
+from ml_enhanced.replay_buffer import ReservoirReplayBuffer
+
+PLAYERS_PER_GAME = 12
+WOLVES_PER_GAME = 4
+
+# --deploy-check 使用的固定漂移程度（狼人信号较弱，准确率明显低于1）
+DEPLOY_DRIFT = 0.6
+
+
+def make_game(rng: random.Random, drift: float) -> Tuple[np.ndarray, np.ndarray]:
+    """生成一局合成数据的特征矩阵与标签（见 make_game_rows）"""
+    rows, labels = make_game_rows(rng, drift)
+    return StandardFeatureExtractor.extract_batch(rows), np.array(labels)
+
+
+def make_game_rows(rng: random.Random, drift: float) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    生成一局合成数据（玩家特征字典）
+
+    drift从0到1：狼人逐渐学会伪装（信任分、投票准确率向好人靠拢，
+    攻击性信号减弱，而夜晚存活率信号增强）
+    """
+    rows, labels = [], []
+    wolves = set(rng.sample(range(PLAYERS_PER_GAME), WOLVES_PER_GAME))
+    for i in range(PLAYERS_PER_GAME):
+        is_wolf = i in wolves
+        signal = (1.0 - drift) if is_wolf else 0.0
+        late_signal = drift if is_wolf else 0.0
+        rows.append({
+            'trust_score': rng.gauss(65 - 30 * signal, 12),
+            'vote_accuracy': rng.gauss(0.6 - 0.25 * signal, 0.12),
+            'contradiction_count': max(0, int(rng.gauss(1 + 2 * signal, 1))),
+            'injection_attempts': int(rng.random() < 0.3 * signal),
+            'false_quotation_count': int(rng.random() < 0.4 * signal),
+            'speech_lengths': [rng.randint(40, 300) for _ in range(3)],
+            'voting_speed_avg': rng.uniform(1, 8),
+            'vote_targets': ['x'] * rng.randint(1, 4),
+            'mentions_others_count': rng.randint(0, 20),
+            'mentioned_by_others_count': rng.randint(0, 10),
+            'aggressive_score': rng.gauss(0.4 + 0.3 * signal, 0.15),
+            'defensive_score': rng.gauss(0.4 + 0.2 * signal, 0.15),
+            'emotion_keyword_count': rng.randint(0, 15),
+            'logic_keyword_count': rng.randint(0, 10),
+            'night_survival_rate': rng.gauss(0.5 + 0.4 * late_signal, 0.12),
+            'alliance_strength': rng.gauss(0.5 + 0.3 * late_signal, 0.15),
+            'isolation_score': rng.uniform(0, 1),
+            'speech_consistency_score': rng.gauss(0.6 - 0.2 * signal, 0.12),
+            'avg_response_time': rng.uniform(1, 8),
+        })
+        labels.append(int(is_wolf))
+    return rows, labels
+
+
+def accuracy(model: WolfDetectionEnsemble, X: np.ndarray, y: np.ndarray) -> float:
+    """按每局狼人数取概率最高的前4名作为预测狼人"""
+    probs = model.predict_wolf_probabilities(X)
+    predicted = np.zeros_like(y)
+    predicted[np.argsort(-probs)[:WOLVES_PER_GAME]] = 1
+    return float((predicted == y).mean())
+
+
+def run(games: int = 300, interval: int = 10, window: int = 50, seed: int = 3) -> Dict[str, Dict]:
+    """执行评估并返回各策略的窗口准确率与训练耗时"""
+    rng = random.Random(seed)
+    stream = [make_game(rng, drift=g / max(1, games - 1)) for g in range(games)]
+
+    full = WolfDetectionEnsemble(weights={'rf': 0.5, 'gb': 0.5})
+    incremental = WolfDetectionEnsemble()
+    buffer = ReservoirReplayBuffer(capacity=2000, decay_rate=0.05, seed=seed)
+
+    history_X: List[np.ndarray] = []
+    history_y: List[np.ndarray] = []
+    results = {
+        'full': {'acc': [], 'train_s': 0.0, 'max_update_ms': 0.0},
+        'incremental': {'acc': [], 'train_s': 0.0, 'max_update_ms': 0.0},
+    }
+
+    for g, (X, y) in enumerate(stream):
+        # 1. 先预测（模型尚未见过这一局）
+        if full.is_trained:
+            results['full']['acc'].append(accuracy(full, X, y))
+        if incremental.is_trained:
+            results['incremental']['acc'].append(accuracy(incremental, X, y))
+
+        # 2. 全量模式：每interval局在全部历史上重训练
+        history_X.append(X)
+        history_y.append(y)
+        if (g + 1) % interval == 0:
+            all_X, all_y = np.vstack(history_X), np.concatenate(history_y)
+            weights = 0.5 + 0.5 * np.linspace(0, 1, len(all_y))
+            start = time.perf_counter()
+            full.train(all_X, all_y, sample_weights=weights)
+            elapsed = time.perf_counter() - start
+            results['full']['train_s'] += elapsed
+            results['full']['max_update_ms'] = max(results['full']['max_update_ms'], elapsed * 1000)
+
+        # 3. 增量模式：每局新样本 + 回放采样
+        replay_X, replay_y, replay_w = buffer.sample(64)
+        start = time.perf_counter()
+        incremental.partial_fit(
+            np.vstack([X, replay_X]),
+            np.concatenate([y, replay_y]),
+            sample_weights=np.concatenate([np.ones(len(y)), replay_w]),
+        )
+        elapsed = time.perf_counter() - start
+        buffer.add_game(X, y)
+        results['incremental']['train_s'] += elapsed
+        results['incremental']['max_update_ms'] = max(results['incremental']['max_update_ms'], elapsed * 1000)
+
+    print("=" * 72)
+    print(f"Prequential accuracy ({games} games, full refit every {interval}, window={window})")
+    print("=" * 72)
+    print(f"{'window':<14} {'full':>10} {'incremental':>12} {'drift(inc-full)':>16}")
+    full_acc = results['full']['acc']
+    inc_acc = results['incremental']['acc']
+    # 对齐：全量模式首个interval局无模型
+    offset = len(inc_acc) - len(full_acc)
+    for start in range(0, len(full_acc), window):
+        f = np.mean(full_acc[start:start + window])
+        i = np.mean(inc_acc[start + offset:start + offset + window])
+        label = f"{start + interval}-{min(start + interval + window, games)}"
+        print(f"{label:<14} {f:>10.3f} {i:>12.3f} {i - f:>+16.3f}")
+    print("-" * 72)
+    for name, stats in results.items():
+        print(
+            f"{name:<12} mean_acc={np.mean(stats['acc']):.3f} "
+            f"total_train={stats['train_s']:.2f}s max_update={stats['max_update_ms']:.1f}ms"
+        )
+    return results
+
+
+def deploy_check(history_games: int = 60, new_games: int = 60, seed: int = 5,
+                 max_drop: float = 0.05) -> bool:
+    """
+    已有全量模型的部署切换到增量模式：每局结束后在留出集上的准确率不应明显低于全量模型
+
+    Returns:
+        bool: 是否通过
+    """
+    rng = random.Random(seed)
+    data_dir = tempfile.mkdtemp(prefix='werewolf-incremental-')
+    os.environ['DATA_DIR'] = data_dir
+    os.environ['ML_MODEL_DIR'] = os.path.join(data_dir, 'ml_models')
+
+    from werewolf.ml_agent import LightweightMLAgent
+    from werewolf.incremental_learning import IncrementalLearningSystem
+
+    def players(game_id: str, rows: List[Dict[str, Any]], labels: List[int]) -> List[Dict[str, Any]]:
+        return [{'name': f"No.{i + 1}", 'role': 'wolf' if label else 'villager', 'data': row}
+                for i, (row, label) in enumerate(zip(rows, labels))]
+
+    # 部署前：全量模型 + collected_data.json
+    collected, all_rows, all_labels = [], [], []
+    for g in range(history_games):
+        rows, labels = make_game_rows(rng, drift=DEPLOY_DRIFT)
+        all_rows += rows
+        all_labels += labels
+        collected += [{'game_id': f"history-{g}", 'player_name': p['name'], 'role': p['role'], 'data': p['data']}
+                      for p in players(f"history-{g}", rows, labels)]
+    with open(os.path.join(data_dir, 'collected_data.json'), 'w', encoding='utf-8') as f:
+        json.dump({'game_count': history_games, 'data': collected}, f)
+
+    holdout = [make_game(rng, drift=DEPLOY_DRIFT) for _ in range(40)]
+
+    def holdout_accuracy(model: WolfDetectionEnsemble) -> float:
+        return float(np.mean([accuracy(model, X, y) for X, y in holdout]))
+
+    agent = LightweightMLAgent()
+    agent.ensemble.train(all_rows, all_labels)
+    baseline = holdout_accuracy(agent.ensemble)
+
+    system = IncrementalLearningSystem(agent, retrain_interval=10, incremental=True)
+    print(f"full model holdout acc={baseline:.3f}, replay buffer seeded with {len(system.replay_buffer)} samples")
+    worst = baseline
+    for g in range(new_games):
+        rows, labels = make_game_rows(rng, drift=DEPLOY_DRIFT)
+        system.on_game_end(f"new-{g}", players(f"new-{g}", rows, labels))
+        acc = holdout_accuracy(agent.ensemble)
+        worst = min(worst, acc)
+        if g in (0, 1, new_games - 1) or agent.ensemble.mode == 'incremental' and g < 3:
+            print(f"after game {g + 1:>3}: mode={agent.ensemble.mode:<11} "
+                  f"incremental_samples={getattr(agent.ensemble, 'incremental_samples', '-'):<5} holdout acc={acc:.3f}")
+
+    passed = worst >= baseline - max_drop and agent.ensemble.mode == 'incremental'
+    print(f"worst holdout acc={worst:.3f} (allowed {baseline - max_drop:.3f}) -> {'OK' if passed else 'FAIL'}")
+    return passed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Incremental vs full-refit offline evaluation")
+    parser.add_argument('--games', type=int, default=300)
+    parser.add_argument('--interval', type=int, default=10)
+    parser.add_argument('--window', type=int, default=50)
+    parser.add_argument('--deploy-check', action='store_true', help='检查已有全量模型的部署切换到增量模式')
+    args = parser.parse_args()
+    if args.deploy_check:
+        logging.basicConfig(level=logging.WARNING)
+        sys.exit(0 if deploy_check() else 1)
+    run(args.games, args.interval, args.window)
@@ -0,0 +1,571 @@
+# -*- coding: utf-8 -*-
+"""
+本地OpenAI兼容LLM桩服务（/v1/chat/completions）
+
+让依赖DeepSeek端点的热路径可以离线、可复现地做延迟/吞吐基准测试。
+
+- 回放：按请求消息哈希（sha256(model + messages)）回放录制的请求→响应对
+- 录制：--mode record 时把请求转发到真实上游并写入磁带文件（JSONL）
+- 合成：未命中时根据提示词中声明的JSON模板合成字段齐全的检测器JSON
+  （true/false、0.0-1.0范围、"A/B/C"枚举、"No.X"玩家、列表与嵌套对象），
+  没有JSON模板的提示词（发言/投票）返回提及提示词中某个玩家的文本；
+  同一提示词总是得到同一响应
+- 故障注入：延迟分布（fixed/uniform/normal/lognormal）、429比例、超时比例
+- 支持 stream=true（SSE分块，stream_options.include_usage时附带usage）
+
+智能体通过环境变量指向本服务（启动时会打印）:
+    OPENAI_BASE_URL / BASE_URL / DETECTION_BASE_URL = http://127.0.0.1:8765/v1
+
+用法:
+    python benchmarks/fake_llm_server.py [--port 8765] [--mode replay|record|synth]
+        [--cassette benchmarks/cassettes/llm.jsonl] [--latency lognormal:600,0.5]
+        [--rate-429 0.02] [--rate-timeout 0.01] [--timeout-seconds 30] [--seed 0]
+
+    进程内使用:
+        from fake_llm_server import FakeLLMConfig, FakeLLMServer
+        server = FakeLLMServer(FakeLLMConfig(latency='fixed:50')).start()
+        os.environ.update(server.client_env())
+        ...
+        server.stop()
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# ==================== 配置 ====================
+
+@dataclass
+class FakeLLMConfig:
+    """
+    桩服务配置
+
+    Attributes:
+        host / port: 监听地址（port=0 表示随机端口）
+        mode: replay（命中回放，未命中合成）/ record（转发上游并录制）/ synth（总是合成）
+        cassette: 磁带文件路径（JSONL，为空=不持久化）
+        strict: replay模式下未命中时返回404而不是合成
+        latency: 延迟分布，fixed:ms / uniform:lo,hi / normal:mean,std / lognormal:median,sigma
+        rate_429: 返回429的比例
+        rate_timeout: 挂起到timeout_seconds后断开连接的比例
+        timeout_seconds: 超时注入时挂起的秒数
+        upstream / upstream_key: record模式的上游地址和密钥
+        seed: 随机种子（故障注入与延迟采样）
+    """
+    host: str = '127.0.0.1'
+    port: int = 8765
+    mode: str = 'replay'
+    cassette: str = ''
+    strict: bool = False
+    latency: str = 'fixed:0'
+    rate_429: float = 0.0
+    rate_timeout: float = 0.0
+    timeout_seconds: float = 30.0
+    upstream: str = field(default_factory=lambda: os.getenv('FAKE_LLM_UPSTREAM', 'https://api.deepseek.com/v1'))
+    upstream_key: str = field(default_factory=lambda: os.getenv('FAKE_LLM_UPSTREAM_KEY', os.getenv('OPENAI_API_KEY', '')))
+    seed: int = 0
+
+
+def parse_latency(spec: str):
+    """
+    解析延迟分布
+
+    Args:
+        spec: fixed:ms / uniform:lo,hi / normal:mean,std / lognormal:median,sigma（单位毫秒）
+
+    Returns:
+        sampler(rng) -> 秒
+    """
+    kind, _, args = (spec or 'fixed:0').partition(':')
+    values = [float(v) for v in args.split(',') if v.strip()] or [0.0]
+    kind = kind.strip().lower()
+    if kind == 'fixed':
+        return lambda rng: values[0] / 1000.0
+    if kind == 'uniform':
+        lo, hi = values[0], values[1] if len(values) > 1 else values[0]
+        return lambda rng: rng.uniform(lo, hi) / 1000.0
+    if kind == 'normal':
+        mean, std = values[0], values[1] if len(values) > 1 else 0.0
+        return lambda rng: max(0.0, rng.gauss(mean, std)) / 1000.0
+    if kind == 'lognormal':
+        median, sigma = values[0], values[1] if len(values) > 1 else 0.5
+        mu = math.log(max(median, 1e-6))
+        return lambda rng: rng.lognormvariate(mu, sigma) / 1000.0
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+# ==================== 请求键与磁带 ====================
+
+def request_key(model: str, messages: List[Dict[str, Any]]) -> str:
+    """按模型和消息内容计算请求哈希"""
+    canonical = json.dumps({'model': model or '', 'messages': messages},
+                           ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """请求哈希 → 响应 的磁带（JSONL，只追加）"""
+
+    def __init__(self, path: str = ''):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.entries[item['key']] = item['response']
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def put(self, key: str, request: Dict[str, Any], response: Dict[str, Any]) -> None:
+        with self._lock:
+            self.entries[key] = response
+            if not self.path:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            prompt = ''
+            if request.get('messages'):
+                prompt = str(request['messages'][-1].get('content', ''))[:120]
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    'key': key, 'model': request.get('model', ''), 'prompt_preview': prompt,
+                    'response': response,
+                }, ensure_ascii=False) + '\n')
+
+
+# ==================== 合成 ====================
+
+_PLAYER_RE = re.compile(r'No\.\d+')
+_FIELD_RE = re.compile(r'^\s*"(?P<key>[^"]+)"\s*:\s*(?P<spec>.+?)\s*,?\s*$')
+_RANGE_RE = re.compile(r'^(-?\d+(?:\.\d+)?)\s*-\s*(-?\d+(?:\.\d+)?)$')
+_INLINE_PAIR_RE = re.compile(r'"(?P<key>[^"]+)"\s*:\s*(?P<spec>"[^"]*"|[^,}]+)')
+# 枚举式答案: Return ONLY: "Run for Sheriff" or "Do Not Run"
+_QUOTED_OPTIONS_RE = re.compile(r'(?:return|output|answer)\s+only\s*:\s*((?:"[^"\n]+"\s*(?:or|/|,)?\s*){2,})',
+                                re.IGNORECASE)
+
+_FILLER_TEXTS = ['发言逻辑基本连贯', '信息量一般', '暂无明显异常', '立场前后一致', '需要继续观察']
+
+
+def _find_json_template(prompt: str) -> Optional[str]:
+    """返回提示词中最后一个多行JSON模板块（{{ 已被格式化为 {）"""
+    end = prompt.rfind('}')
+    while end != -1:
+        depth = 0
+        for i in range(end, -1, -1):
+            ch = prompt[i]
+            if ch == '}':
+                depth += 1
+            elif ch == '{':
+                depth -= 1
+                if depth == 0:
+                    block = prompt[i:end + 1]
+                    if '\n' in block and '"' in block:
+                        return block
+                    break
+        end = prompt.rfind('}', 0, end)
+    return None
+
+
+def synth_value(spec: str, rng: random.Random, players: List[str]) -> Any:
+    """
+    按模板中的字段说明合成一个值
+
+    Args:
+        spec: 模板中冒号后的说明，如 true/false、0.0-1.0、"A/B/C"、["No.X"] or []
+        rng: 随机数生成器
+        players: 提示词中出现的玩家
+
+    Returns:
+        合成的值
+    """
+    spec = spec.strip().rstrip(',').strip()
+    choice = spec.split(' or ')[0].strip()
+
+    if choice.startswith('{'):
+        return {m.group('key'): synth_value(m.group('spec'), rng, players)
+                for m in _INLINE_PAIR_RE.finditer(choice)}
+    if choice.startswith('['):
+        if 'No.' in choice and players:
+            return rng.sample(players, k=min(len(players), rng.randint(0, 2)))
+        return rng.sample(_FILLER_TEXTS, k=2)
+    if choice == 'true/false':
+        return rng.random() < 0.2
+    if choice in ('true', 'false'):
+        return choice == 'true'
+    match = _RANGE_RE.match(choice)
+    if match:
+        lo, hi = match.group(1), match.group(2)
+        if '.' in lo or '.' in hi:
+            return round(rng.uniform(float(lo), float(hi)), 2)
+        return rng.randint(int(lo), int(hi))
+    if not choice.startswith('"'):
+        numbers = [int(n) for n in re.findall(r'[-+]?\d+', choice)]
+        if len(numbers) >= 2:
+            return rng.randint(min(numbers), max(numbers))
+        if numbers:
+            return numbers[0]
+        return None
+
+    inner = choice.strip('"')
+    if 'No.' in inner:
+        return rng.choice(players) if players else 'No.1'
+    if '/' in inner and ' ' not in inner:
+        options = [o for o in inner.split('/') if o]
+        # 枚举的第一项通常是最"严重"的分类，降低其概率以贴近真实分布
+        return options[-1] if rng.random() < 0.6 else rng.choice(options)
+    return rng.choice(_FILLER_TEXTS)
+
+
+def synthesize_content(prompt: str, seed: int = 0) -> str:
+    """
+    为提示词合成响应内容（同一提示词结果确定）
+
+    Args:
+        prompt: 最后一条用户消息
+        seed: 全局种子
+
+    Returns:
+        JSON字符串或文本
+    """
+    digest = hashlib.sha256(f"{seed}:{prompt}".encode('utf-8')).hexdigest()
+    rng = random.Random(int(digest[:16], 16))
+    players = sorted(set(_PLAYER_RE.findall(prompt)), key=lambda p: int(p[3:]))
+
+    template = _find_json_template(prompt)
+    if template:
+        result = {}
+        for line in template.splitlines():
+            match = _FIELD_RE.match(line)
+            if match:
+                result[match.group('key')] = synth_value(match.group('spec'), rng, players)
+        if result:
+            return json.dumps(result, ensure_ascii=False)
+
+    options_match = None
+    for options_match in _QUOTED_OPTIONS_RE.finditer(prompt):
+        pass
+    if options_match:
+        return rng.choice(re.findall(r'"([^"\n]+)"', options_match.group(1)))
+
+    target = rng.choice(players) if players else 'No.1'
+    lowered = prompt.lower()
+    if any(word in prompt for word in ('只返回', '只输出', '直接返回')) or 'only return' in lowered:
+        return target
+    return f"我听完了大家的发言，{target}的逻辑有些问题，我这轮倾向于关注{target}，请大家再听听他的解释。"
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数（中文约1.5字/token，英文约4字符/token）"""
+    if not text:
+        return 0
+    cjk = sum(1 for ch in text if '一' <= ch <= '鿿')
+    return max(1, int(cjk / 1.5 + (len(text) - cjk) / 4))
+
+
+def build_completion(model: str, messages: List[Dict[str, Any]], content: str) -> Dict[str, Any]:
+    """构造chat.completion响应"""
+    prompt_tokens = sum(estimate_tokens(str(m.get('content', ''))) for m in messages)
+    completion_tokens = estimate_tokens(content)
+    return {
+        'id': f"chatcmpl-fake-{hashlib.md5(content.encode('utf-8')).hexdigest()[:12]}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': model or 'fake-model',
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': content},
+            'finish_reason': 'stop',
+        }],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'prompt_cache_hit_tokens': 0,
+        },
+    }
+
+
+# ==================== 服务 ====================
+
+class FakeLLMServer:
+    """OpenAI兼容桩服务（ThreadingHTTPServer，每个连接一个线程）"""
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None):
+        self.config = config or FakeLLMConfig()
+        self.cassette = Cassette(self.config.cassette)
+        self._sample_latency = parse_latency(self.config.latency)
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'replayed': 0, 'synthesized': 0, 'recorded': 0,
+                      'rate_limited': 0, 'timeouts': 0, 'streamed': 0, 'misses': 0}
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2] if self._httpd else (self.config.host, self.config.port)
+        return f"http://{host}:{port}/v1"
+
+    def client_env(self) -> Dict[str, str]:
+        """智能体指向本服务所需的环境变量"""
+        return {
+            'OPENAI_BASE_URL': self.url,
+            'BASE_URL': self.url,
+            'DETECTION_BASE_URL': self.url,
+            'OPENAI_API_KEY': 'fake-key',
+            'API_KEY': 'fake-key',
+            'DETECTION_API_KEY': 'fake-key',
+        }
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _draw(self) -> Tuple[float, float]:
+        with self._rng_lock:
+            return self._rng.random(), self._sample_latency(self._rng)
+
+    # ---------- 生命周期 ----------
+
+    def start(self) -> 'FakeLLMServer':
+        server = self
+
+        class Handler(_Handler):
+            fake = server
+
+        self._httpd = ThreadingHTTPServer((self.config.host, self.config.port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-llm-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    # ---------- 响应生成 ----------
+
+    def resolve(self, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """按模式得到完整的chat.completion响应（strict未命中时返回None）"""
+        model = body.get('model', '')
+        messages = body.get('messages') or []
+        key = request_key(model, messages)
+
+        if self.config.mode == 'record':
+            response = self._forward(body)
+            self.cassette.put(key, body, response)
+            self._count('recorded')
+            return response
+
+        if self.config.mode == 'replay':
+            response = self.cassette.get(key)
+            if response is not None:
+                self._count('replayed')
+                return response
+            self._count('misses')
+            if self.config.strict:
+                return None
+
+        prompt = str(messages[-1].get('content', '')) if messages else ''
+        response = build_completion(model, messages, synthesize_content(prompt, self.config.seed))
+        self._count('synthesized')
+        return response
+
+    def _forward(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        upstream_body = dict(body)
+        upstream_body['stream'] = False
+        upstream_body.pop('stream_options', None)
+        request = urllib.request.Request(
+            self.config.upstream.rstrip('/') + '/chat/completions',
+            data=json.dumps(upstream_body).encode('utf-8'),
+            headers={'Content-Type': 'application/json',
+                     'Authorization': f"Bearer {self.config.upstream_key}"},
+            method='POST',
+        )
+        with urllib.request.urlopen(request, timeout=120) as resp:
+            return json.loads(resp.read().decode('utf-8'))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    fake: FakeLLMServer = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = self.path.rstrip('/')
+        if path in ('/v1/models', '/models'):
+            self._send_json(200, {'object': 'list', 'data': [
+                {'id': 'deepseek-chat', 'object': 'model', 'owned_by': 'fake'},
+                {'id': 'deepseek-reasoner', 'object': 'model', 'owned_by': 'fake'},
+            ]})
+        elif path in ('/stats', '/v1/stats'):
+            with self.fake._stats_lock:
+                self._send_json(200, dict(self.fake.stats))
+        elif path in ('/health', ''):
+            self._send_json(200, {'status': 'ok', 'mode': self.fake.config.mode})
+        else:
+            self._send_json(404, {'error': {'message': 'not found', 'type': 'invalid_request_error'}})
+
+    def do_POST(self):
+        if self.path.rstrip('/') not in ('/v1/chat/completions', '/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found', 'type': 'invalid_request_error'}})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+        except (ValueError, UnicodeDecodeError):
+            self._send_json(400, {'error': {'message': 'invalid JSON body', 'type': 'invalid_request_error'}})
+            return
+
+        fake = self.fake
+        fake._count('requests')
+        roll, latency = fake._draw()
+
+        if roll < fake.config.rate_timeout:
+            fake._count('timeouts')
+            time.sleep(fake.config.timeout_seconds)
+            self.close_connection = True
+            return
+        if roll < fake.config.rate_timeout + fake.config.rate_429:
+            fake._count('rate_limited')
+            self._send_json(429, {'error': {'message': 'Rate limit reached (injected)',
+                                            'type': 'rate_limit_error', 'code': 'rate_limit_exceeded'}},
+                            headers={'Retry-After': '1'})
+            return
+
+        try:
+            response = fake.resolve(body)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            self._send_json(502, {'error': {'message': f"upstream error: {e}", 'type': 'api_error'}})
+            return
+        if response is None:
+            self._send_json(404, {'error': {'message': 'no recorded response for request',
+                                            'type': 'invalid_request_error', 'code': 'cassette_miss'}})
+            return
+
+        if body.get('stream'):
+            fake._count('streamed')
+            include_usage = bool((body.get('stream_options') or {}).get('include_usage'))
+            self._stream(response, latency, include_usage)
+        else:
+            if latency > 0:
+                time.sleep(latency)
+            self._send_json(200, response)
+
+    def _stream(self, response: Dict[str, Any], latency: float, include_usage: bool) -> None:
+        """以SSE分块发送响应：首块前等待30%延迟，其余延迟均摊到各块"""
+        content = response['choices'][0]['message'].get('content') or ''
+        pieces = [content[i:i + 8] for i in range(0, len(content), 8)] or ['']
+        base = {'id': response.get('id', 'chatcmpl-fake'), 'object': 'chat.completion.chunk',
+                'created': response.get('created', int(time.time())), 'model': response.get('model', '')}
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def send(chunk: Dict[str, Any]) -> None:
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        if latency > 0:
+            time.sleep(latency * 0.3)
+        per_piece = latency * 0.7 / len(pieces) if latency > 0 else 0.0
+        send(dict(base, choices=[{'index': 0, 'delta': {'role': 'assistant', 'content': ''}, 'finish_reason': None}]))
+        for piece in pieces:
+            if per_piece:
+                time.sleep(per_piece)
+            send(dict(base, choices=[{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]))
+        send(dict(base, choices=[{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]))
+        if include_usage:
+            send(dict(base, choices=[], usage=response.get('usage')))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--mode', choices=('replay', 'record', 'synth'), default='replay')
+    parser.add_argument('--cassette', default='', help='JSONL request→response cassette')
+    parser.add_argument('--strict', action='store_true', help='replay: 404 on cassette miss instead of synthesizing')
+    parser.add_argument('--latency', default='fixed:0', help='fixed:ms | uniform:lo,hi | normal:mean,std | lognormal:median,sigma')
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--rate-timeout', type=float, default=0.0)
+    parser.add_argument('--timeout-seconds', type=float, default=30.0)
+    parser.add_argument('--upstream', default=None, help='record mode upstream base URL')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    config = FakeLLMConfig(
+        host=args.host, port=args.port, mode=args.mode, cassette=args.cassette, strict=args.strict,
+        latency=args.latency, rate_429=args.rate_429, rate_timeout=args.rate_timeout,
+        timeout_seconds=args.timeout_seconds, seed=args.seed,
+    )
+    if args.upstream:
+        config.upstream = args.upstream
+    if config.mode == 'record' and not config.cassette:
+        parser.error('--mode record requires --cassette')
+
+    server = FakeLLMServer(config)
+    server.start()
+    print(f"Fake LLM server listening on {server.url} (mode={config.mode}, "
+          f"cassette entries={len(server.cassette.entries)}, latency={config.latency}, "
+          f"429={config.rate_429}, timeout={config.rate_timeout})")
+    print("Point agents at it with:")
+    for name, value in server.client_env().items():
+        print(f"  export {name}={value}")
+    sys.stdout.flush()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,648 @@
+# -*- coding: utf-8 -*-
+"""
+无头12人局模拟器（自对弈吞吐测试）
+
+进程内的游戏主持人：按SDK的状态常量构造AgentReq，驱动七种角色智能体
+（4狼含狼王、预言家、女巫、守卫、猎人、4平民）完成整局游戏，LLM请求
+打到本地桩服务（benchmarks/fake_llm_server.py，合成或回放模式）。
+
+主持人负责执行规则，智能体的回答只是"意图"：
+- 选择类回答（投票/击杀/查验/守护/开枪/移交警徽）必须在候选列表内，
+  否则记为invalid并随机代选（投票则弃票）
+- 守卫不能连续两晚守护同一人；女巫解药、毒药各一瓶，解药用完后不再告知刀口
+- 同守同救视为死亡；被毒的猎人/狼王不能开枪
+- 首夜死亡与白天放逐的玩家有遗言；警长死亡时移交或撕毁警徽；警长投票计1.5票
+  （汇总中没有任何一局选出警长时退出码为1：警长相关流程没有被覆盖）
+- 狼人全灭好人胜；神职或平民全灭（屠边）狼人胜；超过最大天数记平局
+
+每个请求按 handler.status 计时，另外统计决策分布与智能体异常。
+多局并行：线程池（默认，LLM等待为主）或进程池（--processes，绕开GIL）。
+
+与线上差异：直接调用角色智能体的perceive/interact（不经WerewolfAgent按
+req.role分发）；猎人的开枪入口在perceive(STATUS_SKILL)，主持人在interact
+没有给出目标时回退到perceive。
+
+用法:
+    python benchmarks/game_simulator.py [--games 20] [--parallel 4] [--processes]
+        [--latency fixed:0] [--cassette benchmarks/cassettes/llm.jsonl]
+        [--base-url http://host:port/v1] [--seed 0] [--max-days 15]
+        [--data-dir DIR] [--json out.json] [--log-level ERROR]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import traceback
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+# 线上以 python werewolf/app.py 启动，模块内有 `from game_utils import ...` 形式的导入
+for _path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'werewolf'), BENCH_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+
+# 角色配置（12人局：4狼含狼王 + 4神 + 4民）
+ROLE_LAYOUT = ['wolf', 'wolf', 'wolf', 'wolf_king',
+               'seer', 'witch', 'guard', 'hunter',
+               'villager', 'villager', 'villager', 'villager']
+WOLF_ROLES = ('wolf', 'wolf_king')
+GOD_ROLES = ('seer', 'witch', 'guard', 'hunter')
+SHOOTER_ROLES = ('hunter', 'wolf_king')
+
+NO_SHOT = 'Do Not Shoot'
+DESTROY_BADGE = 'Destroy'
+
+_NAME_PATTERN = re.compile(r'No\.\s*(\d+)')
+_agent_classes: Optional[Dict[str, Any]] = None
+
+
+def _load_agent_classes() -> Dict[str, Any]:
+    """延迟导入角色智能体（进程池中每个worker各导入一次）"""
+    global _agent_classes
+    if _agent_classes is None:
+        from werewolf.seer.seer_agent import SeerAgent
+        from werewolf.villager.villager_agent import VillagerAgent
+        from werewolf.witch.witch_agent import WitchAgent
+        from werewolf.wolf.wolf_agent import WolfAgent
+        from werewolf.guard.guard_agent import GuardAgent
+        from werewolf.hunter.hunter_agent import HunterAgent
+        from werewolf.wolf_king.wolf_king_agent import WolfKingAgent
+        _agent_classes = {
+            'villager': VillagerAgent, 'wolf': WolfAgent, 'seer': SeerAgent, 'witch': WitchAgent,
+            'guard': GuardAgent, 'hunter': HunterAgent, 'wolf_king': WolfKingAgent,
+        }
+    return _agent_classes
+
+
+def create_agent(role: str):
+    """与 app.py 相同的构造参数创建角色智能体"""
+    cls = _load_agent_classes()[role]
+    model_name = os.getenv('MODEL_NAME', 'deepseek-chat')
+    if role in ('wolf', 'witch', 'wolf_king'):
+        detection_model = os.getenv('DETECTION_MODEL_NAME', model_name)
+        return cls(model_name=model_name, analysis_model_name=detection_model)
+    return cls(model_name=model_name)
+
+
+def build_agent_pool() -> Dict[str, List[Any]]:
+    """按 ROLE_LAYOUT 创建一套可跨局复用的智能体（与线上长驻进程一致）"""
+    pool: Dict[str, List[Any]] = defaultdict(list)
+    for role in ROLE_LAYOUT:
+        pool[role].append(create_agent(role))
+    return dict(pool)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+# ==================== 对局 ====================
+
+class Seat:
+    """座位：玩家名、角色、智能体实例与存活状态"""
+
+    def __init__(self, name: str, role: str, agent: Any):
+        self.name = name
+        self.role = role
+        self.agent = agent
+        self.alive = True
+
+    @property
+    def is_wolf(self) -> bool:
+        return self.role in WOLF_ROLES
+
+
+class GameMaster:
+    """
+    单局主持人
+
+    Args:
+        game_index: 对局序号（用于日志与随机种子）
+        seed: 随机种子（角色分配与无效回答的代选）
+        max_days: 最大天数，超过记平局
+        agent_pool: 复用的智能体（build_agent_pool），None时每局新建
+    """
+
+    def __init__(self, game_index: int = 0, seed: int = 0, max_days: int = 15,
+                 agent_pool: Optional[Dict[str, List[Any]]] = None):
+        self.game_index = game_index
+        self.rng = random.Random(seed * 100003 + game_index)
+        self.max_days = max_days
+        roles = list(ROLE_LAYOUT)
+        self.rng.shuffle(roles)
+        available = {role: list(agents) for role, agents in (agent_pool or {}).items()}
+        self.seats = [
+            Seat(f"No.{i + 1}", role, available[role].pop() if available.get(role) else create_agent(role))
+            for i, role in enumerate(roles)
+        ]
+        self.by_name = {seat.name: seat for seat in self.seats}
+        self.day = 0
+        self.sheriff: Optional[str] = None
+        self.sheriff_elected = False
+        self.last_guarded: Optional[str] = None
+        self.antidote = True
+        self.poison = True
+        self.winner: Optional[str] = None
+
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.decisions: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+        self.error_samples: Dict[str, str] = {}
+        self.requests = 0
+
+    # ---------- 请求发送 ----------
+
+    def _call(self, seat: Seat, handler: str, status: str, name: Optional[str] = None,
+              message: Optional[str] = None):
+        from agent_build_sdk.model.werewolf_model import AgentReq
+
+        req = AgentReq(status=status, name=name, message=message, role=seat.role, round=self.day)
+        start = time.perf_counter()
+        try:
+            return getattr(seat.agent, handler)(req)
+        except Exception as e:
+            key = f"{handler}.{status}.{seat.role}"
+            self.errors[key] += 1
+            self.error_samples.setdefault(key, " ".join(f"{type(e).__name__}: {e}".split()))
+            return None
+        finally:
+            self.latencies[f"{handler}.{status}"].append((time.perf_counter() - start) * 1000.0)
+            self.requests += 1
+
+    def alive(self, wolves: Optional[bool] = None) -> List[Seat]:
+        return [s for s in self.seats if s.alive and (wolves is None or s.is_wolf == wolves)]
+
+    def broadcast(self, status: str, name: Optional[str] = None, message: Optional[str] = None,
+                  seats: Optional[List[Seat]] = None) -> None:
+        """向座位（默认全部，包括出局玩家）推送perceive事件"""
+        for seat in (self.seats if seats is None else seats):
+            self._call(seat, 'perceive', status, name=name, message=message)
+
+    def ask_text(self, seat: Seat, status: str, name: Optional[str] = None,
+                 message: Optional[str] = None) -> str:
+        resp = self._call(seat, 'interact', status, name=name, message=message)
+        return str(getattr(resp, 'result', '') or '') if resp is not None else ''
+
+    def _coerce(self, answer: str, choices: List[str]) -> Optional[str]:
+        answer = answer.strip()
+        if answer in choices:
+            return answer
+        match = _NAME_PATTERN.search(answer)
+        if match and f"No.{match.group(1)}" in choices:
+            return f"No.{match.group(1)}"
+        return None
+
+    def ask_choice(self, seat: Seat, status: str, choices: List[str], phase: str,
+                   name: Optional[str] = None, allow_none: bool = False,
+                   none_words=(), fallback: bool = True) -> Optional[str]:
+        """
+        请求智能体在候选中选择，执行规则校验
+
+        Args:
+            seat: 被询问的座位
+            status: 交互状态
+            choices: 合法候选
+            phase: 决策分布统计键
+            name: AgentReq.name
+            allow_none: 是否允许放弃（"Do Not Use"等）
+            none_words: 视为放弃的关键词
+            fallback: 非法回答时是否随机代选
+
+        Returns:
+            选中的玩家名，放弃或无效时为None（或代选结果）
+        """
+        answer = self.ask_text(seat, status, name=name, message=",".join(choices))
+        target = self._coerce(answer, choices)
+        if target is None and seat.role == 'hunter' and status == 'skill':
+            resp = self._call(seat, 'perceive', status, name=name, message=",".join(choices))
+            answer = str(getattr(resp, 'result', '') or '') if resp is not None else answer
+            target = self._coerce(answer, choices)
+        if target is not None:
+            return target
+        lowered = answer.lower()
+        if allow_none and (not answer or any(word in lowered for word in none_words)):
+            self.decisions[f"{phase}.{seat.role}"]['none'] += 1
+            return None
+        self.decisions[f"{phase}.{seat.role}"]['invalid'] += 1
+        return self.rng.choice(choices) if fallback and choices else None
+
+    def record(self, phase: str, seat: Seat, target: Optional[str]) -> None:
+        if target is None:
+            return
+        camp = 'wolf' if self.by_name[target].is_wolf else 'good'
+        self.decisions[f"{phase}.{seat.role}"][camp] += 1
+
+    # ---------- 胜负 ----------
+
+    def check_winner(self) -> Optional[str]:
+        if not self.alive(wolves=True):
+            self.winner = 'good'
+        elif (not any(s.role in GOD_ROLES for s in self.alive())
+              or not any(s.role == 'villager' for s in self.alive())):
+            self.winner = 'wolf'
+        return self.winner
+
+    # ---------- 死亡结算 ----------
+
+    def kill(self, names: List[str], last_words: bool, can_shoot: Dict[str, bool]) -> None:
+        """结算一批死亡：遗言、开枪、警徽移交"""
+        for name in names:
+            self.by_name[name].alive = False
+        for name in names:
+            seat = self.by_name[name]
+            if last_words:
+                speech = self.ask_text(seat, 'discuss', name=name,
+                                       message=f"{name}, please give your last words")
+                self.broadcast('discuss', name=name, message=f"Last Words: {speech}",
+                               seats=[s for s in self.seats if s is not seat])
+            if seat.role in SHOOTER_ROLES and can_shoot.get(name, True):
+                self.shoot(seat)
+            if self.sheriff == name:
+                self.transfer_badge(seat)
+
+    def shoot(self, seat: Seat) -> None:
+        choices = [s.name for s in self.alive()]
+        if not choices:
+            return
+        self.broadcast('hunter', name=seat.name)
+        target = self.ask_choice(seat, 'skill', choices, 'shoot', name='shoot',
+                                 allow_none=True, none_words=('not', 'no shoot', 'skip'), fallback=False)
+        if target is None:
+            self.broadcast('hunter_result', name=seat.name, message=NO_SHOT)
+            return
+        self.record('shoot', seat, target)
+        self.broadcast('hunter_result', name=seat.name, message=target)
+        self.kill([target], last_words=False, can_shoot={target: True})
+
+    def transfer_badge(self, seat: Seat) -> None:
+        choices = [s.name for s in self.alive()]
+        target = self.ask_choice(seat, 'sheriff', choices, 'badge', allow_none=True,
+                                 none_words=('destroy', 'tear', '撕'), fallback=False) if choices else None
+        self.sheriff = target
+        self.decisions[f"badge.{seat.role}"]['transfer' if target else 'destroy'] += 1
+        self.broadcast('sheriff', name=target or '', message=f"{seat.name} -> {target or DESTROY_BADGE}")
+
+    # ---------- 夜晚 ----------
+
+    def night(self) -> Dict[str, bool]:
+        """夜晚行动，返回 {死亡玩家: 能否开枪}"""
+        self.broadcast('night')
+        alive_names = [s.name for s in self.alive()]
+
+        # 守卫：不能连守
+        guarded = None
+        for seat in self.alive():
+            if seat.role == 'guard':
+                choices = [n for n in alive_names if n != self.last_guarded]
+                guarded = self.ask_choice(seat, 'skill', choices, 'guard', allow_none=True,
+                                          none_words=('do not', 'skip', 'none'), fallback=False)
+                self.decisions['guard.guard']['self' if guarded == seat.name else ('other' if guarded else 'none')] += 1
+        self.last_guarded = guarded
+
+        # 狼人：夜聊 + 击杀（以首个存活狼人的选择为准）
+        wolves = self.alive(wolves=True)
+        victim = None
+        for seat in wolves:
+            speech = self.ask_text(seat, 'wolf_speech')
+            self.broadcast('wolf_speech', name=seat.name, message=speech,
+                           seats=[w for w in wolves if w is not seat])
+        if wolves:
+            victim = self.ask_choice(wolves[0], 'skill', alive_names, 'kill')
+            self.decisions[f"kill.{wolves[0].role}"][self.by_name[victim].role] += 1
+            self.broadcast('skill_result', name=victim, seats=wolves)
+
+        # 女巫：解药用完后不再告知刀口
+        saved = poisoned = None
+        for seat in self.alive():
+            if seat.role != 'witch':
+                continue
+            if victim and self.antidote:
+                message = f"Tonight {victim} was killed. Alive players: {','.join(alive_names)}"
+            else:
+                message = f"Alive players: {','.join(alive_names)}"
+            answer = self.ask_text(seat, 'skill', message=message)
+            action = 'none'
+            target = self._coerce(answer, alive_names)
+            if answer.lower().startswith('save') and self.antidote and target == victim:
+                saved, self.antidote, action = victim, False, 'save'
+            elif answer.lower().startswith('poison') and self.poison and target:
+                poisoned, self.poison, action = target, False, 'poison'
+            elif answer and not answer.lower().startswith('do not'):
+                action = 'invalid'
+            self.decisions['witch.witch'][action] += 1
+
+        # 预言家
+        for seat in self.alive():
+            if seat.role == 'seer':
+                choices = [n for n in alive_names if n != seat.name]
+                checked = self.ask_choice(seat, 'skill', choices, 'check')
+                self.record('check', seat, checked)
+                verdict = 'wolf' if self.by_name[checked].is_wolf else 'good'
+                self.broadcast('skill_result', name=checked, message=verdict, seats=[seat])
+
+        # 结算：同守同救死亡
+        dead: Dict[str, bool] = {}
+        if victim and (bool(saved) == bool(guarded == victim)):
+            dead[victim] = True
+        if poisoned:
+            dead[poisoned] = False
+        return dead
+
+    # ---------- 白天 ----------
+
+    def sheriff_election(self) -> None:
+        candidates = []
+        for seat in self.alive():
+            answer = self.ask_text(seat, 'sheriff_election').lower()
+            run = 'run' in answer and 'not' not in answer
+            self.decisions[f"sheriff_election.{seat.role}"]['run' if run else 'not_run'] += 1
+            if run:
+                candidates.append(seat.name)
+        self.broadcast('sheriff_election', message=",".join(candidates))
+        if not candidates:
+            return
+        for name in candidates:
+            speech = self.ask_text(self.by_name[name], 'sheriff_speech')
+            self.broadcast('sheriff_speech', name=name, message=speech)
+
+        for attempt in range(2):
+            voters = [s for s in self.alive() if s.name not in candidates]
+            tally: Counter = Counter()
+            for seat in voters:
+                target = self.ask_choice(seat, 'sheriff_vote', candidates, 'sheriff_vote')
+                self.record('sheriff_vote', seat, target)
+                tally[target] += 1
+                self.broadcast('sheriff_vote', name=seat.name, message=target)
+            leaders = self._leaders(tally) if tally else candidates
+            if len(leaders) == 1:
+                self.sheriff = leaders[0]
+                break
+            if attempt == 0:
+                candidates = leaders
+                for name in candidates:
+                    speech = self.ask_text(self.by_name[name], 'sheriff_pk')
+                    self.broadcast('sheriff_pk', name=name, message=speech)
+        if self.sheriff:
+            self.sheriff_elected = True
+            self.broadcast('sheriff', name=self.sheriff)
+
+    @staticmethod
+    def _leaders(tally: Counter) -> List[str]:
+        top = max(tally.values())
+        return [name for name, votes in tally.items() if votes == top]
+
+    def discussion(self) -> None:
+        self.broadcast('discuss')
+        order = self.alive()
+        if self.sheriff and self.by_name[self.sheriff].alive:
+            answer = self.ask_text(self.by_name[self.sheriff], 'sheriff_speech_order',
+                                   message="Clockwise,Counter-clockwise")
+            counter = 'counter' in answer.lower() or '小号' in answer
+            self.decisions['speech_order.sheriff']['counter' if counter else 'clockwise'] += 1
+            if counter:
+                order = list(reversed(order))
+        for seat in order:
+            speech = self.ask_text(seat, 'discuss')
+            self.decisions[f"discuss.{seat.role}"]['spoke' if speech else 'empty'] += 1
+            self.broadcast('discuss', name=seat.name, message=speech,
+                           seats=[s for s in self.seats if s is not seat])
+
+    def vote(self) -> Optional[str]:
+        alive_seats = self.alive()
+        tally: Counter = Counter()
+        for seat in alive_seats:
+            choices = [s.name for s in alive_seats if s is not seat]
+            target = self.ask_choice(seat, 'vote', choices, 'vote', fallback=False)
+            if target is None:
+                continue
+            self.record('vote', seat, target)
+            tally[target] += 1.5 if seat.name == self.sheriff else 1
+            self.broadcast('vote', name=seat.name, message=target)
+        leaders = self._leaders(tally) if tally else []
+        out = leaders[0] if len(leaders) == 1 else None
+        self.broadcast('vote_result', name=out, message=out)
+        return out
+
+    # ---------- 主循环 ----------
+
+    def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        wolves = [s.name for s in self.seats if s.is_wolf]
+        for seat in self.seats:
+            teammates = ",".join(w for w in wolves if w != seat.name) if seat.is_wolf else ''
+            self._call(seat, 'perceive', 'start', name=seat.name, message=teammates)
+
+        while self.winner is None and self.day < self.max_days:
+            self.day += 1
+            dead = self.night()
+            if self.day == 1:
+                self.sheriff_election()
+            names = list(dead)
+            self.broadcast('night_info', message=(f"{', '.join(names)} died last night" if names
+                                                  else "Last night was peaceful, no one died"))
+            self.kill(names, last_words=(self.day == 1), can_shoot=dead)
+            if self.check_winner():
+                break
+            self.discussion()
+            out = self.vote()
+            if out:
+                self.kill([out], last_words=True, can_shoot={out: True})
+            self.check_winner()
+
+        winner = self.winner or 'draw'
+        roles = {s.name: s.role for s in self.seats}
+        self.broadcast('result', message=f"Game over. Winner: {winner} camp. Roles: {json.dumps(roles)}")
+        return {
+            'game': self.game_index,
+            'winner': winner,
+            'days': self.day,
+            'seconds': time.perf_counter() - started,
+            'requests': self.requests,
+            'survivors': [s.role for s in self.alive()],
+            'sheriff_elected': self.sheriff_elected,
+            'latencies': dict(self.latencies),
+            'decisions': {k: dict(v) for k, v in self.decisions.items()},
+            'errors': dict(self.errors),
+            'error_samples': self.error_samples,
+        }
+
+
+def play_game(game_index: int, seed: int, max_days: int) -> Dict[str, Any]:
+    """运行一局（进程池入口，必须可pickle）"""
+    try:
+        return GameMaster(game_index, seed, max_days).run()
+    except Exception as e:
+        return {'game': game_index, 'winner': 'crashed', 'days': 0, 'seconds': 0.0, 'requests': 0,
+                'survivors': [], 'sheriff_elected': False, 'latencies': {}, 'decisions': {},
+                'errors': {'game.crash': 1},
+                'error_samples': {'game.crash': traceback.format_exc(limit=5)}}
+
+
+# ==================== 汇总 ====================
+
+def summarize(results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """合并各局结果：胜率、吞吐、分阶段延迟、决策分布与异常"""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    decisions: Dict[str, Counter] = defaultdict(Counter)
+    errors: Counter = Counter()
+    samples: Dict[str, str] = {}
+    for result in results:
+        for key, values in result['latencies'].items():
+            latencies[key].extend(values)
+        for key, counts in result['decisions'].items():
+            decisions[key].update(counts)
+        errors.update(result['errors'])
+        for key, sample in result['error_samples'].items():
+            samples.setdefault(key, sample)
+
+    games = len(results)
+    return {
+        'games': games,
+        'wall_seconds': round(wall_seconds, 3),
+        'games_per_hour': round(games / wall_seconds * 3600.0, 1) if wall_seconds > 0 else 0.0,
+        'requests': sum(r['requests'] for r in results),
+        'winners': dict(Counter(r['winner'] for r in results)),
+        'avg_days': round(sum(r['days'] for r in results) / games, 2) if games else 0.0,
+        'avg_game_seconds': round(sum(r['seconds'] for r in results) / games, 3) if games else 0.0,
+        'sheriff_elections': sum(1 for r in results if r.get('sheriff_elected')),
+        'phases': {
+            key: {'count': len(values),
+                  'p50_ms': round(percentile(values, 50), 3),
+                  'p95_ms': round(percentile(values, 95), 3),
+                  'max_ms': round(max(values), 3),
+                  'total_s': round(sum(values) / 1000.0, 3)}
+            for key, values in sorted(latencies.items())
+        },
+        'decisions': {key: dict(counts) for key, counts in sorted(decisions.items())},
+        'errors': dict(errors.most_common()),
+        'error_samples': samples,
+    }
+
+
+def format_report(summary: Dict[str, Any]) -> str:
+    lines = [
+        f"Games: {summary['games']}  wall: {summary['wall_seconds']:.1f}s  "
+        f"games/hour: {summary['games_per_hour']:.1f}  requests: {summary['requests']}",
+        f"Winners: {summary['winners']}  avg days: {summary['avg_days']}  "
+        f"avg game: {summary['avg_game_seconds']:.2f}s  sheriff elected: {summary['sheriff_elections']}/{summary['games']}",
+        "",
+        f"{'phase':<34} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'total s':>9}",
+        "-" * 82,
+    ]
+    for key, row in summary['phases'].items():
+        lines.append(f"{key:<34} {row['count']:>7} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                     f"{row['max_ms']:>9.2f} {row['total_s']:>9.2f}")
+    lines += ["", "Decisions:"]
+    for key, counts in summary['decisions'].items():
+        total = sum(counts.values())
+        dist = ", ".join(f"{k}={v} ({v / total:.0%})" for k, v in sorted(counts.items(), key=lambda kv: -kv[1]))
+        lines.append(f"  {key:<32} {dist}")
+    if summary['errors']:
+        lines += ["", "Agent errors:"]
+        for key, count in summary['errors'].items():
+            lines.append(f"  {key:<40} {count:>6}  {summary['error_samples'].get(key, '')[:100]}")
+    return "\n".join(lines)
+
+
+# ==================== 入口 ====================
+
+def _worker_init(log_level: str) -> None:
+    from werewolf.common.structured_logging import configure_logging
+    configure_logging(level=log_level, fmt='text')
+    _load_agent_classes()
+
+
+def run(games: int = 10, parallel: int = 4, processes: bool = False, seed: int = 0,
+        max_days: int = 15, log_level: str = 'ERROR') -> Dict[str, Any]:
+    """
+    运行多局并汇总
+
+    Args:
+        games: 对局数
+        parallel: 并行对局数
+        processes: 使用进程池（默认线程池）
+        seed: 随机种子
+        max_days: 每局最大天数
+        log_level: 智能体日志级别
+
+    Returns:
+        summarize() 的结果
+    """
+    _worker_init(log_level)
+    executor_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    kwargs = {'initializer': _worker_init, 'initargs': (log_level,)} if processes else {}
+    started = time.perf_counter()
+    with executor_cls(max_workers=max(1, parallel), **kwargs) as pool:
+        futures = [pool.submit(play_game, i, seed, max_days) for i in range(games)]
+        results = [f.result() for f in futures]
+    return summarize(results, time.perf_counter() - started)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--parallel', type=int, default=4)
+    parser.add_argument('--processes', action='store_true', help='进程池并行（默认线程池）')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-days', type=int, default=15)
+    parser.add_argument('--latency', default='fixed:0', help='桩服务延迟分布，见 fake_llm_server.py')
+    parser.add_argument('--cassette', default='', help='回放磁带（为空=合成模式）')
+    parser.add_argument('--base-url', default='', help='使用已运行的LLM端点，不启动进程内桩服务')
+    parser.add_argument('--data-dir', default='', help='DATA_DIR/ML_MODEL_DIR（默认临时目录）')
+    parser.add_argument('--json', default='', help='汇总结果写入JSON文件')
+    parser.add_argument('--log-level', default='ERROR')
+    args = parser.parse_args(argv)
+
+    # 对局结束时智能体会写游戏数据/模型，默认隔离到临时目录
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='werewolf-sim-')
+    os.environ['DATA_DIR'] = data_dir
+    os.environ.setdefault('ML_MODEL_DIR', os.path.join(data_dir, 'ml_models'))
+    os.environ.setdefault('MODEL_NAME', 'deepseek-chat')
+
+    server = None
+    if args.base_url:
+        for key in ('OPENAI_BASE_URL', 'BASE_URL', 'DETECTION_BASE_URL'):
+            os.environ[key] = args.base_url
+    else:
+        from fake_llm_server import FakeLLMConfig, FakeLLMServer
+        server = FakeLLMServer(FakeLLMConfig(
+            port=0, mode='replay' if args.cassette else 'synth', cassette=args.cassette,
+            latency=args.latency, seed=args.seed,
+        )).start()
+        os.environ.update(server.client_env())
+
+    try:
+        summary = run(args.games, args.parallel, args.processes, args.seed, args.max_days, args.log_level)
+    finally:
+        if server:
+            server.stop()
+    if server:
+        summary['llm_server'] = dict(server.stats)
+    summary['data_dir'] = data_dir
+
+    print(format_report(summary))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"\nSummary written to {args.json}")
+    if summary['games'] and not summary['sheriff_elections']:
+        print("\nFAIL: no game elected a sheriff; sheriff election, badge transfer and the 1.5x vote were not simulated")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
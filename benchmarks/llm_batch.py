@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+LLM批处理器基准
+
+模拟上游只能同时处理 --upstream 个请求（超出的在上游排队）时的突发检测：
+--messages 条发言同时到达，每条4个检测请求，对比直接并发调用与经过
+werewolf.optimization.llm.LLMBatchProcessor（并发上限=上游容量，按检测器优先级派发）
+时各检测器的延迟分位数。
+
+行为正确性（结果对应、并发上限、优先级、截止时间、取消、错误隔离、检测器接入）
+由 tests/test_llm_batch.py 覆盖，伪后端 FakeBackend/FakeBatchBackend 与测试共用。
+
+用法:
+    python benchmarks/llm_batch.py [--messages 24] [--upstream 8] [--latency-ms 40] [--json out.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (BENCH_DIR, PROJECT_ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from werewolf.optimization.llm.batch_processor import (  # noqa: E402
+    LLMBatchProcessor, LLMRequest, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW,
+)
+
+DETECTOR_PRIORITIES = {
+    'InjectionDetector': PRIORITY_HIGH,
+    'FalseQuoteDetector': PRIORITY_NORMAL,
+    'MessageParser': PRIORITY_NORMAL,
+    'SpeechQualityEvaluator': PRIORITY_LOW,
+}
+
+
+class FakeBackend:
+    """伪后端：回显提示词，记录调用顺序与在途峰值；可模拟上游容量（超出的排队）"""
+
+    def __init__(self, latency: float = 0.01, upstream: int = 0, fail_on: str = '',
+                 jitter: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.fail_on = fail_on
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.upstream = asyncio.Semaphore(upstream) if upstream > 0 else None
+        self.calls: List[str] = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def complete(self, request: LLMRequest) -> str:
+        self.calls.append(request.prompt)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            if self.upstream is not None:
+                async with self.upstream:
+                    await self._work()
+            else:
+                await self._work()
+            if self.fail_on and self.fail_on in request.prompt:
+                raise RuntimeError(f"backend failure for {request.prompt}")
+            return f"echo:{request.prompt}"
+        finally:
+            self.in_flight -= 1
+
+    async def _work(self) -> None:
+        delay = self.latency
+        if self.jitter:
+            delay *= self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+        await asyncio.sleep(delay)
+
+
+class FakeBatchBackend(FakeBackend):
+    """支持一次调用处理多个提示词的伪后端"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_sizes: List[int] = []
+
+    async def complete_batch(self, requests: List[LLMRequest]) -> List[Any]:
+        self.batch_sizes.append(len(requests))
+        await self._work()
+        return [RuntimeError("bad") if self.fail_on and self.fail_on in r.prompt else f"echo:{r.prompt}"
+                for r in requests]
+
+
+# ==================== 突发检测基准 ====================
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+async def burst(mode: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """--messages 条发言同时到达，每条4个检测请求"""
+    backend = FakeBackend(latency=args.latency_ms / 1000.0, upstream=args.upstream, jitter=0.3, seed=args.seed)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    processor = None
+    if mode == 'batched':
+        processor = LLMBatchProcessor(backend, batch_window=args.window_ms / 1000.0,
+                                      max_concurrency=args.upstream)
+
+    async def one(message: int, caller: str) -> None:
+        request = LLMRequest(f"{caller}:{message}", caller=caller, priority=DETECTOR_PRIORITIES[caller])
+        start = time.perf_counter()
+        if processor is not None:
+            await processor.process(request)
+        else:
+            await backend.complete(request)
+        latencies[caller].append((time.perf_counter() - start) * 1000.0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(m, caller) for m in range(args.messages) for caller in DETECTOR_PRIORITIES))
+    makespan = (time.perf_counter() - start) * 1000.0
+    if processor is not None:
+        await processor.close()
+    return {
+        'mode': mode,
+        'makespan_ms': makespan,
+        'upstream_peak': backend.peak,
+        'latency_ms': {caller: {'p50': percentile(v, 50), 'p95': percentile(v, 95)}
+                       for caller, v in latencies.items()},
+    }
+
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'mode':<9}{'detector':<24}{'p50 ms':>9}{'p95 ms':>9}"]
+    for r in results:
+        for caller, row in r['latency_ms'].items():
+            lines.append(f"{r['mode']:<9}{caller:<24}{row['p50']:>9.1f}{row['p95']:>9.1f}")
+    lines.append('')
+    for r in results:
+        lines.append(f"{r['mode']}: makespan {r['makespan_ms']:.0f}ms, "
+                     f"peak requests sent upstream at once {r['upstream_peak']}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=24)
+    parser.add_argument('--upstream', type=int, default=8, help='上游同时处理的请求数')
+    parser.add_argument('--latency-ms', type=float, default=40.0)
+    parser.add_argument('--window-ms', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default='')
+    args = parser.parse_args(argv)
+
+    results = [asyncio.run(burst(mode, args)) for mode in ('direct', 'batched')]
+    print(format_report(results))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,558 @@
+# -*- coding: utf-8 -*-
+"""
+多局并发压测（部署形态的HTTP服务）
+
+线上一个容器通过SDK的FastAPI/uvicorn应用（/agent/perceive、/agent/interact）
+同时服务多局游戏。本脚本在本机启动 werewolf/app.py（LLM指向进程内桩服务
+benchmarks/fake_llm_server.py），按阶梯逐步提高并发局数K：
+
+- 每局是一个座位视角的合成事件序列（随机角色，开局→夜晚技能→警长竞选→
+  发言/投票若干天→结束），每个K槽位连续跑 --games-per-slot 局
+- 记录每阶段请求延迟分位数（全部/perceive/interact）、错误率
+  （HTTP错误、超时、success=false）
+- 从 /proc/<pid> 读取服务进程CPU时间与RSS（Linux），折算为每局CPU秒与每局内存
+- 找拐点：吞吐增益明显低于并发增益、p95翻倍或错误率超阈值的第一个阶段，
+  其前一阶段即建议容量；再按 --vcpu / --mem-gb 估算CPU与内存各自允许的并发上限
+
+用法:
+    python benchmarks/load_test.py [--ramp 1,2,4,8,16] [--games-per-slot 2] [--days 4]
+        [--llm-latency lognormal:400,0.4] [--think-ms 0] [--vcpu 2] [--mem-gb 16]
+        [--json capacity.json]
+
+    对已运行的服务压测（LLM端点由服务自己的环境变量决定）:
+    python benchmarks/load_test.py --target http://127.0.0.1:7860 [--pid PID]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+SERVICE_PORT = 7860  # 服务默认端口（app.py与shard_router.py均读取PORT）
+ROLES = ['villager', 'villager', 'villager', 'villager', 'wolf', 'wolf', 'wolf', 'wolf_king',
+         'seer', 'witch', 'guard', 'hunter']
+SKILL_ROLES = ('wolf', 'wolf_king', 'seer', 'witch', 'guard')
+
+SPEECHES = [
+    "I am a villager. No.{a} voted against the seer yesterday and the logic does not hold up.",
+    "No.{a} claimed seer but gave no check result, I suspect No.{a} and No.{b}.",
+    "I have no special information. No.{a} and No.{b} keep defending each other.",
+    "I trust No.{a}; let's focus on No.{b} today and listen to the last speakers.",
+]
+
+
+# ==================== 合成对局 ====================
+
+def build_seat_script(role: str, rng: random.Random, days: int = 4) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    生成一个座位视角的事件序列
+
+    Args:
+        role: 本座位角色
+        rng: 随机数生成器
+        days: 天数
+
+    Returns:
+        [(endpoint, AgentReq字典)]，endpoint为 perceive / interact
+    """
+    me = rng.randint(1, 12)
+    my_name = f"No.{me}"
+    alive = [f"No.{i}" for i in range(1, 13)]
+    others = lambda: [p for p in alive if p != my_name]  # noqa: E731
+    script: List[Tuple[str, Dict[str, Any]]] = []
+
+    def add(endpoint: str, status: str, name: Optional[str] = None, message: Optional[str] = None,
+            day: int = 0) -> None:
+        script.append((endpoint, {'status': status, 'name': name, 'message': message,
+                                  'role': role, 'round': day}))
+
+    def speech() -> str:
+        a, b = rng.sample(others(), 2)
+        return rng.choice(SPEECHES).format(a=a[3:], b=b[3:])
+
+    teammates = ",".join(rng.sample(others(), 3)) if role in ('wolf', 'wolf_king') else ''
+    add('perceive', 'start', name=my_name, message=teammates)
+
+    for day in range(1, days + 1):
+        add('perceive', 'night', day=day)
+        if role in ('wolf', 'wolf_king'):
+            add('interact', 'wolf_speech', day=day)
+            for mate in teammates.split(","):
+                add('perceive', 'wolf_speech', name=mate, message=speech(), day=day)
+        if role in SKILL_ROLES:
+            if role == 'witch':
+                add('interact', 'skill', message=f"Tonight {rng.choice(others())} was killed", day=day)
+            else:
+                add('interact', 'skill', message=",".join(others()), day=day)
+            if role == 'seer':
+                add('perceive', 'skill_result', name=rng.choice(others()),
+                    message=rng.choice(['wolf', 'good']), day=day)
+
+        if day == 1:
+            add('interact', 'sheriff_election', day=day)
+            candidates = rng.sample(others(), 3)
+            add('perceive', 'sheriff_election', message=",".join(candidates), day=day)
+            for name in candidates:
+                add('perceive', 'sheriff_speech', name=name, message=speech(), day=day)
+            add('interact', 'sheriff_vote', message=",".join(candidates), day=day)
+            add('perceive', 'sheriff', name=rng.choice(candidates), day=day)
+
+        dead = rng.choice(others())
+        alive.remove(dead)
+        add('perceive', 'night_info', message=f"{dead} died last night", day=day)
+        add('perceive', 'discuss', day=day)
+        for name in others():
+            add('perceive', 'discuss', name=name, message=speech(), day=day)
+        add('interact', 'discuss', day=day)
+        add('interact', 'vote', message=",".join(others()), day=day)
+        for name in others():
+            add('perceive', 'vote', name=name, message=rng.choice(alive), day=day)
+        out = rng.choice(others())
+        alive.remove(out)
+        add('perceive', 'vote_result', name=out, message=out, day=day)
+
+    add('perceive', 'result', message="Game over. Winner: good camp.", day=days)
+    return script
+
+
+# ==================== HTTP与进程采样 ====================
+
+class AgentClient:
+    """一局一个持久连接（game_id非空时带X-Game-Id头，服务端按局分配角色实例）"""
+
+    def __init__(self, target: str, timeout: float, game_id: str = ''):
+        parsed = urlparse(target)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or SERVICE_PORT
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json'}
+        if game_id:
+            self.headers['X-Game-Id'] = game_id
+        self.conn: Optional[http.client.HTTPConnection] = None
+
+    def post(self, path: str, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        body = json.dumps(payload)
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request('POST', path, body=body, headers=self.headers)
+                resp = self.conn.getresponse()
+                data = resp.read()
+                try:
+                    parsed = json.loads(data) if data else {}
+                except ValueError:
+                    parsed = {}
+                return resp.status, parsed if isinstance(parsed, dict) else {}
+            except (ConnectionError, http.client.HTTPException):
+                # keep-alive连接被服务端关闭时重连一次
+                self.close()
+                if attempt:
+                    raise
+        return 0, {}
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class ProcessSampler:
+    """
+    后台采样服务进程的CPU时间与RSS（/proc，非Linux时不可用）
+
+    include_children=True 时统计进程及其子进程（分片部署的路由+工作进程）：
+    CPU含已退出子进程，内存按PSS累加（共享页按进程数分摊，不重复计算mmap模型）
+    """
+
+    def __init__(self, pid: Optional[int], interval: float = 0.5, include_children: bool = False):
+        self.pid = pid
+        self.interval = interval
+        self.include_children = include_children
+        self.rss_samples: List[float] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+    @property
+    def available(self) -> bool:
+        return bool(self.pid) and os.path.exists(f"/proc/{self.pid}/stat")
+
+    @staticmethod
+    def _stat_fields(pid: int) -> List[str]:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(')', 1)[1].split()
+
+    def _children(self) -> List[int]:
+        children = []
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                if int(self._stat_fields(int(entry))[1]) == self.pid:
+                    children.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+        return children
+
+    def cpu_seconds(self) -> float:
+        if not self.available:
+            return 0.0
+        fields = self._stat_fields(self.pid)
+        ticks = int(fields[11]) + int(fields[12])
+        if self.include_children:
+            # 已回收子进程计入cutime/cstime，存活子进程逐个累加
+            ticks += int(fields[13]) + int(fields[14])
+            for child in self._children():
+                try:
+                    child_fields = self._stat_fields(child)
+                    ticks += int(child_fields[11]) + int(child_fields[12])
+                except (OSError, IndexError, ValueError):
+                    continue
+        return ticks / self._ticks
+
+    @staticmethod
+    def _memory_kb(pid: int, key: str, path: str) -> int:
+        try:
+            with open(f"/proc/{pid}/{path}") as f:
+                for line in f:
+                    if line.startswith(key):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return 0
+
+    def rss_mb(self) -> float:
+        if not self.available:
+            return 0.0
+        if not self.include_children:
+            return self._memory_kb(self.pid, 'VmRSS:', 'status') / 1024.0
+        pids = [self.pid] + self._children()
+        pss = [self._memory_kb(pid, 'Pss:', 'smaps_rollup') for pid in pids]
+        if not any(pss):
+            pss = [self._memory_kb(pid, 'VmRSS:', 'status') for pid in pids]
+        return sum(pss) / 1024.0
+
+    def start(self) -> 'ProcessSampler':
+        self.rss_samples = []
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.interval):
+                self.rss_samples.append(self.rss_mb())
+
+        self._thread = threading.Thread(target=loop, name='rss-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))]
+
+
+# ==================== 阶段执行 ====================
+
+def play_game(target: str, rng: random.Random, days: int, think_ms: float,
+              timeout: float) -> Dict[str, Any]:
+    """跑一局合成对局，返回每个请求的 (endpoint, status, 毫秒, 是否成功)"""
+    role = rng.choice(ROLES)
+    client = AgentClient(target, timeout, game_id=f"load-{rng.getrandbits(48):012x}")
+    records = []
+    started = time.perf_counter()
+    try:
+        for endpoint, payload in build_seat_script(role, rng, days):
+            if think_ms:
+                time.sleep(think_ms / 1000.0)
+            t0 = time.perf_counter()
+            try:
+                status, body = client.post(f"/agent/{endpoint}", payload)
+                ok = status == 200 and body.get('success', True) is not False
+                error = None if ok else (f"http {status}" if status != 200 else 'success=false')
+            except Exception as e:
+                ok, error = False, type(e).__name__
+                client.close()
+            records.append((endpoint, payload['status'], (time.perf_counter() - t0) * 1000.0, error))
+    finally:
+        client.close()
+    return {'role': role, 'seconds': time.perf_counter() - started, 'records': records}
+
+
+def run_stage(target: str, concurrency: int, games_per_slot: int, days: int, think_ms: float,
+              timeout: float, sampler: ProcessSampler, seed: int) -> Dict[str, Any]:
+    """以K个并发槽位运行一个阶段"""
+    rngs = [random.Random(seed * 1009 + concurrency * 31 + slot) for slot in range(concurrency)]
+
+    def slot(index: int) -> List[Dict[str, Any]]:
+        return [play_game(target, rngs[index], days, think_ms, timeout) for _ in range(games_per_slot)]
+
+    cpu_before = sampler.cpu_seconds()
+    sampler.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        games = [game for result in pool.map(slot, range(concurrency)) for game in result]
+    wall = time.perf_counter() - started
+    sampler.stop()
+    cpu = sampler.cpu_seconds() - cpu_before
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    total = 0
+    for game in games:
+        for endpoint, status, ms, error in game['records']:
+            total += 1
+            latencies['all'].append(ms)
+            latencies[endpoint].append(ms)
+            if endpoint == 'interact':
+                latencies[f"interact.{status}"].append(ms)
+            if error:
+                errors[f"{endpoint}.{status}: {error}"] += 1
+
+    rss = sampler.rss_samples or [sampler.rss_mb()]
+    return {
+        'concurrency': concurrency,
+        'games': len(games),
+        'requests': total,
+        'wall_seconds': round(wall, 3),
+        'games_per_minute': round(len(games) / wall * 60.0, 3) if wall else 0.0,
+        'requests_per_second': round(total / wall, 2) if wall else 0.0,
+        'avg_game_seconds': round(sum(g['seconds'] for g in games) / len(games), 3) if games else 0.0,
+        'error_rate': round(sum(errors.values()) / total, 4) if total else 0.0,
+        'errors': dict(errors),
+        'latency_ms': {
+            key: {'p50': round(percentile(v, 50), 2), 'p95': round(percentile(v, 95), 2),
+                  'p99': round(percentile(v, 99), 2), 'count': len(v)}
+            for key, v in sorted(latencies.items())
+        },
+        'cpu_seconds': round(cpu, 3),
+        'cpu_utilization': round(cpu / wall, 3) if wall else 0.0,
+        'cpu_seconds_per_game': round(cpu / len(games), 3) if games else 0.0,
+        'rss_peak_mb': round(max(rss), 1),
+        'rss_mean_mb': round(sum(rss) / len(rss), 1),
+    }
+
+
+def find_knee(stages: List[Dict[str, Any]], min_gain: float = 0.5, p95_factor: float = 2.0,
+              max_error_rate: float = 0.01) -> Dict[str, Any]:
+    """
+    找吞吐拐点
+
+    第i阶段满足任一条件即视为越过拐点：
+    - 吞吐增益不足并发增益的 min_gain（如并发翻倍但吞吐只涨不到50%）
+    - 全部请求p95超过首阶段的 p95_factor 倍
+    - 错误率超过 max_error_rate
+
+    Args:
+        stages: run_stage 结果（按并发升序）
+        min_gain: 吞吐增益/并发增益 的下限
+        p95_factor: p95相对首阶段的放大上限
+        max_error_rate: 错误率上限
+
+    Returns:
+        {'knee_concurrency', 'recommended_concurrency', 'reason'}
+    """
+    if not stages:
+        return {'knee_concurrency': None, 'recommended_concurrency': None, 'reason': 'no stages'}
+    base_p95 = stages[0]['latency_ms'].get('all', {}).get('p95', 0.0)
+    for prev, cur in zip(stages, stages[1:]):
+        reasons = []
+        load_gain = cur['concurrency'] / prev['concurrency'] - 1.0
+        tput_gain = cur['games_per_minute'] / prev['games_per_minute'] - 1.0 if prev['games_per_minute'] else 0.0
+        if load_gain > 0 and tput_gain < min_gain * load_gain:
+            reasons.append(f"throughput +{tput_gain:.0%} for concurrency +{load_gain:.0%}")
+        p95 = cur['latency_ms'].get('all', {}).get('p95', 0.0)
+        if base_p95 and p95 > p95_factor * base_p95:
+            reasons.append(f"p95 {p95:.0f}ms > {p95_factor:g}x baseline {base_p95:.0f}ms")
+        if cur['error_rate'] > max_error_rate:
+            reasons.append(f"error rate {cur['error_rate']:.1%}")
+        if reasons:
+            return {'knee_concurrency': cur['concurrency'],
+                    'recommended_concurrency': prev['concurrency'],
+                    'reason': "; ".join(reasons)}
+    return {'knee_concurrency': None, 'recommended_concurrency': stages[-1]['concurrency'],
+            'reason': 'no knee within ramp'}
+
+
+def sizing(stages: List[Dict[str, Any]], idle_rss_mb: float, vcpu: float, mem_gb: float) -> Dict[str, Any]:
+    """按每局CPU占用与每局内存估算给定规格下的并发上限"""
+    if not stages:
+        return {}
+    top = stages[-1]
+    # 每个并发局持续占用的CPU核数（阶段CPU利用率 / 并发局数）
+    cores_per_game = top['cpu_utilization'] / top['concurrency'] if top['concurrency'] else 0.0
+    rss_per_game = max(0.0, (top['rss_peak_mb'] - idle_rss_mb) / top['concurrency']) if top['concurrency'] else 0.0
+    by_cpu = int(vcpu * 0.8 / cores_per_game) if cores_per_game > 0 else None
+    by_mem = int((mem_gb * 1024 * 0.8 - idle_rss_mb) / rss_per_game) if rss_per_game > 0 else None
+    return {
+        'vcpu': vcpu,
+        'mem_gb': mem_gb,
+        'idle_rss_mb': round(idle_rss_mb, 1),
+        'cores_per_concurrent_game': round(cores_per_game, 4),
+        'rss_mb_per_concurrent_game': round(rss_per_game, 2),
+        'max_games_by_cpu_80pct': by_cpu,
+        'max_games_by_mem_80pct': by_mem,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"Target: {report['target']}  LLM latency: {report['llm_latency']}  days/game: {report['days']}",
+        "",
+        f"{'K':>4} {'games':>6} {'games/min':>10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'int p95':>8} {'err%':>6} {'cpu%':>6} {'cpu s/game':>10} {'rss MB':>8}",
+        "-" * 108,
+    ]
+    for s in report['stages']:
+        all_ms = s['latency_ms'].get('all', {})
+        interact = s['latency_ms'].get('interact', {})
+        lines.append(
+            f"{s['concurrency']:>4} {s['games']:>6} {s['games_per_minute']:>10.2f} {s['requests_per_second']:>8.1f} "
+            f"{all_ms.get('p50', 0):>8.1f} {all_ms.get('p95', 0):>8.1f} {all_ms.get('p99', 0):>8.1f} "
+            f"{interact.get('p95', 0):>8.1f} {s['error_rate'] * 100:>6.2f} {s['cpu_utilization'] * 100:>6.1f} "
+            f"{s['cpu_seconds_per_game']:>10.3f} {s['rss_peak_mb']:>8.1f}")
+    knee = report['knee']
+    lines += ["", f"Knee: K={knee['knee_concurrency']}  recommended: K={knee['recommended_concurrency']}  "
+                  f"({knee['reason']})"]
+    size = report.get('sizing') or {}
+    if size:
+        lines.append(
+            f"Sizing {size['vcpu']:g} vCPU / {size['mem_gb']:g} GB: "
+            f"{size['cores_per_concurrent_game']:.3f} cores and {size['rss_mb_per_concurrent_game']:.1f} MB "
+            f"per concurrent game (idle RSS {size['idle_rss_mb']:.0f} MB) -> "
+            f"CPU allows ~{size['max_games_by_cpu_80pct']}, memory allows ~{size['max_games_by_mem_80pct']} "
+            f"concurrent games at 80% utilisation")
+    return "\n".join(lines)
+
+
+# ==================== 服务进程 ====================
+
+def wait_healthy(target: str, timeout: float = 120.0) -> bool:
+    deadline = time.time() + timeout
+    client = AgentClient(target, 5.0)
+    while time.time() < deadline:
+        try:
+            status, _ = client.post('/agent/checkHealth', {})
+            if status == 200:
+                return True
+        except Exception:
+            client.close()
+        time.sleep(0.5)
+    return False
+
+
+def launch_service(env: Dict[str, str], log_path: str, script: str = 'app.py') -> subprocess.Popen:
+    """以线上相同方式启动 werewolf/app.py（script='shard_router.py' 时启动分片部署）"""
+    full_env = dict(os.environ)
+    full_env.update(env)
+    full_env['PYTHONPATH'] = os.pathsep.join(filter(None, [PROJECT_ROOT, full_env.get('PYTHONPATH', '')]))
+    log = open(log_path, 'w')
+    return subprocess.Popen([sys.executable, os.path.join('werewolf', script)], cwd=PROJECT_ROOT,
+                            env=full_env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ramp', default='1,2,4,8,16', help='并发局数阶梯')
+    parser.add_argument('--games-per-slot', type=int, default=2)
+    parser.add_argument('--days', type=int, default=4)
+    parser.add_argument('--think-ms', type=float, default=0.0, help='请求间隔（模拟平台节奏）')
+    parser.add_argument('--timeout', type=float, default=120.0, help='单请求超时（秒）')
+    parser.add_argument('--llm-latency', default='lognormal:400,0.4', help='桩服务延迟分布')
+    parser.add_argument('--target', default='', help='已运行服务的地址（不启动app.py）')
+    parser.add_argument('--pid', type=int, default=0, help='--target模式下用于采样CPU/RSS的服务进程PID')
+    parser.add_argument('--vcpu', type=float, default=2.0)
+    parser.add_argument('--mem-gb', type=float, default=16.0)
+    parser.add_argument('--min-gain', type=float, default=0.5)
+    parser.add_argument('--p95-factor', type=float, default=2.0)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default='', help='容量报告写入JSON文件')
+    args = parser.parse_args(argv)
+
+    ramp = sorted({int(k) for k in args.ramp.split(',') if k.strip()})
+    server = process = None
+    target = args.target or f"http://127.0.0.1:{SERVICE_PORT}"
+    pid = args.pid or None
+    llm_latency = args.llm_latency if not args.target else 'external'
+
+    try:
+        if not args.target:
+            from fake_llm_server import FakeLLMConfig, FakeLLMServer
+            server = FakeLLMServer(FakeLLMConfig(port=0, mode='synth', latency=args.llm_latency,
+                                                 seed=args.seed)).start()
+            data_dir = tempfile.mkdtemp(prefix='werewolf-load-')
+            env = dict(server.client_env())
+            env.update({'DATA_DIR': data_dir, 'ML_MODEL_DIR': os.path.join(data_dir, 'ml_models'),
+                        'MODEL_NAME': os.getenv('MODEL_NAME', 'deepseek-chat'),
+                        'METRICS_PORT': '0', 'METRICS_FILE': ''})
+            log_path = os.path.join(data_dir, 'service.log')
+            process = launch_service(env, log_path)
+            pid = process.pid
+            print(f"Started app.py (pid {pid}), log: {log_path}")
+        if not wait_healthy(target):
+            print(f"Service at {target} did not become healthy")
+            return 1
+
+        sampler = ProcessSampler(pid)
+        idle_rss = sampler.rss_mb()
+        stages = []
+        for concurrency in ramp:
+            stage = run_stage(target, concurrency, args.games_per_slot, args.days, args.think_ms,
+                              args.timeout, sampler, args.seed)
+            stages.append(stage)
+            all_ms = stage['latency_ms'].get('all', {})
+            print(f"K={concurrency:<3} games/min {stage['games_per_minute']:.2f}  p95 {all_ms.get('p95', 0):.0f}ms  "
+                  f"errors {stage['error_rate']:.2%}  cpu {stage['cpu_utilization']:.0%}  rss {stage['rss_peak_mb']:.0f}MB")
+
+        report = {
+            'target': target,
+            'llm_latency': llm_latency,
+            'days': args.days,
+            'games_per_slot': args.games_per_slot,
+            'process_sampling': sampler.available,
+            'stages': stages,
+            'knee': find_knee(stages, args.min_gain, args.p95_factor, args.max_error_rate),
+            'sizing': sizing(stages, idle_rss, args.vcpu, args.mem_gb) if sampler.available else {},
+        }
+        print()
+        print(format_report(report))
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"\nCapacity report written to {args.json}")
+        return 0
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if server is not None:
+            server.stop()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+内存soak测试（长驻进程泄漏检测）
+
+用模拟器（benchmarks/game_simulator.py）在同一进程内顺序跑N局，七种角色
+智能体跨局复用（与线上长驻容器一致），LLM请求打到进程内桩服务。
+每局结束用 werewolf.common.memory_profiler 采样RSS/gc对象数（--tracemalloc
+时另外对比快照，输出增长最多的分配点），最后断言：
+
+- 预热后每局RSS增长（最小二乘斜率）不超过 --max-growth-kb
+  （PerformanceValidator.validate_memory_growth）
+- 峰值RSS不超过 --max-rss-mb（PerformanceValidator.validate_memory_usage）
+
+用法:
+    python benchmarks/memory_soak.py [--games 500] [--warmup 20] [--max-growth-kb 64]
+        [--max-rss-mb 1024] [--tracemalloc] [--json soak.json]
+
+退出码: 0=内存有界, 1=超出限制
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from typing import List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+import game_simulator  # noqa: E402  (设置sys.path)
+
+from werewolf.common.memory_profiler import MemoryProfiler, growth_slope  # noqa: E402
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=20, help='计算增长斜率时跳过的前几局')
+    parser.add_argument('--max-growth-kb', type=float, default=64.0)
+    parser.add_argument('--max-rss-mb', type=float, default=1024.0)
+    parser.add_argument('--tracemalloc', action='store_true', help='对比tracemalloc快照（较慢）')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--max-days', type=int, default=15)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default='')
+    parser.add_argument('--log-level', default='CRITICAL')
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix='werewolf-soak-')
+    os.environ['DATA_DIR'] = data_dir
+    os.environ.setdefault('ML_MODEL_DIR', os.path.join(data_dir, 'ml_models'))
+    os.environ.setdefault('MODEL_NAME', 'deepseek-chat')
+    # 模拟器每局向12个座位发送RESULT，全局钩子会重复采样；这里由脚本每局采样一次
+    os.environ['MEMORY_PROFILE'] = 'off'
+
+    from fake_llm_server import FakeLLMConfig, FakeLLMServer
+    from werewolf.common.structured_logging import configure_logging
+    from werewolf.hunter.validators import PerformanceValidator
+
+    server = FakeLLMServer(FakeLLMConfig(port=0, mode='synth', seed=args.seed)).start()
+    os.environ.update(server.client_env())
+    configure_logging(level=args.log_level, fmt='text')
+
+    profiler = MemoryProfiler(mode='tracemalloc' if args.tracemalloc else 'rss', top=args.top,
+                              warmup=args.warmup, max_samples=args.games + 1)
+    pool = game_simulator.build_agent_pool()
+    started = time.perf_counter()
+    winners = {}
+    try:
+        for index in range(args.games):
+            result = game_simulator.GameMaster(index, args.seed, args.max_days, agent_pool=pool).run()
+            winners[result['winner']] = winners.get(result['winner'], 0) + 1
+            sample = profiler.game_boundary(game_id=f"soak-{index}", role='all')
+            if index % 25 == 0 or index == args.games - 1:
+                print(f"game {index + 1:>4}/{args.games}  rss {sample.rss_bytes / 1048576:.1f}MB  "
+                      f"gc objects {sample.gc_objects}  growth {profiler.growth_per_game() / 1024:.1f}KB/game  "
+                      f"({time.perf_counter() - started:.0f}s)", flush=True)
+    finally:
+        server.stop()
+
+    report = profiler.report()
+    profiler.stop()
+    steady = [s['rss_bytes'] for s in report['samples'] if s['game_index'] >= args.warmup]
+    half = len(steady) // 2
+    report.update({
+        'winners': winners,
+        'wall_seconds': round(time.perf_counter() - started, 1),
+        'growth_first_half_bytes': growth_slope(steady[:half]),
+        'growth_second_half_bytes': growth_slope(steady[half:]),
+    })
+
+    growth_ok, growth_msg = PerformanceValidator.validate_memory_growth(
+        report['growth_per_game_bytes'], int(args.max_growth_kb * 1024))
+    rss_ok, rss_msg = PerformanceValidator.validate_memory_usage(
+        report['rss_peak_bytes'], int(args.max_rss_mb * 1024 * 1024))
+
+    print()
+    print(f"Games: {report['games']}  wall: {report['wall_seconds']}s  winners: {winners}")
+    print(f"RSS first/last/peak: {report['rss_first_bytes'] / 1048576:.1f} / "
+          f"{report['rss_last_bytes'] / 1048576:.1f} / {report['rss_peak_bytes'] / 1048576:.1f} MB")
+    print(f"Growth after warmup: {report['growth_per_game_bytes'] / 1024:.2f} KB/game "
+          f"(first half {report['growth_first_half_bytes'] / 1024:.2f}, "
+          f"second half {report['growth_second_half_bytes'] / 1024:.2f}); "
+          f"gc objects {report['gc_objects_growth_per_game']:+.1f}/game")
+    if args.tracemalloc:
+        print(f"Traced growth: {report['traced_growth_per_game_bytes'] / 1024:.2f} KB/game; "
+              f"top allocators in the last game:")
+        for item in report['last_top_growth']:
+            print(f"  +{item['size_diff'] / 1024:8.1f}KB {item['count_diff']:+6d} blocks  {item['location']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    failures = [msg for ok, msg in ((growth_ok, growth_msg), (rss_ok, rss_msg)) if not ok]
+    for msg in failures:
+        print(f"FAIL: {msg}")
+    if not failures:
+        print("PASS: memory bounded")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
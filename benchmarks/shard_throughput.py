@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+单进程 vs 多进程分片吞吐对比
+
+用 load_test 的合成对局模拟器（每局一个座位视角的完整事件序列，LLM指向
+进程内桩服务）分别压测两种部署形态：
+
+- single: werewolf/app.py 单个uvicorn进程
+- sharded: werewolf/shard_router.py 前置路由 + --workers 个工作进程
+  （每局带X-Game-Id，按一致性哈希粘滞到同一工作进程）
+
+两种形态都预热全部角色，并先跑一轮不计入结果的热身阶段；之后在相同的
+并发局数与随机种子下计时，对比吞吐（局/分钟）、延迟分位数、错误率、
+CPU利用率（路由+全部工作进程）与内存（PSS累加）。
+CPU密集的打分/ML路径占比越高、LLM延迟越低，分片收益越明显；
+单核机器上分片只会增加转发开销。
+
+用法:
+    python benchmarks/shard_throughput.py [--workers 2] [--concurrency 8] [--games-per-slot 3]
+        [--days 3] [--llm-latency fixed:5] [--json out.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+from load_test import SERVICE_PORT, ProcessSampler, launch_service, run_stage, wait_healthy  # noqa: E402
+
+
+def measure(mode: str, workers: int, base_env: Dict[str, str], args: argparse.Namespace) -> Dict[str, Any]:
+    """启动一种部署形态，热身后跑一个计时阶段"""
+    target = f"http://127.0.0.1:{SERVICE_PORT}"
+    env = dict(base_env)
+    script = 'app.py'
+    if mode == 'sharded':
+        env['SHARD_WORKERS'] = str(workers)
+        script = 'shard_router.py'
+    log_path = os.path.join(env['DATA_DIR'], f"{mode}.log")
+    process = launch_service(env, log_path, script=script)
+    try:
+        if not wait_healthy(target, timeout=args.startup_timeout):
+            raise RuntimeError(f"{mode} service did not become healthy, see {log_path}")
+        sampler = ProcessSampler(process.pid, include_children=True)
+        # 等后台预热完成，再跑一轮热身（各进程首次请求的懒加载/JIT路径不计入结果）
+        time.sleep(args.settle)
+        run_stage(target, args.concurrency, 1, args.days, 0.0, args.timeout, sampler, args.seed + 1)
+        idle_mb = sampler.rss_mb()
+        stage = run_stage(target, args.concurrency, args.games_per_slot, args.days, 0.0,
+                          args.timeout, sampler, args.seed)
+        stage.update({'mode': mode, 'workers': workers if mode == 'sharded' else 1,
+                      'memory_before_mb': round(idle_mb, 1), 'log': log_path})
+        return stage
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=60)
+        except Exception:
+            process.kill()
+
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'mode':<10}{'procs':>6}{'games':>7}{'games/min':>11}{'p50 ms':>9}{'p95 ms':>9}"
+             f"{'err%':>7}{'cpu%':>7}{'cpu s/game':>11}{'PSS MB':>9}"]
+    for r in results:
+        all_ms = r['latency_ms'].get('all', {})
+        lines.append(
+            f"{r['mode']:<10}{r['workers']:>6}{r['games']:>7}{r['games_per_minute']:>11.2f}"
+            f"{all_ms.get('p50', 0):>9.1f}{all_ms.get('p95', 0):>9.1f}{r['error_rate'] * 100:>7.2f}"
+            f"{r['cpu_utilization'] * 100:>7.1f}{r['cpu_seconds_per_game']:>11.3f}{r['rss_peak_mb']:>9.1f}")
+    by_mode = {r['mode']: r for r in results}
+    if 'single' in by_mode and 'sharded' in by_mode and by_mode['single']['games_per_minute']:
+        speedup = by_mode['sharded']['games_per_minute'] / by_mode['single']['games_per_minute']
+        lines += ['', f"Sharded throughput: {speedup:.2f}x single process "
+                      f"({os.cpu_count()} CPUs visible to this benchmark)"]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--modes', default='single,sharded')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发局数')
+    parser.add_argument('--games-per-slot', type=int, default=3)
+    parser.add_argument('--days', type=int, default=3)
+    parser.add_argument('--llm-latency', default='fixed:5', help='桩服务延迟分布（越低越偏CPU密集）')
+    parser.add_argument('--timeout', type=float, default=120.0, help='单请求超时（秒）')
+    parser.add_argument('--startup-timeout', type=float, default=180.0)
+    parser.add_argument('--settle', type=float, default=5.0, help='健康后等待后台预热的秒数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default='')
+    args = parser.parse_args(argv)
+
+    from fake_llm_server import FakeLLMConfig, FakeLLMServer
+    server = FakeLLMServer(FakeLLMConfig(port=0, mode='synth', latency=args.llm_latency, seed=args.seed)).start()
+    data_dir = tempfile.mkdtemp(prefix='werewolf-shard-')
+    base_env = dict(server.client_env())
+    base_env.update({'DATA_DIR': data_dir, 'ML_MODEL_DIR': os.path.join(data_dir, 'ml_models'),
+                     'MODEL_NAME': os.getenv('MODEL_NAME', 'deepseek-chat'),
+                     'METRICS_PORT': '0', 'METRICS_FILE': '',
+                     'ROLE_AGENT_PREWARM': 'all', 'ROLE_AGENT_PREWARM_DELAY': '0'})
+
+    results = []
+    try:
+        for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+            result = measure(mode, args.workers, base_env, args)
+            results.append(result)
+            print(f"{mode}: {result['games_per_minute']:.2f} games/min, "
+                  f"errors {result['error_rate']:.2%}, cpu {result['cpu_utilization']:.0%}", flush=True)
+    finally:
+        server.stop()
+
+    print()
+    print(format_report(results))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'llm_latency': args.llm_latency, 'concurrency': args.concurrency,
+                       'cpu_count': os.cpu_count(), 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -90,22 +90,30 @@ class GoldenPathLearningSystem:
         except Exception as e:
             logger.error(f"Failed to collect game data: {e}")
     
+    def _count_games(self) -> int:
+        """统计已收集的游戏记录数（未合并的game_*.json + 压缩分段中的记录）"""
+        try:
+            from werewolf.common.data_compaction import DataCompactor
+            return DataCompactor(str(self.data_dir)).count_records('game')
+        except ImportError:
+            return len(list(self.data_dir.glob("game_*.json")))
+    
     def retrain_models(self) -> None:
         """
         重训练模型（占位符实现）
         """
         try:
-            # 统计数据文件数量
-            data_files = list(self.data_dir.glob("game_*.json"))
+            # 统计数据记录数量（含已合并到压缩分段的记录）
+            total_games = self._count_games()
             
-            if len(data_files) < self.min_samples:
+            if total_games < self.min_samples:
                 logger.info(
                     f"Not enough samples for training: "
-                    f"{len(data_files)}/{self.min_samples}"
+                    f"{total_games}/{self.min_samples}"
                 )
                 return
             
-            logger.info(f"Starting model retraining with {len(data_files)} samples...")
+            logger.info(f"Starting model retraining with {total_games} samples...")
             
             # 在轻量级版本中，这里只是记录日志
             # 实际的ML训练由各个角色智能体自己处理
@@ -117,13 +125,13 @@ class GoldenPathLearningSystem:
     def print_statistics(self) -> None:
         """打印统计信息"""
         try:
-            # 统计数据文件
-            data_files = list(self.data_dir.glob("game_*.json"))
+            # 统计数据记录
+            total_games = self._count_games()
             
             logger.info("=" * 60)
             logger.info("Learning System Statistics")
             logger.info("=" * 60)
-            logger.info(f"  Total games collected: {len(data_files)}")
+            logger.info(f"  Total games collected: {total_games}")
             logger.info(f"  Games since last train: {self.game_count % self.retrain_interval}")
             logger.info(f"  Current stage: {self.current_stage}")
             logger.info(f"  Golden path enabled: {self.enable_golden_path}")
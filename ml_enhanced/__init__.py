@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+ML增强模块
+
+- feature_extractor: 19维标准化特征模式与批量提取
+- ensemble_detector: 集成狼人检测器
+- anomaly_detector: 行为异常检测器
+- bayesian_inference: 贝叶斯行为分析器
+"""
+
+from ml_enhanced.feature_extractor import (
+    FEATURE_NAMES,
+    FEATURE_SCHEMA_HASH,
+    N_FEATURES,
+    StandardFeatureExtractor,
+)
+from ml_enhanced.ensemble_detector import WolfDetectionEnsemble
+from ml_enhanced.anomaly_detector import BehaviorAnomalyDetector
+from ml_enhanced.bayesian_inference import BayesianAnalyzer
+
+__all__ = [
+    'FEATURE_NAMES',
+    'FEATURE_SCHEMA_HASH',
+    'N_FEATURES',
+    'StandardFeatureExtractor',
+    'WolfDetectionEnsemble',
+    'BehaviorAnomalyDetector',
+    'BayesianAnalyzer',
+]
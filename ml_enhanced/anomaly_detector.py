@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+行为异常检测器
+
+以好人玩家的行为分布训练IsolationForest，
+偏离好人分布越远的玩家狼人概率越高
+"""
+
+import logging
+from typing import Any
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from ml_enhanced.feature_extractor import to_feature_matrix
+
+logger = logging.getLogger(__name__)
+
+
+class BehaviorAnomalyDetector:
+    """行为异常检测器"""
+
+    MIN_FIT_SAMPLES = 5  # 最少训练样本数
+
+    def __init__(self, contamination: float = 0.33, random_state: int = 42, sharpness: float = 10.0):
+        """
+        Args:
+            contamination: 预期异常比例（狼人占比）
+            random_state: 随机种子
+            sharpness: 异常分数到概率的sigmoid陡度
+        """
+        if not 0.0 < contamination < 0.5:
+            logger.warning(f"Invalid contamination {contamination}, clamped into (0, 0.5)")
+            contamination = min(max(contamination, 0.01), 0.49)
+        self.contamination = contamination
+        self.random_state = random_state
+        self.sharpness = sharpness
+        self.scaler = StandardScaler()
+        self.model = None
+        self.is_fitted = False
+
+    def fit(self, rows: Any) -> bool:
+        """
+        以好人玩家数据训练
+
+        Args:
+            rows: 好人玩家特征数据字典列表（或特征矩阵）
+
+        Returns:
+            bool: 是否训练成功
+        """
+        X = to_feature_matrix(rows)
+        if X.shape[0] < self.MIN_FIT_SAMPLES:
+            logger.warning(
+                f"Anomaly detector needs >= {self.MIN_FIT_SAMPLES} samples, got {X.shape[0]}"
+            )
+            return False
+
+        X_scaled = self.scaler.fit_transform(X)
+        model = IsolationForest(
+            n_estimators=100,
+            contamination=self.contamination,
+            random_state=self.random_state,
+            n_jobs=1
+        )
+        model.fit(X_scaled)
+
+        self.model = model
+        self.is_fitted = True
+        logger.info(f"✓ Anomaly detector fitted on {X.shape[0]} samples")
+        return True
+
+    def get_wolf_probabilities(self, rows: Any) -> np.ndarray:
+        """
+        批量计算狼人概率
+
+        decision_function < 0 表示异常，经sigmoid映射到(0, 1)，
+        决策边界处概率为0.5
+
+        Args:
+            rows: 玩家特征数据字典列表（或特征矩阵）
+
+        Returns:
+            np.ndarray: 每行的狼人概率，未训练时全部为0.5
+        """
+        X = to_feature_matrix(rows)
+        if not self.is_fitted or self.model is None:
+            return np.full(X.shape[0], 0.5)
+
+        scores = self.model.decision_function(self.scaler.transform(X))
+        return 1.0 / (1.0 + np.exp(self.sharpness * scores))
+
+    def get_wolf_probability(self, player_data: Any) -> float:
+        """
+        计算单个玩家的狼人概率
+
+        Args:
+            player_data: 玩家特征数据字典
+
+        Returns:
+            float: 狼人概率 (0.0-1.0)
+        """
+        return float(self.get_wolf_probabilities([player_data])[0])
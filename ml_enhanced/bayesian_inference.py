@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+贝叶斯行为分析器
+
+无需训练：以狼人先验比例为起点，每个证据特征按
+(值 - 中性点) / 尺度 转换为对数似然比并累加（朴素贝叶斯），
+整批玩家一次矩阵运算完成
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from ml_enhanced.feature_extractor import FEATURE_NAMES, N_FEATURES, to_feature_matrix
+
+logger = logging.getLogger(__name__)
+
+
+# 证据特征: (中性点, 尺度, 对数似然比权重)，权重为正表示值越大越像狼
+DEFAULT_EVIDENCE: Dict[str, Tuple[float, float, float]] = {
+    'trust_score': (50.0, 25.0, -0.8),
+    'vote_accuracy': (0.5, 0.25, -0.6),
+    'contradiction_count': (1.0, 2.0, 0.5),
+    'injection_attempts': (0.0, 1.0, 0.9),
+    'false_quotation_count': (0.0, 1.0, 0.6),
+    'aggressive_score': (0.5, 0.25, 0.3),
+    'defensive_score': (0.5, 0.25, 0.2),
+    'night_survival_rate': (0.5, 0.25, 0.3),
+    'speech_consistency_score': (0.5, 0.25, -0.4),
+}
+
+
+class BayesianAnalyzer:
+    """贝叶斯行为分析器"""
+
+    MAX_EVIDENCE_Z = 3.0  # 单个证据的标准化上限，防止极端值主导
+
+    def __init__(self, prior: float = 4 / 12, evidence: Optional[Dict[str, Tuple[float, float, float]]] = None):
+        """
+        Args:
+            prior: 狼人先验概率（12人局4狼）
+            evidence: 证据配置 {特征名: (中性点, 尺度, 权重)}
+        """
+        prior = min(max(prior, 1e-3), 1 - 1e-3)
+        self.prior = prior
+        self.prior_log_odds = float(np.log(prior / (1 - prior)))
+
+        evidence = evidence or DEFAULT_EVIDENCE
+        unknown = set(evidence) - set(FEATURE_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown evidence features: {sorted(unknown)}")
+
+        # 预先展开为与特征模式对齐的向量，推理时只做矩阵运算
+        self._center = np.zeros(N_FEATURES)
+        self._scale = np.ones(N_FEATURES)
+        self._weight = np.zeros(N_FEATURES)
+        for name, (center, scale, weight) in evidence.items():
+            idx = FEATURE_NAMES.index(name)
+            self._center[idx] = center
+            self._scale[idx] = scale if scale > 0 else 1.0
+            self._weight[idx] = weight
+
+    def analyze_players(self, rows: Any) -> np.ndarray:
+        """
+        批量计算后验狼人概率
+
+        Args:
+            rows: 玩家特征数据字典列表（或特征矩阵）
+
+        Returns:
+            np.ndarray: 每行的后验狼人概率
+        """
+        X = to_feature_matrix(rows)
+        z = np.clip((X - self._center) / self._scale, -self.MAX_EVIDENCE_Z, self.MAX_EVIDENCE_Z)
+        log_odds = self.prior_log_odds + z @ self._weight
+        return 1.0 / (1.0 + np.exp(-log_odds))
+
+    def analyze_player(self, player_data: Any) -> float:
+        """
+        计算单个玩家的后验狼人概率
+
+        Args:
+            player_data: 玩家特征数据字典
+
+        Returns:
+            float: 狼人概率 (0.0-1.0)
+        """
+        return float(self.analyze_players([player_data])[0])
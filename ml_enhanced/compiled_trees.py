@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+树集成编译推理
+
+把训练好的随机森林 / 梯度提升 / SGD逻辑回归导出为扁平NumPy数组
+（feature, threshold, left, right, value），用向量化遍历内核在
+所有行 × 所有树上同时前进一层，绕开sklearn每次调用的参数校验、
+线程池调度与逐树Python循环。
+
+也可以生成只依赖NumPy的纯Python模块（generate_python_source），
+部署时无需sklearn即可推理。
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+
+from ml_enhanced.feature_extractor import FEATURE_SCHEMA_HASH, N_FEATURES, _LOWER, _UPPER
+
+logger = logging.getLogger(__name__)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # 裁剪避免exp溢出告警，|x|>500时结果在双精度下已饱和
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -500, 500)))
+
+
+class CompiledForest:
+    """
+    扁平化的树集合
+
+    叶子节点被改写为自环（threshold=+inf、left=right=自身），
+    遍历时不需要判断是否到达叶子，固定迭代max_depth次即可
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, value: np.ndarray, roots: np.ndarray, max_depth: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_trees(cls, trees: List[Any], leaf_value) -> 'CompiledForest':
+        """
+        Args:
+            trees: sklearn决策树估计器列表
+            leaf_value: 函数 tree_ -> 每个节点的输出值数组
+        """
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in trees:
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n) + offset
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.intp))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.intp))
+            values.append(np.asarray(leaf_value(tree), dtype=float))
+            roots.append(offset)
+
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds),
+            np.concatenate(lefts), np.concatenate(rights),
+            np.concatenate(values), np.asarray(roots, dtype=np.intp), max_depth,
+        )
+
+    def leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """
+        向量化遍历
+
+        Args:
+            X: 形状为(n, n_features)的特征矩阵
+
+        Returns:
+            np.ndarray: 形状为(n, n_trees)的叶子输出值
+        """
+        # sklearn内部以float32比较阈值，保持一致才能逐位等价
+        X32 = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(X32.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X32.shape[0], self.roots.shape[0]))
+        for _ in range(self.max_depth):
+            go_left = X32[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'feature': self.feature, 'threshold': self.threshold,
+            'left': self.left, 'right': self.right,
+            'value': self.value, 'roots': self.roots,
+        }
+
+
+class CompiledModel:
+    """单个已编译模型（输出类别1的概率）"""
+
+    def __init__(self, kind: str, forest: Optional[CompiledForest] = None,
+                 params: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            kind: 'forest'（树平均概率）/ 'boosting'（sigmoid(init + lr*Σ)）/ 'linear'
+            forest: 扁平树集合（linear时为None）
+            params: 额外参数（init/learning_rate 或 mean/scale/coef/intercept）
+        """
+        self.kind = kind
+        self.forest = forest
+        self.params = params or {}
+
+    def predict_proba1(self, X: np.ndarray) -> np.ndarray:
+        if self.kind == 'forest':
+            return self.forest.leaf_values(X).mean(axis=1)
+        if self.kind == 'boosting':
+            raw = self.params['init'] + self.params['learning_rate'] * self.forest.leaf_values(X).sum(axis=1)
+            return _sigmoid(raw)
+        if self.kind == 'linear':
+            p = self.params
+            return _sigmoid(((X - p['mean']) / p['scale']) @ p['coef'] + p['intercept'])
+        raise ValueError(f"Unknown compiled model kind: {self.kind}")
+
+
+def _forest_leaf_proba(tree) -> np.ndarray:
+    """分类树节点的类别1概率（与DecisionTreeClassifier.predict_proba的归一化一致）"""
+    counts = tree.value[:, 0, :]
+    totals = counts.sum(axis=1)
+    totals[totals == 0] = 1.0
+    return counts[:, 1] / totals
+
+
+def compile_model(model: Any) -> Optional[CompiledModel]:
+    """
+    编译单个模型
+
+    Args:
+        model: 已训练的sklearn模型（或带scaler/model属性的在线逻辑回归）
+
+    Returns:
+        CompiledModel，不支持的模型类型返回None
+    """
+    if isinstance(model, RandomForestClassifier):
+        if not hasattr(model, 'estimators_') or list(model.classes_) != [0, 1]:
+            return None
+        return CompiledModel('forest', CompiledForest.from_trees(model.estimators_, _forest_leaf_proba))
+
+    if isinstance(model, GradientBoostingClassifier):
+        if model.estimators_.shape[1] != 1 or getattr(model, 'loss', 'log_loss') not in ('log_loss', 'deviance'):
+            return None
+        init = float(model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0, 0])
+        forest = CompiledForest.from_trees(
+            list(model.estimators_[:, 0]), lambda tree: tree.value[:, 0, 0]
+        )
+        return CompiledModel('boosting', forest, {'init': init, 'learning_rate': float(model.learning_rate)})
+
+    scaler = getattr(model, 'scaler', None)
+    linear = getattr(model, 'model', None)
+    if scaler is not None and hasattr(linear, 'coef_') and getattr(linear, 'loss', None) == 'log_loss':
+        return CompiledModel('linear', params={
+            'mean': scaler.mean_.copy(),
+            'scale': scaler.scale_.copy(),
+            'coef': linear.coef_[0].copy(),
+            'intercept': float(linear.intercept_[0]),
+        })
+
+    return None
+
+
+class CompiledEnsemble:
+    """
+    已编译的加权集成
+
+    无法编译的成员（如XGBoost）保留原模型的predict_proba，
+    保证与未编译路径结果一致
+    """
+
+    def __init__(self, members: List[Tuple[str, float, Any]]):
+        """
+        Args:
+            members: [(模型名, 权重, CompiledModel或原始模型)]
+        """
+        self.members = members
+        self.total_weight = sum(weight for _, weight, _ in members)
+
+    @classmethod
+    def compile(cls, models: Dict[str, Any], weights: Dict[str, float]) -> 'CompiledEnsemble':
+        members = []
+        for name, model in models.items():
+            weight = float(weights.get(name, 0.0))
+            if weight <= 0 or (name == 'rf' and not hasattr(model, 'estimators_')):
+                continue
+            compiled = compile_model(model)
+            if compiled is None:
+                logger.debug(f"Model '{name}' not compilable, keeping sklearn path")
+            members.append((name, weight, compiled if compiled is not None else model))
+        return cls(members)
+
+    @property
+    def fully_compiled(self) -> bool:
+        return all(isinstance(member, CompiledModel) for _, _, member in self.members)
+
+    def predict_proba1(self, X: np.ndarray) -> np.ndarray:
+        if self.total_weight <= 0:
+            return np.full(X.shape[0], 0.5)
+        probs = np.zeros(X.shape[0], dtype=float)
+        for _, weight, member in self.members:
+            if isinstance(member, CompiledModel):
+                probs += weight * member.predict_proba1(X)
+            else:
+                probs += weight * member.predict_proba(X)[:, 1]
+        return np.clip(probs / self.total_weight, 0.0, 1.0)
+
+    def verify(self, reference, X: Optional[np.ndarray] = None, atol: float = 1e-9,
+               n_probe: int = 64, seed: int = 0) -> float:
+        """
+        与参考实现逐行比较
+
+        Args:
+            reference: 函数 X -> 概率数组（sklearn路径）
+            X: 比较用特征矩阵，默认在各特征合法范围内均匀采样
+            atol: 允许的最大绝对误差
+
+        Returns:
+            float: 最大绝对误差
+
+        Raises:
+            ValueError: 误差超过atol
+        """
+        if X is None:
+            X = np.random.default_rng(seed).uniform(_LOWER, _UPPER, size=(n_probe, N_FEATURES))
+        max_err = float(np.max(np.abs(self.predict_proba1(X) - reference(X)))) if len(X) else 0.0
+        if max_err > atol:
+            raise ValueError(f"Compiled ensemble deviates from sklearn: max_err={max_err:.3e}")
+        return max_err
+
+    def generate_python_source(self) -> str:
+        """
+        生成只依赖NumPy的独立推理模块源码
+
+        Returns:
+            str: 模块源码，提供 predict_wolf_probabilities(X) 函数
+
+        Raises:
+            ValueError: 存在无法编译的成员
+        """
+        if not self.fully_compiled:
+            raise ValueError("Ensemble contains non-compilable members, cannot generate code")
+
+        def arr(values: np.ndarray, dtype: str) -> str:
+            body = np.array2string(
+                np.asarray(values).ravel(), separator=',', threshold=np.inf,
+                max_line_width=120, floatmode='unique'
+            ).replace('inf', 'np.inf')
+            return f"np.array({body}, dtype={dtype})"
+
+        lines = [
+            "# -*- coding: utf-8 -*-",
+            '"""自动生成的狼人概率推理模块（请勿手工修改）"""',
+            "import numpy as np",
+            "",
+            f"SCHEMA_HASH = {FEATURE_SCHEMA_HASH!r}",
+            "",
+            "",
+            "def _sigmoid(x):",
+            "    return 1.0 / (1.0 + np.exp(-np.clip(x, -500, 500)))",
+            "",
+            "",
+            "def _leaf_values(X32, feature, threshold, left, right, value, roots, max_depth):",
+            "    rows = np.arange(X32.shape[0])[:, None]",
+            "    node = np.broadcast_to(roots, (X32.shape[0], roots.shape[0]))",
+            "    for _ in range(max_depth):",
+            "        go_left = X32[rows, feature[node]] <= threshold[node]",
+            "        node = np.where(go_left, left[node], right[node])",
+            "    return value[node]",
+            "",
+            "",
+            "MEMBERS = []",
+        ]
+        for name, weight, member in self.members:
+            entry = {'name': repr(name), 'weight': repr(weight), 'kind': repr(member.kind)}
+            if member.forest is not None:
+                f = member.forest
+                entry.update({
+                    'feature': arr(f.feature, 'np.intp'),
+                    'threshold': arr(f.threshold, 'np.float64'),
+                    'left': arr(f.left, 'np.intp'),
+                    'right': arr(f.right, 'np.intp'),
+                    'value': arr(f.value, 'np.float64'),
+                    'roots': arr(f.roots, 'np.intp'),
+                    'max_depth': repr(f.max_depth),
+                })
+            for key, val in member.params.items():
+                entry[key] = arr(val, 'np.float64') if isinstance(val, np.ndarray) else repr(val)
+            lines.append("MEMBERS.append({")
+            lines.extend(f"    {key!r}: {val}," for key, val in entry.items())
+            lines.append("})")
+
+        lines += [
+            "",
+            "",
+            "def predict_wolf_probabilities(X):",
+            "    X = np.asarray(X, dtype=np.float64)",
+            "    if X.ndim == 1:",
+            "        X = X.reshape(1, -1)",
+            "    X32 = X.astype(np.float32).astype(np.float64)",
+            "    probs = np.zeros(X.shape[0])",
+            "    total = 0.0",
+            "    for m in MEMBERS:",
+            "        if m['kind'] == 'linear':",
+            "            p = _sigmoid(((X - m['mean']) / m['scale']) @ m['coef'] + m['intercept'])",
+            "        else:",
+            "            leaves = _leaf_values(X32, m['feature'], m['threshold'], m['left'], m['right'],",
+            "                                  m['value'], m['roots'], m['max_depth'])",
+            "            if m['kind'] == 'forest':",
+            "                p = leaves.mean(axis=1)",
+            "            else:",
+            "                p = _sigmoid(m['init'] + m['learning_rate'] * leaves.sum(axis=1))",
+            "        probs += m['weight'] * p",
+            "        total += m['weight']",
+            "    if total <= 0:",
+            "        return np.full(X.shape[0], 0.5)",
+            "    return np.clip(probs / total, 0.0, 1.0)",
+            "",
+        ]
+        return "\n".join(lines)
@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+"""
+集成狼人检测器
+
+RandomForest + GradientBoosting（可选XGBoost）加权集成，
+输入统一经过StandardFeatureExtractor，支持批量预测
+
+多进程部署（werewolf/shard_router.py）时设置 ML_MODEL_MMAP=true：
+模型文件与编译后的扁平数组（<模型文件>.compiled）以只读mmap方式加载，
+各工作进程共享同一份页缓存；模型文件通过原子替换写入，不影响已映射的读者
+"""
+
+import os
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import joblib
+import sklearn
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from ml_enhanced.compiled_trees import CompiledEnsemble
+from ml_enhanced.feature_extractor import (
+    FEATURE_SCHEMA_HASH,
+    StandardFeatureExtractor,
+    to_feature_matrix,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    from xgboost import XGBClassifier
+    XGB_AVAILABLE = True
+except ImportError:
+    XGB_AVAILABLE = False
+
+DEFAULT_WEIGHTS = {'rf': 0.4, 'gb': 0.4, 'xgb': 0.2}
+
+# 增量模式下的模型权重（warm-start随机森林 + 在线逻辑回归）
+INCREMENTAL_WEIGHTS = {'rf': 0.5, 'sgd': 0.5}
+
+
+def _mmap_mode() -> Optional[str]:
+    """模型加载的mmap模式（ML_MODEL_MMAP=true时只读映射）"""
+    return 'r' if os.getenv('ML_MODEL_MMAP', 'false').lower() == 'true' else None
+
+
+def _file_signature(path: str) -> List[int]:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _atomic_dump(payload: Any, path: str) -> None:
+    """先写临时文件再替换，已mmap旧文件的进程继续读取旧inode"""
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        joblib.dump(payload, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _load_configured_weights() -> Dict[str, float]:
+    """从全局配置读取集成权重（配置不可用时使用默认值）"""
+    try:
+        from config import config
+        return dict(config.ENSEMBLE_WEIGHTS)
+    except Exception as e:
+        logger.debug(f"Ensemble weights config unavailable, using defaults: {e}")
+        return dict(DEFAULT_WEIGHTS)
+
+
+class _ScaledSGDClassifier:
+    """带在线标准化的SGD逻辑回归（两者均支持partial_fit）"""
+
+    def __init__(self, random_state: int = 42):
+        self.scaler = StandardScaler()
+        self.model = SGDClassifier(loss='log_loss', alpha=1e-3, random_state=random_state)
+
+    def partial_fit(self, X: np.ndarray, y: np.ndarray, sample_weight: Optional[np.ndarray] = None):
+        self.scaler.partial_fit(X)
+        self.model.partial_fit(self.scaler.transform(X), y, classes=np.array([0, 1]),
+                               sample_weight=sample_weight)
+        return self
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self.model.predict_proba(self.scaler.transform(X))
+
+
+class WolfDetectionEnsemble:
+    """集成狼人检测器"""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, random_state: int = 42):
+        """
+        Args:
+            weights: 各模型权重 {'rf': x, 'gb': y, 'xgb': z}，默认读取全局配置
+            random_state: 随机种子
+        """
+        self.weights = weights or _load_configured_weights()
+        self.random_state = random_state
+        self.models: Dict[str, Any] = {}
+        self.is_trained = False
+        self.mode = 'full'  # full=全量重训练, incremental=增量更新
+
+        # 编译推理路径（ML_COMPILED_TREES=false 时使用sklearn原生predict_proba）
+        self.use_compiled = os.getenv('ML_COMPILED_TREES', 'true').lower() == 'true'
+        self._compiled: Optional[CompiledEnsemble] = None
+
+        # 增量模式参数：每次更新新增的树数量 / 森林最大树数量（超出后淘汰最旧的树）
+        self.trees_per_update = 10
+        self.max_estimators = 200
+
+        # 已有全量模型时，增量模型先在后台训练，累计样本数达到下限后才接替全量模型对外预测
+        self.min_incremental_samples = int(os.getenv('ML_INCREMENTAL_MIN_SAMPLES', '500'))
+        self.incremental_samples = 0
+        self._pending_models: Optional[Dict[str, Any]] = None
+
+    def _build_models(self) -> Dict[str, Any]:
+        """创建未训练的模型实例"""
+        models = {
+            'rf': RandomForestClassifier(
+                n_estimators=100, max_depth=8, min_samples_leaf=2,
+                class_weight='balanced', random_state=self.random_state, n_jobs=1
+            ),
+            'gb': GradientBoostingClassifier(
+                n_estimators=100, max_depth=3, learning_rate=0.1,
+                random_state=self.random_state
+            ),
+        }
+        if XGB_AVAILABLE and self.weights.get('xgb', 0) > 0:
+            models['xgb'] = XGBClassifier(
+                n_estimators=100, max_depth=4, learning_rate=0.1,
+                random_state=self.random_state, n_jobs=1, eval_metric='logloss'
+            )
+        return models
+
+    def _build_incremental_models(self) -> Dict[str, Any]:
+        """创建未训练的增量模型（SGD逻辑回归 + warm_start随机森林）"""
+        return {
+            'sgd': _ScaledSGDClassifier(self.random_state),
+            'rf': RandomForestClassifier(
+                n_estimators=0, max_depth=8, min_samples_leaf=2,
+                warm_start=True, random_state=self.random_state, n_jobs=1
+            ),
+        }
+
+    def train(
+        self,
+        player_data_list: Sequence[Dict[str, Any]],
+        labels: Sequence[int],
+        sample_weights: Optional[Sequence[float]] = None
+    ) -> bool:
+        """
+        训练集成模型
+
+        Args:
+            player_data_list: 玩家特征数据字典列表（或特征矩阵）
+            labels: 标签（1=狼人，0=好人）
+            sample_weights: 样本权重（可选）
+
+        Returns:
+            bool: 是否训练成功
+        """
+        X = to_feature_matrix(player_data_list)
+        y = np.asarray(labels, dtype=int)
+
+        if X.shape[0] != y.shape[0]:
+            raise ValueError(f"Features/labels length mismatch: {X.shape[0]} vs {y.shape[0]}")
+        if len(np.unique(y)) < 2:
+            logger.warning("Ensemble training skipped: labels contain a single class")
+            return False
+
+        weights = None
+        if sample_weights is not None:
+            weights = np.asarray(sample_weights, dtype=float)
+            if weights.shape[0] != y.shape[0]:
+                raise ValueError(f"Sample weights length mismatch: {weights.shape[0]} vs {y.shape[0]}")
+
+        models = self._build_models()
+        for name, model in models.items():
+            model.fit(X, y, sample_weight=weights)
+            logger.debug(f"Ensemble model '{name}' trained on {X.shape[0]} samples")
+
+        if self.mode != 'full':
+            self.weights = _load_configured_weights()
+            self.mode = 'full'
+        self.models = models
+        self._pending_models = None
+        self.incremental_samples = 0
+        self.is_trained = True
+        self._compile()
+        logger.info(f"✓ Ensemble trained: {list(models.keys())}, {X.shape[0]} samples")
+        return True
+
+    def partial_fit(
+        self,
+        player_data_list: Sequence[Dict[str, Any]],
+        labels: Sequence[int],
+        sample_weights: Optional[Sequence[float]] = None
+    ) -> bool:
+        """
+        增量更新（代价与本次样本数成正比）
+
+        - SGD逻辑回归: partial_fit 在线更新
+        - 随机森林: warm_start 只在本次样本上新增 trees_per_update 棵树，
+          超过 max_estimators 时淘汰最旧的树
+
+        已有训练好的全量模型时，增量模型先在后台更新，全量模型继续对外预测，
+        直到增量模型累计见过 min_incremental_samples 个样本（ML_INCREMENTAL_MIN_SAMPLES）
+        才切换到增量模式；没有全量模型时立即切换
+
+        Args:
+            player_data_list: 本次样本（通常为新一局 + 回放缓冲区采样）
+            labels: 标签（1=狼人，0=好人）
+            sample_weights: 样本权重（可选）
+
+        Returns:
+            bool: 是否完成更新
+        """
+        X = to_feature_matrix(player_data_list)
+        y = np.asarray(labels, dtype=int)
+        if X.shape[0] != y.shape[0]:
+            raise ValueError(f"Features/labels length mismatch: {X.shape[0]} vs {y.shape[0]}")
+        if X.shape[0] == 0:
+            return False
+
+        weights = None
+        if sample_weights is not None:
+            weights = np.asarray(sample_weights, dtype=float)
+            if weights.shape[0] != y.shape[0]:
+                raise ValueError(f"Sample weights length mismatch: {weights.shape[0]} vs {y.shape[0]}")
+
+        if self.mode == 'incremental':
+            models = self.models
+        else:
+            if self._pending_models is None:
+                self._pending_models = self._build_incremental_models()
+                self.incremental_samples = 0
+            models = self._pending_models
+
+        models['sgd'].partial_fit(X, y, sample_weight=weights)
+
+        # 随机森林的每棵树需要两类样本，单类批次只更新SGD
+        rf = models['rf']
+        if len(np.unique(y)) == 2:
+            rf.n_estimators += self.trees_per_update
+            rf.fit(X, y, sample_weight=weights)
+            if len(rf.estimators_) > self.max_estimators:
+                rf.estimators_ = rf.estimators_[-self.max_estimators:]
+                rf.n_estimators = self.max_estimators
+        self.incremental_samples += X.shape[0]
+
+        if self.mode != 'incremental':
+            if self.is_trained and self.incremental_samples < self.min_incremental_samples:
+                logger.debug(
+                    f"Ensemble incremental model warming up: {self.incremental_samples}/"
+                    f"{self.min_incremental_samples} samples, full model still serving"
+                )
+                return True
+            self.models = models
+            self.weights = dict(INCREMENTAL_WEIGHTS)
+            self.mode = 'incremental'
+            self._pending_models = None
+            logger.info(f"✓ Ensemble switched to incremental mode after {self.incremental_samples} samples")
+
+        self.is_trained = True
+        self._compile()
+        logger.debug(
+            f"Ensemble incremental update: {X.shape[0]} samples, "
+            f"{len(getattr(rf, 'estimators_', []))} trees"
+        )
+        return True
+
+    def predict_wolf_probabilities(self, rows: Any) -> np.ndarray:
+        """
+        批量预测狼人概率
+
+        Args:
+            rows: 玩家特征数据字典列表（或特征矩阵）
+
+        Returns:
+            np.ndarray: 每行的狼人概率，未训练时全部为0.5
+        """
+        X = to_feature_matrix(rows)
+        if not self.is_trained or not self.models:
+            return np.full(X.shape[0], 0.5)
+
+        if self._compiled is not None:
+            return self._compiled.predict_proba1(X)
+        return self._sklearn_probabilities(X)
+
+    def _sklearn_probabilities(self, X: np.ndarray) -> np.ndarray:
+        """sklearn原生推理路径（编译路径的参考实现）"""
+        total = 0.0
+        probs = np.zeros(X.shape[0], dtype=float)
+        for name, model in self.models.items():
+            weight = float(self.weights.get(name, 0.0))
+            if weight <= 0 or (name == 'rf' and not hasattr(model, 'estimators_')):
+                continue
+            probs += weight * model.predict_proba(X)[:, 1]
+            total += weight
+
+        if total <= 0:
+            return np.full(X.shape[0], 0.5)
+        return np.clip(probs / total, 0.0, 1.0)
+
+    def predict_wolf_probability(self, player_data: Dict[str, Any]) -> float:
+        """
+        预测单个玩家的狼人概率
+
+        Args:
+            player_data: 玩家特征数据字典
+
+        Returns:
+            float: 狼人概率 (0.0-1.0)
+        """
+        return float(self.predict_wolf_probabilities([player_data])[0])
+
+    def save_models(self, path: str) -> None:
+        """
+        保存模型（附带特征模式哈希和sklearn版本）
+
+        Args:
+            path: 模型文件路径
+        """
+        if not self.is_trained:
+            logger.warning("Ensemble not trained, nothing to save")
+            return
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        _atomic_dump({
+            'schema_hash': FEATURE_SCHEMA_HASH,
+            'feature_names': list(StandardFeatureExtractor.FEATURE_NAMES),
+            'sklearn_version': sklearn.__version__,
+            'weights': self.weights,
+            'mode': self.mode,
+            'incremental_samples': self.incremental_samples,
+            'models': self.models,
+        }, path)
+        logger.info(f"✓ Ensemble saved to {path}")
+
+    def load_models(self, path: str) -> bool:
+        """
+        加载模型（特征模式或sklearn版本不匹配时拒绝加载）
+
+        Args:
+            path: 模型文件路径
+
+        Returns:
+            bool: 是否加载成功
+        """
+        try:
+            payload = joblib.load(path, mmap_mode=_mmap_mode())
+        except Exception as e:
+            logger.warning(f"Failed to read ensemble model {path}: {e}")
+            return False
+
+        if not isinstance(payload, dict) or 'models' not in payload:
+            logger.warning(f"Unrecognized ensemble model format: {path}")
+            return False
+
+        try:
+            StandardFeatureExtractor.validate_schema(payload.get('schema_hash', ''))
+        except ValueError as e:
+            logger.warning(f"Ensemble model rejected: {e}")
+            return False
+
+        saved_version = payload.get('sklearn_version')
+        if saved_version != sklearn.__version__:
+            logger.warning(
+                f"Ensemble model rejected: sklearn {saved_version} != {sklearn.__version__}"
+            )
+            return False
+
+        models: Dict[str, Any] = payload['models']
+        if not models:
+            return False
+
+        self.models = models
+        self.weights = payload.get('weights', self.weights)
+        self.mode = payload.get('mode', 'full')
+        self.incremental_samples = (
+            int(payload.get('incremental_samples', self.min_incremental_samples))
+            if self.mode == 'incremental' else 0
+        )
+        self._pending_models = None
+        self.is_trained = True
+        self._compile(source_path=path)
+        logger.info(f"✓ Ensemble loaded from {path}: {list(models.keys())}")
+        return True
+
+    def _compile(self, source_path: Optional[str] = None) -> None:
+        """
+        把当前模型编译为扁平数组推理路径
+
+        编译后在随机探测样本上与sklearn输出比对，不一致时放弃编译路径。
+        启用mmap且模型来自文件时，编译结果缓存到 <模型文件>.compiled
+        并以只读映射加载，多个工作进程共享同一份数组
+
+        Args:
+            source_path: 模型文件路径（从文件加载时提供）
+        """
+        self._compiled = None
+        if not self.use_compiled or not self.models:
+            return
+        try:
+            compiled = None
+            if source_path and _mmap_mode():
+                compiled = self._load_compiled_cache(source_path)
+            if compiled is None:
+                compiled = CompiledEnsemble.compile(self.models, self.weights)
+                if source_path and _mmap_mode():
+                    compiled = self._save_compiled_cache(source_path, compiled)
+            compiled.verify(self._sklearn_probabilities)
+            self._compiled = compiled
+        except Exception as e:
+            logger.warning(f"Compiled inference disabled, using sklearn path: {e}")
+
+    def _load_compiled_cache(self, source_path: str) -> Optional[CompiledEnsemble]:
+        """读取与模型文件匹配的编译缓存（不存在或过期时返回None）"""
+        cache_path = f"{source_path}.compiled"
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            payload = joblib.load(cache_path, mmap_mode=_mmap_mode())
+        except Exception as e:
+            logger.debug(f"Compiled cache {cache_path} unreadable: {e}")
+            return None
+        if (not isinstance(payload, dict) or payload.get('schema_hash') != FEATURE_SCHEMA_HASH
+                or payload.get('source') != _file_signature(source_path)):
+            return None
+        return payload.get('ensemble')
+
+    def _save_compiled_cache(self, source_path: str, compiled: CompiledEnsemble) -> CompiledEnsemble:
+        """写出编译缓存并重新以mmap加载（写入失败时返回内存中的编译结果）"""
+        try:
+            _atomic_dump({
+                'schema_hash': FEATURE_SCHEMA_HASH,
+                'source': _file_signature(source_path),
+                'ensemble': compiled,
+            }, f"{source_path}.compiled")
+        except OSError as e:
+            logger.debug(f"Compiled cache not written: {e}")
+            return compiled
+        return self._load_compiled_cache(source_path) or compiled
+
+    def export_python_module(self, path: str) -> None:
+        """
+        导出只依赖NumPy的独立推理模块
+
+        Args:
+            path: 输出的.py文件路径
+
+        Raises:
+            ValueError: 模型未训练或包含无法编译的成员
+        """
+        if not self.is_trained:
+            raise ValueError("Ensemble not trained")
+        compiled = self._compiled or CompiledEnsemble.compile(self.models, self.weights)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(compiled.generate_python_source())
+        logger.info(f"✓ Compiled ensemble exported to {path}")
+
+    def get_model_names(self) -> List[str]:
+        """获取已训练的模型名列表"""
+        return list(self.models.keys())
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+标准化特征提取器
+
+声明19维特征模式（顺序固定），提供单条与批量（向量化）特征提取。
+特征顺序由模式哈希校验，训练/保存/加载模型时必须保持一致。
+"""
+
+import hashlib
+import logging
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# 特征模式：(特征名, 默认值, 下界, 上界)
+# 列表型字段（speech_lengths/vote_targets）在提取时聚合为标量
+FEATURE_SCHEMA = (
+    ('trust_score', 50.0, 0.0, 100.0),
+    ('vote_accuracy', 0.5, 0.0, 1.0),
+    ('contradiction_count', 0.0, 0.0, 50.0),
+    ('injection_attempts', 0.0, 0.0, 50.0),
+    ('false_quotation_count', 0.0, 0.0, 50.0),
+    ('speech_lengths', 100.0, 0.0, 5000.0),       # 平均发言长度
+    ('voting_speed_avg', 5.0, 0.0, 600.0),
+    ('vote_targets', 0.0, 0.0, 50.0),             # 投票次数
+    ('mentions_others_count', 0.0, 0.0, 500.0),
+    ('mentioned_by_others_count', 0.0, 0.0, 500.0),
+    ('aggressive_score', 0.5, 0.0, 1.0),
+    ('defensive_score', 0.5, 0.0, 1.0),
+    ('emotion_keyword_count', 0.0, 0.0, 500.0),
+    ('logic_keyword_count', 0.0, 0.0, 500.0),
+    ('night_survival_rate', 0.5, 0.0, 1.0),
+    ('alliance_strength', 0.5, 0.0, 1.0),
+    ('isolation_score', 0.5, 0.0, 1.0),
+    ('speech_consistency_score', 0.5, 0.0, 1.0),
+    ('avg_response_time', 5.0, 0.0, 600.0),
+)
+
+FEATURE_NAMES = tuple(item[0] for item in FEATURE_SCHEMA)
+N_FEATURES = len(FEATURE_NAMES)
+
+# 模式哈希：特征名+顺序变化都会改变哈希
+FEATURE_SCHEMA_HASH = hashlib.sha256("|".join(FEATURE_NAMES).encode('utf-8')).hexdigest()[:16]
+
+_DEFAULTS = np.array([item[1] for item in FEATURE_SCHEMA], dtype=float)
+_LOWER = np.array([item[2] for item in FEATURE_SCHEMA], dtype=float)
+_UPPER = np.array([item[3] for item in FEATURE_SCHEMA], dtype=float)
+
+# 列表型字段的聚合方式
+_LIST_FEATURES = {
+    'speech_lengths': 'mean',
+    'vote_targets': 'count',
+}
+
+
+def _scalar(value: Any, default: float) -> float:
+    """将任意输入转换为浮点数，失败返回默认值"""
+    if value is None:
+        return default
+    try:
+        result = float(value)
+    except (ValueError, TypeError):
+        return default
+    return result if np.isfinite(result) else default
+
+
+def _aggregate(value: Any, how: str, default: float) -> float:
+    """聚合列表型字段（兼容已聚合的标量输入）"""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        if how == 'count':
+            return float(len(value))
+        numbers = [_scalar(v, np.nan) for v in value]
+        numbers = [v for v in numbers if np.isfinite(v)]
+        return float(np.mean(numbers)) if numbers else default
+    return _scalar(value, default)
+
+
+class StandardFeatureExtractor:
+    """标准化特征提取器（19维，顺序由FEATURE_SCHEMA_HASH保证）"""
+
+    FEATURE_NAMES = FEATURE_NAMES
+    N_FEATURES = N_FEATURES
+    SCHEMA_HASH = FEATURE_SCHEMA_HASH
+
+    @classmethod
+    def extract_features(cls, data: Dict[str, Any]) -> np.ndarray:
+        """
+        提取单个玩家的特征向量
+
+        Args:
+            data: 玩家特征数据字典
+
+        Returns:
+            np.ndarray: 形状为(19,)的特征向量
+        """
+        return cls.extract_batch([data])[0]
+
+    @classmethod
+    def extract_batch(cls, rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        批量提取特征矩阵
+
+        逐列构建（每个特征一次遍历），缺失/非法值统一填充默认值，
+        最后整体裁剪到各特征的合法范围
+
+        Args:
+            rows: 玩家特征数据字典列表（非字典行按全默认值处理）
+
+        Returns:
+            np.ndarray: 形状为(len(rows), 19)的特征矩阵
+        """
+        n = len(rows)
+        if n == 0:
+            return np.empty((0, N_FEATURES), dtype=float)
+
+        dict_rows = [row if isinstance(row, dict) else {} for row in rows]
+        matrix = np.empty((n, N_FEATURES), dtype=float)
+
+        for col, (name, default, _, _) in enumerate(FEATURE_SCHEMA):
+            how = _LIST_FEATURES.get(name)
+            if how:
+                matrix[:, col] = [_aggregate(row.get(name), how, default) for row in dict_rows]
+            else:
+                matrix[:, col] = [_scalar(row.get(name), default) for row in dict_rows]
+
+        np.clip(matrix, _LOWER, _UPPER, out=matrix)
+        return matrix
+
+    @classmethod
+    def get_schema(cls) -> Dict[str, Any]:
+        """
+        获取特征模式描述
+
+        Returns:
+            包含特征名、数量和哈希的字典
+        """
+        return {
+            'feature_names': list(FEATURE_NAMES),
+            'n_features': N_FEATURES,
+            'schema_hash': FEATURE_SCHEMA_HASH,
+        }
+
+    @classmethod
+    def validate_schema(cls, schema_hash: str) -> None:
+        """
+        校验外部（如已保存模型）的特征模式哈希
+
+        Args:
+            schema_hash: 待校验的哈希
+
+        Raises:
+            ValueError: 哈希与当前模式不一致
+        """
+        if schema_hash != FEATURE_SCHEMA_HASH:
+            raise ValueError(
+                f"Feature schema mismatch: got {schema_hash}, expected {FEATURE_SCHEMA_HASH}"
+            )
+
+    @classmethod
+    def validate_matrix(cls, matrix: np.ndarray) -> np.ndarray:
+        """
+        校验特征矩阵维度
+
+        Args:
+            matrix: 特征矩阵
+
+        Returns:
+            np.ndarray: 二维浮点矩阵
+
+        Raises:
+            ValueError: 维度与模式不一致
+        """
+        matrix = np.asarray(matrix, dtype=float)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.ndim != 2 or matrix.shape[1] != N_FEATURES:
+            raise ValueError(f"Invalid feature matrix shape: {matrix.shape}, expected (n, {N_FEATURES})")
+        return matrix
+
+
+def to_feature_matrix(rows: Any) -> np.ndarray:
+    """
+    将玩家字典列表或已提取的特征矩阵统一转换为特征矩阵
+
+    Args:
+        rows: 玩家特征数据字典列表，或形状为(n, 19)的数组
+
+    Returns:
+        np.ndarray: 形状为(n, 19)的特征矩阵
+    """
+    if isinstance(rows, np.ndarray):
+        return StandardFeatureExtractor.validate_matrix(rows)
+    rows: List = list(rows)
+    if rows and not isinstance(rows[0], dict) and isinstance(rows[0], (list, tuple, np.ndarray)):
+        return StandardFeatureExtractor.validate_matrix(np.asarray(rows, dtype=float))
+    return StandardFeatureExtractor.extract_batch(rows)
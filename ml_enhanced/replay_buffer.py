@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+蓄水池采样回放缓冲区
+
+固定容量保存历史样本（Algorithm R，所有历史样本等概率留存），
+采样时按样本所在游戏的"年龄"施加指数衰减权重，
+供增量学习在新样本之外混入少量历史样本，抑制灾难性遗忘
+"""
+
+import random
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ml_enhanced.feature_extractor import FEATURE_SCHEMA_HASH, N_FEATURES, to_feature_matrix
+
+logger = logging.getLogger(__name__)
+
+
+class ReservoirReplayBuffer:
+    """蓄水池采样回放缓冲区"""
+
+    def __init__(self, capacity: int = 2000, decay_rate: float = 0.05, seed: Optional[int] = None):
+        """
+        Args:
+            capacity: 最大样本数
+            decay_rate: 每局游戏的指数衰减率，权重 = exp(-decay_rate * 年龄)
+            seed: 随机种子
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        if decay_rate < 0:
+            raise ValueError(f"decay_rate must be non-negative, got {decay_rate}")
+
+        self.capacity = capacity
+        self.decay_rate = decay_rate
+        self._rng = random.Random(seed)
+
+        self._features = np.empty((capacity, N_FEATURES), dtype=float)
+        self._labels = np.empty(capacity, dtype=int)
+        self._game_index = np.empty(capacity, dtype=int)
+        self._size = 0
+
+        self.seen = 0  # 累计见过的样本数（蓄水池采样需要）
+        self.current_game = 0  # 当前游戏序号
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add_game(self, rows: Any, labels: List[int]) -> int:
+        """
+        加入一局游戏的样本并推进游戏序号
+
+        Args:
+            rows: 玩家特征数据字典列表（或特征矩阵）
+            labels: 标签（1=狼人，0=好人）
+
+        Returns:
+            int: 本局实际写入缓冲区的样本数
+        """
+        X = to_feature_matrix(rows)
+        y = np.asarray(labels, dtype=int)
+        if X.shape[0] != y.shape[0]:
+            raise ValueError(f"Features/labels length mismatch: {X.shape[0]} vs {y.shape[0]}")
+
+        self.current_game += 1
+        written = 0
+        for i in range(X.shape[0]):
+            self.seen += 1
+            if self._size < self.capacity:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = self._rng.randrange(self.seen)
+                if slot >= self.capacity:
+                    continue
+            self._features[slot] = X[i]
+            self._labels[slot] = y[i]
+            self._game_index[slot] = self.current_game
+            written += 1
+        return written
+
+    def weights(self) -> np.ndarray:
+        """当前所有样本的指数衰减权重"""
+        age = self.current_game - self._game_index[:self._size]
+        return np.exp(-self.decay_rate * age)
+
+    def sample(self, n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        无放回随机采样
+
+        Args:
+            n: 采样数量（超过当前容量时返回全部）
+
+        Returns:
+            (特征矩阵, 标签, 衰减权重)
+        """
+        n = min(n, self._size)
+        if n <= 0:
+            return np.empty((0, N_FEATURES)), np.empty(0, dtype=int), np.empty(0)
+        idx = np.array(self._rng.sample(range(self._size), n), dtype=int)
+        return self._features[idx].copy(), self._labels[idx].copy(), self.weights()[idx]
+
+    def all(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """返回全部样本 (特征矩阵, 标签, 衰减权重)"""
+        return (
+            self._features[:self._size].copy(),
+            self._labels[:self._size].copy(),
+            self.weights(),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为可JSON保存的字典"""
+        return {
+            'schema_hash': FEATURE_SCHEMA_HASH,
+            'capacity': self.capacity,
+            'decay_rate': self.decay_rate,
+            'seen': self.seen,
+            'current_game': self.current_game,
+            'features': self._features[:self._size].round(6).tolist(),
+            'labels': self._labels[:self._size].tolist(),
+            'game_index': self._game_index[:self._size].tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any], capacity: Optional[int] = None,
+                  decay_rate: Optional[float] = None) -> 'ReservoirReplayBuffer':
+        """
+        从字典恢复缓冲区（特征模式不一致时返回空缓冲区）
+
+        Args:
+            payload: to_dict() 的输出
+            capacity: 覆盖保存的容量（可选）
+            decay_rate: 覆盖保存的衰减率（可选）
+        """
+        buffer = cls(
+            capacity=capacity or int(payload.get('capacity', 2000)),
+            decay_rate=payload.get('decay_rate', 0.05) if decay_rate is None else decay_rate,
+        )
+        if payload.get('schema_hash') != FEATURE_SCHEMA_HASH:
+            logger.warning("Replay buffer schema mismatch, starting empty")
+            return buffer
+
+        features = np.asarray(payload.get('features', []), dtype=float).reshape(-1, N_FEATURES)
+        keep = min(features.shape[0], buffer.capacity)
+        buffer._features[:keep] = features[:keep]
+        buffer._labels[:keep] = np.asarray(payload.get('labels', []), dtype=int)[:keep]
+        buffer._game_index[:keep] = np.asarray(payload.get('game_index', []), dtype=int)[:keep]
+        buffer._size = keep
+        buffer.seen = max(int(payload.get('seen', keep)), keep)
+        buffer.current_game = int(payload.get('current_game', 0))
+        return buffer
@@ -76,4 +76,10 @@ echo "=========================================="
 echo "✓ 所有检查通过，启动应用..."
 echo "=========================================="
 echo ""
+# SHARD_WORKERS>1 时由前置路由按游戏ID分发到多个工作进程（见 werewolf/shard_router.py）
+# 前置路由要求每局请求带游戏ID请求头（X-Game-Id），平台直连时保持 SHARD_WORKERS=1
+if [ "${SHARD_WORKERS:-1}" -gt 1 ]; then
+    echo "分片部署: ${SHARD_WORKERS} 个工作进程"
+    exec python werewolf/shard_router.py
+fi
 exec python werewolf/app.py
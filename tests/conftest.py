@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""pytest配置：项目根目录与benchmarks（伪LLM服务等测试替身）加入sys.path（与benchmarks脚本一致，不需要安装本仓库）"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(PROJECT_ROOT, 'benchmarks')
+for _path in (PROJECT_ROOT, BENCH_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+异步智能体路径测试（werewolf.core.async_agent，本机伪LLM服务）
+
+- 平民讨论发言经 interact_async 生成：提示词与同步 interact 相同，生成走 llm_caller_async
+  （不调用同步 llm_caller），账本记录归属到该局
+- 遗言等其他交互仍走同步处理逻辑
+"""
+
+import asyncio
+import logging
+
+import pytest
+
+from agent_build_sdk.model.werewolf_model import AgentReq
+from werewolf.common import game_scope, llm_ledger
+from werewolf.core.async_agent import call_async
+
+SPEECH = "No.5: I am a villager. No.7 voted strangely yesterday, I suspect No.7."
+
+
+@pytest.fixture
+def fake_llm(tmp_path, monkeypatch):
+    """临时数据目录、本机伪LLM服务（同一提示词响应确定）、临时LLM账本；结束时关闭未结束的对局"""
+    from fake_llm_server import FakeLLMConfig, FakeLLMServer
+
+    monkeypatch.setenv('DATA_DIR', str(tmp_path))
+    monkeypatch.setenv('ML_MODEL_DIR', str(tmp_path / 'ml_models'))
+    monkeypatch.setenv('MEMORY_PROFILE', 'off')
+    server = FakeLLMServer(FakeLLMConfig(port=0, mode='synth', seed=0)).start()
+    for name, value in server.client_env().items():
+        monkeypatch.setenv(name, value)
+    ledger = llm_ledger.LLMLedger(str(tmp_path / 'llm_ledger.db'))
+    monkeypatch.setattr(llm_ledger, '_ledger', ledger)
+    logging.disable(logging.CRITICAL)
+    try:
+        yield ledger
+    finally:
+        logging.disable(logging.NOTSET)
+        server.stop()
+        # 测试中的对局没有收到RESULT，手动关闭
+        for game_id in game_scope.open_games():
+            game_scope.close(game_id)
+
+
+def _villager():
+    from werewolf.villager.villager_agent import VillagerAgent
+
+    agent = VillagerAgent(model_name='deepseek-chat')
+    agent.perceive(AgentReq(status='start', name='No.3', message='', role='villager', round=1))
+    agent.perceive(AgentReq(status='discuss', name='No.5', message=SPEECH, role='villager', round=1))
+    return agent
+
+
+def _discuss_req():
+    return AgentReq(status='discuss', name='No.3', message='', role='villager', round=1)
+
+
+def test_discussion_speech_is_generated_on_the_event_loop(fake_llm):
+    sync_agent, async_agent = _villager(), _villager()
+    sync_prompts, async_prompts = [], []
+
+    def sync_caller(prompt):
+        sync_prompts.append(prompt)
+        return llm_ledger.sdk_llm_call(sync_agent.model_name, prompt)
+
+    def no_sync_caller(prompt):
+        raise AssertionError("discussion speech must not use the sync llm_caller")
+
+    original_async = async_agent.llm_caller_async
+
+    async def async_caller(prompt):
+        async_prompts.append(prompt)
+        return await original_async(prompt)
+
+    sync_agent.llm_caller = sync_caller
+    async_agent.llm_caller = no_sync_caller
+    async_agent.llm_caller_async = async_caller
+
+    expected = sync_agent.interact(_discuss_req())
+
+    async def scenario():
+        return await call_async(async_agent, 'interact', _discuss_req())
+
+    resp = asyncio.run(scenario())
+    assert resp.success
+    assert resp.result == expected.result
+    assert async_prompts == sync_prompts
+    assert async_agent.memory.load_variable("game_state") == sync_agent.memory.load_variable("game_state")
+
+    rows = fake_llm.caller_rollup(game_id=async_agent._game_id)
+    assert [row['calls'] for row in rows if row['caller'] == 'llm_caller'] == [1]
+
+
+def test_last_words_use_the_sync_handler(fake_llm):
+    agent = _villager()
+    agent.memory.set_variable("giving_last_words", True)
+    calls = []
+
+    def sync_caller(prompt):
+        calls.append(prompt)
+        return "My last words: No.7 is a wolf."
+
+    async def no_async_caller(prompt):
+        raise AssertionError("last words stay on the sync path")
+
+    agent.llm_caller = sync_caller
+    agent.llm_caller_async = no_async_caller
+
+    resp = asyncio.run(call_async(agent, 'interact', _discuss_req()))
+    assert resp.result == "My last words: No.7 is a wolf."
+    assert len(calls) == 1
+    assert not agent.memory.load_variable("giving_last_words")
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+werewolf.common.cache.ShardedCache 单元测试
+
+- lru: 超出条目数配额时淘汰最久未使用的条目
+- ttl: set 的过期时间与 get(key, ttl) 的兼容语义（注入时钟，不sleep）
+- namespaces: 命名空间配额互不影响，未知命名空间报错
+- bytes: 字节数配额、超大值拒绝写入
+- stampede: 多线程同时 get_or_compute 同一个键时只计算一次，异常传给所有等待者
+- stress: 多线程混合读写删后，条目数/字节数不超过配额、字节计数与条目一致、命中+未命中=读取次数
+"""
+
+import time
+import random
+import threading
+from typing import Any, List
+
+import pytest
+
+from werewolf.common.cache import ShardedCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _run_threads(target, count, args=()):
+    pool = [threading.Thread(target=target, args=args + (i,)) for i in range(count)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+
+def test_lru_eviction():
+    cache = ShardedCache(max_entries=3, shards=1)
+    for key in 'abc':
+        cache.set(key, key, size=1)
+    cache.get('a')
+    cache.set('d', 'd', size=1)
+    assert not cache.has('b')
+    assert all(cache.has(k) for k in 'acd')
+    assert cache.stats()['default']['evictions'] == 1
+
+    # 覆盖写不改变条目数
+    cache.set('a', 'A', size=1)
+    assert cache.size() == 3
+    assert cache.get('a') == 'A'
+
+
+def test_ttl():
+    clock = FakeClock()
+    cache = ShardedCache(max_entries=10, shards=2, default_ttl=5, clock=clock)
+    cache.set('short', 1)
+    cache.set('forever', 2, ttl=0)
+    clock.now += 4
+    assert cache.get('short') == 1
+    # get(key, ttl) 按写入时间判断过期（兼容原 CacheManager）
+    assert cache.get('forever', ttl=3) is None
+    clock.now += 2
+    assert cache.get('short') is None
+    assert not cache.has('short')
+
+    cache.set('a', 1, ttl=1)
+    cache.set('b', 1, ttl=1)
+    clock.now += 2
+    assert cache.purge_expired() == 2
+    assert cache.size() == 0
+
+
+def test_namespace_quotas():
+    cache = ShardedCache(max_entries=8, shards=1, namespaces={'detectors': 0.5, 'default': 0.5})
+    for i in range(4):
+        cache.set(i, i, size=1)
+    for i in range(20):
+        cache.set(i, i, namespace='detectors', size=1)
+    assert cache.size('default') == 4
+    assert cache.size('detectors') == 4
+    assert cache.get(19, namespace='detectors') == 19
+    assert cache.get(19) is None
+
+    detectors = cache.namespace('detectors')
+    detectors.clear()
+    assert detectors.size() == 0
+    assert cache.size('default') == 4
+
+    with pytest.raises(KeyError):
+        cache.get('x', namespace='missing')
+
+
+def test_byte_quota():
+    cache = ShardedCache(max_entries=100, max_bytes=1000, shards=1)
+    for i in range(10):
+        cache.set(i, i, size=300)
+    stats = cache.stats()['default']
+    assert stats['bytes'] <= 1000
+    assert stats['entries'] == 3
+
+    assert not cache.set('huge', 'x', size=2000)
+    assert not cache.has('huge')
+    assert cache.stats()['default']['rejected'] == 1
+
+    auto = ShardedCache(max_entries=10, max_bytes=10 ** 6, shards=1)
+    auto.set('text', 'x' * 10000)
+    assert auto.stats()['default']['bytes'] >= 10000
+
+
+def test_stampede_computes_once():
+    threads = 16
+    cache = ShardedCache(max_entries=100, shards=4)
+    calls = []
+    results: List[Any] = []
+    start = threading.Barrier(threads)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'value'
+
+    def worker(_index):
+        start.wait()
+        results.append(cache.get_or_compute('key', compute, ttl=60))
+
+    _run_threads(worker, threads)
+    assert len(calls) == 1
+    assert results == ['value'] * threads
+    stats = cache.stats()['default']
+    assert stats['coalesced'] + stats['hits'] == threads - 1
+
+
+def test_stampede_error_reaches_every_waiter():
+    cache = ShardedCache(max_entries=100, shards=4)
+    failures: List[BaseException] = []
+    start = threading.Barrier(4)
+
+    def failing():
+        time.sleep(0.05)
+        raise RuntimeError("llm down")
+
+    def worker(_index):
+        start.wait()
+        try:
+            cache.get_or_compute('bad', failing)
+        except RuntimeError as e:
+            failures.append(e)
+
+    _run_threads(worker, 4)
+    assert len(failures) == 4
+    assert not cache.has('bad')
+
+    cache.get_or_compute('empty', lambda: "{}", should_cache=lambda text: text != "{}")
+    assert not cache.has('empty')
+
+
+def test_concurrent_stress_keeps_quotas_and_accounting():
+    threads, ops = 8, 20000
+    cache = ShardedCache(max_entries=256, max_bytes=64 * 1024, shards=8,
+                         namespaces={'detectors': 0.5, 'prompts': 0.25, 'default': 0.25})
+    namespaces = ['detectors', 'prompts', 'default']
+    gets = [0] * threads
+    failures: List[BaseException] = []
+
+    def worker(index):
+        rng = random.Random(index)
+        try:
+            for _ in range(ops):
+                ns = rng.choice(namespaces)
+                key = rng.randrange(1000)
+                op = rng.random()
+                if op < 0.6:
+                    cache.get(key, namespace=ns)
+                    gets[index] += 1
+                elif op < 0.85:
+                    cache.set(key, 'v' * rng.randrange(1, 400), ttl=rng.choice([0, 0.001, 60]), namespace=ns)
+                elif op < 0.95:
+                    cache.get_or_compute(key, lambda: key, namespace=ns, ttl=60)
+                    gets[index] += 1
+                else:
+                    cache.delete(key, namespace=ns)
+        except BaseException as e:  # noqa: BLE001 - 记录任何异常
+            failures.append(e)
+
+    _run_threads(worker, threads)
+    assert failures == []
+
+    stats = cache.stats()
+    assert sum(row['hits'] + row['misses'] for row in stats.values()) == sum(gets)
+    for row in stats.values():
+        assert row['entries'] <= row['max_entries']
+        assert row['bytes'] <= row['max_bytes']
+    for shard in cache._shards:
+        for ns, entries in shard.entries.items():
+            assert shard.bytes[ns] == sum(e.size for e in entries.values())
+        assert not shard.pending
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+ml_enhanced.feature_extractor 单元测试（无网络、无GPU）
+
+- 模式哈希：固定值、对特征名与顺序敏感、与get_schema/validate_schema一致
+- 批量与单条提取等价：extract_batch 与逐行的参考实现、extract_features 一致
+- 输出行序：第i行始终对应输入第i个玩家
+"""
+
+import hashlib
+import random
+
+import numpy as np
+import pytest
+
+from ml_enhanced.feature_extractor import (
+    FEATURE_NAMES,
+    FEATURE_SCHEMA,
+    FEATURE_SCHEMA_HASH,
+    N_FEATURES,
+    StandardFeatureExtractor,
+    to_feature_matrix,
+)
+
+# 已保存的模型与回放缓冲区都带着这个哈希；改变特征名或顺序必须同时更新它（旧模型随之失效）
+PINNED_SCHEMA_HASH = '47d31fdbce7d1013'
+
+
+def _schema_hash(names):
+    return hashlib.sha256("|".join(names).encode('utf-8')).hexdigest()[:16]
+
+
+def _reference_row(data):
+    """逐特征的参考实现（不经过批量路径）"""
+    row = []
+    for name, default, lower, upper in FEATURE_SCHEMA:
+        value = data.get(name) if isinstance(data, dict) else None
+        if name == 'vote_targets' and isinstance(value, (list, tuple)):
+            result = float(len(value))
+        elif name == 'speech_lengths' and isinstance(value, (list, tuple)):
+            numbers = []
+            for item in value:
+                try:
+                    number = float(item)
+                except (TypeError, ValueError):
+                    continue
+                if np.isfinite(number):
+                    numbers.append(number)
+            result = sum(numbers) / len(numbers) if numbers else default
+        else:
+            try:
+                result = float(value) if value is not None else default
+            except (TypeError, ValueError):
+                result = default
+            if not np.isfinite(result):
+                result = default
+        row.append(min(max(result, lower), upper))
+    return row
+
+
+def _player(rng, index):
+    return {
+        'trust_score': rng.uniform(-20, 120),
+        'vote_accuracy': rng.random(),
+        'contradiction_count': rng.randint(0, 60),
+        'injection_attempts': rng.choice([0, 1, '2', None]),
+        'false_quotation_count': rng.randint(0, 3),
+        'speech_lengths': [rng.randint(10, 400) for _ in range(rng.randint(0, 4))],
+        'voting_speed_avg': rng.uniform(0, 10),
+        'vote_targets': [f"No.{rng.randint(1, 12)}" for _ in range(rng.randint(0, 5))],
+        'mentions_others_count': index,
+        'aggressive_score': rng.choice([rng.random(), 'high', float('nan')]),
+        'night_survival_rate': rng.random(),
+        'avg_response_time': rng.uniform(0, 900),
+    }
+
+
+@pytest.fixture
+def players():
+    rng = random.Random(11)
+    return [_player(rng, i) for i in range(25)]
+
+
+# ==================== 模式哈希 ====================
+
+def test_schema_hash_is_pinned():
+    assert FEATURE_SCHEMA_HASH == PINNED_SCHEMA_HASH
+    assert N_FEATURES == len(FEATURE_NAMES) == 19
+
+
+def test_schema_hash_changes_with_names_and_order():
+    assert _schema_hash(FEATURE_NAMES) == FEATURE_SCHEMA_HASH
+    swapped = list(FEATURE_NAMES)
+    swapped[0], swapped[1] = swapped[1], swapped[0]
+    assert _schema_hash(swapped) != FEATURE_SCHEMA_HASH
+    assert _schema_hash(FEATURE_NAMES[:-1]) != FEATURE_SCHEMA_HASH
+    assert _schema_hash(FEATURE_NAMES + ('extra',)) != FEATURE_SCHEMA_HASH
+
+
+def test_schema_description_and_validation():
+    schema = StandardFeatureExtractor.get_schema()
+    assert schema == {
+        'feature_names': list(FEATURE_NAMES),
+        'n_features': N_FEATURES,
+        'schema_hash': FEATURE_SCHEMA_HASH,
+    }
+    StandardFeatureExtractor.validate_schema(FEATURE_SCHEMA_HASH)
+    with pytest.raises(ValueError):
+        StandardFeatureExtractor.validate_schema('0' * 16)
+
+
+# ==================== 批量与单条等价 ====================
+
+def test_batch_matches_reference(players):
+    matrix = StandardFeatureExtractor.extract_batch(players)
+    assert matrix.shape == (len(players), N_FEATURES)
+    np.testing.assert_allclose(matrix, [_reference_row(p) for p in players])
+
+
+def test_batch_matches_single(players):
+    matrix = StandardFeatureExtractor.extract_batch(players)
+    for i, player in enumerate(players):
+        np.testing.assert_array_equal(StandardFeatureExtractor.extract_features(player), matrix[i])
+
+
+def test_defaults_and_clipping():
+    row = StandardFeatureExtractor.extract_features({})
+    np.testing.assert_array_equal(row, [item[1] for item in FEATURE_SCHEMA])
+    row = StandardFeatureExtractor.extract_features({'trust_score': 500, 'vote_accuracy': -1})
+    assert row[FEATURE_NAMES.index('trust_score')] == 100.0
+    assert row[FEATURE_NAMES.index('vote_accuracy')] == 0.0
+
+
+def test_feature_matrix_passthrough(players):
+    matrix = StandardFeatureExtractor.extract_batch(players)
+    np.testing.assert_array_equal(to_feature_matrix(players), matrix)
+    np.testing.assert_array_equal(to_feature_matrix(matrix), matrix)
+    with pytest.raises(ValueError):
+        to_feature_matrix(np.zeros((2, N_FEATURES - 1)))
+
+
+# ==================== 输出行序 ====================
+
+def test_rows_follow_input_order(players):
+    matrix = StandardFeatureExtractor.extract_batch(players)
+    column = FEATURE_NAMES.index('mentions_others_count')
+    np.testing.assert_array_equal(matrix[:, column], np.arange(len(players)))
+
+    order = list(range(len(players)))
+    random.Random(3).shuffle(order)
+    shuffled = StandardFeatureExtractor.extract_batch([players[i] for i in order])
+    np.testing.assert_array_equal(shuffled, matrix[order])
+
+
+def test_non_dict_rows_keep_their_position(players):
+    rows = [players[0], None, players[1], 'not a player', players[2]]
+    matrix = StandardFeatureExtractor.extract_batch(rows)
+    defaults = [item[1] for item in FEATURE_SCHEMA]
+    assert matrix.shape == (5, N_FEATURES)
+    np.testing.assert_array_equal(matrix[1], defaults)
+    np.testing.assert_array_equal(matrix[3], defaults)
+    np.testing.assert_array_equal(matrix[[0, 2, 4]], StandardFeatureExtractor.extract_batch(players[:3]))
+
+
+def test_empty_batch():
+    assert StandardFeatureExtractor.extract_batch([]).shape == (0, N_FEATURES)
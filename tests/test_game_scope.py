@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+对局作用域测试（werewolf.common.game_scope）
+
+- GameScope 的登记、单次清理、释放失败隔离、未收到RESULT的对局在下一局开始时关闭、
+  重复RESULT识别（is_closed）
+- 登记表覆盖：用模拟器（benchmarks/game_simulator.py，本机伪LLM服务）在同一进程内用同一套
+  智能体连续跑对局，第N局发给智能体的每条消息换成可弱引用的str子类并记录弱引用；
+  第N局收到RESULT后、第N+1局开始前断言：
+    * 没有未关闭的对局，各智能体登记的容器都已清空
+    * LLM账本没有残留的单局计数（预算设为1 token，每局都会写入计数与告警记录）
+    * gc后第N局的消息对象没有任何一个存活（失败信息里列出引用者）
+"""
+
+import gc
+import logging
+import weakref
+from typing import Any, Dict, List
+
+import pytest
+
+import game_simulator
+from werewolf.common import game_scope, llm_ledger
+
+GAMES = 3
+MAX_DAYS = 6
+
+
+class GameMessage(str):
+    """可弱引用的消息字符串（标记某一局发出的对象）"""
+
+
+class MarkingGameMaster(game_simulator.GameMaster):
+    """把发给智能体的消息换成 GameMessage 并记录弱引用"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.markers: List[weakref.ref] = []
+
+    def _call(self, seat, handler, status, name=None, message=None):
+        if message:
+            message = GameMessage(message)
+            self.markers.append(weakref.ref(message))
+        return super()._call(seat, handler, status, name=name, message=message)
+
+
+class FakeAgent:
+    role = 'fake'
+
+
+def describe(obj: Any, pool: Dict[str, List[Any]]) -> str:
+    """存活对象的引用者（容器类型与所属智能体属性）"""
+    owners = []
+    for referrer in gc.get_referrers(obj):
+        if isinstance(referrer, (list, dict, tuple, set)):
+            for agents in pool.values():
+                for agent in agents:
+                    for attr, value in vars(agent).items():
+                        if value is referrer:
+                            owners.append(f"{agent.role}.{attr}")
+            owners.append(type(referrer).__name__ + (f"[{len(referrer)}]" if hasattr(referrer, '__len__') else ''))
+        elif type(referrer).__name__ != 'frame':
+            owners.append(type(referrer).__name__)
+    return ", ".join(owners[:6]) or "?"
+
+
+# ==================== GameScope ====================
+
+def test_register_and_close():
+    scope = game_scope.GameScope('test')
+    cache: Dict[str, int] = {}
+    calls: List[str] = []
+    scope.register('cache', cache)
+    scope.register('broken', object(), release=lambda: 1 / 0)
+    scope.on_close('once', lambda: calls.append('once'))
+    cache['x'] = 1
+    assert scope.residual() == {'cache': 1}
+    # 释放失败的资源不影响其他资源
+    assert scope.close() == 2
+    assert cache == {}
+    assert calls == ['once']
+
+    # 登记的容器每局都释放，on_close只执行一次
+    cache['y'] = 2
+    scope.close()
+    assert cache == {}
+    assert calls == ['once']
+
+    with pytest.raises(TypeError):
+        scope.register('bad', object())
+
+
+def test_abandoned_game_closed_when_next_game_starts():
+    agent = FakeAgent()
+    cache: Dict[str, int] = {}
+    calls: List[str] = []
+    first = game_scope.activate(agent, 'test-game-1')
+    first.register('cache', cache)
+    cache['z'] = 3
+    with game_scope.bind(first):
+        game_scope.on_close('once', lambda: calls.append('abandoned'))
+
+    game_scope.activate(agent, 'test-game-2')
+    assert cache == {}
+    assert calls == ['abandoned']
+    assert 'test-game-1' not in game_scope.open_games()
+
+    game_scope.close('test-game-2')
+    assert game_scope.is_closed('test-game-2')
+    assert 'test-game-2' not in game_scope.open_games()
+
+
+def test_registration_without_bound_scope_is_noop():
+    assert game_scope.register('unbound', {}) == {}
+    assert not game_scope.on_close('unbound', lambda: None)
+
+
+def test_hunter_learning_stats_survive_game_close():
+    from werewolf.hunter.optimizer import AdaptiveLearner
+
+    scope = game_scope.GameScope('hunter')
+    with game_scope.bind(scope):
+        learner = AdaptiveLearner(max_outcomes=2)
+    for result in ('win', 'lose', 'win'):
+        learner.record_game_outcome(result, {'aggressive': True})
+        scope.close()
+
+    # 对局记录跨局保留（有界），总局数与策略统计一致
+    assert len(learner.game_outcomes) == 2
+    assert learner.total_games == learner.strategy_performance['aggressive']['total'] == 3
+    assert "Total games: 3" in learner.get_learning_report()
+
+
+# ==================== 登记表覆盖 ====================
+
+@pytest.fixture
+def simulated_env(tmp_path, monkeypatch):
+    """临时数据目录、本机伪LLM服务、1 token预算的LLM账本；关闭日志（日志捕获保留的记录会引用消息对象）"""
+    from fake_llm_server import FakeLLMConfig, FakeLLMServer
+
+    monkeypatch.setenv('DATA_DIR', str(tmp_path))
+    monkeypatch.setenv('ML_MODEL_DIR', str(tmp_path / 'ml_models'))
+    monkeypatch.setenv('MODEL_NAME', 'deepseek-chat')
+    monkeypatch.setenv('MEMORY_PROFILE', 'off')
+    monkeypatch.setenv('LLM_LEDGER_ENABLED', 'true')
+    monkeypatch.setenv('LLM_LEDGER_DB', str(tmp_path / 'llm_ledger.db'))
+    monkeypatch.setenv('LLM_GAME_TOKEN_BUDGET', '1')
+    server = FakeLLMServer(FakeLLMConfig(port=0, mode='synth', seed=0)).start()
+    for name, value in server.client_env().items():
+        monkeypatch.setenv(name, value)
+    previous = (llm_ledger._ledger, llm_ledger._ledger_failed)
+    ledger = llm_ledger.configure(str(tmp_path / 'llm_ledger.db'), token_budget=1)
+    logging.disable(logging.CRITICAL)
+    try:
+        yield ledger
+    finally:
+        logging.disable(logging.NOTSET)
+        server.stop()
+        llm_ledger._ledger, llm_ledger._ledger_failed = previous
+
+
+def test_no_game_state_survives_into_next_game(simulated_env):
+    ledger = simulated_env
+    pool = game_simulator.build_agent_pool()
+    agents = [agent for agents in pool.values() for agent in agents]
+    errors: List[str] = []
+    ledger_games_before = 0
+    for index in range(GAMES):
+        master = MarkingGameMaster(index, 0, MAX_DAYS, agent_pool=pool)
+        master.run()
+        game = f"game {index + 1}"
+
+        if game_scope.open_games():
+            errors.append(f"{game}: games left open: {game_scope.open_games()}")
+        for agent in agents:
+            residual = agent.game_scope.residual()
+            if residual:
+                errors.append(f"{game}: {agent.role} resources not released: {residual}")
+
+        ledger_games = len(ledger.game_rollup(limit=1000))
+        if ledger_games <= ledger_games_before:
+            errors.append(f"{game}: no LLM calls recorded in the ledger")
+        ledger_games_before = ledger_games
+        if ledger._game_tokens or ledger._alarmed_games:
+            errors.append(f"{game}: ledger per-game state not released: "
+                          f"{len(ledger._game_tokens)} token counters, {len(ledger._alarmed_games)} alarms")
+
+        markers = master.markers
+        del master
+        gc.collect()
+        alive = [marker for marker in (ref() for ref in markers) if marker is not None]
+        if alive:
+            errors.append(f"{game}: {len(alive)} message objects survived into the next game")
+            errors.extend(f"    {marker[:60]!r} <- {describe(marker, pool)}" for marker in alive[:5])
+
+    assert not errors, "\n".join(errors)
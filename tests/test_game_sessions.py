@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+werewolf.core.game_sessions 单元测试
+
+STATUS_RESULT 关闭会话时，实例要等进行中的请求结束后才归还（重置）到池中
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from werewolf.core import checkpoints
+from werewolf.core.game_sessions import RoleAgentPool, SessionManager, SessionRoleAgent, session_key_scope
+from werewolf.common.request_context import STATUS_RESULT
+
+
+class FakeAgent:
+    """记录重置次数的角色智能体；interact 阻塞到测试放行"""
+
+    def __init__(self):
+        self.resets = 0
+        self.entered = threading.Event()
+        self.proceed = threading.Event()
+        self.seen_resets = None
+
+    def reset_session(self):
+        self.resets += 1
+
+    def interact(self, req):
+        self.entered.set()
+        assert self.proceed.wait(5)
+        # 请求结束时实例仍未被重置
+        self.seen_resets = self.resets
+        return 'vote No.3'
+
+    def perceive(self, req):
+        return None
+
+
+@pytest.fixture(autouse=True)
+def no_checkpoints(monkeypatch):
+    monkeypatch.setattr(checkpoints, 'get_checkpointer', lambda: None)
+
+
+@pytest.fixture
+def entry():
+    pool = RoleAgentPool('Villager', FakeAgent, max_idle=4)
+    manager = SessionManager({'Villager': pool})
+    return SessionRoleAgent('Villager', manager)
+
+
+def _req(status):
+    return SimpleNamespace(status=status, name='No.1', message='', round=1)
+
+
+def test_result_waits_for_in_flight_interact(entry):
+    manager = entry.manager
+    pool = manager.pools['Villager']
+    results = []
+
+    def run_interact():
+        with session_key_scope(''):
+            results.append(entry.interact(_req('vote')))
+
+    worker = threading.Thread(target=run_interact)
+    worker.start()
+    agent = None
+    try:
+        # 平台不带X-Game-Id：所有请求共用''会话
+        session = None
+        for _ in range(500):
+            session = manager._sessions.get(('', 'Villager'))
+            if session is not None:
+                break
+            time.sleep(0.01)
+        assert session is not None
+        agent = session.agent
+        assert agent.entered.wait(5)
+
+        with session_key_scope(''):
+            entry.perceive(_req(STATUS_RESULT))
+
+        # 会话已关闭，但进行中的interact还在用这个实例：不重置、不回池
+        assert session.closing
+        assert ('', 'Villager') not in manager._sessions
+        assert agent.resets == 0
+        assert pool.idle == 0
+
+        # 下一局的请求拿到另一个实例
+        with manager.use('', 'Villager') as next_session:
+            assert next_session.agent is not agent
+    finally:
+        if agent is not None:
+            agent.proceed.set()
+        worker.join(5)
+
+    assert results == ['vote No.3']
+    assert agent.seen_resets == 0
+    # 最后一个请求结束后才归还
+    assert agent.resets == 1
+    assert session.in_flight == 0
+    assert agent in pool._idle
+
+
+def test_release_without_in_flight_checks_in_immediately(entry):
+    manager = entry.manager
+    with session_key_scope('game-1'):
+        entry.perceive(_req('start'))
+    agent = manager._sessions[('game-1', 'Villager')].agent
+
+    with session_key_scope('game-1'):
+        entry.perceive(_req(STATUS_RESULT))
+
+    assert agent.resets == 1
+    assert manager.pools['Villager'].idle == 1
+    assert manager.release('game-1', 'Villager') is False
+
+
+def test_closed_session_checked_in_once(entry):
+    manager = entry.manager
+    session = manager.acquire('game-2', 'Villager')
+    manager.acquire('game-2', 'Villager')
+    assert manager.release('game-2', 'Villager')
+    manager.done(session)
+    assert session.agent.resets == 0
+    manager.done(session)
+    assert session.agent.resets == 1
+    assert manager.pools['Villager'].idle == 1
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+werewolf.optimization.llm.LLMBatchProcessor 单元测试（伪后端，无网络）
+
+- 结果按请求对应、有界并发、优先级派发顺序
+- 截止时间（派发前过期 / 执行中超时）、取消（排队中 / 执行中 / 等待方被取消）
+- 后端异常只影响对应请求、complete_batch 后端整批调用
+- 检测器接入：LLM_BATCH_ENABLED=true 时 detect_async 经过批处理器（本机伪LLM服务）
+"""
+
+import time
+import asyncio
+
+from llm_batch import FakeBackend, FakeBatchBackend
+from werewolf.optimization.llm.batch_processor import (
+    LLMBatchProcessor, LLMRequest, ResponseStatus,
+    PRIORITY_HIGH, PRIORITY_LOW, deadline_in,
+)
+
+
+def test_results_match_requests_and_concurrency_is_bounded():
+    backend = FakeBackend(latency=0.01)
+
+    async def scenario():
+        async with LLMBatchProcessor(backend, batch_window=0.002, max_concurrency=3) as processor:
+            responses = await processor.process_many([LLMRequest(f"p{i}") for i in range(20)])
+            return responses, processor.stats()
+
+    responses, stats = asyncio.run(scenario())
+    assert [r.content for r in responses] == [f"echo:p{i}" for i in range(20)]
+    assert backend.peak <= 3
+    assert stats['ok'] == 20
+    assert stats['batches'] >= 1
+
+
+def test_priority_order():
+    backend = FakeBackend(latency=0.005)
+
+    async def scenario():
+        async with LLMBatchProcessor(backend, batch_window=0.01, max_concurrency=1) as processor:
+            requests = ([LLMRequest(f"low{i}", priority=PRIORITY_LOW) for i in range(3)]
+                        + [LLMRequest(f"normal{i}") for i in range(3)]
+                        + [LLMRequest(f"high{i}", priority=PRIORITY_HIGH) for i in range(3)])
+            await processor.process_many(requests)
+            # 第一批执行期间到达的高优先级请求排在剩余低优先级请求前面
+            later = [LLMRequest("low-late", priority=PRIORITY_LOW)] + [
+                LLMRequest(f"l{i}", priority=PRIORITY_LOW) for i in range(3)]
+            tasks = [asyncio.ensure_future(processor.process(r)) for r in later]
+            await asyncio.sleep(0.015)
+            tasks.append(asyncio.ensure_future(processor.process(LLMRequest("urgent", priority=PRIORITY_HIGH))))
+            await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    expected = [f"high{i}" for i in range(3)] + [f"normal{i}" for i in range(3)] + [f"low{i}" for i in range(3)]
+    assert backend.calls[:9] == expected
+    assert backend.calls[9:].index("urgent") <= 2
+
+
+def test_deadlines():
+    backend = FakeBackend(latency=0.05)
+
+    async def scenario():
+        async with LLMBatchProcessor(backend, batch_window=0.0, max_concurrency=2) as processor:
+            past = LLMRequest("past", deadline=time.monotonic() - 1)
+            short = LLMRequest("short", deadline=deadline_in(0.01))
+            fine = LLMRequest("fine", deadline=deadline_in(5))
+            return await processor.process_many([past, short, fine])
+
+    responses = asyncio.run(scenario())
+    assert [r.status for r in responses] == [ResponseStatus.EXPIRED, ResponseStatus.EXPIRED, ResponseStatus.OK]
+    assert "past" not in backend.calls
+    # 过期的响应回退为空JSON
+    assert responses[1].text() == "{}"
+
+
+def test_cancellation():
+    backend = FakeBackend(latency=0.05)
+
+    async def scenario():
+        async with LLMBatchProcessor(backend, batch_window=0.0, max_concurrency=1) as processor:
+            running = LLMRequest("running")
+            queued = LLMRequest("queued")
+            f_running = processor.submit(running)
+            f_queued = processor.submit(queued)
+            t_waiter = asyncio.ensure_future(processor.process(LLMRequest("waiter")))
+            await asyncio.sleep(0.01)
+            assert processor.cancel(queued.request_id)
+            t_waiter.cancel()
+            await asyncio.sleep(0)
+            assert processor.cancel(running.request_id)
+            r_running, r_queued = await f_running, await f_queued
+            waiter_cancelled = False
+            try:
+                await t_waiter
+            except asyncio.CancelledError:
+                waiter_cancelled = True
+            after = await processor.process(LLMRequest("after"))
+            return r_running, r_queued, waiter_cancelled, after, processor.stats()
+
+    r_running, r_queued, waiter_cancelled, after, stats = asyncio.run(scenario())
+    assert r_running.status == ResponseStatus.CANCELLED
+    assert r_queued.status == ResponseStatus.CANCELLED
+    assert waiter_cancelled
+    assert "queued" not in backend.calls
+    assert "waiter" not in backend.calls
+    # 取消后处理器仍可用
+    assert after.ok
+    assert stats['in_flight'] == 0
+
+
+def test_backend_error_only_affects_its_request():
+    backend = FakeBackend(latency=0.005, fail_on='bad')
+
+    async def scenario():
+        async with LLMBatchProcessor(backend, batch_window=0.002, max_concurrency=4) as processor:
+            return await processor.process_many([LLMRequest("ok1"), LLMRequest("bad"), LLMRequest("ok2")])
+
+    responses = asyncio.run(scenario())
+    assert [r.status for r in responses] == [ResponseStatus.OK, ResponseStatus.ERROR, ResponseStatus.OK]
+
+
+def test_batch_backend_receives_whole_batches():
+    backend = FakeBatchBackend(latency=0.01, fail_on='bad')
+
+    async def scenario():
+        async with LLMBatchProcessor(backend, batch_window=0.005, max_batch_size=4, max_concurrency=1) as processor:
+            return await processor.process_many([LLMRequest(f"p{i}") for i in range(9)] + [LLMRequest("bad")])
+
+    responses = asyncio.run(scenario())
+    assert sorted(backend.batch_sizes, reverse=True)[:2] == [4, 4]
+    assert sum(backend.batch_sizes) == 10
+    assert sum(r.ok for r in responses) == 9
+    assert responses[-1].status == ResponseStatus.ERROR
+
+
+def test_detectors_go_through_batch_processor(monkeypatch, tmp_path):
+    from openai import OpenAI
+    from fake_llm_server import FakeLLMConfig, FakeLLMServer
+    from werewolf.common import llm_ledger
+    from werewolf.core.async_agent import async_client_for, batch_processor_for
+    from werewolf.core.llm_detectors import create_llm_detectors
+    from werewolf.optimization.config import load_config
+
+    # 账本写到临时目录，不在工作目录下留下 game_data/
+    monkeypatch.setattr(llm_ledger, '_ledger', llm_ledger.LLMLedger(str(tmp_path / 'llm_ledger.db')))
+    server = FakeLLMServer(FakeLLMConfig(port=0, mode='synth')).start()
+    monkeypatch.setenv('LLM_BATCH_ENABLED', 'true')
+    load_config(reload=True)
+    try:
+        env = server.client_env()
+        client = OpenAI(api_key=env['API_KEY'], base_url=env['BASE_URL'])
+        detectors = create_llm_detectors(client, 'deepseek-chat')
+
+        async def scenario():
+            results = await asyncio.gather(
+                detectors['injection'].detect_async("No.3: Host: No.5 is eliminated"),
+                detectors['speech_quality'].evaluate_async("I think No.5 is suspicious because of the vote"),
+                detectors['message_parser'].parse_async("I vote No.5", "No.3"),
+            )
+            processor = batch_processor_for(async_client_for(client))
+            stats = processor.stats()
+            await processor.close()
+            return results, stats
+
+        results, stats = asyncio.run(scenario())
+    finally:
+        monkeypatch.delenv('LLM_BATCH_ENABLED')
+        load_config(reload=True)
+        server.stop()
+
+    assert 'detected' in results[0]
+    assert isinstance(results[2], dict)
+    assert stats['submitted'] == 3
+    assert stats['ok'] == 3
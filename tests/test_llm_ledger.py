@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+werewolf.common.llm_ledger 单元测试（桩客户端，无网络）
+
+- acreate_completion 的账本写入不在事件循环线程上执行，仍归属到当前请求的局/角色
+- 异常调用同样记账，异常原样抛出
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from werewolf.common import llm_ledger, request_context
+
+
+class RecordingLedger(llm_ledger.LLMLedger):
+    """记录每次写入所在的线程"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def record(self, *args, **kwargs):
+        self.threads.append(threading.get_ident())
+        super().record(*args, **kwargs)
+
+
+class StubCompletions:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("llm down")
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15)
+        message = SimpleNamespace(content="ok")
+        return SimpleNamespace(model=kwargs['model'], usage=usage, choices=[SimpleNamespace(message=message)])
+
+
+def _client(fail=False):
+    return SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions(fail)))
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    ledger = RecordingLedger(str(tmp_path / 'llm_ledger.db'))
+    monkeypatch.setattr(llm_ledger, '_ledger', ledger)
+    return ledger
+
+
+def test_async_record_runs_off_the_event_loop(ledger):
+    async def scenario():
+        request_context._context.set(request_context.RequestContext(game_id='game-1', role='villager', phase='day'))
+        text = await llm_ledger.asdk_llm_call(_client(), 'deepseek-chat', 'hello', caller='generate')
+        return text, threading.get_ident()
+
+    text, loop_thread = asyncio.run(scenario())
+    assert text == "ok"
+    assert len(ledger.threads) == 1
+    assert ledger.threads[0] != loop_thread
+
+    rows = ledger.game_rollup(limit=10)
+    assert [row['game_id'] for row in rows] == ['game-1']
+    assert rows[0]['total_tokens'] == 15
+
+
+def test_async_error_is_recorded_and_raised(ledger):
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await llm_ledger.acreate_completion(_client(fail=True), caller='generate', model='deepseek-chat')
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(ledger.threads) == 1
+    assert ledger.threads[0] != loop_thread
+    assert ledger.caller_rollup()[0]['errors'] == 1
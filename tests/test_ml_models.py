@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+ml_enhanced 模型单元测试（合成玩家数据，无网络）
+
+- WolfDetectionEnsemble: 训练与批量/单条预测、编译推理路径与sklearn一致、保存/加载
+- WolfDetectionEnsemble.partial_fit: 已有全量模型时增量模型在后台预热，累计样本数达到
+  ML_INCREMENTAL_MIN_SAMPLES 之前全量模型继续对外预测；没有全量模型时立即切换
+- BehaviorAnomalyDetector: 样本不足拒绝训练、偏离好人分布的玩家概率更高
+- BayesianAnalyzer: 证据方向、标准化上限、零权重时等于先验
+"""
+
+import random
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pytest
+
+from ml_enhanced.anomaly_detector import BehaviorAnomalyDetector
+from ml_enhanced.bayesian_inference import BayesianAnalyzer
+from ml_enhanced.ensemble_detector import INCREMENTAL_WEIGHTS, WolfDetectionEnsemble
+from ml_enhanced.feature_extractor import to_feature_matrix
+
+WEIGHTS = {'rf': 0.5, 'gb': 0.5}
+
+
+def make_player(rng: random.Random, is_wolf: bool) -> Dict[str, Any]:
+    """合成一个玩家的特征数据（狼人信任低、注入/虚假引用多）"""
+    return {
+        'trust_score': rng.uniform(5, 45) if is_wolf else rng.uniform(40, 95),
+        'vote_accuracy': rng.uniform(0.0, 0.5) if is_wolf else rng.uniform(0.4, 1.0),
+        'contradiction_count': rng.randint(1, 4) if is_wolf else rng.randint(0, 1),
+        'injection_attempts': rng.randint(0, 3) if is_wolf else 0,
+        'false_quotation_count': rng.randint(0, 2) if is_wolf else 0,
+        'speech_lengths': [rng.randint(40, 300) for _ in range(3)],
+        'aggressive_score': rng.uniform(0.4, 1.0) if is_wolf else rng.uniform(0.0, 0.6),
+        'night_survival_rate': rng.uniform(0.5, 1.0) if is_wolf else rng.uniform(0.0, 0.6),
+    }
+
+
+def make_dataset(seed: int, count: int, wolf_ratio: float = 1 / 3) -> Tuple[List[Dict[str, Any]], List[int]]:
+    rng = random.Random(seed)
+    labels = [1 if rng.random() < wolf_ratio else 0 for _ in range(count)]
+    return [make_player(rng, bool(label)) for label in labels], labels
+
+
+@pytest.fixture
+def ensemble(monkeypatch):
+    monkeypatch.setenv('ML_INCREMENTAL_MIN_SAMPLES', '100')
+    return WolfDetectionEnsemble(weights=dict(WEIGHTS))
+
+
+# ==================== WolfDetectionEnsemble ====================
+
+def test_untrained_ensemble_predicts_neutral(ensemble):
+    rows, _ = make_dataset(0, 4)
+    assert ensemble.predict_wolf_probabilities(rows).tolist() == [0.5] * 4
+    assert ensemble.predict_wolf_probability(rows[0]) == 0.5
+
+
+def test_train_and_predict(ensemble):
+    rows, labels = make_dataset(1, 240)
+    assert ensemble.train(rows, labels)
+    assert ensemble.mode == 'full'
+    assert set(ensemble.get_model_names()) == {'rf', 'gb'}
+
+    test_rows, test_labels = make_dataset(2, 60)
+    probs = ensemble.predict_wolf_probabilities(test_rows)
+    assert probs.shape == (60,)
+    assert np.all((probs >= 0.0) & (probs <= 1.0))
+    wolves = probs[np.array(test_labels) == 1]
+    goods = probs[np.array(test_labels) == 0]
+    assert wolves.mean() > 0.7 > 0.3 > goods.mean()
+
+    # 批量与单条一致；编译路径与sklearn路径一致
+    assert ensemble.predict_wolf_probability(test_rows[3]) == pytest.approx(probs[3])
+    assert ensemble._compiled is not None
+    np.testing.assert_allclose(probs, ensemble._sklearn_probabilities(to_feature_matrix(test_rows)), atol=1e-9)
+
+
+def test_train_rejects_bad_input(ensemble):
+    rows, _ = make_dataset(3, 10)
+    assert not ensemble.train(rows, [0] * 10)
+    assert not ensemble.is_trained
+    with pytest.raises(ValueError):
+        ensemble.train(rows, [0, 1])
+    with pytest.raises(ValueError):
+        ensemble.train(rows, [0, 1] * 5, sample_weights=[1.0])
+
+
+def test_partial_fit_warm_up_keeps_full_model_serving(ensemble):
+    rows, labels = make_dataset(4, 240)
+    ensemble.train(rows, labels)
+    full_models = ensemble.models
+    test_rows, _ = make_dataset(5, 30)
+    before = ensemble.predict_wolf_probabilities(test_rows)
+
+    # 预热阶段：增量模型在后台更新，对外预测不变
+    for batch in range(2):
+        new_rows, new_labels = make_dataset(10 + batch, 40)
+        assert ensemble.partial_fit(new_rows, new_labels)
+        assert ensemble.mode == 'full'
+        assert ensemble.models is full_models
+        assert ensemble._pending_models is not None
+        assert ensemble.incremental_samples == 40 * (batch + 1)
+        np.testing.assert_array_equal(ensemble.predict_wolf_probabilities(test_rows), before)
+
+    # 累计达到 min_incremental_samples 后切换到增量模型
+    new_rows, new_labels = make_dataset(12, 40)
+    assert ensemble.partial_fit(new_rows, new_labels)
+    assert ensemble.mode == 'incremental'
+    assert ensemble._pending_models is None
+    assert set(ensemble.models) == {'rf', 'sgd'}
+    assert ensemble.weights == INCREMENTAL_WEIGHTS
+    assert len(ensemble.models['rf'].estimators_) == 3 * ensemble.trees_per_update
+    after = ensemble.predict_wolf_probabilities(test_rows)
+    assert not np.array_equal(after, before)
+
+    # 重新全量训练后回到全量模式，增量计数清零
+    ensemble.train(rows, labels)
+    assert ensemble.mode == 'full'
+    assert ensemble.incremental_samples == 0
+
+
+def test_partial_fit_without_full_model_switches_immediately(ensemble):
+    rows, labels = make_dataset(6, 30)
+    assert ensemble.partial_fit(rows, labels)
+    assert ensemble.mode == 'incremental'
+    assert ensemble.is_trained
+    assert ensemble.incremental_samples == 30
+
+    # 单类批次只更新SGD，随机森林不新增树
+    trees = len(ensemble.models['rf'].estimators_)
+    wolves = [row for row, label in zip(*make_dataset(7, 30)) if label == 1]
+    assert ensemble.partial_fit(wolves, [1] * len(wolves))
+    assert len(ensemble.models['rf'].estimators_) == trees
+    assert not ensemble.partial_fit([], [])
+
+
+def test_partial_fit_caps_forest_size(ensemble):
+    ensemble.max_estimators = 25
+    for batch in range(4):
+        rows, labels = make_dataset(20 + batch, 30)
+        ensemble.partial_fit(rows, labels)
+    rf = ensemble.models['rf']
+    assert len(rf.estimators_) == rf.n_estimators == 25
+
+
+def test_save_and_load_round_trip(ensemble, tmp_path):
+    rows, labels = make_dataset(8, 200)
+    ensemble.train(rows, labels)
+    for batch in range(3):
+        ensemble.partial_fit(*make_dataset(30 + batch, 40))
+    assert ensemble.mode == 'incremental'
+    path = str(tmp_path / 'ensemble.pkl')
+    ensemble.save_models(path)
+
+    loaded = WolfDetectionEnsemble(weights=dict(WEIGHTS))
+    assert loaded.load_models(path)
+    assert loaded.mode == 'incremental'
+    assert loaded.incremental_samples == ensemble.incremental_samples
+    test_rows, _ = make_dataset(9, 20)
+    np.testing.assert_allclose(loaded.predict_wolf_probabilities(test_rows),
+                               ensemble.predict_wolf_probabilities(test_rows), atol=1e-12)
+
+    assert not WolfDetectionEnsemble(weights=dict(WEIGHTS)).load_models(str(tmp_path / 'missing.pkl'))
+
+
+# ==================== BehaviorAnomalyDetector ====================
+
+def test_anomaly_detector_needs_enough_samples():
+    detector = BehaviorAnomalyDetector()
+    rows, _ = make_dataset(40, 4, wolf_ratio=0.0)
+    assert not detector.fit(rows)
+    assert detector.get_wolf_probabilities(rows).tolist() == [0.5] * 4
+
+
+def test_anomaly_detector_scores_outliers_higher():
+    detector = BehaviorAnomalyDetector(contamination=0.1)
+    goods, _ = make_dataset(41, 120, wolf_ratio=0.0)
+    assert detector.fit(goods)
+
+    rng = random.Random(42)
+    normal = [make_player(rng, False) for _ in range(30)]
+    outliers = [dict(make_player(rng, True), injection_attempts=5, false_quotation_count=4,
+                     contradiction_count=8, trust_score=2.0) for _ in range(30)]
+    p_normal = detector.get_wolf_probabilities(normal)
+    p_outliers = detector.get_wolf_probabilities(outliers)
+    assert np.all((p_outliers > 0.0) & (p_outliers < 1.0))
+    assert p_outliers.min() > 0.5 > p_normal.mean()
+    assert detector.get_wolf_probability(outliers[0]) == pytest.approx(p_outliers[0])
+
+
+def test_anomaly_detector_clamps_contamination():
+    assert BehaviorAnomalyDetector(contamination=0.9).contamination == 0.49
+    assert BehaviorAnomalyDetector(contamination=0.0).contamination == 0.01
+
+
+# ==================== BayesianAnalyzer ====================
+
+def test_bayesian_evidence_direction():
+    analyzer = BayesianAnalyzer()
+    base = {'trust_score': 50.0, 'vote_accuracy': 0.5, 'contradiction_count': 1}
+    suspicious = dict(base, injection_attempts=2, trust_score=20.0)
+    trusted = dict(base, trust_score=90.0, vote_accuracy=0.9)
+    probs = analyzer.analyze_players([base, suspicious, trusted])
+    assert probs[1] > probs[0] > probs[2]
+    assert analyzer.analyze_player(suspicious) == pytest.approx(probs[1])
+
+
+def test_bayesian_evidence_is_capped():
+    analyzer = BayesianAnalyzer()
+    # injection_attempts 尺度为1：3次与50次都达到标准化上限
+    three, fifty = analyzer.analyze_players([{'injection_attempts': 3}, {'injection_attempts': 50}])
+    assert three == pytest.approx(fifty)
+
+
+def test_bayesian_zero_weight_returns_prior():
+    analyzer = BayesianAnalyzer(prior=0.25, evidence={'trust_score': (50.0, 25.0, 0.0)})
+    rows, _ = make_dataset(50, 10)
+    np.testing.assert_allclose(analyzer.analyze_players(rows), 0.25)
+    with pytest.raises(ValueError):
+        BayesianAnalyzer(evidence={'not_a_feature': (0.0, 1.0, 1.0)})
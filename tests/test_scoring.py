@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+投票/毒药打分测试
+
+VoteDecisionMaker / WitchDecisionEngine 逐候选人计算分数（标量循环），维度与权重定义在
+build_vote_engine / build_poison_engine 的评分引擎中。用基准脚本的合成上下文
+（benchmarks/bench_scoring_engine.py）核对两者在默认权重与随机权重下结果一致，
+且运行时修改引擎权重后标量路径随之生效。
+"""
+
+import random
+
+import pytest
+
+from bench_scoring_engine import make_context
+from werewolf.optimization.core.scoring_strategy import OVERRIDE
+
+CONTEXTS = 60
+WEIGHT_CHOICES = [0.0, 0.5, 1.0, 2.0]
+
+
+@pytest.fixture(scope='module')
+def contexts():
+    rng = random.Random(11)
+    return [make_context(rng, rng.choice([3, 5, 11])) for _ in range(CONTEXTS)]
+
+
+@pytest.fixture
+def vote_maker():
+    from werewolf.villager.analyzers import TrustScoreCalculator, VotingPatternAnalyzer
+    from werewolf.villager.config import VillagerConfig
+    from werewolf.villager.decision_makers import VoteDecisionMaker
+
+    config = VillagerConfig()
+    return VoteDecisionMaker(config, TrustScoreCalculator(config), VotingPatternAnalyzer(config))
+
+
+@pytest.fixture
+def witch_engine():
+    from werewolf.witch.config import WitchConfig
+    from werewolf.witch.decision_engine import WitchDecisionEngine
+
+    return WitchDecisionEngine(WitchConfig(), None)
+
+
+def _random_weights(engine, rng):
+    return {d.name: (rng.choice([0.0, 1.0]) if d.combine == OVERRIDE else rng.choice(WEIGHT_CHOICES))
+            for d in engine.dimensions}
+
+
+def _assert_same(scalar, engine_scores):
+    assert list(scalar) == list(engine_scores)
+    for candidate, score in engine_scores.items():
+        assert scalar[candidate] == pytest.approx(score, abs=1e-9), candidate
+
+
+def test_vote_scores_match_engine(vote_maker, contexts):
+    rng = random.Random(1)
+    engine = vote_maker.scoring_engine
+    for index, context in enumerate(contexts):
+        if index % 2:
+            engine.set_weights(_random_weights(engine, rng))
+        candidates = context['candidates']
+        _assert_same(vote_maker._vote_scores(candidates, context), engine.score(candidates, context))
+
+
+def test_poison_scores_match_engine(witch_engine, contexts):
+    rng = random.Random(2)
+    engine = witch_engine.poison_engine
+    for index, context in enumerate(contexts):
+        if index % 2:
+            engine.set_weights(_random_weights(engine, rng))
+        candidates = context['candidates']
+        _assert_same(witch_engine._poison_scores(candidates, context), engine.score(candidates, context))
+
+
+def test_weight_changes_reach_cached_weights(witch_engine, contexts):
+    context = contexts[0]
+    candidates = context['candidates']
+    before = witch_engine._poison_scores(candidates, context)
+    assert witch_engine._poison_weights() is witch_engine._poison_weights()
+
+    witch_engine.poison_engine.set_weights({'trust': 0.0})
+    after = witch_engine._poison_scores(candidates, context)
+    assert witch_engine._poison_weights()['trust'] == 0.0
+    assert after != before
+    _assert_same(after, witch_engine.poison_engine.score(candidates, context))
+
+
+def test_vote_decision_reason_reuses_analysis(vote_maker, contexts, monkeypatch):
+    context = dict(contexts[0])
+    candidates = context['candidates']
+    calls = []
+    analyze = vote_maker.trust_calculator.analyze
+    monkeypatch.setattr(vote_maker.trust_calculator, 'analyze',
+                        lambda player, ctx: calls.append(player) or analyze(player, ctx))
+
+    target, reason, scores = vote_maker.decide(candidates, 'No.12', context)
+    assert target == max(scores, key=scores.get)
+    assert reason
+    # 生成理由时不再重复计算目标的信任分数
+    assert len(calls) == len([c for c in candidates if c != 'No.12'])
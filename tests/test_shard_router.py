@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+werewolf.shard_router 单元测试（不启动工作进程，上游用桩）
+
+- 缺少游戏ID请求头的对局请求被拒绝，不按客户端地址绑定
+- RESULT 只在该局没有其他在途请求时解除绑定
+"""
+
+import json
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from werewolf.shard_router import ShardRouter, Worker, create_app
+
+
+class StubPool:
+    """上游连接池桩：interact 阻塞到测试放行"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+
+    async def request(self, method, path, headers, body, timeout):
+        self.calls.append(path)
+        if path == '/agent/interact':
+            await self.release.wait()
+        return 200, [(b'content-type', b'application/json')], b'{}'
+
+    def close(self):
+        pass
+
+
+def _router(workers=2):
+    router = ShardRouter(workers=workers)
+    for slot in router.slots:
+        worker = Worker(slot, 0, 7900 + slot)
+        worker.pool = StubPool()
+        worker.process = SimpleNamespace(pid=0, poll=lambda: None)
+        worker.state = 'ready'
+        router.current[slot] = worker
+    return router
+
+
+async def _call(app, path, payload, headers=()):
+    body = json.dumps(payload).encode()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'content-type', b'application/json')] + [(k.lower().encode(), v.encode()) for k, v in headers],
+        'client': ('10.0.0.1', 5000), 'server': ('127.0.0.1', 7860),
+    }
+    received = {'done': False}
+    messages = []
+
+    async def receive():
+        if received['done']:
+            await asyncio.Event().wait()
+        received['done'] = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await asyncio.wait_for(app(scope, receive, send), 5)
+    return next(m['status'] for m in messages if m['type'] == 'http.response.start')
+
+
+def test_game_request_without_header_is_rejected():
+    router = _router()
+    app = create_app(router)
+
+    async def scenario():
+        status = await _call(app, '/agent/interact', {'status': 'vote', 'round': 1})
+        assert status == 400
+        # 非对局端点（健康检查）照常转发，不创建绑定
+        assert await _call(app, '/agent/checkHealth', {}) == 200
+
+    asyncio.run(scenario())
+    assert router.pins == {}
+    assert router.counters['rejected'] == 1
+    assert all(w.pool.calls.count('/agent/interact') == 0 for w in router.current.values())
+
+
+def test_result_keeps_pin_while_other_requests_in_flight():
+    router = _router()
+    app = create_app(router)
+    game = [('X-Game-Id', 'game-1')]
+
+    async def scenario():
+        assert await _call(app, '/agent/perceive', {'status': 'start'}, game) == 200
+        worker = router.pins['game-1'].worker
+        pending = asyncio.ensure_future(_call(app, '/agent/interact', {'status': 'vote'}, game))
+        try:
+            await asyncio.sleep(0.01)
+            assert router.pins['game-1'].in_flight == 1
+
+            assert await _call(app, '/agent/perceive', {'status': 'result'}, game) == 200
+            # interact 仍在途：绑定保留，后续请求仍到同一工作进程
+            assert 'game-1' in router.pins
+            assert router.route('game-1') is worker
+            assert router.counters['finished'] == 0
+        finally:
+            worker.pool.release.set()
+        assert await asyncio.wait_for(pending, 5) == 200
+        assert 'game-1' not in router.pins
+        assert router.counters['finished'] == 1
+
+    asyncio.run(scenario())
+
+
+def test_finish_does_not_touch_other_games():
+    router = _router()
+    router.route('game-a')
+    router.route('game-b')
+    router.pins['game-b'].in_flight = 1
+    router.finish('game-a')
+    router.finish('game-b')
+    assert list(router.pins) == ['game-b']
+    # 在途请求的绑定不会因空闲超时过期
+    router.check(now=router.pins['game-b'].last_seen + router.pin_timeout + 1)
+    assert list(router.pins) == ['game-b']
+
+
+@pytest.mark.parametrize('key', ['game-1', 'game-2', 'game-3'])
+def test_route_is_sticky(key):
+    router = _router(workers=3)
+    worker = router.route(key)
+    assert all(router.route(key) is worker for _ in range(5))
@@ -6,8 +6,15 @@
 __version__ = '1.0.0'
 __author__ = 'Werewolf AI Team'
 
-# 导出核心组件
-from werewolf.core import *
+
+def __getattr__(name):
+    """导出核心组件（按需从werewolf.core取，导入werewolf子模块时不连带导入全部角色基础设施）"""
+    import importlib
+    core = importlib.import_module('werewolf.core')
+    if name in core.__all__:
+        return getattr(core, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     '__version__',
@@ -1,17 +1,20 @@
 import os
 import logging
 
-from agent_build_sdk.builder import AgentBuilder
-from werewolf.seer.seer_agent import SeerAgent
-from werewolf.villager.villager_agent import VillagerAgent
-from werewolf.witch.witch_agent import WitchAgent
-from werewolf.wolf.wolf_agent import WolfAgent
-from werewolf.guard.guard_agent import GuardAgent
-from werewolf.hunter.hunter_agent import HunterAgent
-from werewolf.wolf_king.wolf_king_agent import WolfKingAgent
+# 加载环境变量（.env），须在读取任何环境变量之前；角色模块改为懒加载后不能再依赖其导入时的副作用
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    logging.debug("python-dotenv not installed, skipping .env file loading")
+
+from agent_build_sdk.server.server import EndpointServer
 from agent_build_sdk.model.roles import ROLE_VILLAGER, ROLE_WOLF, ROLE_SEER, ROLE_WITCH, ROLE_HUNTER, ROLE_GUARD, ROLE_WOLF_KING
 from agent_build_sdk.sdk.werewolf_agent import WerewolfAgent
 
+# 角色智能体懒加载（角色模块连带导入ML模块/sklearn，首个请求时才导入并构建）
+from werewolf.core.lazy_role_agent import register_role_agents
+
 # 游戏结束处理器
 from werewolf.game_end_handler import set_learning_system
 
@@ -31,11 +34,9 @@ except ImportError as e:
     logging.warning(f"Golden Path learning system not available: {e}")
 
 if __name__ == '__main__':
-    # 配置日志
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    # 配置日志（结构化/采样/限速/队列输出，见 werewolf.common.structured_logging）
+    from werewolf.common.structured_logging import configure_logging
+    configure_logging()
     
     # 初始化黄金路径学习系统（默认启用）
     learning_system = None
@@ -74,32 +75,21 @@ if __name__ == '__main__':
     name = 'spy'
     agent = WerewolfAgent(name, model_name=os.getenv('MODEL_NAME'))
     
-    # Register basic role
-    agent.register_role_agent(ROLE_VILLAGER, VillagerAgent(model_name=os.getenv('MODEL_NAME')))
-    
-    # Wolf agent with dual-model architecture
-    detection_model = os.getenv('DETECTION_MODEL_NAME', os.getenv('MODEL_NAME'))
-    agent.register_role_agent(ROLE_WOLF, WolfAgent(
-        model_name=os.getenv('MODEL_NAME'),
-        analysis_model_name=detection_model
-    ))
-    
-    agent.register_role_agent(ROLE_SEER, SeerAgent(model_name=os.getenv('MODEL_NAME')))
-    # Witch agent with dual-model architecture
-    agent.register_role_agent(ROLE_WITCH, WitchAgent(
-        model_name=os.getenv('MODEL_NAME'),
-        analysis_model_name=detection_model
-    ))
-    
-    # Register new characters (12-player game)
-    agent.register_role_agent(ROLE_GUARD, GuardAgent(model_name=os.getenv('MODEL_NAME')))
-    agent.register_role_agent(ROLE_HUNTER, HunterAgent(model_name=os.getenv('MODEL_NAME')))
-    
-    # Wolf King agent with dual-model architecture
-    agent.register_role_agent(ROLE_WOLF_KING, WolfKingAgent(
-        model_name=os.getenv('MODEL_NAME'),
-        analysis_model_name=detection_model
-    ))
+    # 注册角色智能体（默认懒加载+按局会话池，见 ROLE_AGENT_LAZY / ROLE_AGENT_PREWARM / GAME_SESSIONS）
+    model_name = os.getenv('MODEL_NAME')
+    # Wolf / Witch / Wolf King 使用双模型架构
+    detection_model = os.getenv('DETECTION_MODEL_NAME', model_name)
+    dual_model = {'model_name': model_name, 'analysis_model_name': detection_model}
+    register_role_agents(agent, {
+        ROLE_VILLAGER: ('werewolf.villager.villager_agent:VillagerAgent', {'model_name': model_name}),
+        ROLE_WOLF: ('werewolf.wolf.wolf_agent:WolfAgent', dual_model),
+        ROLE_SEER: ('werewolf.seer.seer_agent:SeerAgent', {'model_name': model_name}),
+        ROLE_WITCH: ('werewolf.witch.witch_agent:WitchAgent', dual_model),
+        # Register new characters (12-player game)
+        ROLE_GUARD: ('werewolf.guard.guard_agent:GuardAgent', {'model_name': model_name}),
+        ROLE_HUNTER: ('werewolf.hunter.hunter_agent:HunterAgent', {'model_name': model_name}),
+        ROLE_WOLF_KING: ('werewolf.wolf_king.wolf_king_agent:WolfKingAgent', dual_model),
+    })
     
     # 如果启用增量学习，将其传递给游戏结束处理器
     if learning_system:
@@ -127,5 +117,27 @@ if __name__ == '__main__':
             logging.info("  ✅ 无需手动操作，完全自动化！")
         logging.info("=" * 60)
     
-    agent_builder = AgentBuilder(name, agent=agent)
-    agent_builder.start()
\ No newline at end of file
+    # 指标导出（METRICS_PORT 本地端点 / METRICS_FILE 定期写文件，默认均关闭）
+    from werewolf.common.metrics import start_metrics_server, start_metrics_file_writer
+    start_metrics_server()
+    start_metrics_file_writer()
+    
+    # 定时压缩game_data（去重、合并为压缩分段、保留策略）
+    # 多进程分片部署时只由0号工作进程执行，避免多个进程同时压缩同一目录
+    if os.getenv('SHARD_WORKER_INDEX', '0') == '0':
+        try:
+            from werewolf.common.data_compaction import start_compaction_scheduler
+            start_compaction_scheduler(os.getenv('DATA_DIR', './game_data'))
+        except Exception as e:
+            logging.warning(f"⚠ Data compaction scheduler not started: {e}")
+    
+    # 与AgentBuilder.start()相同，额外安装会话键中间件（X-Game-Id -> 按局隔离的角色实例）
+    # AGENT_ASYNC=true时perceive/interact改为async端点（见 werewolf.core.async_agent），AGENT_THREADS固定线程数
+    # 监听地址读取HOST/PORT（默认0.0.0.0:7860；分片部署时由shard_router分配本机端口）
+    import uvicorn
+    from werewolf.core.game_sessions import install_session_middleware
+    from werewolf.core.async_agent import install_async_routes
+    server = EndpointServer(agent)
+    install_session_middleware(server.app)
+    install_async_routes(server.app, agent)
+    uvicorn.run(server.app, host=os.getenv('HOST', '0.0.0.0'), port=int(os.getenv('PORT', '7860')))
\ No newline at end of file
@@ -4,10 +4,12 @@ Common module - 通用组件层
 提供可复用的通用组件基类和工具
 """
 
-from .utils import DataValidator, CacheManager
+from .utils import DataValidator
+from .cache import CacheManager, ShardedCache
 
 __all__ = [
     # Utils
     'DataValidator',
     'CacheManager',
+    'ShardedCache',
 ]
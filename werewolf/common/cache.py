@@ -0,0 +1,513 @@
+"""
+进程内缓存
+
+原来的 CacheManager 是进程级字典加时间戳：从不淘汰、没有容量上限，SDK在多个线程中
+处理请求时无锁读写。这里换成分片锁的 LRU/TTL 缓存：
+
+- 分片: 键按哈希分到各分片，每个分片一把锁，不同分片的读写互不阻塞
+- 命名空间配额: detectors / prompts / decisions / default 等命名空间各有条目数与字节数上限
+  （max_entries / max_bytes 按 CacheConfig.namespaces 的比例分配）；一个命名空间写满只淘汰
+  自己的条目。配额平均分到各分片，分片内按LRU淘汰（近似全局LRU）
+- 字节数: 写入时按值估算（estimate_size），也可以由调用方给出；超过分片字节配额的值不缓存
+- TTL: set 的 ttl（默认 CacheConfig.default_ttl，0为不过期），读取时惰性清理；
+  兼容原接口 get(key, ttl) 的"写入后超过 ttl 秒视为过期"
+- 防击穿: get_or_compute 对同一个键只让一个线程计算，其余线程等待并共享结果
+- 统计: stats() 按命名空间汇总命中、未命中、写入、淘汰、过期、拒绝、合并等待次数与当前条目数/字节数
+
+用法:
+    from werewolf.common.cache import CacheManager
+
+    cache = CacheManager()
+    detections = cache.namespace('detectors')
+    result = detections.get_or_compute(key, lambda: detector.detect(text), ttl=600)
+
+配置见 werewolf.optimization.models.CacheConfig（CACHE_* 环境变量或 OPTIMIZATION_CONFIG 的 cache 段）。
+"""
+
+import sys
+import math
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+DEFAULT_NAMESPACE = 'default'
+
+# estimate_size 递归统计容器的最大深度与每层最多统计的元素数（超出部分按已统计的平均值外推）
+SIZE_MAX_DEPTH = 4
+SIZE_MAX_ITEMS = 256
+
+_MISSING = object()
+
+
+def estimate_size(value: Any, depth: int = 0) -> int:
+    """
+    估算值占用的字节数（sys.getsizeof，递归统计常见容器）
+
+    Args:
+        value: 缓存值
+        depth: 当前递归深度
+
+    Returns:
+        估算字节数
+    """
+    size = sys.getsizeof(value)
+    if depth >= SIZE_MAX_DEPTH or isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        items: Iterable[Any] = value.items()
+        count = len(value)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = value
+        count = len(value)
+    elif hasattr(value, '__dict__'):
+        return size + estimate_size(vars(value), depth + 1)
+    else:
+        return size
+    counted = 0
+    nested = 0
+    for item in items:
+        if counted >= SIZE_MAX_ITEMS:
+            break
+        if isinstance(item, tuple) and isinstance(value, dict):
+            nested += estimate_size(item[0], depth + 1) + estimate_size(item[1], depth + 1)
+        else:
+            nested += estimate_size(item, depth + 1)
+        counted += 1
+    if counted and count > counted:
+        nested = nested * count // counted
+    return size + nested
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'created', 'expires')
+
+    def __init__(self, value: Any, size: int, created: float, expires: float):
+        self.value = value
+        self.size = size
+        self.created = created
+        self.expires = expires
+
+
+class _Pending:
+    """get_or_compute 中正在计算的键（等待者共享结果或异常；Event在出现等待者时才创建）"""
+
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event: Optional[threading.Event] = None
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _NamespaceStats:
+    __slots__ = ('hits', 'misses', 'sets', 'evictions', 'expirations', 'rejected', 'coalesced')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0
+        self.coalesced = 0
+
+
+class _Shard:
+    """一个分片: 一把锁，每个命名空间一个LRU有序字典"""
+
+    __slots__ = ('lock', 'entries', 'bytes', 'stats', 'pending')
+
+    def __init__(self, namespaces: Iterable[str]):
+        self.lock = threading.Lock()
+        self.entries: Dict[str, 'OrderedDict[Hashable, _Entry]'] = {ns: OrderedDict() for ns in namespaces}
+        self.bytes: Dict[str, int] = {ns: 0 for ns in self.entries}
+        self.stats: Dict[str, _NamespaceStats] = {ns: _NamespaceStats() for ns in self.entries}
+        self.pending: Dict[Tuple[str, Hashable], _Pending] = {}
+
+
+class ShardedCache:
+    """
+    分片锁的 LRU/TTL 缓存（线程安全）
+
+    示例:
+        >>> cache = ShardedCache(max_entries=1000, namespaces={'prompts': 0.5, 'default': 0.5})
+        >>> cache.set('k', 'v', ttl=60, namespace='prompts')
+        True
+        >>> cache.get('k', namespace='prompts')
+        'v'
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: float = 0.0,
+        shards: int = 16,
+        namespaces: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 全部命名空间的条目数上限
+            max_bytes: 全部命名空间的估算字节数上限
+            default_ttl: 默认过期时间（秒，0表示不过期）
+            shards: 分片数
+            namespaces: {命名空间: 配额比例}（默认只有default）
+            clock: 时钟（单调时间，测试可替换）
+        """
+        namespaces = dict(namespaces or {DEFAULT_NAMESPACE: 1.0})
+        namespaces.setdefault(DEFAULT_NAMESPACE, min(namespaces.values()))
+        total_share = sum(namespaces.values())
+        self.shard_count = max(1, int(shards))
+        self.default_ttl = float(default_ttl)
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self._clock = clock
+        # 每个分片内各命名空间的配额: (条目数, 字节数)
+        self._limits: Dict[str, Tuple[int, int]] = {}
+        for ns, share in namespaces.items():
+            entries = max(1, math.ceil(max_entries * share / total_share / self.shard_count))
+            size = max(1, math.ceil(max_bytes * share / total_share / self.shard_count))
+            self._limits[ns] = (entries, size)
+        self._shards: List[_Shard] = [_Shard(self._limits) for _ in range(self.shard_count)]
+
+    # ==================== 读写 ====================
+
+    def _shard(self, key: Hashable) -> _Shard:
+        return self._shards[hash(key) % self.shard_count]
+
+    def _check_namespace(self, namespace: str) -> None:
+        if namespace not in self._limits:
+            raise KeyError(f"unknown cache namespace: {namespace}")
+
+    def _lookup(self, shard: _Shard, key: Hashable, namespace: str, ttl: Optional[float], now: float) -> Any:
+        """持有分片锁时查找（过期条目顺便删除），未命中返回 _MISSING"""
+        entries = shard.entries[namespace]
+        entry = entries.get(key)
+        if entry is None:
+            return _MISSING
+        if (entry.expires and now >= entry.expires) or (ttl is not None and now - entry.created > ttl):
+            del entries[key]
+            shard.bytes[namespace] -= entry.size
+            shard.stats[namespace].expirations += 1
+            return _MISSING
+        entries.move_to_end(key)
+        return entry.value
+
+    def get(self, key: Hashable, ttl: Optional[float] = None, namespace: str = DEFAULT_NAMESPACE,
+            default: Any = None) -> Any:
+        """
+        获取缓存值
+
+        Args:
+            key: 缓存键
+            ttl: 写入后超过ttl秒视为过期（兼容原接口；None表示只按写入时的过期时间）
+            namespace: 命名空间
+            default: 未命中时的返回值
+
+        Returns:
+            缓存值，不存在或过期时返回default
+        """
+        self._check_namespace(namespace)
+        shard = self._shard(key)
+        with shard.lock:
+            value = self._lookup(shard, key, namespace, ttl, self._clock())
+            stats = shard.stats[namespace]
+            if value is _MISSING:
+                stats.misses += 1
+                return default
+            stats.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, namespace: str = DEFAULT_NAMESPACE,
+            size: Optional[int] = None) -> bool:
+        """
+        设置缓存值（命名空间超出配额时淘汰最久未使用的条目）
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 过期时间（秒，None使用默认值，0表示不过期）
+            namespace: 命名空间
+            size: 字节数（None时估算）
+
+        Returns:
+            是否写入（超过单个分片的字节配额时不写入）
+        """
+        self._check_namespace(namespace)
+        ttl = self.default_ttl if ttl is None else ttl
+        size = estimate_size(value) if size is None else int(size)
+        max_entries, max_bytes = self._limits[namespace]
+        shard = self._shard(key)
+        with shard.lock:
+            entries = shard.entries[namespace]
+            stats = shard.stats[namespace]
+            old = entries.pop(key, None)
+            if old is not None:
+                shard.bytes[namespace] -= old.size
+            if size > max_bytes:
+                stats.rejected += 1
+                return False
+            now = self._clock()
+            entries[key] = _Entry(value, size, now, now + ttl if ttl > 0 else 0.0)
+            shard.bytes[namespace] += size
+            stats.sets += 1
+            while len(entries) > max_entries or shard.bytes[namespace] > max_bytes:
+                _, evicted = entries.popitem(last=False)
+                shard.bytes[namespace] -= evicted.size
+                stats.evictions += 1
+        return True
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        ttl: Optional[float] = None,
+        namespace: str = DEFAULT_NAMESPACE,
+        size: Optional[int] = None,
+        should_cache: Optional[Callable[[Any], bool]] = None,
+        wait_timeout: Optional[float] = None
+    ) -> Any:
+        """
+        取缓存值，未命中时计算并写入（防击穿：同一个键同时只有一个线程计算）
+
+        Args:
+            key: 缓存键
+            compute: 无参计算函数
+            ttl: 过期时间（同set）
+            namespace: 命名空间
+            size: 字节数（None时估算）
+            should_cache: 结果是否写入缓存（例如失败时返回的占位结果不缓存）；等待者仍共享该结果
+            wait_timeout: 等待其他线程计算的最长时间（秒），超时后自己计算；None表示一直等待
+
+        Returns:
+            缓存值或计算结果（计算抛出的异常原样传给所有等待者，不缓存）
+        """
+        self._check_namespace(namespace)
+        shard = self._shard(key)
+        pending_key = (namespace, key)
+        with shard.lock:
+            value = self._lookup(shard, key, namespace, None, self._clock())
+            stats = shard.stats[namespace]
+            if value is not _MISSING:
+                stats.hits += 1
+                return value
+            stats.misses += 1
+            pending = shard.pending.get(pending_key)
+            owner = pending is None
+            if owner:
+                pending = shard.pending[pending_key] = _Pending()
+            else:
+                stats.coalesced += 1
+                if pending.event is None:
+                    pending.event = threading.Event()
+                event = pending.event
+
+        if not owner:
+            if event.wait(wait_timeout):
+                if pending.error is not None:
+                    raise pending.error
+                return pending.value
+            return compute()
+
+        try:
+            value = compute()
+            pending.value = value
+            if should_cache is None or should_cache(value):
+                self.set(key, value, ttl=ttl, namespace=namespace, size=size)
+            return value
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with shard.lock:
+                shard.pending.pop(pending_key, None)
+                event = pending.event
+            if event is not None:
+                event.set()
+
+    def delete(self, key: Hashable, namespace: str = DEFAULT_NAMESPACE) -> None:
+        """
+        删除缓存
+
+        Args:
+            key: 缓存键
+            namespace: 命名空间
+        """
+        self._check_namespace(namespace)
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries[namespace].pop(key, None)
+            if entry is not None:
+                shard.bytes[namespace] -= entry.size
+
+    def has(self, key: Hashable, namespace: str = DEFAULT_NAMESPACE) -> bool:
+        """
+        检查缓存是否存在（未过期，不计入命中统计、不改变LRU顺序）
+
+        Args:
+            key: 缓存键
+            namespace: 命名空间
+
+        Returns:
+            是否存在
+        """
+        self._check_namespace(namespace)
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries[namespace].get(key)
+            return entry is not None and not (entry.expires and self._clock() >= entry.expires)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """清空缓存（指定命名空间时只清空该命名空间）"""
+        if namespace is not None:
+            self._check_namespace(namespace)
+        for shard in self._shards:
+            with shard.lock:
+                for ns in ([namespace] if namespace is not None else list(shard.entries)):
+                    shard.entries[ns].clear()
+                    shard.bytes[ns] = 0
+
+    def purge_expired(self) -> int:
+        """
+        删除全部已过期条目
+
+        Returns:
+            删除的条目数
+        """
+        removed = 0
+        now = self._clock()
+        for shard in self._shards:
+            with shard.lock:
+                for ns, entries in shard.entries.items():
+                    expired = [k for k, e in entries.items() if e.expires and now >= e.expires]
+                    for k in expired:
+                        shard.bytes[ns] -= entries.pop(k).size
+                    shard.stats[ns].expirations += len(expired)
+                    removed += len(expired)
+        return removed
+
+    def size(self, namespace: Optional[str] = None) -> int:
+        """
+        获取缓存条目数
+
+        Args:
+            namespace: 命名空间（None表示全部）
+
+        Returns:
+            缓存项数量（可能包含尚未清理的过期条目）
+        """
+        if namespace is not None:
+            self._check_namespace(namespace)
+        total = 0
+        for shard in self._shards:
+            with shard.lock:
+                if namespace is None:
+                    total += sum(len(entries) for entries in shard.entries.values())
+                else:
+                    total += len(shard.entries[namespace])
+        return total
+
+    def namespace(self, name: str) -> 'CacheNamespace':
+        """绑定命名空间的视图"""
+        self._check_namespace(name)
+        return CacheNamespace(self, name)
+
+    # ==================== 统计 ====================
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        按命名空间汇总的统计
+
+        Returns:
+            {命名空间: {entries, bytes, max_entries, max_bytes, hits, misses, hit_rate,
+                        sets, evictions, expirations, rejected, coalesced}}
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        for ns, (max_entries, max_bytes) in self._limits.items():
+            row = {'entries': 0, 'bytes': 0,
+                   'max_entries': max_entries * self.shard_count, 'max_bytes': max_bytes * self.shard_count}
+            row.update({name: 0 for name in _NamespaceStats.__slots__})
+            result[ns] = row
+        for shard in self._shards:
+            with shard.lock:
+                for ns, row in result.items():
+                    row['entries'] += len(shard.entries[ns])
+                    row['bytes'] += shard.bytes[ns]
+                    stats = shard.stats[ns]
+                    for name in _NamespaceStats.__slots__:
+                        row[name] += getattr(stats, name)
+        for row in result.values():
+            lookups = row['hits'] + row['misses']
+            row['hit_rate'] = row['hits'] / lookups if lookups else 0.0
+        return result
+
+
+class CacheNamespace:
+    """绑定到一个命名空间的缓存视图（接口同 ShardedCache，省去 namespace 参数）"""
+
+    def __init__(self, cache: ShardedCache, name: str):
+        self.cache = cache
+        self.name = name
+
+    def get(self, key: Hashable, ttl: Optional[float] = None, default: Any = None) -> Any:
+        return self.cache.get(key, ttl=ttl, namespace=self.name, default=default)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, size: Optional[int] = None) -> bool:
+        return self.cache.set(key, value, ttl=ttl, namespace=self.name, size=size)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float] = None,
+                       size: Optional[int] = None, should_cache: Optional[Callable[[Any], bool]] = None,
+                       wait_timeout: Optional[float] = None) -> Any:
+        return self.cache.get_or_compute(key, compute, ttl=ttl, namespace=self.name, size=size,
+                                         should_cache=should_cache, wait_timeout=wait_timeout)
+
+    def delete(self, key: Hashable) -> None:
+        self.cache.delete(key, namespace=self.name)
+
+    def has(self, key: Hashable) -> bool:
+        return self.cache.has(key, namespace=self.name)
+
+    def clear(self) -> None:
+        self.cache.clear(namespace=self.name)
+
+    def size(self) -> int:
+        return self.cache.size(namespace=self.name)
+
+
+class CacheManager(ShardedCache):
+    """
+    缓存管理器(单例模式 - 线程安全)
+
+    进程内共享的 ShardedCache，容量、分片与命名空间配额来自 load_config().cache
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                # 双重检查锁定
+                if cls._instance is None:
+                    from werewolf.optimization.config import load_config
+
+                    config = load_config().cache
+                    instance = super().__new__(cls)
+                    ShardedCache.__init__(
+                        instance,
+                        max_entries=config.max_entries,
+                        max_bytes=config.max_bytes,
+                        default_ttl=config.default_ttl,
+                        shards=config.shards,
+                        namespaces=config.namespaces,
+                    )
+                    cls._instance = instance
+        return cls._instance
+
+    def __init__(self):
+        # 单例在 __new__ 中按配置初始化，重复调用 CacheManager() 不重置
+        pass
@@ -0,0 +1,496 @@
+"""
+游戏数据压缩与保留策略
+
+game_data/ 下每局会产生多个小JSON文件（game_*.json、seer_*.json），
+同一局还会被多个角色重复记录。本模块负责：
+
+- 按 (记录类型, game_id) 和内容哈希去重（保留最早的一份）
+- 把小文件合并为压缩分段 segments/segment_*.jsonl.{zst,gz}
+- collected_data.json 按 (game_id, player_name) 去重并可限制样本数
+- 按年龄和总大小执行保留策略
+- 报告回收的字节数
+
+用法:
+    python -m werewolf.common.data_compaction --data-dir ./game_data
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+# 参与合并的小文件模式 -> 记录类型
+LOOSE_FILE_PATTERNS = {
+    'game_*.json': 'game',
+    'seer_*.json': 'seer',
+}
+COLLECTED_DATA_FILE = 'collected_data.json'
+SEGMENT_DIR = 'segments'
+INDEX_FILE = 'index.json'
+
+
+@dataclass
+class CompactionReport:
+    """一次压缩任务的统计结果"""
+    files_scanned: int = 0
+    records_compacted: int = 0
+    duplicates_removed: int = 0
+    unreadable_files: int = 0
+    segments_written: int = 0
+    segments_deleted: int = 0
+    collected_samples_removed: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    duration_ms: float = 0.0
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return max(0, self.bytes_before - self.bytes_after)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result['bytes_reclaimed'] = self.bytes_reclaimed
+        return result
+
+
+def _content_hash(record: Any) -> str:
+    """记录内容的规范化哈希（键排序，忽略缩进差异）"""
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def _extract_game_id(record: Any, fallback: str) -> str:
+    """从记录中提取game_id（兼容顶层和metadata中的game_id）"""
+    if isinstance(record, dict):
+        if record.get('game_id'):
+            return str(record['game_id'])
+        metadata = record.get('metadata')
+        if isinstance(metadata, dict) and metadata.get('game_id'):
+            return str(metadata['game_id'])
+    return fallback
+
+
+def _atomic_write_bytes(path: Path, payload: bytes) -> None:
+    """先写临时文件再替换"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+class DataCompactor:
+    """game_data 目录压缩器"""
+
+    def __init__(
+        self,
+        data_dir: Optional[str] = None,
+        max_age_days: Optional[float] = None,
+        max_total_bytes: Optional[int] = None,
+        max_collected_samples: Optional[int] = None,
+        segment_max_records: int = 1000,
+        min_file_age_seconds: float = 60.0,
+        compression: Optional[str] = None
+    ):
+        """
+        Args:
+            data_dir: 数据目录，默认读取 DATA_DIR
+            max_age_days: 分段保留天数，默认读取 DATA_RETENTION_DAYS（0=不限）
+            max_total_bytes: 分段总大小上限，默认读取 DATA_MAX_BYTES（0=不限）
+            max_collected_samples: collected_data.json 最多保留的样本数，默认读取 DATA_MAX_SAMPLES（0=不限）
+            segment_max_records: 单个分段的最大记录数
+            min_file_age_seconds: 只合并修改时间早于此值的文件，避免与正在写入的文件竞争
+            compression: 'zstd' 或 'gzip'，默认优先zstd
+        """
+        self.data_dir = Path(data_dir or os.getenv('DATA_DIR', './game_data'))
+        self.max_age_days = float(os.getenv('DATA_RETENTION_DAYS', '30')) if max_age_days is None else max_age_days
+        self.max_total_bytes = int(os.getenv('DATA_MAX_BYTES', str(512 * 1024 * 1024))) if max_total_bytes is None else max_total_bytes
+        self.max_collected_samples = int(os.getenv('DATA_MAX_SAMPLES', '0')) if max_collected_samples is None else max_collected_samples
+        self.segment_max_records = max(1, segment_max_records)
+        self.min_file_age_seconds = min_file_age_seconds
+
+        if compression is None:
+            compression = 'zstd' if ZSTD_AVAILABLE else 'gzip'
+        if compression == 'zstd' and not ZSTD_AVAILABLE:
+            logger.warning("zstandard not installed, falling back to gzip")
+            compression = 'gzip'
+        self.compression = compression
+
+        self.segment_dir = self.data_dir / SEGMENT_DIR
+        self._lock = threading.Lock()
+
+    # ==================== 索引 ====================
+
+    def _load_index(self) -> Dict[str, Any]:
+        path = self.segment_dir / INDEX_FILE
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                index.setdefault('keys', {})
+                index.setdefault('hashes', {})
+                index.setdefault('segments', {})
+                return index
+            except (json.JSONDecodeError, IOError, OSError) as e:
+                logger.warning(f"[Compaction] 索引损坏，将重建: {e}")
+        return {'keys': {}, 'hashes': {}, 'segments': {}}
+
+    def _save_index(self, index: Dict[str, Any]) -> None:
+        _atomic_write_bytes(
+            self.segment_dir / INDEX_FILE,
+            json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        )
+
+    # ==================== 分段读写 ====================
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor(level=10).compress(raw)
+        return gzip.compress(raw, compresslevel=9)
+
+    @staticmethod
+    def _decompress(path: Path) -> bytes:
+        data = path.read_bytes()
+        if path.suffix == '.zst':
+            if not ZSTD_AVAILABLE:
+                raise RuntimeError(f"zstandard required to read {path}")
+            return zstandard.ZstdDecompressor().decompress(data, max_output_size=1 << 31)
+        return gzip.decompress(data)
+
+    def _write_segment(self, entries: List[Dict[str, Any]]) -> Tuple[str, int]:
+        """写入一个压缩分段，返回(文件名, 字节数)"""
+        suffix = 'zst' if self.compression == 'zstd' else 'gz'
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        name = f"segment_{stamp}.jsonl.{suffix}"
+        raw = "\n".join(json.dumps(e, ensure_ascii=False, separators=(',', ':')) for e in entries)
+        payload = self._compress(raw.encode('utf-8'))
+        _atomic_write_bytes(self.segment_dir / name, payload)
+        return name, len(payload)
+
+    def iter_records(self, kind: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        遍历已合并的记录
+
+        Args:
+            kind: 记录类型过滤（'game'/'seer'），None表示全部
+
+        Yields:
+            {'game_id', 'kind', 'source', 'mtime', 'record'}
+        """
+        if not self.segment_dir.exists():
+            return
+        for path in sorted(self.segment_dir.glob('segment_*.jsonl.*')):
+            try:
+                lines = self._decompress(path).decode('utf-8').splitlines()
+            except Exception as e:
+                logger.warning(f"[Compaction] 读取分段失败 {path.name}: {e}")
+                continue
+            for line in lines:
+                if not line:
+                    continue
+                entry = json.loads(line)
+                if kind is None or entry.get('kind') == kind:
+                    yield entry
+
+    def count_records(self, kind: str) -> int:
+        """
+        统计某类记录的总数（已合并 + 尚未合并的小文件）
+
+        Args:
+            kind: 记录类型（'game'/'seer'）
+        """
+        compacted = sum(1 for key in self._load_index()['keys'] if key.startswith(f"{kind}:"))
+        loose = sum(
+            len(list(self.data_dir.glob(pattern)))
+            for pattern, pattern_kind in LOOSE_FILE_PATTERNS.items() if pattern_kind == kind
+        )
+        return compacted + loose
+
+    # ==================== 压缩流程 ====================
+
+    def _directory_bytes(self) -> int:
+        total = 0
+        if not self.data_dir.exists():
+            return 0
+        for path in self.data_dir.rglob('*'):
+            if path.is_file():
+                try:
+                    total += path.stat().st_size
+                except OSError:
+                    pass
+        return total
+
+    def _compact_loose_files(self, index: Dict[str, Any], report: CompactionReport) -> List[Path]:
+        """合并小文件，返回可删除的已处理文件"""
+        now = time.time()
+        candidates: List[Tuple[float, Path, str]] = []
+        for pattern, kind in LOOSE_FILE_PATTERNS.items():
+            for path in self.data_dir.glob(pattern):
+                try:
+                    mtime = path.stat().st_mtime
+                except OSError:
+                    continue
+                if now - mtime >= self.min_file_age_seconds:
+                    candidates.append((mtime, path, kind))
+
+        # 按修改时间排序，重复记录保留最早的一份
+        candidates.sort(key=lambda item: item[0])
+        report.files_scanned = len(candidates)
+
+        entries: List[Dict[str, Any]] = []
+        processed: List[Path] = []
+        for mtime, path, kind in candidates:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+            except (json.JSONDecodeError, IOError, OSError, UnicodeDecodeError) as e:
+                logger.warning(f"[Compaction] 跳过无法读取的文件 {path.name}: {e}")
+                report.unreadable_files += 1
+                continue
+
+            processed.append(path)
+            game_id = _extract_game_id(record, fallback=path.stem)
+            key = f"{kind}:{game_id}"
+            digest = _content_hash(record)
+            if key in index['keys'] or digest in index['hashes']:
+                report.duplicates_removed += 1
+                continue
+
+            entries.append({
+                'game_id': game_id,
+                'kind': kind,
+                'source': path.name,
+                'mtime': mtime,
+                'record': record,
+            })
+            index['keys'][key] = None  # 写入分段后回填分段名
+            index['hashes'][digest] = key
+
+        # 分批写入分段
+        for start in range(0, len(entries), self.segment_max_records):
+            chunk = entries[start:start + self.segment_max_records]
+            name, size = self._write_segment(chunk)
+            for entry in chunk:
+                index['keys'][f"{entry['kind']}:{entry['game_id']}"] = name
+            index['segments'][name] = {
+                'records': len(chunk),
+                'bytes': size,
+                'newest_mtime': max(entry['mtime'] for entry in chunk),
+            }
+            report.segments_written += 1
+            report.records_compacted += len(chunk)
+
+        return processed
+
+    def _compact_collected_data(self, report: CompactionReport) -> None:
+        """collected_data.json 去重并按样本数保留最近的数据"""
+        path = self.data_dir / COLLECTED_DATA_FILE
+        if not path.exists():
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (json.JSONDecodeError, IOError, OSError) as e:
+            logger.warning(f"[Compaction] 跳过无法读取的 {COLLECTED_DATA_FILE}: {e}")
+            report.unreadable_files += 1
+            return
+
+        samples = saved.get('data', []) if isinstance(saved, dict) else []
+        seen = set()
+        deduped = []
+        for item in samples:
+            if isinstance(item, dict) and item.get('game_id') is not None:
+                key = (item.get('game_id'), item.get('player_name'))
+            else:
+                key = _content_hash(item)
+            if key in seen:
+                continue
+            seen.add(key)
+            deduped.append(item)
+
+        if self.max_collected_samples > 0 and len(deduped) > self.max_collected_samples:
+            deduped = deduped[-self.max_collected_samples:]
+
+        removed = len(samples) - len(deduped)
+        if removed <= 0:
+            return
+
+        saved['data'] = deduped
+        _atomic_write_bytes(
+            path, json.dumps(saved, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        )
+        report.collected_samples_removed = removed
+
+    def _enforce_retention(self, index: Dict[str, Any], report: CompactionReport) -> None:
+        """按年龄和总大小删除最旧的分段"""
+        segments = index['segments']
+        expired = set()
+
+        if self.max_age_days > 0:
+            cutoff = time.time() - self.max_age_days * 86400
+            expired.update(name for name, meta in segments.items() if meta['newest_mtime'] < cutoff)
+
+        if self.max_total_bytes > 0:
+            remaining = sorted(
+                (name for name in segments if name not in expired),
+                key=lambda name: segments[name]['newest_mtime']
+            )
+            total = sum(segments[name]['bytes'] for name in remaining)
+            while remaining and total > self.max_total_bytes:
+                oldest = remaining.pop(0)
+                total -= segments[oldest]['bytes']
+                expired.add(oldest)
+
+        if not expired:
+            return
+
+        for name in expired:
+            try:
+                (self.segment_dir / name).unlink()
+            except FileNotFoundError:
+                pass
+            segments.pop(name, None)
+            report.segments_deleted += 1
+
+        index['keys'] = {key: seg for key, seg in index['keys'].items() if seg not in expired}
+        live_keys = set(index['keys'])
+        index['hashes'] = {h: key for h, key in index['hashes'].items() if key in live_keys}
+
+    def run(self) -> CompactionReport:
+        """
+        执行一次完整的压缩任务
+
+        Returns:
+            CompactionReport: 统计结果
+        """
+        report = CompactionReport()
+        if not self.data_dir.exists():
+            return report
+
+        with self._lock:
+            start = time.perf_counter()
+            report.bytes_before = self._directory_bytes()
+            self.segment_dir.mkdir(parents=True, exist_ok=True)
+
+            index = self._load_index()
+            processed = self._compact_loose_files(index, report)
+            self._enforce_retention(index, report)
+            self._save_index(index)
+
+            # 分段和索引落盘后才删除原文件，中途崩溃时下次运行会按索引去重
+            for path in processed:
+                try:
+                    path.unlink()
+                except OSError as e:
+                    logger.warning(f"[Compaction] 删除已合并文件失败 {path.name}: {e}")
+
+            self._compact_collected_data(report)
+
+            report.bytes_after = self._directory_bytes()
+            report.duration_ms = (time.perf_counter() - start) * 1000
+
+        logger.info(
+            f"[Compaction] {report.files_scanned} files -> {report.records_compacted} records "
+            f"in {report.segments_written} segments, {report.duplicates_removed} duplicates, "
+            f"{report.segments_deleted} segments expired, "
+            f"reclaimed {report.bytes_reclaimed} bytes ({report.duration_ms:.0f}ms)"
+        )
+        return report
+
+
+class CompactionScheduler:
+    """后台定时压缩任务（守护线程）"""
+
+    def __init__(self, compactor: DataCompactor, interval_seconds: float):
+        """
+        Args:
+            compactor: 压缩器
+            interval_seconds: 执行间隔（秒）
+        """
+        self.compactor = compactor
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name='data-compaction', daemon=True)
+        self._thread.start()
+        logger.info(f"[Compaction] Scheduler started (every {self.interval_seconds / 3600:.1f}h)")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _loop(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self.compactor.run()
+            except Exception as e:
+                logger.error(f"[Compaction] Scheduled run failed: {e}", exc_info=True)
+
+
+def start_compaction_scheduler(data_dir: Optional[str] = None) -> Optional[CompactionScheduler]:
+    """
+    按环境变量 DATA_COMPACTION_INTERVAL_HOURS 启动定时压缩（0表示禁用）
+
+    Returns:
+        CompactionScheduler，禁用时返回None
+    """
+    try:
+        interval_hours = float(os.getenv('DATA_COMPACTION_INTERVAL_HOURS', '6'))
+    except ValueError:
+        logger.warning("Invalid DATA_COMPACTION_INTERVAL_HOURS, using 6")
+        interval_hours = 6.0
+    if interval_hours <= 0:
+        return None
+
+    scheduler = CompactionScheduler(DataCompactor(data_dir), interval_hours * 3600)
+    scheduler.start()
+    return scheduler
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compact, dedup and prune game_data/")
+    parser.add_argument('--data-dir', default=None, help="数据目录（默认 DATA_DIR 或 ./game_data）")
+    parser.add_argument('--max-age-days', type=float, default=None)
+    parser.add_argument('--max-bytes', type=int, default=None)
+    parser.add_argument('--max-samples', type=int, default=None, help="collected_data.json 最多保留的样本数")
+    parser.add_argument('--compression', choices=['zstd', 'gzip'], default=None)
+    parser.add_argument('--min-file-age', type=float, default=60.0, help="只合并早于N秒的文件")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    compactor = DataCompactor(
+        data_dir=args.data_dir,
+        max_age_days=args.max_age_days,
+        max_total_bytes=args.max_bytes,
+        max_collected_samples=args.max_samples,
+        min_file_age_seconds=args.min_file_age,
+        compression=args.compression,
+    )
+    print(json.dumps(compactor.run().to_dict(), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,366 @@
+"""
+决策点录制
+
+在打分函数（女巫毒药分数、守卫优先级、投票优先级）入口录制完整输入：
+被评估的玩家、决策上下文（由memory构建的字典，以及其中引用的分析器状态快照）
+和当时的输出，写成紧凑的JSONL（路径以.gz结尾时gzip压缩）。
+benchmarks/decision_replay.py 用当前代码重放这些决策点，对比选中目标并计时。
+
+- 同一次决策中各候选人共享同一个上下文：上下文按内容哈希只写一次，
+  调用记录通过键引用，文件体积与候选人数量基本无关
+- 上下文中的对象（如守卫的RoleEstimator）按公开属性做状态快照，
+  重放时恢复为同类实例
+- 未启用时装饰器只多一次全局变量检查
+
+用法:
+    from werewolf.common import decision_recorder
+
+    @decision_recorder.recorded("witch.poison_score")
+    def _calculate_poison_score(self, target, context):
+        ...
+
+    # 一次为全部候选人打分的方法，每个候选人写一条调用记录（格式相同，重放走单候选人方法）
+    @decision_recorder.recorded_scores("witch.poison_score")
+    def _calculate_poison_scores(self, candidates, context):
+        ...
+
+记录格式（每行一个JSON）:
+    {"type": "context", "key": "...", "data": {...}}
+    {"type": "call", "point": "...", "owner": "模块.类", "config": "模块.类",
+     "game_id": "...", "role": "...", "phase": "...", "subject": "No.3",
+     "context": "<key>", "result": 42.0, "elapsed_us": 18.2}
+
+环境变量:
+    DECISION_RECORD_FILE: 录制输出路径（为空=禁用；可包含{pid}，多进程时各写一个文件）
+    DECISION_RECORD_MAX: 单进程最多录制的调用数（默认100000，超出后停止录制）
+"""
+
+import os
+import gzip
+import json
+import time
+import atexit
+import hashlib
+import logging
+import threading
+import functools
+import importlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from werewolf.common.request_context import get_request_context
+
+logger = logging.getLogger(__name__)
+
+# 对象快照时跳过的属性（配置与记忆由重放端提供）
+_SKIPPED_ATTRIBUTES = ('config', 'logger', 'memory', 'memory_dao')
+
+# 记住最近写出的上下文键数量（超出后同一上下文会重复写出，不影响正确性）
+_CONTEXT_CACHE_SIZE = 256
+
+# 对象快照的递归深度上限
+_MAX_DEPTH = 8
+
+
+def class_path(cls: type) -> str:
+    """类的完整路径（模块.类名）"""
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def import_class(path: str) -> type:
+    """按完整路径导入类"""
+    module_name, _, name = path.rpartition('.')
+    return getattr(importlib.import_module(module_name), name)
+
+
+def encode(value: Any, depth: int = 0) -> Any:
+    """
+    把决策输入编码为JSON可表示的结构
+
+    集合编码为 {"__set__": [...]}，对象编码为
+    {"__object__": 类路径, "state": 公开属性}，无法表示的值编码为 {"__repr__": ...}
+
+    Args:
+        value: 任意值
+        depth: 当前递归深度
+
+    Returns:
+        可JSON序列化的结构
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if depth >= _MAX_DEPTH:
+        return {'__repr__': repr(value)[:200]}
+    if isinstance(value, dict):
+        return {str(k): encode(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode(v, depth + 1) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return {'__set__': sorted((encode(v, depth + 1) for v in value), key=repr)}
+    if hasattr(value, 'item') and callable(value.item):
+        # numpy标量
+        try:
+            return value.item()
+        except (TypeError, ValueError):
+            pass
+    if hasattr(value, '__dict__') and not callable(value):
+        state = {
+            name: encode(attr, depth + 1)
+            for name, attr in vars(value).items()
+            if not name.startswith('_') and name not in _SKIPPED_ATTRIBUTES and not callable(attr)
+        }
+        return {'__object__': class_path(type(value)), 'state': state}
+    return {'__repr__': repr(value)[:200]}
+
+
+def decode(value: Any, config: Any = None) -> Any:
+    """
+    还原encode的结果
+
+    Args:
+        value: encode产生的结构
+        config: 恢复对象时注入的配置（对应被跳过的config属性）
+
+    Returns:
+        还原后的值（无法表示的值还原为None）
+    """
+    if isinstance(value, list):
+        return [decode(v, config) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if '__set__' in value:
+        return set(decode(v, config) for v in value['__set__'])
+    if '__object__' in value:
+        cls = import_class(value['__object__'])
+        obj = cls.__new__(cls)
+        if config is not None:
+            obj.config = config
+            if hasattr(config, 'get_logger'):
+                obj.logger = config.get_logger(cls.__name__)
+        for name, attr in value.get('state', {}).items():
+            setattr(obj, name, decode(attr, config))
+        return obj
+    if '__repr__' in value:
+        return None
+    return {k: decode(v, config) for k, v in value.items()}
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class DecisionRecorder:
+    """
+    决策点录制器（线程安全，文件句柄常驻，进程退出时刷新）
+
+    Args:
+        path: 输出路径（为空=禁用；{pid}替换为进程号）
+        max_records: 最多录制的调用数
+    """
+
+    def __init__(self, path: str = '', max_records: int = 100000):
+        self.path = path.replace('{pid}', str(os.getpid())) if path else ''
+        self.max_records = max_records
+        self.enabled = bool(self.path) and max_records > 0
+        self.records_written = 0
+        self.records_dropped = 0
+        self._contexts: 'OrderedDict[str, None]' = OrderedDict()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _context_key(self, encoded_context: Any) -> Tuple[str, str]:
+        blob = json.dumps(encoded_context, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha1(blob.encode('utf-8')).hexdigest()[:16], blob
+
+    def record(self, point: str, owner: Any, subject: Any, context: Any, result: Any, elapsed_us: float) -> None:
+        """
+        录制一次决策调用
+
+        Args:
+            point: 决策点名称
+            owner: 被调用方法所属实例
+            subject: 被评估的玩家
+            context: 已编码的决策上下文（调用前编码，避免记录被打分函数修改后的状态）
+            result: 输出
+            elapsed_us: 原调用耗时（微秒）
+        """
+        if not self.enabled:
+            return
+        try:
+            key, blob = self._context_key(context)
+            config = getattr(owner, 'config', None)
+            ctx = get_request_context()
+            call = {
+                'type': 'call',
+                'point': point,
+                'owner': class_path(type(owner)),
+                'config': class_path(type(config)) if config is not None else '',
+                'game_id': ctx.game_id if ctx else '',
+                'role': ctx.role if ctx else '',
+                'phase': ctx.phase if ctx else '',
+                'subject': encode(subject),
+                'context': key,
+                'result': encode(result),
+                'elapsed_us': round(elapsed_us, 2),
+            }
+            line = json.dumps(call, ensure_ascii=False, separators=(',', ':'))
+            with self._lock:
+                if self.records_written >= self.max_records:
+                    self.records_dropped += 1
+                    return
+                if self._file is None:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._file = _open(self.path, 'a')
+                if key not in self._contexts:
+                    self._file.write('{"type":"context","key":"%s","data":%s}\n' % (key, blob))
+                    self._contexts[key] = None
+                    if len(self._contexts) > _CONTEXT_CACHE_SIZE:
+                        self._contexts.popitem(last=False)
+                else:
+                    self._contexts.move_to_end(key)
+                self._file.write(line + '\n')
+                self.records_written += 1
+        except (OSError, TypeError, ValueError) as e:
+            self.records_dropped += 1
+            logger.warning(f"[DECISION RECORD] Failed to record {point}: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except OSError as e:
+                    logger.warning(f"[DECISION RECORD] Failed to close {self.path}: {e}")
+                self._file = None
+            self._contexts.clear()
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    读取录制文件，按顺序产出调用记录（context字段替换为解码前的上下文结构）
+
+    Args:
+        path: 录制文件路径
+
+    Yields:
+        调用记录
+    """
+    contexts: Dict[str, Any] = {}
+    with _open(path, 'r') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"[DECISION RECORD] {path}:{line_no}: skipped malformed line")
+                continue
+            if item.get('type') == 'context':
+                contexts[item['key']] = item['data']
+            elif item.get('type') == 'call':
+                item['context_key'] = item['context']
+                item['context'] = contexts.get(item['context'], {})
+                yield item
+
+
+_recorder: Optional[DecisionRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder() -> DecisionRecorder:
+    """获取全局录制器（首次调用时从环境变量读取配置）"""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = DecisionRecorder(
+                    path=os.getenv('DECISION_RECORD_FILE', ''),
+                    max_records=int(os.getenv('DECISION_RECORD_MAX', '100000')),
+                )
+                if _recorder.enabled:
+                    atexit.register(_recorder.close)
+                    logger.info(f"[DECISION RECORD] Enabled: file={_recorder.path}")
+    return _recorder
+
+
+def configure(path: str = '', max_records: int = 100000) -> DecisionRecorder:
+    """
+    显式配置全局录制器（覆盖环境变量，主要供脚本使用）
+
+    Args:
+        path: 输出路径（为空=禁用）
+        max_records: 最多录制的调用数
+
+    Returns:
+        新的录制器
+    """
+    global _recorder
+    with _recorder_lock:
+        if _recorder is not None:
+            _recorder.close()
+        _recorder = DecisionRecorder(path=path, max_records=max_records)
+        if _recorder.enabled:
+            atexit.register(_recorder.close)
+    return _recorder
+
+
+def recorded(point: str) -> Callable:
+    """
+    决策点装饰器（被装饰方法签名须为 (self, subject, context)）
+
+    Args:
+        point: 决策点名称（重放端按名称选择重建方式）
+
+    Returns:
+        装饰器
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, subject, context, *args, **kwargs):
+            recorder = _recorder if _recorder is not None else get_recorder()
+            if not recorder.enabled:
+                return func(self, subject, context, *args, **kwargs)
+            encoded_context = encode(context)
+            started = time.perf_counter()
+            result = func(self, subject, context, *args, **kwargs)
+            elapsed_us = (time.perf_counter() - started) * 1e6
+            recorder.record(point, self, subject, encoded_context, result, elapsed_us)
+            return result
+        wrapper.decision_point = point
+        return wrapper
+    return decorator
+
+
+def recorded_scores(point: str) -> Callable:
+    """
+    批量打分的决策点装饰器（被装饰方法签名须为 (self, subjects, context)，返回 {subject: 分数}）
+
+    每个候选人写一条与 recorded 相同格式的调用记录（共享上下文，耗时按候选人平均分摊）
+
+    Args:
+        point: 决策点名称
+
+    Returns:
+        装饰器
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, subjects, context, *args, **kwargs):
+            recorder = _recorder if _recorder is not None else get_recorder()
+            if not recorder.enabled:
+                return func(self, subjects, context, *args, **kwargs)
+            encoded_context = encode(context)
+            started = time.perf_counter()
+            results = func(self, subjects, context, *args, **kwargs)
+            elapsed_us = (time.perf_counter() - started) * 1e6
+            for subject, result in (results or {}).items():
+                recorder.record(point, self, subject, encoded_context, result, elapsed_us / len(results))
+            return results
+        wrapper.decision_point = point
+        return wrapper
+    return decorator
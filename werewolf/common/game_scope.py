@@ -0,0 +1,295 @@
+"""
+对局作用域
+
+按局有效的状态散落在各组件里：智能体的SDK记忆、预言家的优先级/决策缓存、猎人的决策历史、
+守卫的身份推断、GameStartHandler/GameEndTrigger的去重集合、LLM账本的单局token计数……原先各自在下一局STATUS_START时
+零散重置，或者只按容量截断，上一局的对象要留到下一局开始甚至更久。本模块提供统一的登记表：
+
+- GameScope: 每个智能体实例一个。组件把按局有效的容器登记进来（register，每局结束都释放），
+  请求处理中也可以登记只在本局结束时执行一次的清理（on_close）
+- 组件不需要拿到智能体：智能体构造组件期间（bind）与请求处理期间（request_context.request_scope），
+  当前作用域通过contextvar绑定，模块级 register()/on_close() 登记到当前作用域；
+  没有绑定时（组件单独使用）登记是空操作
+- close(game_id): perceive(STATUS_RESULT)处理完毕时由 request_scope 调用，一次释放该局登记的
+  全部资源；没有收到RESULT的对局在同一实例开始下一局、或会话被归还时关闭
+
+测试（第N局的对象不会留到第N+1局）: python -m pytest tests/test_game_scope.py
+"""
+
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 记住最近关闭的游戏ID数量（重复的STATUS_RESULT不再触发一次对局结束处理）
+CLOSED_HISTORY = 1024
+
+Release = Callable[[], Any]
+
+
+def _release_for(resource: Any, release: Optional[Release]) -> Release:
+    if release is not None:
+        return release
+    clear = getattr(resource, 'clear', None)
+    if not callable(clear):
+        raise TypeError(f"{type(resource).__name__} has no clear(); pass release=")
+    return clear
+
+
+class GameScope:
+    """
+    一个智能体实例的对局资源登记表（线程安全）
+
+    Args:
+        owner: 所属智能体（日志用，一般为角色名）
+    """
+
+    def __init__(self, owner: str = ''):
+        self.owner = owner
+        self.game_id = ''
+        self.games_closed = 0
+        self._lock = threading.Lock()
+        self._resources: Dict[str, Tuple[Any, Release]] = {}
+        self._callbacks: List[Tuple[str, Release]] = []
+
+    def register(self, name: str, resource: Any, release: Optional[Release] = None) -> Any:
+        """
+        登记按局有效的资源（每局结束时释放；同名登记覆盖，组件重建时替换旧实例）
+
+        Args:
+            name: 资源名（同一智能体内唯一，如 'seer.priority_cache'）
+            resource: 资源（缓存字典、缓冲队列、组件等）
+            release: 释放函数（默认调用 resource.clear()）
+
+        Returns:
+            resource（便于 self._cache = register('x', {}) 的写法）
+        """
+        entry = (resource, _release_for(resource, release))
+        with self._lock:
+            self._resources[name] = entry
+        return resource
+
+    def unregister(self, name: str) -> None:
+        """取消登记"""
+        with self._lock:
+            self._resources.pop(name, None)
+
+    def on_close(self, name: str, callback: Release) -> None:
+        """
+        登记只在本局结束时执行一次的清理
+
+        Args:
+            name: 清理名（日志用）
+            callback: 无参清理函数
+        """
+        with self._lock:
+            self._callbacks.append((name, callback))
+
+    def names(self) -> List[str]:
+        """已登记的资源名"""
+        with self._lock:
+            return sorted(self._resources)
+
+    def residual(self) -> Dict[str, int]:
+        """
+        仍有内容的已登记容器（用于核对释放是否彻底）
+
+        Returns:
+            {资源名: 元素数}，不支持len()的资源不出现
+        """
+        with self._lock:
+            resources = list(self._resources.items())
+        result = {}
+        for name, (resource, _) in resources:
+            try:
+                size = len(resource)
+            except TypeError:
+                continue
+            if size:
+                result[name] = size
+        return result
+
+    def close(self) -> int:
+        """
+        释放本局的全部资源（单个资源释放失败只记录警告）
+
+        Returns:
+            执行的释放/清理数
+        """
+        with self._lock:
+            releases = [(name, release) for name, (_, release) in self._resources.items()]
+            releases.extend(self._callbacks)
+            self._callbacks = []
+            game_id = self.game_id
+            self.games_closed += 1
+        released = 0
+        for name, release in releases:
+            try:
+                release()
+                released += 1
+            except Exception as e:
+                logger.warning(f"[GAME SCOPE] {self.owner} failed to release {name} ({game_id}): {e}")
+        logger.debug(f"[GAME SCOPE] {self.owner} game {game_id} closed, {released} resources released")
+        return released
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar('werewolf_game_scope', default=None)
+
+_lock = threading.Lock()
+_open: Dict[str, GameScope] = {}
+_closed_queue: Deque[str] = deque(maxlen=CLOSED_HISTORY)
+_closed_set: Set[str] = set()
+
+
+def current_scope() -> Optional[GameScope]:
+    """当前绑定的对局作用域（未绑定时为None）"""
+    return _current.get()
+
+
+@contextmanager
+def bind(scope: GameScope) -> Iterator[GameScope]:
+    """在当前上下文中绑定作用域（智能体构造组件期间使用）"""
+    token = _current.set(scope)
+    try:
+        yield scope
+    finally:
+        _current.reset(token)
+
+
+def register(name: str, resource: Any, release: Optional[Release] = None) -> Any:
+    """
+    登记到当前作用域（见 GameScope.register；未绑定时不登记）
+
+    Returns:
+        resource
+    """
+    scope = _current.get()
+    if scope is not None:
+        scope.register(name, resource, release)
+    return resource
+
+
+def on_close(name: str, callback: Release) -> bool:
+    """
+    登记本局结束时执行一次的清理（见 GameScope.on_close）
+
+    Returns:
+        是否已登记（未绑定作用域时为False）
+    """
+    scope = _current.get()
+    if scope is None:
+        return False
+    scope.on_close(name, callback)
+    return True
+
+
+def on_game_close(game_id: str, name: str, callback: Release) -> bool:
+    """
+    按游戏ID登记该局结束时执行一次的清理（不依赖当前绑定的作用域，
+    供可能在请求上下文之外记录按局状态的模块使用，如LLM账本）
+
+    Args:
+        game_id: 游戏ID
+        name: 清理名（日志用）
+        callback: 无参清理函数
+
+    Returns:
+        是否已登记（该局没有打开的作用域时为False）
+    """
+    with _lock:
+        scope = _open.get(game_id)
+    if scope is None:
+        return False
+    scope.on_close(name, callback)
+    return True
+
+
+def scope_for(agent: Any) -> GameScope:
+    """
+    智能体的对局作用域（保存在其 game_scope 属性上，首次使用时创建）
+
+    Args:
+        agent: 智能体实例
+
+    Returns:
+        GameScope
+    """
+    scope = getattr(agent, 'game_scope', None)
+    if scope is None:
+        scope = GameScope(getattr(agent, 'role', '') or type(agent).__name__)
+        try:
+            agent.game_scope = scope
+        except AttributeError:
+            pass
+    return scope
+
+
+def activate(agent: Any, game_id: str) -> GameScope:
+    """
+    把智能体的作用域绑定到当前游戏ID（request_scope 在每个请求开始时调用）
+
+    同一实例换了新的游戏ID而上一局未关闭（没有收到STATUS_RESULT）时，先关闭上一局。
+
+    Args:
+        agent: 智能体实例
+        game_id: 当前游戏ID
+
+    Returns:
+        GameScope
+    """
+    scope = scope_for(agent)
+    if scope.game_id == game_id and _open.get(game_id) is scope:
+        return scope
+    previous = scope.game_id
+    if previous and previous != game_id and _open.get(previous) is scope:
+        logger.info(f"[GAME SCOPE] {scope.owner} game {previous} ended without result, closing")
+        close(previous)
+    with _lock:
+        scope.game_id = game_id
+        _open[game_id] = scope
+    return scope
+
+
+def close(game_id: str) -> int:
+    """
+    对局结束：释放该局登记的全部资源
+
+    Args:
+        game_id: 游戏ID
+
+    Returns:
+        执行的释放/清理数（该局没有打开的作用域时为0）
+    """
+    with _lock:
+        scope = _open.pop(game_id, None)
+        if game_id and game_id not in _closed_set:
+            if len(_closed_queue) == _closed_queue.maxlen:
+                _closed_set.discard(_closed_queue[0])
+            _closed_queue.append(game_id)
+            _closed_set.add(game_id)
+    if scope is None:
+        return 0
+    return scope.close()
+
+
+def close_agent(agent: Any) -> int:
+    """关闭智能体当前打开的对局（会话归还时调用）"""
+    scope = getattr(agent, 'game_scope', None)
+    if scope is None or _open.get(scope.game_id) is not scope:
+        return 0
+    return close(scope.game_id)
+
+
+def is_closed(game_id: str) -> bool:
+    """该游戏ID最近是否已经关闭"""
+    return game_id in _closed_set
+
+
+def open_games() -> List[str]:
+    """尚未关闭的游戏ID"""
+    with _lock:
+        return list(_open)
@@ -0,0 +1,609 @@
+"""
+LLM调用账本
+
+记录每一次chat completion调用的模型、调用方、角色、阶段、
+prompt/completion/缓存token数、延迟、重试次数和结果，
+写入本地只追加的SQLite表，用于把花费归因到检测器、发言生成和决策。
+
+- 只追加：表上的触发器拒绝UPDATE/DELETE
+- 汇总：按局（game_rollup视图）、按天（day_rollup视图）、按调用方
+- 预算告警：单局token超过 LLM_GAME_TOKEN_BUDGET 时告警一次；单局的内存计数在该局
+  对局作用域关闭时释放（见game_scope）
+- 报告：python -m werewolf.common.llm_ledger report [--by game|day|caller]
+
+用法:
+    from werewolf.common import llm_ledger
+
+    response = llm_ledger.create_completion(
+        client, caller="InjectionDetector",
+        model=model, messages=[...], temperature=0.2,
+    )
+
+    # 异步路径（AsyncOpenAI客户端）
+    response = await llm_ledger.acreate_completion(async_client, caller="InjectionDetector", ...)
+
+环境变量:
+    LLM_LEDGER_ENABLED: 是否记录（默认true）
+    LLM_LEDGER_DB: SQLite路径（默认 $DATA_DIR/llm_ledger.db）
+    LLM_GAME_TOKEN_BUDGET: 单局token预算（0=不告警）
+    LLM_PRICING: JSON价格表 {"模型": [输入, 缓存输入, 输出]}，单位USD/百万token
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from werewolf.common import game_scope, metrics
+from werewolf.common.request_context import get_request_context
+
+logger = logging.getLogger(__name__)
+
+
+# 默认价格（USD/百万token: 输入, 缓存命中输入, 输出），可用LLM_PRICING覆盖
+DEFAULT_PRICING: Dict[str, Tuple[float, float, float]] = {
+    'deepseek-chat': (0.27, 0.07, 1.10),
+    'deepseek-reasoner': (0.55, 0.14, 2.19),
+}
+
+LLM_TOKENS = 'werewolf_llm_tokens'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    game_id TEXT NOT NULL DEFAULT '',
+    role TEXT NOT NULL DEFAULT '',
+    phase TEXT NOT NULL DEFAULT '',
+    caller TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL DEFAULT '',
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    latency_ms REAL NOT NULL DEFAULT 0,
+    retries INTEGER NOT NULL DEFAULT 0,
+    outcome TEXT NOT NULL DEFAULT 'ok',
+    error TEXT NOT NULL DEFAULT '',
+    cost_usd REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_game ON llm_calls(game_id);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_day ON llm_calls(day);
+CREATE TRIGGER IF NOT EXISTS llm_calls_no_update BEFORE UPDATE ON llm_calls
+BEGIN SELECT RAISE(ABORT, 'llm_calls is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS llm_calls_no_delete BEFORE DELETE ON llm_calls
+BEGIN SELECT RAISE(ABORT, 'llm_calls is append-only'); END;
+CREATE VIEW IF NOT EXISTS game_rollup AS
+    SELECT game_id, MIN(ts) AS first_ts, COUNT(*) AS calls,
+           SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens,
+           SUM(cached_tokens) AS cached_tokens, SUM(total_tokens) AS total_tokens,
+           SUM(cost_usd) AS cost_usd, AVG(latency_ms) AS avg_latency_ms,
+           SUM(retries) AS retries, SUM(outcome != 'ok') AS errors
+    FROM llm_calls GROUP BY game_id;
+CREATE VIEW IF NOT EXISTS day_rollup AS
+    SELECT day, COUNT(DISTINCT game_id) AS games, COUNT(*) AS calls,
+           SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens,
+           SUM(cached_tokens) AS cached_tokens, SUM(total_tokens) AS total_tokens,
+           SUM(cost_usd) AS cost_usd, AVG(latency_ms) AS avg_latency_ms,
+           SUM(retries) AS retries, SUM(outcome != 'ok') AS errors
+    FROM llm_calls GROUP BY day;
+"""
+
+_COLUMNS = ('ts', 'day', 'game_id', 'role', 'phase', 'caller', 'model', 'prompt_tokens',
+            'completion_tokens', 'cached_tokens', 'total_tokens', 'latency_ms', 'retries',
+            'outcome', 'error', 'cost_usd')
+
+
+def _load_pricing() -> Dict[str, Tuple[float, float, float]]:
+    pricing = dict(DEFAULT_PRICING)
+    raw = os.getenv('LLM_PRICING', '')
+    if raw:
+        try:
+            for model, prices in json.loads(raw).items():
+                prompt_price, cached_price, completion_price = (float(p) for p in prices)
+                pricing[model] = (prompt_price, cached_price, completion_price)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"[LLM_LEDGER] Invalid LLM_PRICING, using defaults: {e}")
+    return pricing
+
+
+def extract_usage(response: Any) -> Dict[str, int]:
+    """
+    从completion响应中提取token用量
+
+    兼容OpenAI（prompt_tokens_details.cached_tokens）和
+    DeepSeek（prompt_cache_hit_tokens）两种缓存字段
+
+    Args:
+        response: ChatCompletion对象
+
+    Returns:
+        {'prompt_tokens', 'completion_tokens', 'cached_tokens', 'total_tokens'}
+    """
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return {'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0, 'total_tokens': 0}
+    prompt_tokens = int(getattr(usage, 'prompt_tokens', 0) or 0)
+    completion_tokens = int(getattr(usage, 'completion_tokens', 0) or 0)
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached = int(getattr(details, 'cached_tokens', 0) or 0) if details is not None else 0
+    if not cached:
+        cached = int(getattr(usage, 'prompt_cache_hit_tokens', 0) or 0)
+    total = int(getattr(usage, 'total_tokens', 0) or 0) or prompt_tokens + completion_tokens
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'cached_tokens': cached,
+        'total_tokens': total,
+    }
+
+
+class LLMLedger:
+    """
+    只追加的SQLite LLM调用账本
+
+    Attributes:
+        path: 数据库路径
+        token_budget: 单局token预算（0=不告警）
+    """
+
+    def __init__(self, path: str, token_budget: int = 0,
+                 pricing: Optional[Dict[str, Tuple[float, float, float]]] = None):
+        """
+        初始化账本
+
+        Args:
+            path: SQLite数据库路径
+            token_budget: 单局token预算（0=不告警）
+            pricing: 价格表（默认读取LLM_PRICING）
+        """
+        self.path = path
+        self.token_budget = max(0, int(token_budget))
+        self.pricing = pricing if pricing is not None else _load_pricing()
+        self._lock = threading.Lock()
+        self._game_tokens: Dict[str, int] = {}
+        self._alarmed_games = set()
+        self._budget_callbacks: List[Callable[[str, int, int], None]] = []
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def on_budget_exceeded(self, callback: Callable[[str, int, int], None]) -> None:
+        """注册预算告警回调 callback(game_id, used_tokens, budget)"""
+        self._budget_callbacks.append(callback)
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int) -> float:
+        """按价格表估算花费（USD），未知模型返回0"""
+        prices = self.pricing.get(model)
+        if not prices:
+            return 0.0
+        prompt_price, cached_price, completion_price = prices
+        uncached = max(0, prompt_tokens - cached_tokens)
+        return (uncached * prompt_price + cached_tokens * cached_price
+                + completion_tokens * completion_price) / 1e6
+
+    def record(self, caller: str, model: str, latency_ms: float, usage: Optional[Dict[str, int]] = None,
+               retries: int = 0, outcome: str = 'ok', error: str = '',
+               game_id: Optional[str] = None, role: Optional[str] = None,
+               phase: Optional[str] = None) -> None:
+        """
+        追加一条调用记录
+
+        game_id/role/phase未指定时取当前请求上下文。
+
+        Args:
+            caller: 调用方（检测器类名、generate、analyze等）
+            model: 模型名
+            latency_ms: 延迟（毫秒，含重试）
+            usage: extract_usage()的结果
+            retries: 客户端重试次数
+            outcome: 'ok' / 'error' / 'timeout' / 'rate_limited'
+            error: 错误信息
+        """
+        ctx = get_request_context()
+        game_id = game_id if game_id is not None else (ctx.game_id if ctx else '')
+        role = role if role is not None else (ctx.role if ctx else '')
+        phase = phase if phase is not None else (ctx.phase if ctx else '')
+        usage = usage or {}
+        prompt_tokens = usage.get('prompt_tokens', 0)
+        completion_tokens = usage.get('completion_tokens', 0)
+        cached_tokens = usage.get('cached_tokens', 0)
+        total_tokens = usage.get('total_tokens', 0) or prompt_tokens + completion_tokens
+        now = time.time()
+        row = (
+            now, time.strftime('%Y-%m-%d', time.localtime(now)), game_id, role, phase, caller,
+            model or '', prompt_tokens, completion_tokens, cached_tokens, total_tokens,
+            float(latency_ms), int(retries), outcome, error[:500],
+            self.cost(model, prompt_tokens, completion_tokens, cached_tokens),
+        )
+
+        with self._lock:
+            try:
+                self._conn.execute(
+                    f"INSERT INTO llm_calls ({','.join(_COLUMNS)}) VALUES ({','.join('?' * len(_COLUMNS))})",
+                    row,
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"[LLM_LEDGER] Failed to record call: {e}")
+                return
+            exceeded = self._add_game_tokens(game_id, total_tokens)
+
+        _record_metrics(caller, model, role, phase, latency_ms, usage, outcome)
+        if exceeded:
+            self._raise_budget_alarm(game_id, exceeded)
+
+    def _add_game_tokens(self, game_id: str, tokens: int) -> int:
+        """累加单局token，首次超出预算时返回已用token数（调用方持有锁）"""
+        if not self.token_budget or not game_id:
+            return 0
+        if game_id not in self._game_tokens:
+            # 进程重启后从账本恢复该局已用量（本条已写入）
+            used = self._conn.execute(
+                'SELECT COALESCE(SUM(total_tokens), 0) FROM llm_calls WHERE game_id = ?', (game_id,)
+            ).fetchone()[0]
+            self._game_tokens[game_id] = int(used)
+            game_scope.on_game_close(game_id, 'llm_ledger', lambda: self.forget_game(game_id))
+        else:
+            self._game_tokens[game_id] += tokens
+        used = self._game_tokens[game_id]
+        if used > self.token_budget and game_id not in self._alarmed_games:
+            self._alarmed_games.add(game_id)
+            return used
+        return 0
+
+    def _raise_budget_alarm(self, game_id: str, used: int) -> None:
+        logger.warning(
+            f"[LLM_LEDGER] 预算告警: game {game_id} 已使用 {used} tokens "
+            f"(budget: {self.token_budget})"
+        )
+        metrics.get_registry().counter(
+            'werewolf_llm_budget_alarms', "Games that exceeded LLM_GAME_TOKEN_BUDGET"
+        ).inc()
+        for callback in list(self._budget_callbacks):
+            try:
+                callback(game_id, used, self.token_budget)
+            except Exception as e:
+                logger.error(f"[LLM_LEDGER] Budget callback failed: {e}")
+
+    def forget_game(self, game_id: str) -> None:
+        """释放单局的内存计数（账本记录保留）"""
+        with self._lock:
+            self._game_tokens.pop(game_id, None)
+            self._alarmed_games.discard(game_id)
+
+    # ==================== 查询 ====================
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            names = [d[0] for d in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def game_rollup(self, limit: int = 20, game_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按局汇总（最近的局在前）"""
+        if game_id is not None:
+            return self._query('SELECT * FROM game_rollup WHERE game_id = ?', (game_id,))
+        return self._query('SELECT * FROM game_rollup ORDER BY first_ts DESC LIMIT ?', (limit,))
+
+    def day_rollup(self, days: int = 14) -> List[Dict[str, Any]]:
+        """按天汇总（最近的天在前）"""
+        return self._query('SELECT * FROM day_rollup ORDER BY day DESC LIMIT ?', (days,))
+
+    def caller_rollup(self, game_id: Optional[str] = None, day: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按调用方和模型汇总，可按局或按天过滤"""
+        where, params = [], []
+        if game_id is not None:
+            where.append('game_id = ?')
+            params.append(game_id)
+        if day is not None:
+            where.append('day = ?')
+            params.append(day)
+        clause = f"WHERE {' AND '.join(where)}" if where else ''
+        return self._query(
+            f"""SELECT caller, model, COUNT(*) AS calls,
+                       SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens,
+                       SUM(cached_tokens) AS cached_tokens, SUM(total_tokens) AS total_tokens,
+                       SUM(cost_usd) AS cost_usd, AVG(latency_ms) AS avg_latency_ms,
+                       SUM(retries) AS retries, SUM(outcome != 'ok') AS errors
+                FROM llm_calls {clause} GROUP BY caller, model ORDER BY total_tokens DESC""",
+            tuple(params),
+        )
+
+
+def _record_metrics(caller: str, model: str, role: str, phase: str, latency_ms: float,
+                    usage: Dict[str, int], outcome: str) -> None:
+    registry = metrics.get_registry()
+    if not registry.enabled:
+        return
+    labels = {'role': role, 'phase': phase, 'operation': caller, 'model': model}
+    metrics.operation_histogram().observe(latency_ms / 1000.0, operation=f"llm.{caller}",
+                                          role=role, phase=phase, model=model)
+    tokens = registry.counter(LLM_TOKENS, "LLM tokens by kind",
+                              label_names=metrics.STANDARD_LABELS + ('kind',))
+    for kind in ('prompt_tokens', 'completion_tokens', 'cached_tokens'):
+        if usage.get(kind):
+            tokens.inc(usage[kind], kind=kind.replace('_tokens', ''), **labels)
+    if outcome != 'ok':
+        metrics.record_error(f"llm.{caller}", role=role, phase=phase, model=model)
+
+
+_ledger: Optional[LLMLedger] = None
+_ledger_lock = threading.Lock()
+_ledger_failed = False
+
+
+def _default_db_path() -> str:
+    return os.getenv('LLM_LEDGER_DB') or os.path.join(os.getenv('DATA_DIR', './game_data'), 'llm_ledger.db')
+
+
+def get_ledger() -> Optional[LLMLedger]:
+    """获取全局账本（禁用或打开失败时返回None）"""
+    global _ledger, _ledger_failed
+    if _ledger is None and not _ledger_failed:
+        if os.getenv('LLM_LEDGER_ENABLED', 'true').lower() != 'true':
+            _ledger_failed = True
+            return None
+        with _ledger_lock:
+            if _ledger is None and not _ledger_failed:
+                try:
+                    _ledger = LLMLedger(
+                        _default_db_path(),
+                        token_budget=int(os.getenv('LLM_GAME_TOKEN_BUDGET', '0')),
+                    )
+                except (sqlite3.Error, OSError) as e:
+                    _ledger_failed = True
+                    logger.warning(f"[LLM_LEDGER] Ledger disabled: {e}")
+    return _ledger
+
+
+def configure(path: str, token_budget: int = 0) -> LLMLedger:
+    """显式配置全局账本（覆盖环境变量，主要供脚本使用）"""
+    global _ledger, _ledger_failed
+    with _ledger_lock:
+        _ledger = LLMLedger(path, token_budget=token_budget)
+        _ledger_failed = False
+    return _ledger
+
+
+# ==================== 调用包装 ====================
+
+_caller: contextvars.ContextVar = contextvars.ContextVar('werewolf_llm_caller', default='')
+
+
+@contextmanager
+def caller_scope(caller: str) -> Iterator[None]:
+    """为作用域内未显式指定调用方的LLM调用设置调用方名称"""
+    token = _caller.set(caller)
+    try:
+        yield
+    finally:
+        _caller.reset(token)
+
+
+def _classify_error(exc: BaseException) -> str:
+    name = type(exc).__name__
+    if 'Timeout' in name:
+        return 'timeout'
+    if 'RateLimit' in name:
+        return 'rate_limited'
+    return 'error'
+
+
+def _record_call(caller: str, model: str, start: float, retries: int,
+                 response: Any = None, error: Optional[BaseException] = None,
+                 end: Optional[float] = None) -> None:
+    ledger = get_ledger()
+    if ledger is None:
+        return
+    latency_ms = ((end or time.perf_counter()) - start) * 1000
+    if error is not None:
+        ledger.record(caller, model, latency_ms, retries=retries,
+                      outcome=_classify_error(error), error=f"{type(error).__name__}: {error}")
+    else:
+        ledger.record(caller, getattr(response, 'model', None) or model, latency_ms,
+                      usage=extract_usage(response), retries=retries)
+
+
+def create_completion(client: Any, caller: str = '', **kwargs) -> Any:
+    """
+    调用 client.chat.completions.create 并记入账本
+
+    通过with_raw_response获取客户端重试次数（客户端不支持时记为0）；
+    异常原样抛出，调用方的降级逻辑不变。
+
+    Args:
+        client: OpenAI兼容客户端
+        caller: 调用方名称（为空时取caller_scope设置的名称）
+        **kwargs: 透传给create的参数
+
+    Returns:
+        ChatCompletion对象
+    """
+    caller = caller or _caller.get() or 'unknown'
+    model = kwargs.get('model', '') or ''
+    completions = client.chat.completions
+    retries = 0
+    start = time.perf_counter()
+    try:
+        raw_api = getattr(completions, 'with_raw_response', None)
+        if raw_api is not None and not kwargs.get('stream'):
+            raw = raw_api.create(**kwargs)
+            retries = int(getattr(raw, 'retries_taken', 0) or 0)
+            response = raw.parse()
+        else:
+            response = completions.create(**kwargs)
+    except Exception as e:
+        _record_call(caller, model, start, retries, error=e)
+        raise
+    _record_call(caller, model, start, retries, response=response)
+    return response
+
+
+async def acreate_completion(client: Any, caller: str = '', **kwargs) -> Any:
+    """
+    create_completion的异步版本（client为AsyncOpenAI兼容客户端）
+
+    等待响应期间不占用线程；账本写入（SQLite插入，持有账本锁）放到线程池执行，
+    不阻塞事件循环（to_thread复制上下文，局/角色/阶段归属不变）。
+
+    Args:
+        client: AsyncOpenAI兼容客户端
+        caller: 调用方名称（为空时取caller_scope设置的名称）
+        **kwargs: 透传给create的参数
+
+    Returns:
+        ChatCompletion对象
+    """
+    caller = caller or _caller.get() or 'unknown'
+    model = kwargs.get('model', '') or ''
+    completions = client.chat.completions
+    retries = 0
+    start = time.perf_counter()
+    try:
+        raw_api = getattr(completions, 'with_raw_response', None)
+        if raw_api is not None and not kwargs.get('stream'):
+            raw = await raw_api.create(**kwargs)
+            retries = int(getattr(raw, 'retries_taken', 0) or 0)
+            response = raw.parse()
+        else:
+            response = await completions.create(**kwargs)
+    except Exception as e:
+        await asyncio.to_thread(_record_call, caller, model, start, retries,
+                                error=e, end=time.perf_counter())
+        raise
+    await asyncio.to_thread(_record_call, caller, model, start, retries,
+                            response=response, end=time.perf_counter())
+    return response
+
+
+def _sdk_request(model_name: str, prompt: str) -> Dict[str, Any]:
+    return {
+        'model': model_name,
+        'messages': [
+            {'role': 'system', 'content': 'You are a helpful assistant.'},
+            {'role': 'user', 'content': prompt},
+        ],
+        'temperature': 0,
+    }
+
+
+def _completion_text(completion: Any) -> Optional[str]:
+    try:
+        return completion.choices[0].message.content
+    except Exception as e:
+        logger.error(f"[LLM_LEDGER] Invalid completion: {e}")
+        return None
+
+
+def sdk_llm_call(model_name: str, prompt: str, caller: str = '') -> Optional[str]:
+    """
+    与SDK BasicRoleAgent.llm_caller 等价的调用（API_KEY/BASE_URL、system提示、temperature=0），
+    但经过账本记录
+
+    Args:
+        model_name: 模型名
+        prompt: 用户提示词
+        caller: 调用方名称
+
+    Returns:
+        生成文本（解析失败时为None）
+    """
+    from openai import OpenAI
+
+    client = OpenAI(api_key=os.getenv('API_KEY'), base_url=os.getenv('BASE_URL'))
+    completion = create_completion(client, caller=caller or _caller.get() or 'llm_caller',
+                                   **_sdk_request(model_name, prompt))
+    return _completion_text(completion)
+
+
+async def asdk_llm_call(client: Any, model_name: str, prompt: str, caller: str = '') -> Optional[str]:
+    """
+    sdk_llm_call的异步版本
+
+    Args:
+        client: AsyncOpenAI客户端（调用方负责复用，应使用API_KEY/BASE_URL配置）
+        model_name: 模型名
+        prompt: 用户提示词
+        caller: 调用方名称
+
+    Returns:
+        生成文本（解析失败时为None）
+    """
+    completion = await acreate_completion(client, caller=caller or _caller.get() or 'llm_caller',
+                                          **_sdk_request(model_name, prompt))
+    return _completion_text(completion)
+
+
+# ==================== 报告 ====================
+
+def format_rows(rows: List[Dict[str, Any]], key_columns: List[str]) -> str:
+    """把汇总结果格式化为文本表格"""
+    if not rows:
+        return '(no data)'
+    columns = key_columns + ['calls', 'prompt_tokens', 'completion_tokens', 'cached_tokens',
+                             'total_tokens', 'cost_usd', 'avg_latency_ms', 'retries', 'errors']
+    columns = [c for c in columns if c in rows[0]]
+
+    def fmt(value: Any) -> str:
+        if isinstance(value, float):
+            return f"{value:.4f}" if value < 1 else f"{value:.1f}"
+        return '' if value is None else str(value)
+
+    table = [[c for c in columns]] + [[fmt(row.get(c)) for c in columns] for row in rows]
+    widths = [max(len(r[i]) for r in table) for i in range(len(columns))]
+    return '\n'.join('  '.join(cell.rjust(w) for cell, w in zip(r, widths)) for r in table)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='LLM token/cost/latency ledger')
+    sub = parser.add_subparsers(dest='command')
+    report = sub.add_parser('report', help='rollups of recorded LLM calls')
+    report.add_argument('--db', default=None, help='ledger path (default: LLM_LEDGER_DB)')
+    report.add_argument('--by', choices=('game', 'day', 'caller'), default='day')
+    report.add_argument('--game', default=None, help='filter caller rollup by game_id')
+    report.add_argument('--day', default=None, help='filter caller rollup by day (YYYY-MM-DD)')
+    report.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command != 'report':
+        parser.print_help()
+        return 1
+
+    path = args.db or _default_db_path()
+    if not os.path.exists(path):
+        print(f"Ledger not found: {path}")
+        return 1
+    ledger = LLMLedger(path, token_budget=0, pricing={})
+    try:
+        if args.by == 'game':
+            print(format_rows(ledger.game_rollup(limit=args.limit), ['game_id']))
+        elif args.by == 'day':
+            print(format_rows(ledger.day_rollup(days=args.limit), ['day', 'games']))
+        else:
+            print(format_rows(ledger.caller_rollup(game_id=args.game, day=args.day), ['caller', 'model']))
+    finally:
+        ledger.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+内存剖析与泄漏检测
+
+长时间运行的容器中，智能体在SDK记忆里保存每局字典，还有模块级单例
+（猎人全局监控、GameEndHandler、预言家get_monitor）和
+无界列表（预言家PerformanceMonitor指标、IncrementalLearningSystem数据列表），
+进程内存会随对局数稳步增长。本模块在对局边界（收到STATUS_RESULT）采样：
+
+- rss: 读取进程RSS与gc对象数（开销极小）
+- tracemalloc: 额外做tracemalloc快照，与上一局快照对比输出增长最多的分配点
+
+每局增长量（对局序号-内存的最小二乘斜率）以指标暴露，超过阈值时告警；
+hunter.validators.PerformanceValidator 的内存校验默认读取这里的数据。
+
+环境变量:
+    MEMORY_PROFILE: off | rss | tracemalloc（默认off）
+    MEMORY_PROFILE_TOP: 每局输出的增长分配点数量（默认10）
+    MEMORY_PROFILE_FRAMES: tracemalloc记录的栈深度（默认1）
+    MEMORY_PROFILE_WARMUP: 计算增长斜率时跳过的前几局（默认5）
+    MEMORY_GROWTH_LIMIT_KB: 每局增长告警阈值（KB，0=不告警）
+"""
+
+import gc
+import os
+import time
+import logging
+import threading
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+
+from werewolf.common import metrics
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'rss', 'tracemalloc')
+
+# 快照中忽略的分配来源（剖析器自身与导入机制）
+_IGNORED_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>',
+                  '<frozen importlib._bootstrap_external>', '<unknown>')
+
+
+def rss_bytes() -> int:
+    """当前进程RSS（Linux读/proc，其它平台退化为峰值RSS）"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux单位KB，macOS单位字节
+        return peak if peak > 1 << 30 else peak * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+def growth_slope(values: List[float]) -> float:
+    """最小二乘斜率（每个样本的增长量）"""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2.0
+    mean_y = sum(values) / n
+    num = sum((i - mean_x) * (v - mean_y) for i, v in enumerate(values))
+    den = sum((i - mean_x) ** 2 for i in range(n))
+    return num / den if den else 0.0
+
+
+@dataclass
+class GameMemorySample:
+    """一个对局边界的内存采样"""
+    game_index: int
+    game_id: str
+    role: str
+    timestamp: float
+    rss_bytes: int
+    gc_objects: int
+    gc_collected: int
+    traced_bytes: int = 0
+    traced_peak_bytes: int = 0
+    top_growth: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class MemoryProfiler:
+    """
+    对局边界内存剖析器
+
+    Args:
+        mode: 'rss' 或 'tracemalloc'
+        top: 每局输出的增长分配点数量
+        frames: tracemalloc栈深度
+        warmup: 计算增长斜率时跳过的前几局（缓存预热、模型加载）
+        growth_limit_bytes: 每局增长告警阈值（0=不告警）
+        max_samples: 保留的采样数上限（剖析器自身不能无界增长）
+    """
+
+    def __init__(self, mode: str = 'rss', top: int = 10, frames: int = 1, warmup: int = 5,
+                 growth_limit_bytes: int = 0, max_samples: int = 1000):
+        if mode not in MODES:
+            raise ValueError(f"Unknown memory profile mode: {mode}")
+        self.mode = mode
+        self.top = top
+        self.frames = max(1, frames)
+        self.warmup = max(0, warmup)
+        self.growth_limit_bytes = growth_limit_bytes
+        self.max_samples = max_samples
+        self.samples: List[GameMemorySample] = []
+        self.games = 0
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started_tracing = False
+        self._lock = threading.Lock()
+        if mode == 'tracemalloc' and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'off'
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        snapshot = tracemalloc.take_snapshot()
+        return snapshot.filter_traces([tracemalloc.Filter(False, name) for name in _IGNORED_FILES])
+
+    def _top_growth(self, snapshot: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        if self._snapshot is None:
+            return []
+        key_type = 'traceback' if self.frames > 1 else 'lineno'
+        growth = []
+        for stat in snapshot.compare_to(self._snapshot, key_type)[:self.top]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            growth.append({
+                'location': f"{frame.filename}:{frame.lineno}",
+                'size_diff': stat.size_diff,
+                'count_diff': stat.count_diff,
+                'size': stat.size,
+            })
+        return growth
+
+    def game_boundary(self, game_id: str = '', role: str = '') -> Optional[GameMemorySample]:
+        """
+        在对局结束时采样（先做一次完整gc，排除可回收的垃圾）
+
+        Args:
+            game_id: 结束的游戏ID
+            role: 当前角色
+
+        Returns:
+            本次采样（禁用时返回None）
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            collected = gc.collect()
+            sample = GameMemorySample(
+                game_index=self.games,
+                game_id=game_id,
+                role=role,
+                timestamp=time.time(),
+                rss_bytes=rss_bytes(),
+                gc_objects=len(gc.get_objects()),
+                gc_collected=collected,
+            )
+            if self.mode == 'tracemalloc' and tracemalloc.is_tracing():
+                sample.traced_bytes, sample.traced_peak_bytes = tracemalloc.get_traced_memory()
+                snapshot = self._take_snapshot()
+                sample.top_growth = self._top_growth(snapshot)
+                self._snapshot = snapshot
+            self.games += 1
+            self.samples.append(sample)
+            if len(self.samples) > self.max_samples:
+                del self.samples[:len(self.samples) - self.max_samples]
+            growth = self.growth_per_game()
+        self._publish(sample, growth)
+        return sample
+
+    def growth_per_game(self, metric: str = 'rss_bytes') -> float:
+        """
+        预热后的每局增长量（字节/局，最小二乘斜率）
+
+        Args:
+            metric: 'rss_bytes' / 'traced_bytes' / 'gc_objects'
+
+        Returns:
+            每局增长量
+        """
+        values = [getattr(s, metric) for s in self.samples if s.game_index >= self.warmup]
+        return growth_slope(values)
+
+    def _publish(self, sample: GameMemorySample, growth: float) -> None:
+        registry = metrics.get_registry()
+        labels = metrics.STANDARD_LABELS + ('kind',)
+        gauge = registry.gauge('werewolf_memory_bytes', "Process memory at game boundaries", label_names=labels)
+        gauge.set(sample.rss_bytes, kind='rss', role=sample.role)
+        if self.mode == 'tracemalloc':
+            gauge.set(sample.traced_bytes, kind='traced', role=sample.role)
+        registry.gauge('werewolf_memory_growth_per_game_bytes',
+                       "Least-squares memory growth per game after warmup",
+                       label_names=labels).set(growth, kind='rss', role=sample.role)
+        registry.gauge('werewolf_memory_gc_objects', "Live gc-tracked objects at game boundaries").set(
+            sample.gc_objects, role=sample.role)
+        registry.counter('werewolf_memory_games_profiled', "Games sampled by the memory profiler").inc(
+            role=sample.role)
+
+        logger.info(
+            "[MEMORY] game %d (%s): rss %.1fMB, gc objects %d, growth %.1fKB/game",
+            sample.game_index, sample.game_id, sample.rss_bytes / 1048576.0, sample.gc_objects, growth / 1024.0,
+        )
+        for item in sample.top_growth:
+            logger.info("[MEMORY]   +%.1fKB (%+d blocks) %s",
+                        item['size_diff'] / 1024.0, item['count_diff'], item['location'])
+        if (self.growth_limit_bytes and sample.game_index >= self.warmup + 2
+                and growth > self.growth_limit_bytes):
+            logger.warning(
+                f"[MEMORY] 内存持续增长: {growth / 1024:.1f}KB/game "
+                f"(limit: {self.growth_limit_bytes / 1024:.1f}KB/game)"
+            )
+
+    def report(self) -> Dict[str, Any]:
+        """汇总（供soak测试与排查使用）"""
+        with self._lock:
+            samples = list(self.samples)
+        rss = [s.rss_bytes for s in samples]
+        return {
+            'mode': self.mode,
+            'games': self.games,
+            'rss_first_bytes': rss[0] if rss else 0,
+            'rss_last_bytes': rss[-1] if rss else 0,
+            'rss_peak_bytes': max(rss) if rss else 0,
+            'growth_per_game_bytes': self.growth_per_game(),
+            'traced_growth_per_game_bytes': self.growth_per_game('traced_bytes') if self.mode == 'tracemalloc' else 0.0,
+            'gc_objects_growth_per_game': self.growth_per_game('gc_objects'),
+            'last_top_growth': samples[-1].top_growth if samples else [],
+            'samples': [{k: v for k, v in asdict(s).items() if k != 'top_growth'} for s in samples],
+        }
+
+    def stop(self) -> None:
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracing = False
+        self._snapshot = None
+
+
+_profiler: Optional[MemoryProfiler] = None
+_profiler_lock = threading.Lock()
+_profiler_checked = False
+
+
+def get_profiler() -> Optional[MemoryProfiler]:
+    """获取全局剖析器（MEMORY_PROFILE=off时返回None）"""
+    global _profiler, _profiler_checked
+    if not _profiler_checked:
+        with _profiler_lock:
+            if not _profiler_checked:
+                mode = os.getenv('MEMORY_PROFILE', 'off').lower()
+                if mode in ('rss', 'tracemalloc'):
+                    _profiler = MemoryProfiler(
+                        mode=mode,
+                        top=int(os.getenv('MEMORY_PROFILE_TOP', '10')),
+                        frames=int(os.getenv('MEMORY_PROFILE_FRAMES', '1')),
+                        warmup=int(os.getenv('MEMORY_PROFILE_WARMUP', '5')),
+                        growth_limit_bytes=int(float(os.getenv('MEMORY_GROWTH_LIMIT_KB', '0')) * 1024),
+                    )
+                elif mode != 'off':
+                    logger.warning(f"[MEMORY] Unknown MEMORY_PROFILE={mode}, profiler disabled")
+                _profiler_checked = True
+    return _profiler
+
+
+def configure(mode: str = 'rss', **kwargs) -> Optional[MemoryProfiler]:
+    """
+    显式配置全局剖析器（替换已有实例）
+
+    Args:
+        mode: 'off' / 'rss' / 'tracemalloc'
+        **kwargs: 透传给MemoryProfiler
+
+    Returns:
+        新的剖析器（off时为None）
+    """
+    global _profiler, _profiler_checked
+    with _profiler_lock:
+        if _profiler is not None:
+            _profiler.stop()
+        _profiler = MemoryProfiler(mode=mode, **kwargs) if mode != 'off' else None
+        _profiler_checked = True
+    return _profiler
+
+
+def game_boundary(game_id: str = '', role: str = '') -> Optional[GameMemorySample]:
+    """对局结束钩子（剖析器禁用时为空操作）"""
+    profiler = get_profiler()
+    if profiler is None:
+        return None
+    try:
+        return profiler.game_boundary(game_id, role)
+    except Exception as e:
+        logger.error(f"[MEMORY] Profiling failed: {e}")
+        return None
@@ -0,0 +1,592 @@
+"""
+统一指标模块
+
+提供计数器、仪表和延迟直方图（对数线性分桶，类HDR），
+统一标签 role / phase / operation / model，
+以OpenMetrics文本格式导出（本地HTTP端点或文件）。
+
+用法:
+    from werewolf.common.metrics import timed, get_registry
+
+    @timed("vote_decision", role="hunter")
+    def decide(...):
+        ...
+
+    get_registry().write_openmetrics("./metrics.txt")
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 统一标签
+STANDARD_LABELS = ('role', 'phase', 'operation', 'model')
+
+# 慢操作告警阈值（秒）
+SLOW_OPERATION_THRESHOLD = float(os.getenv('METRICS_SLOW_THRESHOLD', '0.1'))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [(n, v) for n, v in zip(names, values) if v != '']
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape_label_value(str(v))}"' for n, v in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class HistogramData:
+    """
+    对数线性分桶直方图（固定内存）
+
+    桶边界按 growth 的几何级数增长，相对误差约为 (growth-1)/2；
+    默认覆盖 1µs ~ 1h，约250个桶
+    """
+
+    def __init__(self, min_value: float = 1e-6, max_value: float = 3600.0, growth: float = 1.08):
+        self.min_value = min_value
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.n_buckets = int(math.ceil(math.log(max_value / min_value) / self._log_growth)) + 1
+        # counts[0]: <= min_value；counts[-1]: 溢出桶
+        self.counts = [0] * (self.n_buckets + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _bucket_index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        idx = int(math.ceil(math.log(value / self.min_value) / self._log_growth))
+        return min(idx, self.n_buckets)
+
+    def upper_bound(self, index: int) -> float:
+        if index >= self.n_buckets:
+            return math.inf
+        return self.min_value * (self.growth ** index)
+
+    def observe(self, value: float) -> None:
+        self.counts[self._bucket_index(value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """
+        估算分位数
+
+        Args:
+            q: 分位数 (0-100)
+
+        Returns:
+            对应桶的上边界（不超过观测到的最大值）
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(math.ceil(q / 100.0 * self.count)))
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def cumulative_at(self, bound: float) -> int:
+        """小于等于bound的观测数（按桶上边界近似）"""
+        total = 0
+        for index, bucket_count in enumerate(self.counts):
+            if self.upper_bound(index) > bound:
+                break
+            total += bucket_count
+        return total
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else 0.0,
+            'max': self.max if self.count else 0.0,
+            'avg': self.sum / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+class _Metric:
+    """指标基类：按标签值组合保存子序列"""
+
+    metric_type = ''
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._series: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        unknown = set(labels) - set(self.label_names)
+        if unknown:
+            raise ValueError(f"Unknown labels for {self.name}: {sorted(unknown)}")
+        return tuple('' if labels.get(n) is None else str(labels.get(n)) for n in self.label_names)
+
+    def series(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        with self._lock:
+            return list(self._series.items())
+
+    def clear(self, role: Optional[str] = None) -> None:
+        """清空序列，指定role时只清空该角色的序列"""
+        with self._lock:
+            if role is None or 'role' not in self.label_names:
+                if role is None:
+                    self._series.clear()
+                return
+            idx = self.label_names.index('role')
+            for key in [k for k in self._series if k[idx] == role]:
+                del self._series[key]
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    metric_type = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0.0)
+
+    def expose(self) -> List[str]:
+        lines = []
+        for key, value in self.series():
+            lines.append(f"{self.name}_total{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """可增可减的仪表"""
+
+    metric_type = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0.0)
+
+    def expose(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in self.series()
+        ]
+
+
+class Histogram(_Metric):
+    """延迟直方图"""
+
+    metric_type = 'histogram'
+
+    # 导出时聚合到的标准桶边界（秒）
+    EXPORT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    EXPORT_QUANTILES = (0.5, 0.95, 0.99)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            data = self._series.get(key)
+            if data is None:
+                data = self._series[key] = HistogramData()
+            data.observe(value)
+
+    def get(self, **labels) -> Optional[HistogramData]:
+        return self._series.get(self._key(labels))
+
+    def expose(self) -> List[str]:
+        lines = []
+        for key, data in self.series():
+            for bound in self.EXPORT_BUCKETS:
+                labels = _format_labels(self.label_names, key, ('le', _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {data.cumulative_at(bound)}")
+            labels = _format_labels(self.label_names, key, ('le', '+Inf'))
+            lines.append(f"{self.name}_bucket{labels} {data.count}")
+            plain = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_count{plain} {data.count}")
+            lines.append(f"{self.name}_sum{plain} {_format_value(data.sum)}")
+        return lines
+
+    def expose_quantiles(self) -> List[str]:
+        lines = []
+        for key, data in self.series():
+            for q in self.EXPORT_QUANTILES:
+                labels = _format_labels(self.label_names, key, ('quantile', _format_value(q)))
+                lines.append(f"{self.name}_quantile{labels} {_format_value(data.percentile(q * 100))}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表（线程安全）"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.enabled = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+    def _get_or_create(self, cls, name: str, documentation: str, label_names: Sequence[str]):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, label_names)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.metric_type}")
+            return metric
+
+    def counter(self, name: str, documentation: str = '', label_names: Sequence[str] = STANDARD_LABELS) -> Counter:
+        return self._get_or_create(Counter, name, documentation, label_names)
+
+    def gauge(self, name: str, documentation: str = '', label_names: Sequence[str] = STANDARD_LABELS) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, label_names)
+
+    def histogram(self, name: str, documentation: str = '', label_names: Sequence[str] = STANDARD_LABELS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, label_names)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def reset(self, role: Optional[str] = None) -> None:
+        """
+        清空序列（保留指标定义）
+
+        Args:
+            role: 只清空该角色的序列，None表示全部
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear(role)
+
+    def to_openmetrics(self) -> str:
+        """
+        导出OpenMetrics文本格式
+
+        Returns:
+            以 "# EOF" 结尾的文本
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            if metric.documentation:
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.extend(metric.expose())
+
+        # 分位数单独作为gauge族导出（OpenMetrics直方图本身不带分位数）
+        for metric in metrics:
+            if isinstance(metric, Histogram) and metric.series():
+                lines.append(f"# TYPE {metric.name}_quantile gauge")
+                lines.extend(metric.expose_quantiles())
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path: str) -> None:
+        """
+        写入OpenMetrics文件（原子替换）
+
+        Args:
+            path: 输出文件路径
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_openmetrics())
+        os.replace(tmp_path, path)
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """获取全局指标注册表"""
+    return _registry
+
+
+# ==================== 标准指标 ====================
+
+OPERATION_DURATION = 'werewolf_operation_duration_seconds'
+OPERATION_ERRORS = 'werewolf_operation_errors'
+CACHE_REQUESTS = 'werewolf_cache_requests'
+
+
+def operation_histogram() -> Histogram:
+    return _registry.histogram(OPERATION_DURATION, "Operation latency in seconds")
+
+
+def operation_errors() -> Counter:
+    return _registry.counter(OPERATION_ERRORS, "Operations that raised or fell back on error")
+
+
+def cache_requests() -> Counter:
+    return _registry.counter(
+        CACHE_REQUESTS, "Cache lookups by result", label_names=STANDARD_LABELS + ('result',)
+    )
+
+
+def observe_operation(operation: str, seconds: float, role: Optional[str] = None,
+                      phase: Optional[str] = None, model: Optional[str] = None) -> None:
+    """
+    记录一次操作耗时（超过阈值时输出慢操作告警）
+
+    Args:
+        operation: 操作名
+        seconds: 耗时（秒）
+        role/phase/model: 标签
+    """
+    if not _registry.enabled:
+        return
+    operation_histogram().observe(seconds, role=role, phase=phase, operation=operation, model=model)
+    if seconds > SLOW_OPERATION_THRESHOLD:
+        logger.warning(
+            f"[PERF] 慢操作: {role or '-'}/{operation} 耗时 {seconds * 1000:.2f}ms "
+            f"(threshold: {SLOW_OPERATION_THRESHOLD * 1000:.0f}ms)"
+        )
+
+
+def record_error(operation: str, role: Optional[str] = None, phase: Optional[str] = None,
+                 model: Optional[str] = None) -> None:
+    """记录一次操作错误"""
+    if _registry.enabled:
+        operation_errors().inc(role=role, phase=phase, operation=operation, model=model)
+
+
+def record_cache(cache_name: str, hit: bool, role: Optional[str] = None) -> None:
+    """记录一次缓存命中/未命中"""
+    if _registry.enabled:
+        cache_requests().inc(role=role, operation=cache_name, result='hit' if hit else 'miss')
+
+
+@contextmanager
+def time_block(operation: str, role: Optional[str] = None, phase: Optional[str] = None,
+               model: Optional[str] = None) -> Iterator[None]:
+    """
+    计时上下文管理器
+
+    用法:
+        with time_block("ml_inference", role="witch", model="ensemble"):
+            ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        record_error(operation, role=role, phase=phase, model=model)
+        raise
+    finally:
+        observe_operation(operation, time.perf_counter() - start, role=role, phase=phase, model=model)
+
+
+def timed(operation: Optional[str] = None, role: Optional[str] = None, phase: Optional[str] = None,
+          model: Optional[str] = None) -> Callable:
+    """
+    计时装饰器
+
+    支持 @timed、@timed("name") 和 @timed("name", role="guard") 三种写法；
+    未指定操作名时使用函数的 __qualname__
+
+    Args:
+        operation: 操作名
+        role/phase/model: 标签
+    """
+    def decorator(func: Callable) -> Callable:
+        op_name = operation or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                record_error(op_name, role=role, phase=phase, model=model)
+                raise
+            finally:
+                observe_operation(op_name, time.perf_counter() - start, role=role, phase=phase, model=model)
+
+        return wrapper
+
+    if callable(operation):
+        func, operation = operation, None
+        return decorator(func)
+    return decorator
+
+
+def summarize_operations(role: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """
+    按操作名汇总延迟统计（合并phase/model标签）
+
+    Args:
+        role: 只汇总该角色的操作，None表示全部
+
+    Returns:
+        {operation: {'count', 'sum', 'min', 'max', 'avg', 'p50', 'p95', 'p99'}}
+    """
+    histogram = operation_histogram()
+    merged: Dict[str, HistogramData] = {}
+    role_idx = histogram.label_names.index('role')
+    op_idx = histogram.label_names.index('operation')
+    for key, data in histogram.series():
+        if role is not None and key[role_idx] != role:
+            continue
+        target = merged.get(key[op_idx])
+        if target is None:
+            target = merged[key[op_idx]] = HistogramData()
+        for index, bucket_count in enumerate(data.counts):
+            target.counts[index] += bucket_count
+        target.count += data.count
+        target.sum += data.sum
+        target.min = min(target.min, data.min)
+        target.max = max(target.max, data.max)
+    return {op: data.snapshot() for op, data in merged.items()}
+
+
+# ==================== 导出端点 ====================
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = '127.0.0.1'):
+    """
+    启动本地OpenMetrics HTTP端点（GET /metrics）
+
+    Args:
+        port: 端口，默认读取 METRICS_PORT（0表示禁用）
+        host: 监听地址，默认仅本机
+
+    Returns:
+        ThreadingHTTPServer实例，禁用时返回None
+    """
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    if port is None:
+        port = int(os.getenv('METRICS_PORT', '0'))
+    if port <= 0:
+        return None
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = _registry.to_openmetrics().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"[Metrics] {self.address_string()} {format % args}")
+
+    with _server_lock:
+        if _server is not None:
+            return _server
+        _server = ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        logger.info(f"✓ Metrics endpoint: http://{host}:{port}/metrics")
+        return _server
+
+
+def start_metrics_file_writer(path: Optional[str] = None, interval_seconds: Optional[float] = None):
+    """
+    后台定期把OpenMetrics文本写入文件
+
+    Args:
+        path: 输出文件，默认读取 METRICS_FILE（为空表示禁用）
+        interval_seconds: 写入间隔，默认读取 METRICS_FILE_INTERVAL（60秒）
+
+    Returns:
+        写入线程，禁用时返回None
+    """
+    path = path or os.getenv('METRICS_FILE', '')
+    if not path:
+        return None
+    if interval_seconds is None:
+        interval_seconds = float(os.getenv('METRICS_FILE_INTERVAL', '60'))
+
+    stop_event = threading.Event()
+
+    def _loop():
+        while not stop_event.wait(interval_seconds):
+            try:
+                _registry.write_openmetrics(path)
+            except OSError as e:
+                logger.warning(f"[Metrics] 写入指标文件失败: {e}")
+
+    thread = threading.Thread(target=_loop, name='metrics-file-writer', daemon=True)
+    thread.stop_event = stop_event
+    thread.start()
+    logger.info(f"✓ Metrics file: {path} (every {interval_seconds:.0f}s)")
+    return thread
+
+
+__all__ = [
+    'STANDARD_LABELS',
+    'HistogramData',
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'MetricsRegistry',
+    'get_registry',
+    'observe_operation',
+    'record_error',
+    'record_cache',
+    'time_block',
+    'timed',
+    'summarize_operations',
+    'start_metrics_server',
+    'start_metrics_file_writer',
+]
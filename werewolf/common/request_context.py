@@ -0,0 +1,101 @@
+"""
+请求上下文
+
+在一次perceive/interact处理期间，通过contextvars暴露当前的
+game_id / role / phase / round，供追踪、LLM账本、日志等横切模块读取，
+无需逐层传参。
+
+平台协议不携带游戏ID：每个智能体实例在收到STATUS_START时生成新的game_id，
+此后该实例上的所有请求沿用同一个ID，直到下一局开始。
+perceive(STATUS_RESULT) 处理完毕即对局边界：关闭对局作用域、释放本局登记的缓存与记忆
+（见game_scope），然后触发内存剖析（见memory_profiler）。
+"""
+
+import time
+import uuid
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+from werewolf.common import game_scope, memory_profiler
+
+STATUS_START = 'start'
+STATUS_RESULT = 'result'
+
+
+@dataclass(frozen=True)
+class RequestContext:
+    """当前请求的上下文"""
+    game_id: str = ''
+    role: str = ''
+    phase: str = ''
+    round: Optional[int] = None
+    handler: str = ''
+
+
+_context: contextvars.ContextVar = contextvars.ContextVar('werewolf_request_context', default=None)
+
+
+def new_game_id() -> str:
+    """生成新的游戏ID（时间戳前缀便于按时间排序）"""
+    return f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def game_id_for(agent: Any, status: Optional[str] = None) -> str:
+    """
+    获取智能体当前的游戏ID
+
+    Args:
+        agent: 智能体实例（ID保存在其 _game_id 属性上）
+        status: 当前请求状态，STATUS_START时开启新一局
+
+    Returns:
+        游戏ID
+    """
+    game_id = getattr(agent, '_game_id', None)
+    if status == STATUS_START or not game_id:
+        game_id = new_game_id()
+        try:
+            agent._game_id = game_id
+        except AttributeError:
+            pass
+    return game_id
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """获取当前请求上下文（不在请求处理中时返回None）"""
+    return _context.get()
+
+
+@contextmanager
+def request_scope(agent: Any, req: Any, handler: str = '') -> Iterator[RequestContext]:
+    """
+    在请求处理期间绑定上下文与智能体的对局作用域
+
+    Args:
+        agent: 处理请求的智能体
+        req: AgentReq
+        handler: 'perceive' 或 'interact'
+
+    Yields:
+        绑定的RequestContext
+    """
+    status = getattr(req, 'status', '') or ''
+    round_num = getattr(req, 'round', None)
+    ctx = RequestContext(
+        game_id=game_id_for(agent, status),
+        role=getattr(agent, 'role', '') or '',
+        phase=status,
+        round=round_num if isinstance(round_num, int) else None,
+        handler=handler,
+    )
+    token = _context.set(ctx)
+    try:
+        with game_scope.bind(game_scope.activate(agent, ctx.game_id)):
+            yield ctx
+    finally:
+        _context.reset(token)
+        if status == STATUS_RESULT and handler == 'perceive':
+            game_scope.close(ctx.game_id)
+            memory_profiler.game_boundary(ctx.game_id, ctx.role)
@@ -0,0 +1,351 @@
+"""
+结构化日志
+
+热路径（贝叶斯推理、信任分数更新、检测器结果、决策评分）的日志
+需要在生产级别下几乎零开销，并且不能刷屏。本模块提供：
+
+- JsonFormatter: 每条记录一行JSON（含game_id/role/phase与trace/span ID）
+- RequestContextFilter: 从request_context注入game_id/role/phase/round
+- SamplingFilter: 按logger前缀对DEBUG/INFO记录采样（WARNING及以上不采样）
+- RateLimitFilter: 每个(logger, level)一个令牌桶，超限丢弃并在下一条放行的记录上附带丢弃数
+- 基于QueueHandler/QueueListener的非阻塞输出：调用线程只做过滤和入队，
+  格式化与IO在后台线程完成；参数为不可变基本类型时延迟到后台格式化
+
+调用方使用%风格参数，未启用的级别不会格式化:
+    logger.debug("Trust score updated: %s %d -> %d", player, old, new)
+
+用法:
+    from werewolf.common.structured_logging import configure_logging
+    configure_logging()   # 读取 LOG_LEVEL / LOG_FORMAT / LOG_SAMPLE_RULES / LOG_RATE_LIMIT
+
+环境变量:
+    LOG_LEVEL: 日志级别（默认INFO）
+    LOG_FORMAT: json 或 text（默认text）
+    LOG_FILE: 额外写入的日志文件（为空=仅stderr）
+    LOG_SAMPLE_RULES: 采样规则 "logger前缀=比例,..."（仅作用于DEBUG/INFO）
+    LOG_RATE_LIMIT: 每个(logger, level)每秒放行条数（0=不限速）
+    LOG_RATE_BURST: 令牌桶容量
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import random
+import atexit
+import logging
+import threading
+import logging.handlers
+from typing import Any, Dict, List, Optional, Tuple
+
+from werewolf.common import tracing
+from werewolf.common.request_context import get_request_context
+
+# 标准LogRecord属性，JSON输出时不作为额外字段
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None)).keys()) | {
+    'message', 'asctime', 'game_id', 'role', 'phase', 'round', 'suppressed', 'taskName',
+}
+
+# 延迟格式化时允许跨线程传递的参数类型（不可变，入队后不会被修改）
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, type(None), bytes)
+
+# SDK的角色模块日志器（agent_build_sdk.utils.logger）
+SDK_LOGGER_NAME = 'agent.builder'
+
+
+class RequestContextFilter(logging.Filter):
+    """把当前请求上下文写入记录（始终放行）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = get_request_context()
+        if ctx is not None:
+            record.game_id = ctx.game_id
+            record.role = ctx.role
+            record.phase = ctx.phase
+            record.round = ctx.round
+        else:
+            record.game_id = getattr(record, 'game_id', '')
+            record.role = getattr(record, 'role', '')
+            record.phase = getattr(record, 'phase', '')
+            record.round = getattr(record, 'round', None)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    按logger名前缀对低级别记录采样
+
+    Attributes:
+        rules: [(前缀, 采样率)]，按前缀长度降序匹配
+        max_level: 参与采样的最高级别（默认INFO）
+    """
+
+    def __init__(self, rules: Optional[Dict[str, float]] = None, max_level: int = logging.INFO):
+        super().__init__()
+        self.rules: List[Tuple[str, float]] = sorted(
+            ((prefix, max(0.0, min(1.0, rate))) for prefix, rate in (rules or {}).items()),
+            key=lambda item: len(item[0]), reverse=True,
+        )
+        self.max_level = max_level
+        self._cache: Dict[str, float] = {}
+
+    def rate_for(self, name: str) -> float:
+        rate = self._cache.get(name)
+        if rate is None:
+            rate = 1.0
+            for prefix, prefix_rate in self.rules:
+                if name == prefix or name.startswith(prefix + '.') or prefix == '':
+                    rate = prefix_rate
+                    break
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or not self.rules:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    每个(logger, level)一个令牌桶
+
+    ERROR及以上从不丢弃；被丢弃的条数记在下一条放行记录的suppressed属性上。
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, max_level: int = logging.WARNING):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            burst: 桶容量（默认为rate的5倍，至少1）
+            max_level: 参与限速的最高级别
+        """
+        super().__init__()
+        self.rate = float(rate)
+        self.burst = float(burst) if burst else max(1.0, self.rate * 5)
+        self.max_level = max_level
+        self._lock = threading.Lock()
+        # key -> [tokens, last_refill, suppressed]
+        self._buckets: Dict[Tuple[str, int], List[float]] = {}
+        self.total_suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno > self.max_level:
+            return True
+        key = (record.name, record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                self.total_suppressed += 1
+                return False
+            bucket[0] -= 1.0
+            if bucket[2]:
+                record.suppressed = int(bucket[2])
+                bucket[2] = 0
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """单行JSON格式化器"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key in ('game_id', 'role', 'phase', 'round', 'trace_id', 'span_id', 'suppressed'):
+            value = getattr(record, key, None)
+            if value not in (None, ''):
+                data[key] = value
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and key not in data and not key.startswith('_'):
+                data[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """文本格式，附带上下文和丢弃计数"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        game_id = getattr(record, 'game_id', '')
+        if game_id:
+            text = f"{text} [game={game_id} role={getattr(record, 'role', '')} phase={getattr(record, 'phase', '')}]"
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text = f"{text} (+{suppressed} suppressed)"
+        return text
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    非阻塞队列处理器
+
+    标准QueueHandler在调用线程里完成格式化；这里当参数都是不可变基本类型时
+    保留msg/args原样入队，由后台线程格式化。含可变对象的参数仍在入队前格式化，
+    避免后台线程看到被修改后的值。
+
+    使用SimpleQueue（入队开销约为queue.Queue的三分之一），用qsize做近似容量上限。
+    """
+
+    def __init__(self, max_size: int = 10000):
+        super().__init__(queue.SimpleQueue())
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        span = tracing.current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        args = record.args
+        if args:
+            values = args.values() if isinstance(args, dict) else args
+            if not all(isinstance(v, _IMMUTABLE_ARG_TYPES) for v in values):
+                record.msg = record.getMessage()
+                record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # 队列满时丢弃，绝不阻塞热路径
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+def parse_sample_rules(text: str) -> Dict[str, float]:
+    """解析 "logger前缀=比例,..." 格式的采样规则"""
+    rules = {}
+    for item in (text or '').split(','):
+        if '=' not in item:
+            continue
+        prefix, _, rate = item.partition('=')
+        try:
+            rules[prefix.strip()] = float(rate)
+        except ValueError:
+            continue
+    return rules
+
+
+def _import_sdk_logger() -> None:
+    """
+    先完成SDK日志模块的导入
+
+    agent_build_sdk.utils.logger 在首次导入时给agent.builder设置INFO级别并挂上自己的处理器。
+    角色模块懒加载后，它可能在configure_logging之后才被导入，覆盖这里的接管配置
+    """
+    try:
+        import agent_build_sdk.utils.logger  # noqa: F401
+    except ImportError:
+        pass
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      sample_rules: Optional[Dict[str, float]] = None,
+                      rate_limit: Optional[float] = None, rate_burst: Optional[float] = None,
+                      log_file: Optional[str] = None, stream=None,
+                      queue_size: int = 10000, include_sdk_logger: bool = True) -> logging.Handler:
+    """
+    配置根日志器（幂等，重复调用会替换之前的配置）
+
+    Args:
+        level: 日志级别（默认LOG_LEVEL）
+        fmt: 'json' 或 'text'（默认LOG_FORMAT）
+        sample_rules: 采样规则（默认LOG_SAMPLE_RULES）
+        rate_limit: 每个(logger, level)每秒放行条数（默认LOG_RATE_LIMIT）
+        rate_burst: 令牌桶容量（默认LOG_RATE_BURST）
+        log_file: 额外日志文件（默认LOG_FILE）
+        stream: 输出流（默认stderr）
+        queue_size: 队列容量（满时丢弃）
+        include_sdk_logger: 是否接管SDK的agent.builder日志器
+
+    Returns:
+        安装在根日志器上的队列处理器
+    """
+    global _listener
+
+    level_name = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.getenv('LOG_FORMAT', 'text')).lower()
+    if sample_rules is None:
+        sample_rules = parse_sample_rules(os.getenv('LOG_SAMPLE_RULES', ''))
+    if rate_limit is None:
+        rate_limit = float(os.getenv('LOG_RATE_LIMIT', '0'))
+    if rate_burst is None:
+        rate_burst = float(os.getenv('LOG_RATE_BURST', '0')) or None
+    if log_file is None:
+        log_file = os.getenv('LOG_FILE', '')
+
+    formatter = JsonFormatter() if fmt == 'json' else TextFormatter()
+    outputs: List[logging.Handler] = [logging.StreamHandler(stream or sys.stderr)]
+    if log_file:
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        outputs.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for output in outputs:
+        output.setFormatter(formatter)
+
+    handler = LazyQueueHandler(max_size=queue_size)
+    handler.addFilter(SamplingFilter(sample_rules))
+    if rate_limit > 0:
+        handler.addFilter(RateLimitFilter(rate_limit, rate_burst))
+    handler.addFilter(RequestContextFilter())
+
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+        _listener = logging.handlers.QueueListener(handler.queue, *outputs, respect_handler_level=False)
+        _listener.start()
+
+        root = logging.getLogger()
+        for old in list(root.handlers):
+            root.removeHandler(old)
+        root.addHandler(handler)
+        root.setLevel(getattr(logging, level_name, logging.INFO))
+
+        if include_sdk_logger:
+            _import_sdk_logger()
+            sdk_logger = logging.getLogger(SDK_LOGGER_NAME)
+            sdk_logger.handlers = []
+            sdk_logger.propagate = True
+            sdk_logger.setLevel(logging.NOTSET)
+
+    return handler
+
+
+def shutdown_logging() -> None:
+    """停止后台监听线程并刷新剩余记录"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
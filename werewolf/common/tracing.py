@@ -0,0 +1,525 @@
+"""
+请求级Span追踪模块
+
+基于contextvars记录一次perceive/interact请求内部的调用树
+（检测器、ML预测、LLM调用、分析器），用于定位单次请求的耗时分布。
+
+- Span通过contextvars自动建立父子关系，无需手动传递上下文
+- 头部采样：根Span决定整条trace是否采样（TRACE_SAMPLE_RATE），
+  未采样的trace在子Span上几乎零开销
+- 输出：每条trace一行JSONL，格式兼容OTLP/JSON（resourceSpans）
+- CLI：按阶段（req.status）输出火焰图式的耗时分解
+
+用法:
+    from werewolf.common import tracing
+
+    @tracing.traced("vote_decision")
+    def decide(...):
+        ...
+
+    with tracing.span("llm.analyze", model="deepseek-chat"):
+        ...
+
+    python -m werewolf.common.tracing report ./traces.jsonl [--phase vote]
+
+环境变量:
+    TRACE_FILE: JSONL输出路径（为空=禁用追踪）
+    TRACE_SAMPLE_RATE: 头部采样率 0.0-1.0（默认1.0）
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from werewolf.common.request_context import request_scope
+
+logger = logging.getLogger(__name__)
+
+
+SERVICE_NAME = 'werewolf-agent'
+SCOPE_NAME = 'werewolf.common.tracing'
+
+# OTLP状态码
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# OTLP SpanKind: INTERNAL
+SPAN_KIND_INTERNAL = 1
+
+# 单条trace最多保留的Span数（防止异常循环撑爆内存）
+MAX_SPANS_PER_TRACE = 2000
+
+
+class Span:
+    """
+    单个Span
+
+    Attributes:
+        trace_id: 32位十六进制trace ID
+        span_id: 16位十六进制span ID
+        parent_id: 父span ID（根Span为空字符串）
+        name: Span名称
+        start_ns / end_ns: 起止时间（Unix纳秒）
+        attributes: 属性字典
+    """
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start_ns', 'end_ns',
+                 'attributes', 'status_code', 'status_message', 'children')
+
+    def __init__(self, trace_id: str, parent_id: str, name: str, attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.status_code = STATUS_UNSET
+        self.status_message = ''
+        self.children: List['Span'] = []
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException) -> None:
+        self.status_code = STATUS_ERROR
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """转换为OTLP/JSON span结构"""
+        data = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': SPAN_KIND_INTERNAL,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            'status': {'code': self.status_code},
+        }
+        if self.parent_id:
+            data['parentSpanId'] = self.parent_id
+        if self.status_message:
+            data['status']['message'] = self.status_message
+        return data
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+def _attribute_value(attr: Dict[str, Any]) -> Any:
+    value = attr.get('value', {})
+    if 'intValue' in value:
+        return int(value['intValue'])
+    for kind in ('stringValue', 'doubleValue', 'boolValue'):
+        if kind in value:
+            return value[kind]
+    return None
+
+
+# 未采样trace的哨兵：子Span看到它直接跳过
+_UNSAMPLED = object()
+
+_current: contextvars.ContextVar = contextvars.ContextVar('werewolf_trace_span', default=None)
+
+
+class Tracer:
+    """
+    追踪器：负责采样决策、Span收集与JSONL写出
+
+    根Span结束时整条trace作为一行OTLP resourceSpans写入文件。
+    """
+
+    def __init__(self, path: str = '', sample_rate: float = 1.0):
+        """
+        初始化追踪器
+
+        Args:
+            path: JSONL输出路径（为空=禁用）
+            sample_rate: 头部采样率
+        """
+        self.path = path
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.enabled = bool(path) and self.sample_rate > 0.0
+        self._lock = threading.Lock()
+        self.traces_written = 0
+        self.traces_dropped = 0
+
+    def should_sample(self) -> bool:
+        return self.enabled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+
+    def export(self, root: Span) -> None:
+        """写出一条完整trace"""
+        spans = []
+        stack = [root]
+        while stack and len(spans) < MAX_SPANS_PER_TRACE:
+            node = stack.pop()
+            spans.append(node.to_otlp())
+            stack.extend(node.children)
+
+        record = {
+            'resourceSpans': [{
+                'resource': {'attributes': [
+                    _otlp_attribute('service.name', SERVICE_NAME),
+                    _otlp_attribute('process.pid', os.getpid()),
+                ]},
+                'scopeSpans': [{
+                    'scope': {'name': SCOPE_NAME},
+                    'spans': spans,
+                }],
+            }]
+        }
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        try:
+            with self._lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+                self.traces_written += 1
+        except OSError as e:
+            self.traces_dropped += 1
+            logger.warning(f"[TRACING] Failed to write trace: {e}")
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """获取全局追踪器（首次调用时从环境变量读取配置）"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(
+                    path=os.getenv('TRACE_FILE', ''),
+                    sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', '1.0')),
+                )
+                if _tracer.enabled:
+                    logger.info(f"[TRACING] Enabled: file={_tracer.path}, sample_rate={_tracer.sample_rate}")
+    return _tracer
+
+
+def configure(path: str = '', sample_rate: float = 1.0) -> Tracer:
+    """
+    显式配置全局追踪器（覆盖环境变量，主要供脚本使用）
+
+    Args:
+        path: JSONL输出路径（为空=禁用）
+        sample_rate: 头部采样率
+
+    Returns:
+        新的追踪器
+    """
+    global _tracer
+    with _tracer_lock:
+        _tracer = Tracer(path=path, sample_rate=sample_rate)
+    return _tracer
+
+
+def current_span() -> Optional[Span]:
+    """获取当前活动的Span（未追踪或未采样时返回None）"""
+    parent = _current.get()
+    return parent if isinstance(parent, Span) else None
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """给当前Span设置属性（无活动Span时忽略）"""
+    active = current_span()
+    if active is not None:
+        active.set_attribute(key, value)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Span上下文管理器
+
+    没有父Span时成为根Span并做头部采样决策；
+    父trace未采样时不创建任何对象。
+
+    Args:
+        name: Span名称
+        **attributes: Span属性
+
+    Yields:
+        当前Span（未采样时为None）
+    """
+    parent = _current.get()
+    if parent is _UNSAMPLED:
+        yield None
+        return
+
+    if parent is None:
+        tracer = get_tracer()
+        if not tracer.enabled:
+            yield None
+            return
+        if not tracer.should_sample():
+            token = _current.set(_UNSAMPLED)
+            try:
+                yield None
+            finally:
+                _current.reset(token)
+            return
+        node = Span('%032x' % random.getrandbits(128), '', name, attributes)
+    else:
+        node = Span(parent.trace_id, parent.span_id, name, attributes)
+        if len(parent.children) < MAX_SPANS_PER_TRACE:
+            parent.children.append(node)
+
+    token = _current.set(node)
+    try:
+        yield node
+        if node.status_code == STATUS_UNSET:
+            node.status_code = STATUS_OK
+    except BaseException as e:
+        node.record_error(e)
+        raise
+    finally:
+        node.end_ns = time.time_ns()
+        _current.reset(token)
+        if parent is None:
+            get_tracer().export(node)
+
+
+def traced(name: Optional[str] = None, **attributes: Any) -> Callable:
+    """
+    Span装饰器
+
+    Args:
+        name: Span名称（默认取函数的__qualname__）
+        **attributes: 固定属性
+
+    Returns:
+        装饰器
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is _UNSAMPLED or (_current.get() is None and not get_tracer().enabled):
+                return func(*args, **kwargs)
+            with span(span_name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_handler(kind: str) -> Callable:
+    """
+    perceive/interact处理器装饰器
+
+    绑定请求上下文（game_id / role / phase，见request_context），
+    并以“类名.kind”命名根Span，记录阶段（status）、轮次、角色和游戏ID。
+
+    Args:
+        kind: 'perceive' 或 'interact'
+
+    Returns:
+        装饰器
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            req = args[0] if args else kwargs.get('req')
+            with handler_scope(self, req, kind):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def handler_scope(agent: Any, req: Any, kind: str) -> Iterator[Any]:
+    """
+    trace_handler的上下文管理器形式（供async处理器使用，绑定请求上下文并开启根Span）
+
+    Args:
+        agent: 角色智能体
+        req: AgentReq
+        kind: 'perceive' 或 'interact'
+
+    Yields:
+        RequestContext
+    """
+    with request_scope(agent, req, kind) as ctx:
+        if _current.get() is None and not get_tracer().enabled:
+            yield ctx
+            return
+        attrs = {
+            'handler': kind,
+            'role': ctx.role,
+            'phase': ctx.phase,
+            'game_id': ctx.game_id,
+        }
+        if ctx.round is not None:
+            attrs['round'] = ctx.round
+        with span(f"{type(agent).__name__}.{kind}", **attrs):
+            yield ctx
+
+
+# ==================== 报告 ====================
+
+def load_traces(path: str) -> List[List[Dict[str, Any]]]:
+    """
+    读取JSONL trace文件
+
+    Args:
+        path: JSONL文件路径
+
+    Returns:
+        trace列表，每条trace为span字典列表
+    """
+    traces = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            spans = []
+            for resource in record.get('resourceSpans', []):
+                for scope in resource.get('scopeSpans', []):
+                    spans.extend(scope.get('spans', []))
+            if spans:
+                traces.append(spans)
+    return traces
+
+
+def summarize_traces(traces: List[List[Dict[str, Any]]]) -> Dict[str, Dict[Tuple[str, ...], Dict[str, float]]]:
+    """
+    按阶段聚合调用树
+
+    Args:
+        traces: load_traces()的结果
+
+    Returns:
+        {phase: {span路径: {'total_ms', 'self_ms', 'count', 'errors', 'traces'}}}
+    """
+    result: Dict[str, Dict[Tuple[str, ...], Dict[str, float]]] = {}
+    for spans in traces:
+        by_id = {s['spanId']: s for s in spans}
+        children: Dict[str, List[Dict[str, Any]]] = {}
+        roots = []
+        for s in spans:
+            parent = s.get('parentSpanId', '')
+            if parent and parent in by_id:
+                children.setdefault(parent, []).append(s)
+            else:
+                roots.append(s)
+
+        for root in roots:
+            attrs = {a['key']: _attribute_value(a) for a in root.get('attributes', [])}
+            phase = attrs.get('phase') or 'unknown'
+            table = result.setdefault(phase, {})
+            stack = [(root, (root['name'],))]
+            while stack:
+                node, path = stack.pop()
+                duration = (int(node['endTimeUnixNano']) - int(node['startTimeUnixNano'])) / 1e6
+                kids = children.get(node['spanId'], [])
+                child_total = sum(
+                    (int(k['endTimeUnixNano']) - int(k['startTimeUnixNano'])) / 1e6 for k in kids
+                )
+                row = table.setdefault(path, {'total_ms': 0.0, 'self_ms': 0.0, 'count': 0, 'errors': 0, 'traces': 0})
+                row['total_ms'] += duration
+                row['self_ms'] += max(0.0, duration - child_total)
+                row['count'] += 1
+                if node.get('status', {}).get('code') == STATUS_ERROR:
+                    row['errors'] += 1
+                if len(path) == 1:
+                    row['traces'] += 1
+                for kid in kids:
+                    stack.append((kid, path + (kid['name'],)))
+    return result
+
+
+def format_report(summary: Dict[str, Dict[Tuple[str, ...], Dict[str, float]]], width: int = 30) -> str:
+    """
+    生成火焰图式文本报告（每阶段一棵树，时间为每条trace平均值）
+
+    Args:
+        summary: summarize_traces()的结果
+        width: 条形图宽度
+
+    Returns:
+        报告文本
+    """
+    lines = []
+    for phase in sorted(summary):
+        table = summary[phase]
+        n_traces = sum(row['traces'] for path, row in table.items() if len(path) == 1) or 1
+        root_total = sum(row['total_ms'] for path, row in table.items() if len(path) == 1) or 1e-9
+        lines.append(f"== phase={phase}  traces={n_traces}  avg={root_total / n_traces:.2f}ms ==")
+        lines.append(f"{'total(ms)':>10} {'self(ms)':>10} {'calls':>7} {'%':>6}  span")
+
+        def emit(prefix: Tuple[str, ...], depth: int) -> None:
+            kids = [p for p in table if len(p) == depth + 1 and p[:depth] == prefix]
+            kids.sort(key=lambda p: table[p]['total_ms'], reverse=True)
+            for path in kids:
+                row = table[path]
+                share = row['total_ms'] / root_total
+                bar = '#' * max(1, int(round(share * width))) if share > 0 else ''
+                errors = f" !{int(row['errors'])}" if row['errors'] else ''
+                lines.append(
+                    f"{row['total_ms'] / n_traces:>10.2f} {row['self_ms'] / n_traces:>10.2f} "
+                    f"{row['count'] / n_traces:>7.1f} {share * 100:>5.1f}%  "
+                    f"{'  ' * depth}{path[-1]} {bar}{errors}"
+                )
+                emit(path, depth + 1)
+
+        emit((), 0)
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='Werewolf span trace tools')
+    sub = parser.add_subparsers(dest='command')
+    report = sub.add_parser('report', help='per-phase flame-style breakdown of a trace file')
+    report.add_argument('path', help='JSONL trace file (TRACE_FILE)')
+    report.add_argument('--phase', default=None, help='only show this phase (req.status)')
+    report.add_argument('--width', type=int, default=30, help='bar width')
+    args = parser.parse_args(argv)
+
+    if args.command != 'report':
+        parser.print_help()
+        return 1
+
+    summary = summarize_traces(load_traces(args.path))
+    if args.phase:
+        summary = {k: v for k, v in summary.items() if k == args.phase}
+    if not summary:
+        print('No traces found')
+        return 1
+    print(format_report(summary, width=args.width))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
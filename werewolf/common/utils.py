@@ -5,9 +5,10 @@
 """
 
 from typing import Any, Optional, Dict
-import time
 import re
-import threading
+
+# 兼容原导入路径: from werewolf.common.utils import CacheManager
+from werewolf.common.cache import CacheManager  # noqa: F401
 
 
 class DataValidator:
@@ -218,97 +219,6 @@ class DataValidator:
         return default
 
 
-class CacheManager:
-    """
-    缓存管理器(单例模式 - 线程安全)
-    
-    提供简单的内存缓存功能
-    """
-    
-    _instance = None
-    _lock = threading.Lock()
-    
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                # 双重检查锁定
-                if cls._instance is None:
-                    instance = super().__new__(cls)
-                    instance._cache = {}
-                    instance._timestamps = {}
-                    cls._instance = instance
-        return cls._instance
-    
-    def get(self, key: str, ttl: Optional[int] = None) -> Optional[Any]:
-        """
-        获取缓存值
-        
-        Args:
-            key: 缓存键
-            ttl: 过期时间(秒),None表示不检查过期
-            
-        Returns:
-            缓存值,不存在或过期返回None
-        """
-        if key not in self._cache:
-            return None
-        
-        # 检查是否过期
-        if ttl is not None and key in self._timestamps:
-            if time.time() - self._timestamps[key] > ttl:
-                self.delete(key)
-                return None
-        
-        return self._cache[key]
-    
-    def set(self, key: str, value: Any) -> None:
-        """
-        设置缓存值
-        
-        Args:
-            key: 缓存键
-            value: 缓存值
-        """
-        self._cache[key] = value
-        self._timestamps[key] = time.time()
-    
-    def delete(self, key: str) -> None:
-        """
-        删除缓存
-        
-        Args:
-            key: 缓存键
-        """
-        self._cache.pop(key, None)
-        self._timestamps.pop(key, None)
-    
-    def clear(self) -> None:
-        """清空所有缓存"""
-        self._cache.clear()
-        self._timestamps.clear()
-    
-    def has(self, key: str) -> bool:
-        """
-        检查缓存是否存在
-        
-        Args:
-            key: 缓存键
-            
-        Returns:
-            是否存在
-        """
-        return key in self._cache
-    
-    def size(self) -> int:
-        """
-        获取缓存大小
-        
-        Returns:
-            缓存项数量
-        """
-        return len(self._cache)
-
-
 def extract_player_number(player_name: str) -> Optional[int]:
     """
     从玩家名称中提取编号
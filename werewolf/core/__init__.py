@@ -2,9 +2,19 @@
 Core module - 核心基础设施
 
 提供所有角色共用的抽象基类和核心功能
+
+BaseGoodAgent / BaseWolfAgent 在首次访问时才导入（会连带导入ML模块与sklearn），
+使只用到轻量组件的进程（如服务启动阶段）不必付出这部分导入开销
 """
 
+import importlib
+
 from .base_agent import BaseAgent
+from .agent_memory import AgentMemory
+from .lazy_role_agent import LazyRoleAgent, register_role_agents
+from .game_sessions import SessionManager, RoleAgentPool
+from .async_agent import AsyncAgentMixin, install_async_routes
+from .checkpoints import AgentCheckpointer, get_checkpointer
 from .base_components import (
     BaseDetector,
     BaseAnalyzer,
@@ -15,9 +25,7 @@ from .base_components import (
 from .game_state import GameState, GamePhase
 from .config import BaseConfig
 from .base_good_config import BaseGoodConfig
-from .base_good_agent import BaseGoodAgent
 from .base_wolf_config import BaseWolfConfig
-from .base_wolf_agent import BaseWolfAgent
 from .llm_detectors import (
     BaseLLMDetector,
     InjectionDetector,
@@ -36,6 +44,15 @@ from .exceptions import (
 
 __all__ = [
     'BaseAgent',
+    'AgentMemory',
+    'LazyRoleAgent',
+    'register_role_agents',
+    'SessionManager',
+    'RoleAgentPool',
+    'AsyncAgentMixin',
+    'install_async_routes',
+    'AgentCheckpointer',
+    'get_checkpointer',
     'BaseDetector',
     'BaseAnalyzer',
     'BaseDecisionMaker',
@@ -60,3 +77,18 @@ __all__ = [
     'ConfigurationError',
     'ComponentError',
 ]
+
+# 延迟导入的重量级导出: 名称 -> 子模块
+_LAZY_EXPORTS = {
+    'BaseGoodAgent': '.base_good_agent',
+    'BaseWolfAgent': '.base_wolf_agent',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -44,12 +44,13 @@ except ImportError:
             self.message = None
             self.round = 0
 
+from .async_agent import AsyncAgentMixin
 from .base_agent import BaseAgent
 from .config import BaseConfig
 from .exceptions import WerewolfException
 
 
-class AgentAdapter(BasicRoleAgent if SDK_AVAILABLE else object):
+class AgentAdapter(AsyncAgentMixin, BasicRoleAgent if SDK_AVAILABLE else object):
     """
     Agent适配器基类
     
@@ -60,6 +61,8 @@ class AgentAdapter(BasicRoleAgent if SDK_AVAILABLE else object):
     2. 实现_initialize_components方法
     3. 使用self.config访问配置
     4. 使用self.logger记录日志
+    5. 异步执行路径（perceive_async/interact_async）来自AsyncAgentMixin，
+       处理玩家发言的子类可覆盖 _detects_message/_detect_message_async 预取检测结果
     """
     
     def __init__(self, role: str, model_name: str, config: Optional[BaseConfig] = None):
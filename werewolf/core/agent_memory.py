@@ -0,0 +1,19 @@
+"""
+智能体记忆
+
+SDK的SimpleMemory把 memories 声明为类属性，且BasicRoleAgent的默认参数
+memory=SimpleMemory() 只求值一次：同一进程内所有角色智能体共享同一份记忆。
+线上每个进程只有一个角色在对局中，共享不会暴露；同进程运行多个座位
+（模拟器、多局并发）时必须每个智能体独立记忆。
+"""
+
+from typing import Any, Dict
+
+from agent_build_sdk.memory.memory import SimpleMemory
+
+
+class AgentMemory(SimpleMemory):
+    """实例独立的SimpleMemory（接口与SDK完全一致）"""
+
+    def __init__(self):
+        self.memories: Dict[str, Any] = {}
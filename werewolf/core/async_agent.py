@@ -0,0 +1,287 @@
+"""
+异步智能体执行路径
+
+SDK的 /agent/perceive、/agent/interact 是同步端点，在线程池中执行：每个在途LLM调用
+都占住一个线程，并发局数一多，线程池先于CPU成为瓶颈。本模块提供基于asyncio与
+共享AsyncOpenAI客户端的执行路径：
+
+- AsyncAgentMixin: 角色智能体的 perceive_async / interact_async
+  - 发言检测（注入/虚假引用/消息解析/发言质量，约占每局LLM调用的九成）在事件循环上
+    并发执行，结果预取后交给角色原有的同步处理逻辑消费，等待LLM期间不占线程
+  - 其余同步逻辑在线程池中执行；interact中的发言生成穿插在各角色的决策流程里，
+    仍在线程中等待。已迁移：平民讨论发言（VillagerAgent.interact_async，提示词构建在线程中，
+    生成经 llm_caller_async 在事件循环上等待），其他角色可按同样方式逐步迁移
+- 同步方法保持不变，SDK同步端点与脚本照常调用（检测器同步/异步方法共用提示词与结果整理）
+- install_async_routes: 用async端点替换SDK应用的 perceive/interact，并固定线程数
+- batch_processor_for: 检测器异步调用的传输层（LLMBatchProcessor，微批次+有界并发+
+  优先级/截止时间），每个事件循环、每个共享客户端一个
+
+环境变量:
+    AGENT_ASYNC: 是否启用异步执行路径（默认false）
+    AGENT_THREADS: 请求处理线程数（同步端点线程池与asyncio默认执行器，0=框架默认）
+    LLM_BATCH_ENABLED: 检测器异步调用是否经过批处理器（默认false）
+    LLM_BATCH_WINDOW_MS: 微批次等待窗口（毫秒，默认5）
+    LLM_BATCH_MAX_SIZE: 单批最大请求数（默认16）
+    LLM_BATCH_CONCURRENCY: 每个客户端同时在途的检测请求上限（默认8）
+    LLM_BATCH_DEADLINE: 检测请求截止时间（秒，0=不限，过期按检测失败处理）
+    （LLM_BATCH_* 经 werewolf.optimization.config.load_config 读取，也可写在 OPTIMIZATION_CONFIG 的 llm 段）
+"""
+
+import os
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from werewolf.common import tracing, llm_ledger
+from werewolf.common.request_context import request_scope
+from werewolf.core import shared_resources
+from werewolf.optimization.config import load_config
+
+logger = logging.getLogger(__name__)
+
+# 当前请求预取的检测结果: (发言, {检测器名: 结果或异常})
+_prefetch: contextvars.ContextVar = contextvars.ContextVar('werewolf_detection_prefetch', default=None)
+
+
+def _async_openai(api_key: Optional[str], base_url: Optional[str], **kwargs) -> Any:
+    """按配置取当前事件循环的共享AsyncOpenAI客户端（连接池绑定事件循环，每个循环一份）"""
+    from openai import AsyncOpenAI
+
+    loop = asyncio.get_running_loop()
+    # timeout可能是不可哈希的httpx.Timeout，按repr区分配置
+    key = ('async_openai', id(loop), api_key, base_url, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+    return shared_resources.shared(key, lambda: AsyncOpenAI(api_key=api_key, base_url=base_url, **kwargs))
+
+
+def async_client_for(client: Any) -> Any:
+    """
+    同步OpenAI客户端对应的共享AsyncOpenAI客户端（相同api_key/base_url/超时/重试次数）
+
+    Args:
+        client: OpenAI客户端（已是异步客户端时原样返回）
+
+    Returns:
+        AsyncOpenAI客户端（client不是OpenAI客户端时为None）
+    """
+    from openai import AsyncOpenAI, OpenAI
+
+    if isinstance(client, AsyncOpenAI):
+        return client
+    if not isinstance(client, OpenAI):
+        return None
+    api_key = client.api_key
+    return _async_openai(api_key, str(client.base_url), timeout=client.timeout,
+                         max_retries=client.max_retries)
+
+
+def batch_processor_for(client: Any) -> Any:
+    """
+    共享AsyncOpenAI客户端对应的LLM批处理器（当前事件循环，LLM_BATCH_ENABLED=false时为None）
+
+    Args:
+        client: AsyncOpenAI客户端（async_client_for的返回值）
+
+    Returns:
+        LLMBatchProcessor 或 None
+    """
+    llm_config = load_config().llm
+    if not llm_config.batch_enabled:
+        return None
+    from werewolf.optimization.llm.batch_processor import LLMBatchProcessor, OpenAIBackend
+
+    loop = asyncio.get_running_loop()
+    key = ('llm_batch', id(loop), id(client))
+    return shared_resources.shared(key, lambda: LLMBatchProcessor(
+        OpenAIBackend(client),
+        batch_window=llm_config.batch_window_ms / 1000.0,
+        max_batch_size=llm_config.batch_max_size,
+        max_concurrency=llm_config.batch_concurrency,
+        name='detectors',
+    ))
+
+
+def batch_deadline() -> float:
+    """检测请求的截止时间（秒，0=不限）"""
+    return load_config().llm.batch_deadline
+
+
+def sdk_async_client() -> Any:
+    """SDK llm_caller 等价调用使用的共享AsyncOpenAI客户端（API_KEY/BASE_URL）"""
+    return _async_openai(os.getenv('API_KEY'), os.getenv('BASE_URL'))
+
+
+def add_job(jobs: Dict[str, Awaitable], name: str, detector: Any, method: str, *args: Any) -> None:
+    """检测器存在且提供异步方法时加入并发任务（否则由同步逻辑自行检测）"""
+    func = getattr(detector, method, None) if detector else None
+    if func is not None:
+        jobs[name] = func(*args)
+
+
+async def gather_jobs(jobs: Dict[str, Awaitable]) -> Dict[str, Any]:
+    """并发执行检测任务，异常作为结果保留（由同步逻辑原有的异常处理记录）"""
+    results = await asyncio.gather(*jobs.values(), return_exceptions=True)
+    return dict(zip(jobs, results))
+
+
+class AsyncAgentMixin:
+    """
+    角色智能体的异步入口
+
+    子类（BaseGoodAgent / BaseWolfAgent / AgentAdapter）提供：
+    - _detects_message(req, kind): 该请求是否会处理玩家发言
+    - _detect_message_async(message, player_name): 并发执行发言检测
+    同步处理逻辑通过 _prefetched() 取用预取结果，没有预取时照常同步检测
+    """
+
+    def _detects_message(self, req: Any, kind: str) -> bool:
+        return False
+
+    async def _detect_message_async(self, message: str, player_name: str) -> Dict[str, Any]:
+        return {}
+
+    async def perceive_async(self, req):
+        return await self._handle_async('perceive', req)
+
+    async def interact_async(self, req):
+        return await self._handle_async('interact', req)
+
+    async def _handle_async(self, kind: str, req: Any) -> Any:
+        handler = getattr(self, kind)
+        if not self._detects_message(req, kind):
+            return await asyncio.to_thread(handler, req)
+
+        with request_scope(self, req, kind):
+            with tracing.span(f"{type(self).__name__}.{kind}.prefetch"):
+                try:
+                    results = await self._detect_message_async(req.message, req.name)
+                except Exception as e:
+                    logger.error(f"[ASYNC AGENT] Detection prefetch failed for {req.name}: {e}")
+                    results = {}
+        # asyncio.to_thread复制当前上下文，处理线程内可读到预取结果
+        token = _prefetch.set((req.message, results))
+        try:
+            return await asyncio.to_thread(handler, req)
+        finally:
+            _prefetch.reset(token)
+
+    def _prefetched(self, name: str, message: str, compute: Callable[[], Any]) -> Any:
+        """
+        取预取的检测结果
+
+        Args:
+            name: 检测器名（injection / false_quote / message_parser / speech_quality）
+            message: 当前处理的发言
+            compute: 没有预取结果时的同步检测
+
+        Returns:
+            检测结果（预取时出现的异常原样抛出）
+        """
+        item: Optional[Tuple[str, Dict[str, Any]]] = _prefetch.get()
+        if item is None or item[0] != message or name not in item[1]:
+            return compute()
+        result = item[1][name]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def llm_caller_async(self, prompt: str) -> Optional[str]:
+        """llm_caller的异步版本（共享AsyncOpenAI客户端，经过LLM账本记录）"""
+        return await llm_ledger.asdk_llm_call(sdk_async_client(), self.model_name, prompt)
+
+
+async def call_async(agent: Any, kind: str, req: Any) -> Any:
+    """
+    调用角色入口的异步处理（没有异步版本时在线程池中执行同步版本）
+
+    Args:
+        agent: 角色智能体或代理
+        kind: 'perceive' 或 'interact'
+        req: AgentReq
+
+    Returns:
+        处理结果
+    """
+    method = getattr(type(agent), f"{kind}_async", None)
+    if method is not None:
+        return await method(agent, req)
+    return await asyncio.to_thread(getattr(agent, kind), req)
+
+
+def configure_threads(app: Any, threads: int) -> None:
+    """
+    固定请求处理线程数（应用启动时设置）
+
+    Args:
+        app: FastAPI应用
+        threads: 同步端点线程池（anyio默认限流器）与asyncio默认执行器的线程数
+    """
+    if threads <= 0:
+        return
+
+    async def apply():
+        import anyio.to_thread
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=threads, thread_name_prefix='agent')
+        )
+        logger.info(f"[ASYNC AGENT] Request threads fixed at {threads}")
+
+    app.router.on_startup.append(apply)
+
+
+def install_async_routes(app: Any, agent: Any, enabled: Optional[bool] = None,
+                         threads: Optional[int] = None) -> bool:
+    """
+    用async端点替换SDK应用的 /agent/perceive、/agent/interact（请求与响应格式不变）
+
+    Args:
+        app: FastAPI应用（EndpointServer.app）
+        agent: WerewolfAgent
+        enabled: 是否启用（None=读AGENT_ASYNC）
+        threads: 请求处理线程数（None=读AGENT_THREADS）
+
+    Returns:
+        是否启用了异步端点
+    """
+    if enabled is None:
+        enabled = os.getenv('AGENT_ASYNC', 'false').lower() == 'true'
+    if threads is None:
+        threads = int(os.getenv('AGENT_THREADS', '0'))
+    configure_threads(app, threads)
+    if not enabled:
+        return False
+
+    from fastapi.routing import APIRoute
+    from agent_build_sdk.model.werewolf_model import AgentReq, AgentResp
+    from agent_build_sdk.utils.logger import logger as sdk_logger
+
+    paths = ('/agent/perceive', '/agent/interact')
+    app.router.routes[:] = [r for r in app.router.routes
+                            if not (isinstance(r, APIRoute) and r.path in paths)]
+
+    def role_agent(req: AgentReq) -> Any:
+        # 与WerewolfAgent.perceive/interact相同的分发
+        if req.role not in agent.role_agent_map:
+            raise ValueError(f"Role agent for {req.role} not registered.")
+        return agent.role_agent_map[req.role]
+
+    @app.post('/agent/interact')
+    async def interact(req: AgentReq) -> AgentResp:
+        sdk_logger.info(f"interact: {req}")
+        return await call_async(role_agent(req), 'interact', req)
+
+    @app.post('/agent/perceive')
+    async def perceive(req: AgentReq):
+        sdk_logger.info(f"Perceive: {req}")
+        try:
+            await call_async(role_agent(req), 'perceive', req)
+            return AgentResp(success=True)
+        except Exception as e:
+            sdk_logger.error(f"invoke perceive error: {e}")
+            return AgentResp(success=False, errMsg=f"perceive error {e}")
+
+    logger.info(f"[ASYNC AGENT] Async perceive/interact routes installed"
+                f"{f' ({threads} threads)' if threads > 0 else ''}")
+    return True
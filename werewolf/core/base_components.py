@@ -7,6 +7,7 @@
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 import logging
+from werewolf.common import tracing
 from .config import BaseConfig
 from .exceptions import ComponentError
 
@@ -93,8 +94,18 @@ class BaseAnalyzer(BaseComponent):
     分析器抽象基类
     
     职责: 分析数据并生成洞察
+    
+    子类的analyze（无论覆盖与否）会自动包裹一个以“类名.analyze”命名的追踪Span
     """
     
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        analyze = cls.__dict__.get('analyze')
+        if analyze is None:
+            # 继承的analyze: 取未包裹的原函数，避免父类Span名重复嵌套
+            analyze = getattr(cls.analyze, '__wrapped__', cls.analyze)
+        cls.analyze = tracing.traced(f"{cls.__name__}.analyze")(analyze)
+    
     def analyze(self, *args, **kwargs) -> Any:
         """
         模板方法: 执行分析流程
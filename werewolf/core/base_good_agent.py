@@ -16,8 +16,14 @@ import os
 import sys
 import json
 from agent_build_sdk.sdk.role_agent import BasicRoleAgent
+from agent_build_sdk.model.werewolf_model import STATUS_DISCUSS
 from agent_build_sdk.utils.logger import logger
 from werewolf.core.base_good_config import BaseGoodConfig
+from werewolf.common import game_scope, tracing, llm_ledger
+from werewolf.core.agent_memory import AgentMemory
+from werewolf.core import shared_resources
+from werewolf.core.async_agent import AsyncAgentMixin, add_job, gather_jobs
+from werewolf.optimization.models.validation import VoteDecisionInput
 
 # 加载环境变量
 try:
@@ -36,7 +42,7 @@ except ImportError as e:
     logger.warning(f"ML agent not available: {e}")
 
 
-class BaseGoodAgent(BasicRoleAgent):
+class BaseGoodAgent(AsyncAgentMixin, BasicRoleAgent):
     """
     好人阵营基类
     
@@ -81,7 +87,8 @@ class BaseGoodAgent(BasicRoleAgent):
             role: 角色名称（如ROLE_VILLAGER, ROLE_SEER等）
             model_name: LLM模型名称
         """
-        super().__init__(role, model_name=model_name)
+        # 每个智能体独立记忆（SDK默认记忆在进程内共享，见 agent_memory）
+        super().__init__(role, memory=AgentMemory(), model_name=model_name)
         
         # 配置（子类可以在__init__中覆盖为角色特有配置）
         if not hasattr(self, 'config') or not isinstance(self.config, BaseGoodConfig):
@@ -107,11 +114,15 @@ class BaseGoodAgent(BasicRoleAgent):
         self.ml_enabled = False
         self._init_ml_enhancement()
         
-        # 初始化共享组件
-        self._init_shared_components()
-        
-        # 初始化角色特有组件（钩子方法，由子类实现）
-        self._init_specific_components()
+        # 对局作用域：记忆与组件的按局缓存登记在这里，每局结束时统一释放（见game_scope）
+        self.game_scope = game_scope.scope_for(self)
+        self.game_scope.register('memory', self.memory, release=self._reset_memory)
+        with game_scope.bind(self.game_scope):
+            # 初始化共享组件
+            self._init_shared_components()
+            
+            # 初始化角色特有组件（钩子方法，由子类实现）
+            self._init_specific_components()
         
         logger.info(f"✓ {role} agent initialized with BaseGoodAgent")
     
@@ -142,6 +153,11 @@ class BaseGoodAgent(BasicRoleAgent):
         self.memory.set_variable("injection_attempts", [])
         self.memory.set_variable("false_quotations", [])
     
+    def _reset_memory(self):
+        """对局结束：清空记忆并恢复初始内存变量（登记在对局作用域中）"""
+        self.memory.clear()
+        self._init_memory_variables()
+    
     def _init_detection_client(self) -> Tuple[Optional[Any], str]:
         """
         初始化双模型架构
@@ -169,8 +185,11 @@ class BaseGoodAgent(BasicRoleAgent):
                 logger.info("ℹ️ 检测模型API未配置，将使用主模型（单模型模式）")
                 return (getattr(self, 'client', None), self.model_name)
             
-            # 创建检测专用客户端（设置90秒超时）
-            detection_client = OpenAI(api_key=api_key, base_url=base_url, timeout=90.0)
+            # 创建检测专用客户端（设置90秒超时；进程内同配置共享一个客户端及其连接池）
+            detection_client = shared_resources.shared(
+                ('openai', api_key, base_url, 90.0),
+                lambda: OpenAI(api_key=api_key, base_url=base_url, timeout=90.0),
+            )
             
             logger.info("✓ 双模型架构已初始化")
             logger.info(f"  - 生成模型: {self.model_name} (用于发言生成)")
@@ -199,7 +218,10 @@ class BaseGoodAgent(BasicRoleAgent):
         
         try:
             model_dir = os.getenv('ML_MODEL_DIR', './ml_models')
-            self.ml_agent = LightweightMLAgent(model_dir=model_dir)
+            # 模型在进程内共享（各角色、会话池中的各实例只加载一次）
+            self.ml_agent = shared_resources.shared(
+                ('ml_agent', model_dir), lambda: LightweightMLAgent(model_dir=model_dir)
+            )
             self.ml_enabled = self.ml_agent.enabled
             
             if self.ml_enabled:
@@ -355,6 +377,36 @@ class BaseGoodAgent(BasicRoleAgent):
     
     # ==================== 共享方法 ====================
     
+    def _detects_message(self, req, kind: str) -> bool:
+        """
+        该请求是否会经过 _process_player_message（异步路径据此预取检测结果）
+        
+        默认：perceive的讨论阶段、带发言者和发言内容
+        """
+        return kind == 'perceive' and req.status == STATUS_DISCUSS and bool(req.name) and bool(req.message)
+    
+    async def _detect_message_async(self, message: str, player_name: str) -> Dict[str, Any]:
+        """
+        并发执行 _process_player_message 中的四项LLM检测（异步路径）
+        
+        虚假引用检测使用本次请求处理前的历史记录（预言家等先写入当前发言再处理的角色，
+        历史中不含当前发言本身）
+        
+        Args:
+            message: 玩家消息
+            player_name: 玩家名称
+        
+        Returns:
+            检测器名 -> 结果（或异常）
+        """
+        jobs = {}
+        add_job(jobs, 'injection', self.injection_detector, 'detect_async', message)
+        add_job(jobs, 'false_quote', self.false_quote_detector, 'detect_async', message, self.memory.load_history())
+        add_job(jobs, 'message_parser', self.message_parser, 'parse_async', message, player_name)
+        if len(message) >= 50:
+            add_job(jobs, 'speech_quality', self.speech_quality_evaluator, 'evaluate_async', message)
+        return await gather_jobs(jobs)
+    
     def _process_player_message(self, message: str, player_name: str):
         """
         处理玩家消息（共享逻辑）- 使用LLM检测器
@@ -377,7 +429,7 @@ class BaseGoodAgent(BasicRoleAgent):
         # 1. 注入检测（使用LLM）
         if self.injection_detector:
             try:
-                result = self.injection_detector.detect(message)
+                result = self._prefetched('injection', message, lambda: self.injection_detector.detect(message))
                 
                 if result.get('detected', False):
                     injection_type = result.get('type', 'NONE')
@@ -421,7 +473,8 @@ class BaseGoodAgent(BasicRoleAgent):
         if self.false_quote_detector:
             try:
                 history = self.memory.load_history()
-                result = self.false_quote_detector.detect(message, history)
+                result = self._prefetched('false_quote', message,
+                                           lambda: self.false_quote_detector.detect(message, history))
                 
                 if result.get('detected', False):
                     confidence = result.get('confidence', 0.0)
@@ -453,7 +506,8 @@ class BaseGoodAgent(BasicRoleAgent):
         # 3. 消息解析（使用LLM）
         if self.message_parser:
             try:
-                parsed_info = self.message_parser.parse(message, player_name)
+                parsed_info = self._prefetched('message_parser', message,
+                                               lambda: self.message_parser.parse(message, player_name))
                 
                 # 处理角色声称
                 claimed_role = parsed_info.get("claimed_role", "none")
@@ -503,7 +557,8 @@ class BaseGoodAgent(BasicRoleAgent):
         # 4. 发言质量评估（使用LLM）
         if self.speech_quality_evaluator and len(message) >= 50:
             try:
-                result = self.speech_quality_evaluator.evaluate(message)
+                result = self._prefetched('speech_quality', message,
+                                           lambda: self.speech_quality_evaluator.evaluate(message))
                 
                 overall_score = result.get('overall_score', 50)
                 player_data[player_name]["speech_quality"] = overall_score
@@ -602,6 +657,39 @@ class BaseGoodAgent(BasicRoleAgent):
         logger.warning("Enhanced decision engine not available, using legacy decision")
         return self._legacy_vote_decision(candidates, context)
     
+    def _predict_ml_wolf_probs(
+        self,
+        candidates: List[str],
+        context: Optional[Dict] = None
+    ) -> Dict[str, float]:
+        """
+        批量预测候选人的狼人概率（共享逻辑）
+        
+        所有候选人一次性送入ML模型，供毒药、开枪、守护等技能决策使用
+        
+        Args:
+            candidates: 候选人列表
+            context: 决策上下文（可选，默认使用_build_context()）
+            
+        Returns:
+            {候选人: 狼人概率}，ML不可用时返回空字典
+        """
+        if not candidates or not self.ml_enabled:
+            return {}
+        
+        engine = getattr(self, 'enhanced_decision_engine', None)
+        if not engine:
+            return {}
+        
+        if context is None:
+            context = self._build_context()
+        
+        try:
+            return engine.predict_wolf_probabilities(candidates, context)
+        except Exception as e:
+            logger.error(f"ML批量预测失败: {e}")
+            return {}
+    
     def _legacy_vote_decision(self, candidates: List[str], context: Dict) -> str:
         """旧版投票决策（降级使用）"""
         my_name = context.get("my_name", "")
@@ -739,6 +827,26 @@ class BaseGoodAgent(BasicRoleAgent):
             # 添加截断标记
             return truncated.rstrip() + "..."
     
+    def _parse_choices(self, message: Any, my_name: Optional[str] = None) -> List[str]:
+        """
+        解析并验证SDK传入的候选人（SDK边界的完整验证）
+        
+        名字格式不对时记录警告并退回按逗号拆分的原始结果，不中断决策
+        
+        Args:
+            message: 逗号分隔的 req.message 或 req.choices 列表
+            my_name: 自己的名字（从候选人中去掉）
+            
+        Returns:
+            候选人列表（去重、去掉自己）
+        """
+        try:
+            return VoteDecisionInput.from_sdk(message, my_name).candidates
+        except ValueError as e:
+            logger.warning(f"[VALIDATION] Unexpected candidates {message!r}: {e}")
+            names = message.split(",") if isinstance(message, str) else list(message or [])
+            return [name for name in names if name and name != my_name]
+    
     def _validate_player_name(self, output: str, valid_choices: List[str]) -> str:
         """
         验证玩家名称
@@ -787,6 +895,7 @@ class BaseGoodAgent(BasicRoleAgent):
 
     # ==================== LLM调用方法 ====================
     
+    @tracing.traced("llm.analyze")
     def _llm_analyze(self, prompt: str, temperature: float = 0.1) -> str:
         """
         使用分析模型进行推理分析
@@ -805,7 +914,9 @@ class BaseGoodAgent(BasicRoleAgent):
             return self.llm_caller(prompt)
         
         try:
-            response = self.detection_client.chat.completions.create(
+            response = llm_ledger.create_completion(
+                self.detection_client,
+                caller="analyze",
                 model=self.detection_model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=temperature
@@ -819,6 +930,7 @@ class BaseGoodAgent(BasicRoleAgent):
             except:
                 return ""
     
+    @tracing.traced("llm.generate")
     def _llm_generate(self, prompt: str, temperature: float = 0.7) -> str:
         """
         使用生成模型生成发言
@@ -832,7 +944,20 @@ class BaseGoodAgent(BasicRoleAgent):
         Returns:
             生成的发言文本
         """
-        return self.llm_caller(prompt)  # 使用SDK的llm_caller
+        with llm_ledger.caller_scope("generate"):
+            return self.llm_caller(prompt)  # 使用SDK的llm_caller
+    
+    def llm_caller(self, prompt):
+        """
+        SDK llm_caller的等价实现，调用经过LLM账本记录
+        
+        Args:
+            prompt: 提示词
+        
+        Returns:
+            生成文本
+        """
+        return llm_ledger.sdk_llm_call(self.model_name, prompt)
     
     def _parse_json_response(self, text: str) -> Dict[str, Any]:
         """
@@ -939,14 +1064,22 @@ class BaseGoodAgent(BasicRoleAgent):
         
         game_data = []
         
-        for player_name, data in player_data_dict.items():
-            if not isinstance(data, dict):
-                continue
-            
+        players = [
+            (player_name, data) for player_name, data in player_data_dict.items()
+            if isinstance(data, dict)
+        ]
+        if not players:
+            return game_data
+        
+        # 一次性批量提取所有玩家的标准化特征
+        try:
+            feature_matrix = StandardFeatureExtractor.extract_batch([data for _, data in players])
+        except Exception as e:
+            logger.error(f"批量提取特征失败: {e}")
+            return game_data
+        
+        for (player_name, data), features in zip(players, feature_matrix):
             try:
-                # 提取标准化特征（直接返回numpy数组）
-                features = StandardFeatureExtractor.extract_features(data)
-                
                 # 推断角色
                 role = self._infer_player_role(player_name, result_message, context)
                 
@@ -960,7 +1093,7 @@ class BaseGoodAgent(BasicRoleAgent):
                 logger.debug(f"收集玩家数据: {player_name} (角色: {role})")
                 
             except Exception as e:
-                logger.error(f"提取特征失败 for {player_name}: {e}")
+                logger.error(f"推断角色失败 for {player_name}: {e}")
                 continue
         
         return game_data
@@ -4,7 +4,8 @@ BaseGoodConfig - 好人阵营基类配置
 定义所有好人角色的共享配置项
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict
 from werewolf.core.config import BaseConfig
 
 
@@ -76,6 +77,8 @@ class BaseGoodConfig(BaseConfig):
     # 投票紧急度配置
     VOTE_URGENCY_MULTIPLIER_ENDGAME: float = 1.5  # 残局紧急度乘数
     VOTE_URGENCY_MULTIPLIER_MIDLATE: float = 1.2  # 中后期紧急度乘数
+    # 投票评分维度权重覆盖（维度名 -> 权重，见 villager.decision_makers.build_vote_engine；空=全部1.0）
+    VOTE_DIMENSION_WEIGHTS: Dict[str, float] = field(default_factory=dict)
     
     def validate(self) -> bool:
         """
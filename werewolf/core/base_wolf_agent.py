@@ -22,6 +22,10 @@ import re
 from agent_build_sdk.sdk.role_agent import BasicRoleAgent
 from agent_build_sdk.utils.logger import logger
 from werewolf.core.base_wolf_config import BaseWolfConfig
+from werewolf.common import game_scope, tracing, llm_ledger
+from werewolf.core.agent_memory import AgentMemory
+from werewolf.core import shared_resources
+from werewolf.core.async_agent import AsyncAgentMixin, add_job, gather_jobs
 
 # ML Enhancement Integration
 try:
@@ -33,7 +37,7 @@ except ImportError as e:
     logger.warning(f"ML agent not available: {e}")
 
 
-class BaseWolfAgent(BasicRoleAgent):
+class BaseWolfAgent(AsyncAgentMixin, BasicRoleAgent):
     """
     狼人阵营基类
     
@@ -77,7 +81,8 @@ class BaseWolfAgent(BasicRoleAgent):
             model_name: LLM模型名称（用于生成发言）
             analysis_model_name: 分析模型名称（用于分析消息），如果为None则从环境变量读取
         """
-        super().__init__(role, model_name=model_name)
+        # 每个智能体独立记忆（SDK默认记忆在进程内共享，见 agent_memory）
+        super().__init__(role, memory=AgentMemory(), model_name=model_name)
         
         # 双模型架构
         self.generation_model_name = model_name
@@ -101,11 +106,15 @@ class BaseWolfAgent(BasicRoleAgent):
         self.ml_enabled = False
         self._init_ml_enhancement()
         
-        # 初始化共享组件
-        self._init_shared_components()
-        
-        # 初始化角色特有组件（钩子方法，由子类实现）
-        self._init_specific_components()
+        # 对局作用域：记忆与组件的按局缓存登记在这里，每局结束时统一释放（见game_scope）
+        self.game_scope = game_scope.scope_for(self)
+        self.game_scope.register('memory', self.memory, release=self._reset_memory)
+        with game_scope.bind(self.game_scope):
+            # 初始化共享组件
+            self._init_shared_components()
+            
+            # 初始化角色特有组件（钩子方法，由子类实现）
+            self._init_specific_components()
         
         logger.info(f"✓ {role} agent initialized with BaseWolfAgent")
         logger.info(f"  - Analysis model: {self.analysis_model_name}")
@@ -141,6 +150,11 @@ class BaseWolfAgent(BasicRoleAgent):
         for key, value in memory_vars.items():
             self.memory.set_variable(key, value)
     
+    def _reset_memory(self):
+        """对局结束：清空记忆并恢复初始内存变量（登记在对局作用域中）"""
+        self.memory.clear()
+        self._init_memory_variables()
+    
     def _init_analysis_client(self) -> Optional[Any]:
         """
         初始化分析客户端
@@ -161,9 +175,9 @@ class BaseWolfAgent(BasicRoleAgent):
             detection_base_url = os.getenv('DETECTION_BASE_URL') or os.getenv('OPENAI_BASE_URL')
             
             if detection_api_key and detection_base_url:
-                analysis_client = OpenAI(
-                    api_key=detection_api_key,
-                    base_url=detection_base_url
+                analysis_client = shared_resources.shared(
+                    ('openai', detection_api_key, detection_base_url, None),
+                    lambda: OpenAI(api_key=detection_api_key, base_url=detection_base_url),
                 )
                 logger.info(f"✓ Analysis LLM client initialized")
                 return analysis_client
@@ -184,7 +198,9 @@ class BaseWolfAgent(BasicRoleAgent):
         
         try:
             model_dir = os.getenv('ML_MODEL_DIR', './ml_models')
-            self.ml_agent = LightweightMLAgent(model_dir=model_dir)
+            self.ml_agent = shared_resources.shared(
+                ('ml_agent', model_dir), lambda: LightweightMLAgent(model_dir=model_dir)
+            )
             self.ml_enabled = self.ml_agent.enabled
             
             if self.ml_enabled:
@@ -254,6 +270,26 @@ class BaseWolfAgent(BasicRoleAgent):
     
     # ==================== 共享方法 ====================
     
+    async def _detect_message_async(self, message: str, player_name: str) -> Dict[str, Any]:
+        """
+        并发执行 _process_player_message 中的注入检测与发言质量评估（异步路径）
+        
+        狼人基类的perceive不处理玩家发言，是否预取由子类的 _detects_message 决定
+        
+        Args:
+            message: 玩家消息
+            player_name: 玩家名称
+        
+        Returns:
+            检测器名 -> 结果（或异常）
+        """
+        if not message or not player_name:
+            return {}
+        jobs = {}
+        add_job(jobs, 'injection', self.injection_detector, 'detect_async', message)
+        add_job(jobs, 'speech_quality', self.speech_quality_evaluator, 'evaluate_async', message)
+        return await gather_jobs(jobs)
+    
     def _process_player_message(self, message: str, player_name: str):
         """
         处理玩家消息（共享逻辑）- 使用LLM检测器
@@ -275,7 +311,7 @@ class BaseWolfAgent(BasicRoleAgent):
         # 1. 注入检测（检测好人试图操控狼人）
         if self.injection_detector:
             try:
-                result = self.injection_detector.detect(message)
+                result = self._prefetched('injection', message, lambda: self.injection_detector.detect(message))
                 
                 if result.get('detected', False):
                     injection_type = result.get('type', 'NONE')
@@ -323,7 +359,8 @@ class BaseWolfAgent(BasicRoleAgent):
         # 使用LLM发言质量评估器
         if self.speech_quality_evaluator:
             try:
-                result = self.speech_quality_evaluator.evaluate(message)
+                result = self._prefetched('speech_quality', message,
+                                           lambda: self.speech_quality_evaluator.evaluate(message))
                 overall_score = result.get('overall_score', 50)
                 return overall_score
             except Exception as e:
@@ -640,6 +677,7 @@ class BaseWolfAgent(BasicRoleAgent):
         logger.warning(f"Invalid player name: {output}, using fallback: {valid_choices[0]}")
         return valid_choices[0]
     
+    @tracing.traced("llm.analyze")
     def _llm_analyze(self, prompt: str, temperature: float = 0.1) -> str:
         """
         使用分析模型进行推理分析
@@ -655,7 +693,9 @@ class BaseWolfAgent(BasicRoleAgent):
             return self.llm_caller(prompt)
         
         try:
-            response = self.analysis_client.chat.completions.create(
+            response = llm_ledger.create_completion(
+                self.analysis_client,
+                caller="analyze",
                 model=self.analysis_model_name,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=temperature
@@ -665,6 +705,7 @@ class BaseWolfAgent(BasicRoleAgent):
             logger.error(f"LLM分析失败: {e}")
             return self.llm_caller(prompt)
     
+    @tracing.traced("llm.generate")
     def _llm_generate(self, prompt: str, temperature: float = 0.7) -> str:
         """
         使用生成模型生成发言
@@ -676,4 +717,17 @@ class BaseWolfAgent(BasicRoleAgent):
         Returns:
             生成的发言文本
         """
-        return self.llm_caller(prompt)
+        with llm_ledger.caller_scope("generate"):
+            return self.llm_caller(prompt)
+    
+    def llm_caller(self, prompt):
+        """
+        SDK llm_caller的等价实现，调用经过LLM账本记录
+        
+        Args:
+            prompt: 提示词
+        
+        Returns:
+            生成文本
+        """
+        return llm_ledger.sdk_llm_call(self.model_name, prompt)
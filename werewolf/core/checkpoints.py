@@ -0,0 +1,524 @@
+"""
+对局状态检查点（崩溃后中途恢复）
+
+容器在对局中途重启（OOM、发布、平台驱逐）时，角色智能体的memory全部丢失：
+历史记录、信任分数、查验结果、女巫的用药情况。之后的请求只能失忆地打完这一局，
+甚至会再次使用已经用掉的药。本模块在阶段边界把每局角色智能体的状态（memory中的
+全部变量与游戏ID）增量写入本地磁盘，重启后同一局的请求到达时恢复。
+
+- 每个(会话键, 角色)一个文件，由若干帧组成：首帧为全量快照，之后每帧只包含
+  自上一帧以来变化（按编码后字节比较）或删除的变量
+- 全量快照写临时文件后os.replace（原子）；增量帧追加写入，帧带长度与CRC32，
+  写到一半崩溃的尾帧在恢复时被丢弃并截断；累计 CHECKPOINT_COMPACT_EVERY 帧后重写为全量快照
+- 编码：变量值用msgpack（memory中是dict/list/str/数字等普通值）；tuple/set/frozenset
+  用扩展类型显式保留；其他类型（自定义对象、defaultdict等）拒绝编码，该变量不写入检查点。
+  不使用pickle：检查点目录可被写入时，恢复不应执行任意代码。帧体zlib压缩。
+  未安装msgpack时检查点不启用
+- 写入时机：每次interact之后（技能、投票等不可逆决策）与perceive进入新阶段时；
+  perceive(STATUS_RESULT)后删除
+- 恢复：会话新建（或进程内首次见到该会话键）且请求不是STATUS_START时读取；
+  超过 CHECKPOINT_MAX_AGE 的检查点视为过期并删除
+
+会话键即请求头 X-Game-Id（见game_sessions）；没有请求头时每个角色只有一个默认会话，
+重启后第一个非START请求恢复该角色最近一局的状态。
+
+环境变量:
+    CHECKPOINT_ENABLED: 是否启用（默认true）
+    CHECKPOINT_DIR: 目录（默认 $DATA_DIR/checkpoints）
+    CHECKPOINT_MAX_AGE: 检查点有效期（秒，默认1800）
+    CHECKPOINT_COMPACT_EVERY: 重写全量快照前的最大帧数（默认16）
+    CHECKPOINT_FSYNC: 每次写入后fsync（默认false；进程崩溃不会丢失页缓存，只有主机掉电才需要）
+"""
+
+import os
+import time
+import zlib
+import struct
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from werewolf.common import metrics
+from werewolf.common.request_context import STATUS_START, STATUS_RESULT
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+MAGIC = b'WC'
+FRAME_FULL = b'F'
+FRAME_DELTA = b'D'
+# 帧头: 魔数、类型、帧体长度、帧体CRC32
+_HEADER = struct.Struct('>2scII')
+_OP_SET = 0
+_OP_DELETE = 1
+# memory变量之外的游戏ID（request_context保存在智能体的 _game_id 属性上）
+GAME_ID_KEY = '\x00game_id'
+
+
+# msgpack扩展类型: 内容为元素列表的msgpack编码
+_EXT_TUPLE = 1
+_EXT_SET = 2
+_EXT_FROZENSET = 3
+_EXT_TYPES = {tuple: _EXT_TUPLE, set: _EXT_SET, frozenset: _EXT_FROZENSET}
+_EXT_DECODERS = {_EXT_TUPLE: tuple, _EXT_SET: set, _EXT_FROZENSET: frozenset}
+
+
+def _pack(value: Any) -> bytes:
+    # strict_types: 子类（defaultdict、namedtuple、bool以外的int子类等）不按父类编码，交给_ext_default拒绝
+    return msgpack.packb(value, use_bin_type=True, strict_types=True, default=_ext_default)
+
+
+def _ext_default(value: Any) -> Any:
+    code = _EXT_TYPES.get(type(value))
+    if code is None:
+        raise TypeError(f"unsupported checkpoint value type {type(value).__name__}")
+    return msgpack.ExtType(code, _pack(list(value)))
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    decoder = _EXT_DECODERS.get(code)
+    if decoder is None:
+        raise ValueError(f"unknown checkpoint extension type {code}")
+    return decoder(_unpack(data))
+
+
+def _unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, strict_map_key=False, ext_hook=_ext_hook)
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    编码单个变量（首字节标记编码方式）
+
+    Args:
+        value: 变量值（dict/list/str/bytes/数字/bool/None，及tuple/set/frozenset）
+
+    Returns:
+        b'm'+msgpack
+
+    Raises:
+        TypeError: 含不支持的类型（该变量不写入检查点）
+    """
+    try:
+        return b'm' + _pack(value)
+    except (ValueError, OverflowError) as e:
+        raise TypeError(str(e)) from e
+
+
+def decode_value(data: bytes) -> Any:
+    """
+    encode_value的逆操作
+
+    Raises:
+        ValueError: 未知的编码方式（如旧版本写入的pickle值，不再加载）
+    """
+    if data[:1] != b'm':
+        raise ValueError(f"unsupported checkpoint value encoding {data[:1]!r}")
+    return _unpack(data[1:])
+
+
+def encode_frame(kind: bytes, values: Dict[str, bytes], deleted: List[str] = ()) -> bytes:
+    """
+    编码一帧
+
+    Args:
+        kind: FRAME_FULL 或 FRAME_DELTA
+        values: 变量名 -> encode_value结果
+        deleted: 删除的变量名
+
+    Returns:
+        帧字节（帧头 + zlib压缩的帧体）
+    """
+    parts = []
+    for name, data in values.items():
+        raw = name.encode('utf-8')
+        parts.append(struct.pack('>BH', _OP_SET, len(raw)) + raw + struct.pack('>I', len(data)) + data)
+    for name in deleted:
+        raw = name.encode('utf-8')
+        parts.append(struct.pack('>BH', _OP_DELETE, len(raw)) + raw)
+    body = zlib.compress(b''.join(parts), 1)
+    return _HEADER.pack(MAGIC, kind, len(body), zlib.crc32(body)) + body
+
+
+def iter_frames(data: bytes) -> Iterator[Tuple[bytes, Dict[str, Optional[bytes]], int]]:
+    """
+    依次解析帧（遇到不完整或校验失败的帧时停止）
+
+    Args:
+        data: 检查点文件内容
+
+    Yields:
+        (帧类型, 变量名 -> 编码值（删除为None）, 该帧结束的偏移)
+    """
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        magic, kind, length, crc = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        body = data[start:start + length]
+        if magic != MAGIC or len(body) < length or zlib.crc32(body) != crc:
+            return
+        try:
+            raw = zlib.decompress(body)
+        except zlib.error:
+            return
+        entries: Dict[str, Optional[bytes]] = {}
+        pos = 0
+        while pos < len(raw):
+            op, name_len = struct.unpack_from('>BH', raw, pos)
+            pos += 3
+            name = raw[pos:pos + name_len].decode('utf-8')
+            pos += name_len
+            if op == _OP_DELETE:
+                entries[name] = None
+                continue
+            (value_len,) = struct.unpack_from('>I', raw, pos)
+            pos += 4
+            entries[name] = raw[pos:pos + value_len]
+            pos += value_len
+        offset = start + length
+        yield kind, entries, offset
+
+
+@dataclass
+class _Track:
+    """一个会话在本进程内的检查点写入状态"""
+    phase: str = ''
+    digests: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    frames: int = 0
+
+
+class AgentCheckpointer:
+    """
+    角色智能体状态检查点
+
+    同一会话的请求由平台串行发送，同一(会话键, 角色)的写入不会并发；
+    锁只保护会话表。
+
+    Args:
+        directory: 检查点目录
+        max_age: 有效期（秒，0=不过期）
+        compact_every: 重写全量快照前的最大帧数
+        fsync: 写入后是否fsync
+    """
+
+    def __init__(self, directory: str, max_age: float = 1800.0, compact_every: int = 16, fsync: bool = False):
+        self.directory = directory
+        self.max_age = max(0.0, max_age)
+        self.compact_every = max(1, compact_every)
+        self.fsync = fsync
+        self._tracks: Dict[Tuple[str, str], _Track] = {}
+        self._lock = threading.Lock()
+        self._warned: set = set()
+        os.makedirs(directory, exist_ok=True)
+        self.prune()
+
+    def path_for(self, key: str, role: str) -> str:
+        digest = hashlib.md5(key.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f"{role}-{digest}.ckpt")
+
+    # ==================== 请求钩子 ====================
+
+    def resume(self, key: str, role: str, agent: Any, req: Any, fresh: bool = False) -> bool:
+        """
+        请求处理前调用：新会话的非START请求从检查点恢复
+
+        Args:
+            key: 会话键
+            role: 角色名
+            agent: 处理该请求的角色智能体
+            req: AgentReq
+            fresh: 智能体是否刚从池中取出（会话新建）
+
+        Returns:
+            是否恢复了状态
+        """
+        if getattr(req, 'status', None) == STATUS_START:
+            with self._lock:
+                self._tracks[(key, role)] = _Track()
+            self._remove(key, role)
+            return False
+        with self._lock:
+            if (key, role) in self._tracks and not fresh:
+                return False
+            self._tracks[(key, role)] = _Track()
+        try:
+            return self.restore(key, role, agent)
+        except Exception as e:
+            logger.warning(f"[CHECKPOINT] Failed to restore {key or '<default>'}/{role}: {e}")
+            return False
+
+    def after_request(self, key: str, role: str, agent: Any, req: Any, kind: str) -> int:
+        """
+        请求处理后调用：在阶段边界写入检查点，对局结束时删除
+
+        Args:
+            key: 会话键
+            role: 角色名
+            agent: 角色智能体
+            req: AgentReq
+            kind: 'perceive' 或 'interact'
+
+        Returns:
+            写入的字节数（未写入时为0）
+        """
+        status = getattr(req, 'status', '') or ''
+        if kind == 'perceive' and status == STATUS_RESULT:
+            self.discard(key, role)
+            return 0
+        with self._lock:
+            track = self._tracks.setdefault((key, role), _Track())
+        if kind != 'interact' and status == track.phase:
+            return 0
+        track.phase = status
+        try:
+            return self.checkpoint(key, role, agent, track)
+        except Exception as e:
+            logger.warning(f"[CHECKPOINT] Failed to checkpoint {key or '<default>'}/{role}: {e}")
+            return 0
+
+    def discard(self, key: str, role: str) -> None:
+        """对局结束：删除检查点并忘记会话"""
+        with self._lock:
+            self._tracks.pop((key, role), None)
+        self._remove(key, role)
+
+    # ==================== 读写 ====================
+
+    def _snapshot(self, role: str, agent: Any) -> Dict[str, bytes]:
+        values = dict(getattr(agent.memory, 'memories', {}) or {})
+        values[GAME_ID_KEY] = getattr(agent, '_game_id', None) or ''
+        encoded = {}
+        for name, value in values.items():
+            try:
+                encoded[name] = encode_value(value)
+            except Exception as e:
+                if (role, name) not in self._warned:
+                    self._warned.add((role, name))
+                    logger.warning(f"[CHECKPOINT] Skipping unencodable {role} variable {name!r}: {e}")
+        return encoded
+
+    def checkpoint(self, key: str, role: str, agent: Any, track: Optional[_Track] = None) -> int:
+        """
+        写入一帧（没有变化时不写）
+
+        Args:
+            key: 会话键
+            role: 角色名
+            agent: 角色智能体
+            track: 会话写入状态（默认取会话表中的记录）
+
+        Returns:
+            写入的字节数
+        """
+        if track is None:
+            with self._lock:
+                track = self._tracks.setdefault((key, role), _Track())
+        started = time.perf_counter()
+        encoded = self._snapshot(role, agent)
+        digests = {name: (zlib.crc32(data), len(data)) for name, data in encoded.items()}
+        changed = {name: encoded[name] for name, digest in digests.items() if track.digests.get(name) != digest}
+        deleted = [name for name in track.digests if name not in digests]
+        if not changed and not deleted:
+            return 0
+
+        path = self.path_for(key, role)
+        if track.frames == 0 or track.frames >= self.compact_every or not os.path.exists(path):
+            frame = encode_frame(FRAME_FULL, encoded)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(frame)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            track.frames = 1
+        else:
+            frame = encode_frame(FRAME_DELTA, changed, deleted)
+            with open(path, 'ab') as f:
+                f.write(frame)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            track.frames += 1
+        track.digests = digests
+        metrics.observe_operation('checkpoint.write', time.perf_counter() - started, role=role)
+        return len(frame)
+
+    def load(self, key: str, role: str) -> Optional[Dict[str, Any]]:
+        """
+        读取检查点（不存在、过期或首帧损坏时为None；损坏的尾帧被截断）
+
+        Args:
+            key: 会话键
+            role: 角色名
+
+        Returns:
+            变量名 -> 值（游戏ID在GAME_ID_KEY下）
+        """
+        path = self.path_for(key, role)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if self.max_age and time.time() - stat.st_mtime > self.max_age:
+            logger.info(f"[CHECKPOINT] Dropping stale checkpoint {os.path.basename(path)}")
+            self._remove(key, role)
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        state: Dict[str, bytes] = {}
+        valid = 0
+        frames = 0
+        for kind, entries, end in iter_frames(data):
+            if kind == FRAME_FULL:
+                state = {}
+            elif valid == 0:
+                break
+            frames += 1
+            for name, value in entries.items():
+                if value is None:
+                    state.pop(name, None)
+                else:
+                    state[name] = value
+            valid = end
+        if valid == 0:
+            logger.warning(f"[CHECKPOINT] Unreadable checkpoint {os.path.basename(path)}, ignoring")
+            self._remove(key, role)
+            return None
+        if valid < len(data):
+            # 崩溃时写了一半的尾帧：截断，后续增量帧接在最后一个完整帧之后
+            logger.warning(f"[CHECKPOINT] Truncating torn tail of {os.path.basename(path)} "
+                           f"({len(data) - valid} bytes)")
+            os.truncate(path, valid)
+        try:
+            values = {name: decode_value(value) for name, value in state.items()}
+        except (ValueError, TypeError, msgpack.UnpackException) as e:
+            logger.warning(f"[CHECKPOINT] Undecodable checkpoint {os.path.basename(path)}, ignoring: {e}")
+            self._remove(key, role)
+            return None
+        with self._lock:
+            track = self._tracks.setdefault((key, role), _Track())
+        track.digests = {name: (zlib.crc32(value), len(value)) for name, value in state.items()}
+        track.frames = frames
+        return values
+
+    def restore(self, key: str, role: str, agent: Any) -> bool:
+        """
+        把检查点恢复到角色智能体（覆盖memory与游戏ID）
+
+        Args:
+            key: 会话键
+            role: 角色名
+            agent: 角色智能体
+
+        Returns:
+            是否存在可用的检查点
+        """
+        started = time.perf_counter()
+        state = self.load(key, role)
+        if state is None:
+            return False
+        game_id = state.pop(GAME_ID_KEY, '')
+        agent.memory.memories.clear()
+        agent.memory.memories.update(state)
+        if game_id:
+            agent._game_id = game_id
+        elapsed = time.perf_counter() - started
+        metrics.observe_operation('checkpoint.restore', elapsed, role=role)
+        logger.info(f"[CHECKPOINT] Restored {key or '<default>'}/{role} game {game_id or '-'} "
+                    f"({len(state)} variables, {elapsed * 1000:.1f}ms)")
+        return True
+
+    def _remove(self, key: str, role: str) -> None:
+        try:
+            os.remove(self.path_for(key, role))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"[CHECKPOINT] Failed to remove checkpoint: {e}")
+
+    def prune(self) -> int:
+        """删除过期检查点与残留临时文件，返回删除的文件数"""
+        removed = 0
+        now = time.time()
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stale = name.endswith('.tmp') or (
+                    name.endswith('.ckpt') and self.max_age and now - os.stat(path).st_mtime > self.max_age
+                )
+                if stale:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"[CHECKPOINT] Pruned {removed} stale checkpoint files")
+        return removed
+
+
+_checkpointer: Optional[AgentCheckpointer] = None
+_checkpointer_lock = threading.Lock()
+_checkpointer_failed = False
+
+
+def get_checkpointer() -> Optional[AgentCheckpointer]:
+    """获取全局检查点管理器（禁用或目录不可用时返回None）"""
+    global _checkpointer, _checkpointer_failed
+    if _checkpointer is None and not _checkpointer_failed:
+        if os.getenv('CHECKPOINT_ENABLED', 'true').lower() != 'true':
+            _checkpointer_failed = True
+            return None
+        if not MSGPACK_AVAILABLE:
+            _checkpointer_failed = True
+            logger.warning("[CHECKPOINT] Checkpointing disabled: msgpack not installed")
+            return None
+        with _checkpointer_lock:
+            if _checkpointer is None and not _checkpointer_failed:
+                directory = os.getenv('CHECKPOINT_DIR') or os.path.join(
+                    os.getenv('DATA_DIR', './game_data'), 'checkpoints')
+                try:
+                    _checkpointer = AgentCheckpointer(
+                        directory,
+                        max_age=float(os.getenv('CHECKPOINT_MAX_AGE', '1800')),
+                        compact_every=int(os.getenv('CHECKPOINT_COMPACT_EVERY', '16')),
+                        fsync=os.getenv('CHECKPOINT_FSYNC', 'false').lower() == 'true',
+                    )
+                except OSError as e:
+                    _checkpointer_failed = True
+                    logger.warning(f"[CHECKPOINT] Checkpointing disabled: {e}")
+    return _checkpointer
+
+
+@contextmanager
+def checkpointed(key: str, role: str, agent: Any, req: Any, kind: str, fresh: bool = False) -> Iterator[None]:
+    """
+    在一次请求前后恢复与写入检查点（未启用时不做任何事；处理抛出异常时不写入）
+
+    Args:
+        key: 会话键
+        role: 角色名
+        agent: 处理该请求的角色智能体
+        req: AgentReq
+        kind: 'perceive' 或 'interact'
+        fresh: 智能体是否刚从池中取出（会话新建）
+    """
+    checkpointer = get_checkpointer()
+    if checkpointer is not None:
+        checkpointer.resume(key, role, agent, req, fresh)
+    yield
+    if checkpointer is not None:
+        checkpointer.after_request(key, role, agent, req, kind)
@@ -7,6 +7,8 @@ import os
 from typing import Dict, Any, List, Optional, Tuple
 import numpy as np
 
+from werewolf.common import tracing
+
 # 导入优化组件
 from werewolf.optimization.utils.safe_math import safe_divide
 from werewolf.optimization.algorithms.bayesian_inference import (
@@ -30,6 +32,7 @@ class EnhancedDecisionEngine:
         logger.info(f"  - ML enabled: {self.ml_enabled}")
         logger.info(f"  - ML fusion ratio: {self.ml_fusion_ratio}")
     
+    @tracing.traced("decision_engine.decide_vote")
     def decide_vote(
         self,
         candidates: List[str],
@@ -83,7 +86,7 @@ class EnhancedDecisionEngine:
             target = max(final_scores, key=final_scores.get)
             confidence = self._calculate_confidence(final_scores[target], final_scores)
             
-            logger.info(f"[VOTE DECISION] Target: {target}, Confidence: {confidence:.2f}")
+            logger.info("[VOTE DECISION] Target: %s, Confidence: %.2f", target, confidence)
             
             return target, confidence, final_scores
         except (ValueError, KeyError, TypeError) as e:
@@ -94,6 +97,7 @@ class EnhancedDecisionEngine:
             return candidates[0] if candidates else None, 0.5, {}
 
     
+    @tracing.traced("decision_engine.decision_tree_scoring")
     def _decision_tree_scoring(
         self,
         candidates: List[str],
@@ -396,6 +400,7 @@ class EnhancedDecisionEngine:
         
         return scores
     
+    @tracing.traced("decision_engine.ml_scoring")
     def _ml_scoring(
         self,
         candidates: List[str],
@@ -404,57 +409,90 @@ class EnhancedDecisionEngine:
         """
         ML预测评分
         
-        使用ML模型预测狼人概率
+        使用ML模型批量预测狼人概率
         """
         if not self.ml_agent or not self.ml_enabled:
             return {}
         
-        scores = {}
+        probs = self.predict_wolf_probabilities(candidates, context)
+        
+        # 转换为分数（0-100）
+        return {candidate: prob * 100 for candidate, prob in probs.items()}
+    
+    def predict_wolf_probabilities(
+        self,
+        candidates: List[str],
+        context: Dict[str, Any]
+    ) -> Dict[str, float]:
+        """
+        批量预测所有候选人的狼人概率
+        
+        构建一次特征输入并调用一次ML模型，供投票、毒药、开枪、守护决策共用
+        
+        Args:
+            candidates: 候选人列表
+            context: 游戏上下文
+        
+        Returns:
+            {候选人: 狼人概率(0.0-1.0)}，ML不可用时返回空字典
+        """
+        if not self.ml_agent or not self.ml_enabled or not candidates:
+            return {}
+        
         player_data = context.get('player_data', {})
         
-        for candidate in candidates:
-            try:
-                # 提取特征
-                features = self._extract_ml_features(candidate, player_data, context)
-                
-                # ML预测
-                wolf_prob = self.ml_agent.predict_wolf_probability(features)
-                
-                # 转换为分数（0-100）
-                scores[candidate] = wolf_prob * 100
-                
-            except (ValueError, KeyError, TypeError) as e:
-                logger.error(f"ML特征提取失败 for {candidate}: {e}")
-                scores[candidate] = 50  # 默认中性分数
-            except Exception as e:
-                logger.error(f"ML评分失败 for {candidate}: {e}", exc_info=True)
-                scores[candidate] = 50  # 默认中性分数
+        try:
+            rows = [
+                self._build_ml_player_data(candidate, player_data, context)
+                for candidate in candidates
+            ]
+            
+            if hasattr(self.ml_agent, 'predict_wolf_probabilities'):
+                probs = self.ml_agent.predict_wolf_probabilities(rows)
+            else:
+                probs = [self.ml_agent.predict_wolf_probability(row) for row in rows]
+            
+            return {candidate: float(prob) for candidate, prob in zip(candidates, probs)}
+            
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"ML特征提取失败: {e}")
+        except Exception as e:
+            logger.error(f"ML评分失败: {e}", exc_info=True)
         
-        return scores
+        # 默认中性概率
+        return {candidate: 0.5 for candidate in candidates}
     
-    def _extract_ml_features(
+    def _build_ml_player_data(
         self,
         player: str,
         player_data: Dict,
         context: Dict
-    ) -> np.ndarray:
-        """提取ML特征"""
-        try:
-            from ml_enhanced.feature_extractor import StandardFeatureExtractor
-            
-            data = player_data.get(player, {})
-            # 使用正确的方法名：extract_features（直接返回numpy数组）
-            features = StandardFeatureExtractor.extract_features(data)
-            return features
-        except ImportError as e:
-            logger.error(f"无法导入StandardFeatureExtractor: {e}")
-            # 返回默认特征向量
-            return np.zeros(19)  # 假设19个特征
-        except Exception as e:
-            logger.error(f"特征提取失败: {e}")
-            import traceback
-            traceback.print_exc()
-            return np.zeros(19)
+    ) -> Dict[str, Any]:
+        """
+        构建ML模型输入（玩家特征字典）
+        
+        在玩家原始数据基础上补齐上下文中的信任分数、投票目标等字段，
+        并把决策树使用的字段名映射为ML特征名
+        """
+        data = player_data.get(player, {})
+        row = dict(data) if isinstance(data, dict) else {}
+        
+        trust_scores = context.get('trust_scores', {})
+        if player in trust_scores:
+            row.setdefault('trust_score', trust_scores[player])
+        
+        vote_targets = context.get('voting_history', {}).get(player)
+        if isinstance(vote_targets, list):
+            row.setdefault('vote_targets', vote_targets)
+        
+        if 'contradictions' in row:
+            row.setdefault('contradiction_count', row['contradictions'])
+        if 'false_quotes' in row:
+            row.setdefault('false_quotation_count', row['false_quotes'])
+        if 'mentioned_by_others' in row:
+            row.setdefault('mentioned_by_others_count', row['mentioned_by_others'])
+        
+        return row
     
     def _dynamic_fusion(
         self,
@@ -647,7 +685,7 @@ class BayesianInferenceEngine:
         evidence_list = self._convert_evidence(evidence)
         
         if not evidence_list:
-            logger.info(f"No evidence for {player}, returning prior probability")
+            logger.debug("No evidence for %s, returning prior probability", player)
             return prior_prob
         
         # 使用新引擎计算后验概率
@@ -855,6 +893,8 @@ class SkillDecisionEngine:
     def __init__(self, ml_agent=None):
         self.ml_agent = ml_agent
         self.bayesian_engine = BayesianInferenceEngine()
+        # 复用同一个增强决策引擎（毒药/开枪/守护共用批量ML预测）
+        self.enhanced_engine = EnhancedDecisionEngine(ml_agent)
         logger.info("✓ SkillDecisionEngine initialized")
     
     def decide_seer_check(
@@ -997,8 +1037,7 @@ class SkillDecisionEngine:
             return None, "无可毒玩家"
         
         # 使用增强决策引擎
-        engine = EnhancedDecisionEngine(self.ml_agent)
-        target, confidence, scores = engine.decide_vote(
+        target, confidence, scores = self.enhanced_engine.decide_vote(
             candidates, context, game_phase="midgame"
         )
         
@@ -1025,6 +1064,7 @@ class SkillDecisionEngine:
         scores = {}
         trust_scores = context.get('trust_scores', {})
         player_data = context.get('player_data', {})
+        ml_probs = self.enhanced_engine.predict_wolf_probabilities(candidates, context)
         
         for candidate in candidates:
             score = 0.0
@@ -1048,6 +1088,10 @@ class SkillDecisionEngine:
             if mentioned > 0:
                 score += 30
             
+            # 4. ML狼人概率（不守护疑似狼人）
+            if candidate in ml_probs:
+                score -= (ml_probs[candidate] - 0.5) * 40
+            
             scores[candidate] = score
         
         target = max(scores, key=scores.get)
@@ -1070,8 +1114,7 @@ class SkillDecisionEngine:
             return None, "无可开枪目标"
         
         # 使用增强决策引擎
-        engine = EnhancedDecisionEngine(self.ml_agent)
-        target, confidence, scores = engine.decide_vote(
+        target, confidence, scores = self.enhanced_engine.decide_vote(
             candidates, context, game_phase="endgame"  # 开枪通常在残局
         )
         
@@ -0,0 +1,505 @@
+"""
+按局隔离的角色智能体会话
+
+WerewolfAgent 每个角色只有一个实例，每局状态保存在该实例的memory中：
+同一容器并发多局时，同角色的请求会互相覆盖状态。本模块按会话键
+（请求头 X-Game-Id，由网关/压测客户端提供，一个值对应一个座位的一局）
+为每局分配独立的角色智能体：
+
+- RoleAgentPool: 每个角色一个池，保存已初始化的空闲实例；LLM客户端、ML模型
+  等重量级组件通过 shared_resources 在进程内共享，实例只承载每局可变状态
+- 归还时只清空memory与每局属性，开销与本局状态大小成正比，不重新构建组件
+- SessionManager: 会话键 -> 会话；perceive(STATUS_RESULT)后关闭会话，
+  后台回收线程归还空闲超时的会话（对局中断、平台不再发送结果）
+- 关闭的会话立即从表中移除（下一局的请求拿到新实例），实例等该会话最后一个
+  进行中的请求结束后才归还：RESULT与仍在执行的interact/perceive重叠时，
+  后者不会在被重置、甚至已分给另一局的实例上继续运行
+- 每局状态在阶段边界写入检查点，进程重启或会话被回收后同一局的请求从检查点恢复（见checkpoints）
+
+平台协议不携带游戏ID：没有请求头时会话键为空串，每个角色退化为
+单一会话（与原先每角色一个实例的行为一致）。
+
+环境变量:
+    GAME_SESSIONS: 是否启用会话池（默认true）
+    GAME_SESSION_HEADER: 会话键请求头（默认X-Game-Id）
+    GAME_SESSION_IDLE_TIMEOUT: 会话空闲超时秒数（默认1800）
+    GAME_SESSION_MAX: 最大并发会话数（默认256，超出时归还最久未用的空闲会话）
+    GAME_SESSION_POOL_IDLE: 每个角色池保留的空闲实例数（默认4）
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from werewolf.common import game_scope, metrics
+from werewolf.common.request_context import STATUS_RESULT
+from werewolf.core.checkpoints import checkpointed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADER = 'X-Game-Id'
+
+_session_key: contextvars.ContextVar = contextvars.ContextVar('werewolf_session_key', default='')
+
+
+def current_session_key() -> str:
+    """当前请求的会话键（无请求头时为空串）"""
+    return _session_key.get()
+
+
+@contextmanager
+def session_key_scope(key: str) -> Iterator[None]:
+    """在当前上下文中绑定会话键（供脚本与非HTTP调用方使用）"""
+    token = _session_key.set(key or '')
+    try:
+        yield
+    finally:
+        _session_key.reset(token)
+
+
+class SessionKeyMiddleware:
+    """
+    ASGI中间件：从请求头读取会话键并绑定到contextvar
+
+    同步端点在线程池中执行，starlette会复制当前上下文，因此处理函数内可读到会话键
+
+    Args:
+        app: 下游ASGI应用
+        header: 请求头名称
+    """
+
+    def __init__(self, app, header: str = DEFAULT_HEADER):
+        self.app = app
+        self.header = header.lower().encode('latin-1')
+
+    async def __call__(self, scope, receive, send):
+        if scope.get('type') != 'http':
+            await self.app(scope, receive, send)
+            return
+        key = ''
+        for name, value in scope.get('headers') or ():
+            if name == self.header:
+                key = value.decode('latin-1').strip()
+                break
+        token = _session_key.set(key)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _session_key.reset(token)
+
+
+def reset_agent_state(agent: Any) -> None:
+    """
+    清空角色智能体的每局状态（对局作用域、memory与请求上下文的游戏ID）
+
+    没有收到STATUS_RESULT就被归还的会话，在这里关闭其对局作用域（见game_scope）；
+    智能体可定义 reset_session() 清理未登记到作用域的每局属性
+
+    Args:
+        agent: 角色智能体
+    """
+    game_scope.close_agent(agent)
+    memory = getattr(agent, 'memory', None)
+    if memory is not None:
+        memory.clear()
+    agent.__dict__.pop('_game_id', None)
+    hook = getattr(agent, 'reset_session', None)
+    if callable(hook):
+        hook()
+
+
+class RoleAgentPool:
+    """
+    单个角色的实例池（线程安全）
+
+    Args:
+        role: 角色名
+        factory: 无参工厂，构建一个新的角色智能体
+        max_idle: 保留的空闲实例数上限
+    """
+
+    def __init__(self, role: str, factory: Callable[[], Any], max_idle: int = 4):
+        self.role = role
+        self._factory = factory
+        self.max_idle = max(0, max_idle)
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+        self.built = 0
+        self.reused = 0
+        self.dropped = 0
+
+    def _build(self) -> Any:
+        started = time.perf_counter()
+        agent = self._factory()
+        elapsed = time.perf_counter() - started
+        metrics.observe_operation('role_agent.build', elapsed, role=self.role)
+        with self._lock:
+            self.built += 1
+        logger.info(f"[SESSION] Built {self.role} agent in {elapsed:.2f}s")
+        return agent
+
+    def checkout(self) -> Any:
+        """取出一个空闲实例（没有空闲实例时构建新实例）"""
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+        return self._build()
+
+    def checkin(self, agent: Any) -> None:
+        """清空每局状态后放回池中（池满时丢弃）"""
+        try:
+            reset_agent_state(agent)
+        except Exception as e:
+            logger.warning(f"[SESSION] Failed to reset {self.role} agent, dropping it: {e}")
+            with self._lock:
+                self.dropped += 1
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(agent)
+            else:
+                self.dropped += 1
+
+    def warm(self, count: int = 1) -> None:
+        """预先构建实例，使空闲实例数至少为count"""
+        while True:
+            with self._lock:
+                if len(self._idle) >= min(count, self.max_idle or count):
+                    return
+            agent = self._build()
+            with self._lock:
+                self._idle.append(agent)
+
+    @property
+    def idle(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+
+@dataclass
+class GameSession:
+    """一个座位一局游戏的会话"""
+    key: str
+    role: str
+    agent: Any
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    requests: int = 0
+    in_flight: int = 0
+    # 已关闭（从会话表移除），等进行中的请求结束后归还实例
+    closing: bool = False
+
+
+class SessionManager:
+    """
+    会话管理器：(会话键, 角色) -> 会话
+
+    Args:
+        pools: 角色 -> 实例池
+        idle_timeout: 空闲超时秒数（超时的会话由reap()归还）
+        max_sessions: 最大并发会话数
+    """
+
+    def __init__(self, pools: Dict[str, RoleAgentPool], idle_timeout: float = 1800.0, max_sessions: int = 256):
+        self.pools = pools
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: Dict[Tuple[str, str], GameSession] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reaped = 0
+        self.evicted = 0
+
+    @contextmanager
+    def use(self, key: str, role: str) -> Iterator[GameSession]:
+        """
+        在一次请求期间使用会话（不存在时从池中取出实例创建）
+
+        Args:
+            key: 会话键
+            role: 角色名
+
+        Yields:
+            会话
+        """
+        session = self.acquire(key, role)
+        try:
+            yield session
+        finally:
+            self.done(session)
+
+    def acquire(self, key: str, role: str, create: bool = True) -> Optional[GameSession]:
+        """
+        开始一次请求（与done()成对调用；use()的拆分形式，供异步入口使用）
+
+        Args:
+            key: 会话键
+            role: 角色名
+            create: 会话不存在时是否从池中取出实例创建（可能构建智能体，耗时）
+
+        Returns:
+            会话（create=False且会话不存在时为None）
+        """
+        if role not in self.pools:
+            raise ValueError(f"Role agent for {role} not registered.")
+        with self._lock:
+            session = self._sessions.get((key, role))
+            if session is not None:
+                session.in_flight += 1
+                return session
+        return self._open(key, role) if create else None
+
+    def done(self, session: GameSession) -> None:
+        """结束一次请求（已关闭会话的最后一个请求结束时归还实例）"""
+        with self._lock:
+            session.in_flight -= 1
+            session.requests += 1
+            session.last_used = time.time()
+            check_in = session.closing and session.in_flight == 0
+        if check_in:
+            self._check_in(session)
+
+    def _open(self, key: str, role: str) -> GameSession:
+        agent = self.pools[role].checkout()
+        evicted: List[GameSession] = []
+        with self._lock:
+            session = self._sessions.get((key, role))
+            if session is not None:
+                # 并发首请求：保留先创建的会话
+                session.in_flight += 1
+                self.pools[role].checkin(agent)
+                return session
+            session = GameSession(key=key, role=role, agent=agent, in_flight=1)
+            self._sessions[(key, role)] = session
+            if len(self._sessions) > self.max_sessions:
+                idle = sorted((s for s in self._sessions.values() if s.in_flight == 0),
+                              key=lambda s: s.last_used)
+                for old in idle[:len(self._sessions) - self.max_sessions]:
+                    del self._sessions[(old.key, old.role)]
+                    evicted.append(old)
+                self.evicted += len(evicted)
+            active = len(self._sessions)
+        for old in evicted:
+            logger.warning(f"[SESSION] Evicted idle session {old.key or '<default>'}/{old.role} "
+                           f"(max sessions {self.max_sessions})")
+            self.pools[old.role].checkin(old.agent)
+        self._publish(active)
+        return session
+
+    def release(self, key: str, role: str) -> bool:
+        """
+        关闭会话：从会话表移除，没有进行中的请求时立即归还实例，
+        否则由最后一个请求的done()归还
+
+        Args:
+            key: 会话键
+            role: 角色名
+
+        Returns:
+            会话是否存在
+        """
+        with self._lock:
+            session = self._sessions.pop((key, role), None)
+            active = len(self._sessions)
+            if session is not None:
+                session.closing = True
+                check_in = session.in_flight == 0
+        if session is None:
+            return False
+        self._publish(active)
+        if check_in:
+            self._check_in(session)
+        else:
+            logger.debug(f"[SESSION] Closing {key or '<default>'}/{role}, "
+                         f"waiting for {session.in_flight} in-flight request(s)")
+        return True
+
+    def _check_in(self, session: GameSession) -> None:
+        self.pools[session.role].checkin(session.agent)
+        logger.debug(f"[SESSION] Released {session.key or '<default>'}/{session.role} "
+                     f"after {session.requests} requests")
+
+    def reap(self, now: Optional[float] = None) -> int:
+        """
+        归还空闲超时的会话
+
+        Args:
+            now: 当前时间（默认time.time()）
+
+        Returns:
+            归还的会话数
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [s for s in self._sessions.values()
+                       if s.in_flight == 0 and now - s.last_used > self.idle_timeout]
+            for session in expired:
+                del self._sessions[(session.key, session.role)]
+            self.reaped += len(expired)
+            active = len(self._sessions)
+        for session in expired:
+            logger.info(f"[SESSION] Reaped idle session {session.key or '<default>'}/{session.role} "
+                        f"(idle {now - session.last_used:.0f}s)")
+            self.pools[session.role].checkin(session.agent)
+        if expired:
+            metrics.get_registry().counter(
+                'werewolf_game_sessions_reaped', "Game sessions returned by the idle reaper",
+            ).inc(len(expired))
+            self._publish(active)
+        return len(expired)
+
+    def start_reaper(self, interval: float = 60.0) -> threading.Thread:
+        """启动后台回收线程"""
+        if self._reaper is not None and self._reaper.is_alive():
+            return self._reaper
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.reap()
+                except Exception as e:
+                    logger.error(f"[SESSION] Reaper failed: {e}")
+
+        self._reaper = threading.Thread(target=loop, name='session-reaper', daemon=True)
+        self._reaper.start()
+        return self._reaper
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _publish(self, active: int) -> None:
+        metrics.get_registry().gauge(
+            'werewolf_game_sessions_active', "Game sessions currently holding a role agent",
+        ).set(active)
+
+    def stats(self) -> Dict[str, Any]:
+        """会话与池的统计"""
+        with self._lock:
+            active = len(self._sessions)
+        return {
+            'active': active,
+            'reaped': self.reaped,
+            'evicted': self.evicted,
+            'pools': {
+                role: {'idle': pool.idle, 'built': pool.built, 'reused': pool.reused, 'dropped': pool.dropped}
+                for role, pool in self.pools.items()
+            },
+        }
+
+
+class SessionRoleAgent:
+    """
+    注册到WerewolfAgent的角色入口：按会话键把请求转发给该局的实例，
+    perceive(STATUS_RESULT)处理完毕后归还实例
+
+    Args:
+        role: 角色名
+        manager: 会话管理器
+    """
+
+    def __init__(self, role: str, manager: SessionManager):
+        self.role = role
+        self.manager = manager
+
+    def warm(self) -> None:
+        self.manager.pools[self.role].warm(1)
+
+    def perceive(self, req):
+        key = current_session_key()
+        try:
+            with self.manager.use(key, self.role) as session:
+                with checkpointed(key, self.role, session.agent, req, 'perceive', fresh=session.requests == 0):
+                    return session.agent.perceive(req)
+        finally:
+            if getattr(req, 'status', None) == STATUS_RESULT:
+                self.manager.release(key, self.role)
+
+    def interact(self, req):
+        key = current_session_key()
+        with self.manager.use(key, self.role) as session:
+            with checkpointed(key, self.role, session.agent, req, 'interact', fresh=session.requests == 0):
+                return session.agent.interact(req)
+
+    async def _session_async(self, key: str) -> GameSession:
+        # 已有会话直接取用；需要从池中取出（可能构建实例）时在线程池中执行
+        session = self.manager.acquire(key, self.role, create=False)
+        return session if session is not None else await asyncio.to_thread(self.manager.acquire, key, self.role)
+
+    async def perceive_async(self, req):
+        from werewolf.core.async_agent import call_async
+        key = current_session_key()
+        try:
+            session = await self._session_async(key)
+            try:
+                with checkpointed(key, self.role, session.agent, req, 'perceive', fresh=session.requests == 0):
+                    return await call_async(session.agent, 'perceive', req)
+            finally:
+                self.manager.done(session)
+        finally:
+            if getattr(req, 'status', None) == STATUS_RESULT:
+                self.manager.release(key, self.role)
+
+    async def interact_async(self, req):
+        from werewolf.core.async_agent import call_async
+        key = current_session_key()
+        session = await self._session_async(key)
+        try:
+            with checkpointed(key, self.role, session.agent, req, 'interact', fresh=session.requests == 0):
+                return await call_async(session.agent, 'interact', req)
+        finally:
+            self.manager.done(session)
+
+
+_manager: Optional[SessionManager] = None
+
+
+def get_session_manager() -> Optional[SessionManager]:
+    """当前进程的会话管理器（未启用会话池时为None）"""
+    return _manager
+
+
+def register_session_agents(agent: Any, factories: Dict[str, Callable[[], Any]]) -> Dict[str, SessionRoleAgent]:
+    """
+    为每个角色创建实例池并向WerewolfAgent注册会话入口，启动空闲回收线程
+
+    Args:
+        agent: WerewolfAgent
+        factories: 角色 -> 无参工厂
+
+    Returns:
+        角色 -> 会话入口
+    """
+    global _manager
+    max_idle = int(os.getenv('GAME_SESSION_POOL_IDLE', '4'))
+    idle_timeout = float(os.getenv('GAME_SESSION_IDLE_TIMEOUT', '1800'))
+    pools = {role: RoleAgentPool(role, factory, max_idle) for role, factory in factories.items()}
+    _manager = SessionManager(pools, idle_timeout=idle_timeout,
+                              max_sessions=int(os.getenv('GAME_SESSION_MAX', '256')))
+    _manager.start_reaper(interval=max(1.0, min(60.0, idle_timeout / 4)))
+    entries = {}
+    for role in factories:
+        entries[role] = SessionRoleAgent(role, _manager)
+        agent.register_role_agent(role, entries[role])
+    logger.info(f"[SESSION] Game sessions enabled for {len(entries)} roles "
+                f"(idle timeout {idle_timeout:.0f}s, pool idle {max_idle})")
+    return entries
+
+
+def install_session_middleware(app: Any, header: Optional[str] = None) -> None:
+    """
+    给SDK的FastAPI应用安装会话键中间件
+
+    Args:
+        app: FastAPI应用（EndpointServer.app）
+        header: 请求头名称（默认读GAME_SESSION_HEADER）
+    """
+    app.add_middleware(SessionKeyMiddleware, header=header or os.getenv('GAME_SESSION_HEADER', DEFAULT_HEADER))
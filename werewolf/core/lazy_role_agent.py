@@ -0,0 +1,232 @@
+"""
+角色智能体懒加载
+
+服务启动时只注册代理，不导入角色模块（连带导入ML模块、sklearn等）也不构建智能体；
+某个角色第一次收到请求时才导入并构建，之后所有请求直接转发给该实例。
+一局游戏每个座位只会用到一种角色，容器可以更早通过平台健康检查，
+空闲时的内存也只包含实际用到的角色。
+
+可选后台预热：服务启动后在后台线程中按顺序构建指定角色，
+使首个请求不必承担构建耗时。
+
+环境变量:
+    ROLE_AGENT_LAZY: 是否懒加载（默认true；false=启动时构建全部角色）
+    ROLE_AGENT_PREWARM: 后台预热的角色（逗号分隔，all=全部，默认不预热）
+    ROLE_AGENT_PREWARM_DELAY: 预热开始前的等待秒数（默认2，先让服务完成启动）
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import importlib
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from werewolf.common import metrics
+from werewolf.core.checkpoints import checkpointed
+from werewolf.core.game_sessions import current_session_key
+
+logger = logging.getLogger(__name__)
+
+
+def role_factory(path: str, **kwargs) -> Callable[[], Any]:
+    """
+    按“模块:类名”生成角色智能体工厂（调用时才导入模块）
+
+    Args:
+        path: 例如 'werewolf.seer.seer_agent:SeerAgent'
+        **kwargs: 构造参数
+
+    Returns:
+        无参工厂
+    """
+    module_name, _, class_name = path.partition(':')
+
+    def factory():
+        agent_class = getattr(importlib.import_module(module_name), class_name)
+        return agent_class(**kwargs)
+    return factory
+
+
+class LazyRoleAgent:
+    """
+    角色智能体代理（首次使用时构建，线程安全）
+
+    Args:
+        role: 角色名
+        factory: 无参工厂，返回构建好的角色智能体
+    """
+
+    def __init__(self, role: str, factory: Callable[[], Any]):
+        self.role = role
+        self._factory = factory
+        self._agent: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_path(cls, role: str, path: str, **kwargs) -> 'LazyRoleAgent':
+        """
+        按“模块:类名”创建代理，导入推迟到首次构建
+
+        Args:
+            role: 角色名
+            path: 例如 'werewolf.seer.seer_agent:SeerAgent'
+            **kwargs: 构造参数
+
+        Returns:
+            代理
+        """
+        return cls(role, role_factory(path, **kwargs))
+
+    @property
+    def built(self) -> bool:
+        return self._agent is not None
+
+    def get(self) -> Any:
+        """获取角色智能体（未构建时构建；构建失败抛出异常，下次请求重试）"""
+        agent = self._agent
+        if agent is not None:
+            return agent
+        with self._lock:
+            if self._agent is None:
+                started = time.perf_counter()
+                self._agent = self._factory()
+                elapsed = time.perf_counter() - started
+                metrics.observe_operation('role_agent.build', elapsed, role=self.role)
+                logger.info(f"[LAZY ROLE] Built {self.role} agent in {elapsed:.2f}s")
+            return self._agent
+
+    def warm(self) -> None:
+        self.get()
+
+    def perceive(self, req):
+        agent = self.get()
+        with checkpointed(current_session_key(), self.role, agent, req, 'perceive'):
+            return agent.perceive(req)
+
+    def interact(self, req):
+        agent = self.get()
+        with checkpointed(current_session_key(), self.role, agent, req, 'interact'):
+            return agent.interact(req)
+
+    async def _agent_async(self) -> Any:
+        # 未构建时在线程池中构建，不阻塞事件循环
+        return self._agent if self._agent is not None else await asyncio.to_thread(self.get)
+
+    async def perceive_async(self, req):
+        from werewolf.core.async_agent import call_async
+        agent = await self._agent_async()
+        with checkpointed(current_session_key(), self.role, agent, req, 'perceive'):
+            return await call_async(agent, 'perceive', req)
+
+    async def interact_async(self, req):
+        from werewolf.core.async_agent import call_async
+        agent = await self._agent_async()
+        with checkpointed(current_session_key(), self.role, agent, req, 'interact'):
+            return await call_async(agent, 'interact', req)
+
+    def __getattr__(self, name: str) -> Any:
+        # 只有实例上不存在的属性才会走到这里，转发给真实智能体
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+
+def parse_prewarm(value: str, roles: Iterable[str]) -> List[str]:
+    """
+    解析预热配置
+
+    Args:
+        value: 'all' 或逗号分隔的角色名
+        roles: 已注册的角色
+
+    Returns:
+        需要预热的角色（保持注册顺序，忽略未知角色）
+    """
+    roles = list(roles)
+    value = (value or '').strip().lower()
+    if not value or value in ('none', 'false', '0'):
+        return []
+    if value in ('all', 'true', '1'):
+        return roles
+    wanted = {r.strip() for r in value.split(',') if r.strip()}
+    unknown = wanted - set(roles)
+    if unknown:
+        logger.warning(f"[LAZY ROLE] Unknown roles in ROLE_AGENT_PREWARM: {sorted(unknown)}")
+    return [r for r in roles if r in wanted]
+
+
+def start_prewarm(proxies: Dict[str, Any], roles: List[str], delay: float = 2.0) -> Optional[threading.Thread]:
+    """
+    后台按顺序构建指定角色
+
+    Args:
+        proxies: 角色 -> 代理（LazyRoleAgent或会话入口，提供warm()）
+        roles: 需要预热的角色
+        delay: 开始前等待秒数
+
+    Returns:
+        预热线程（无需预热时为None）
+    """
+    if not roles:
+        return None
+
+    def prewarm():
+        time.sleep(max(0.0, delay))
+        started = time.perf_counter()
+        for role in roles:
+            try:
+                proxies[role].warm()
+            except Exception as e:
+                logger.error(f"[LAZY ROLE] Prewarm of {role} failed: {e}")
+        logger.info(f"[LAZY ROLE] Prewarmed {len(roles)} roles in {time.perf_counter() - started:.2f}s")
+
+    thread = threading.Thread(target=prewarm, name='role-prewarm', daemon=True)
+    thread.start()
+    return thread
+
+
+def register_role_agents(agent: Any, specs: Dict[str, tuple], lazy: Optional[bool] = None,
+                         prewarm: Optional[str] = None, sessions: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    向WerewolfAgent注册角色入口
+
+    Args:
+        agent: WerewolfAgent
+        specs: 角色 -> ('模块:类名', 构造参数字典)
+        lazy: 是否懒加载（None=读ROLE_AGENT_LAZY）
+        prewarm: 预热配置（None=读ROLE_AGENT_PREWARM）
+        sessions: 是否按局分配实例（None=读GAME_SESSIONS，见game_sessions）
+
+    Returns:
+        角色 -> 入口（LazyRoleAgent或SessionRoleAgent）
+    """
+    if lazy is None:
+        lazy = os.getenv('ROLE_AGENT_LAZY', 'true').lower() == 'true'
+    if prewarm is None:
+        prewarm = os.getenv('ROLE_AGENT_PREWARM', '')
+    if sessions is None:
+        sessions = os.getenv('GAME_SESSIONS', 'true').lower() == 'true'
+
+    if sessions:
+        from werewolf.core.game_sessions import register_session_agents
+        proxies = register_session_agents(
+            agent, {role: role_factory(path, **kwargs) for role, (path, kwargs) in specs.items()}
+        )
+    else:
+        proxies = {}
+        for role, (path, kwargs) in specs.items():
+            proxies[role] = LazyRoleAgent.from_path(role, path, **kwargs)
+            agent.register_role_agent(role, proxies[role])
+
+    if not lazy:
+        for proxy in proxies.values():
+            proxy.warm()
+        logger.info(f"[LAZY ROLE] Built all {len(proxies)} role agents at startup")
+    else:
+        roles = parse_prewarm(prewarm, proxies)
+        start_prewarm(proxies, roles, float(os.getenv('ROLE_AGENT_PREWARM_DELAY', '2')))
+        logger.info(f"[LAZY ROLE] Registered {len(proxies)} lazy role agents"
+                    f"{f', prewarming {roles}' if roles else ''}")
+    return proxies
@@ -0,0 +1,41 @@
+"""
+进程级共享资源
+
+角色智能体实例（包括会话池中的多个同角色实例）各自持有每局可变状态（memory），
+但LLM客户端、ML模型这类构建成本高、跨局只读（或自带同步）的组件在进程内只需一份。
+构建智能体时通过 shared() 按键取用，首次取用时构建。
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+_components: Dict[Hashable, Any] = {}
+_lock = threading.Lock()
+
+
+def shared(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """
+    获取共享组件（不存在时调用factory构建；构建失败时不缓存，异常向上抛出）
+
+    Args:
+        key: 组件键（应包含影响构建结果的全部参数，如模型目录、API地址）
+        factory: 无参构建函数
+
+    Returns:
+        共享组件
+    """
+    component = _components.get(key)
+    if component is not None:
+        return component
+    with _lock:
+        component = _components.get(key)
+        if component is None:
+            component = factory()
+            _components[key] = component
+        return component
+
+
+def clear() -> None:
+    """清空共享组件（测试或重新加载模型时使用）"""
+    with _lock:
+        _components.clear()
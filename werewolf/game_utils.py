@@ -6,6 +6,8 @@ import time
 import logging
 from collections import deque
 from typing import Set, Optional
+from werewolf.common import game_scope
+from werewolf.common.request_context import get_request_context
 from werewolf.optimization.utils.safe_math import safe_divide
 
 logger = logging.getLogger(__name__)
@@ -19,6 +21,9 @@ class GameEndTrigger:
     - deque: 保持时间顺序,自动限制大小
     - set: 提供O(1)查找性能
     
+    已触发的游戏ID在对局作用域关闭时移除（见game_scope）；作用域已关闭的对局
+    （重复的STATUS_RESULT）不再触发。
+    
     优化说明:
     - 时间复杂度: O(1) 插入和查找
     - 空间复杂度: O(n) 其中n=100
@@ -49,6 +54,11 @@ class GameEndTrigger:
             bool: 是否成功触发
         """
         try:
+            ctx = get_request_context()
+            if ctx is not None and game_scope.is_closed(ctx.game_id):
+                logger.debug(f"[{role_name}] Game {ctx.game_id} already closed, skipping")
+                return False
+            
             from game_end_handler import get_game_end_handler
             handler = get_game_end_handler()
             
@@ -72,8 +82,9 @@ class GameEndTrigger:
                 logger.debug(f"[{role_name}] Game {game_id} already triggered, skipping")
                 return False
             
-            # 添加到队列和集合
+            # 添加到队列和集合（本局结束时移除）
             cls._add_game(game_id)
+            game_scope.on_close('game_end_trigger', lambda: cls._remove_game(game_id))
             
             # 触发游戏结束处理
             handler.on_game_end(req.message)
@@ -124,6 +135,15 @@ class GameEndTrigger:
             cls._cleanup_set()
             cls._last_cleanup_time = current_time
     
+    @classmethod
+    def _remove_game(cls, game_id: str) -> None:
+        """对局结束：从追踪系统移除游戏ID"""
+        try:
+            cls._triggered_games_queue.remove(game_id)
+        except ValueError:
+            pass
+        cls._triggered_games_set.discard(game_id)
+    
     @classmethod
     def _cleanup_set(cls) -> None:
         """
@@ -167,7 +187,7 @@ class GameStartHandler:
     """
     统一的游戏开始处理器
     
-    使用与GameEndTrigger相同的双数据结构策略
+    使用与GameEndTrigger相同的双数据结构策略（游戏ID在对局作用域关闭时移除）
     """
     
     _started_games_queue: deque = deque(maxlen=100)
@@ -208,8 +228,9 @@ class GameStartHandler:
                 logger.debug(f"[{role_name}] Game {game_id} already started, skipping")
                 return False
             
-            # 添加到追踪系统
+            # 添加到追踪系统（本局结束时移除）
             cls._add_game(game_id)
+            game_scope.on_close('game_start_handler', lambda: cls._remove_game(game_id))
             
             # 设置game_id到内存
             memory.set_variable("game_id", game_id)
@@ -252,6 +273,15 @@ class GameStartHandler:
             cls._cleanup_set()
             cls._last_cleanup_time = current_time
     
+    @classmethod
+    def _remove_game(cls, game_id: str) -> None:
+        """对局结束：从追踪系统移除游戏ID"""
+        try:
+            cls._started_games_queue.remove(game_id)
+        except ValueError:
+            pass
+        cls._started_games_set.discard(game_id)
+    
     @classmethod
     def _cleanup_set(cls) -> None:
         """清理set,确保与deque同步"""
@@ -7,6 +7,7 @@ Guard 分析器模块
 - GuardPriorityCalculator: 守卫优先级计算器
 """
 
+from werewolf.common import decision_recorder, game_scope
 from werewolf.core.base_components import BaseAnalyzer
 from werewolf.guard.config import GuardConfig
 from typing import Dict, Any, Optional, List
@@ -38,6 +39,13 @@ class RoleEstimator(BaseAnalyzer):
             self.confirmed_seers = set()
             self.likely_seers = set()
             self.sheriff = None
+        game_scope.register('guard.role_estimator', self, release=self.reset)
+    
+    def reset(self) -> None:
+        """对局结束：清空本局的身份推断"""
+        self.confirmed_seers.clear()
+        self.likely_seers.clear()
+        self.sheriff = None
     
     def _do_analyze(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -268,6 +276,7 @@ class GuardPriorityCalculator(BaseAnalyzer):
         
         return {'priorities': priorities}
     
+    @decision_recorder.recorded("guard.priority")
     def calculate(self, player: str, context: Dict[str, Any]) -> float:
         """
         计算单个玩家的守护优先级（优化版 - 动态权重 + 存活人数考虑）
@@ -27,6 +27,7 @@ class GuardConfig(BaseGoodConfig):
     GUARD_PRIORITY_HIGH_TRUST: int = 55
     GUARD_PRIORITY_HUNTER_MAX: int = 30
     GUARD_PRIORITY_WOLF_TARGET_BONUS: int = 25
+    GUARD_PRIORITY_ML_WOLF_PENALTY: int = 20  # ML判定为狼人时的守护优先级惩罚（±）
     
     # ==================== 狼人击杀预测 ====================
     KILL_PROB_CONFIRMED_SEER: float = 0.80
@@ -137,6 +137,8 @@ class GuardDecisionMaker:
             raise ValueError("[GuardDecision] Wolf kill predictor is required but not set")
         
         # 5. 企业级决策逻辑
+        ml_wolf_probs = context.get('ml_wolf_probs') or {}
+        
         try:
             choices_with_priority = []
             
@@ -162,6 +164,11 @@ class GuardDecisionMaker:
                     # 调整优先级（被击杀概率越高，优先级越高）
                     adjusted_priority = priority + (wolf_target_prob * self.config.GUARD_PRIORITY_WOLF_TARGET_BONUS)
                     
+                    # ML批量预测：越像狼人越不值得守护
+                    ml_prob = ml_wolf_probs.get(candidate)
+                    if ml_prob is not None:
+                        adjusted_priority -= (ml_prob - 0.5) * 2 * self.config.GUARD_PRIORITY_ML_WOLF_PENALTY
+                    
                     choices_with_priority.append((candidate, adjusted_priority, wolf_target_prob, priority))
                     
                     logger.debug(f"[GuardDecision] {candidate}: base_priority={priority:.1f}, "
@@ -23,6 +23,7 @@ from agent_build_sdk.model.werewolf_model import (
 from agent_build_sdk.utils.logger import logger
 from agent_build_sdk.sdk.agent import format_prompt
 from werewolf.core.base_good_agent import BaseGoodAgent
+from werewolf.common import tracing
 from werewolf.guard.prompt import (
     DESC_PROMPT, 
     LAST_WORDS_PROMPT,
@@ -183,6 +184,7 @@ class GuardAgent(BaseGoodAgent):
     
     # ==================== 守卫特有方法 ====================
     
+    @tracing.trace_handler("perceive")
     def perceive(self, req: AgentReq):
         """
         处理游戏事件（完全兼容平民模板 + 守卫特有处理）
@@ -698,6 +700,7 @@ class GuardAgent(BaseGoodAgent):
                 'role_checker': self.role_estimator if hasattr(self, 'role_estimator') else None,
                 'wolf_predictor': self.wolf_kill_predictor if hasattr(self, 'wolf_kill_predictor') else None,
             }
+            context['ml_wolf_probs'] = self._predict_ml_wolf_probs(candidates)
             
             target, reason, confidence = self.guard_decision_maker.decide(
                 candidates, 
@@ -878,6 +881,7 @@ You should review this recommendation and confirm or adjust based on game contex
     
     # ==================== 交互方法（使用父类方法）====================
     
+    @tracing.trace_handler("interact")
     def interact(self, req: AgentReq) -> AgentResp:
         """
         处理交互请求（完全兼容模板代理人）
@@ -10,6 +10,7 @@
 """
 from typing import Dict, List
 from agent_build_sdk.utils.logger import logger
+from werewolf.common import metrics
 
 # 定义自定义异常
 class InvalidPlayerError(Exception):
@@ -22,16 +23,12 @@ class GuardMemoryError(Exception):
 
 
 def monitor_performance(name=None):
-    """性能监控装饰器（简化版本）"""
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            return func(*args, **kwargs)
-        return wrapper
+    """性能监控装饰器（记录到统一指标模块，role=guard）"""
     if callable(name):
         # 如果直接使用@monitor_performance而不带参数
-        return decorator(name)
+        return metrics.timed(role='guard')(name)
     # 如果使用@monitor_performance("name")带参数
-    return decorator
+    return metrics.timed(name, role='guard')
 
 
 class TrustScoreConfig:
@@ -191,9 +188,9 @@ class TrustScoreManager:
         self._set_trust_scores(trust_scores)
         self._set_trust_history(trust_history)
         
-        logger.info(f"[TrustManager] {player}: {current_score:.1f} -> {new_score:.1f} "
-                   f"(delta={delta:+.1f}, impact={evidence_impact:+.1f}, "
-                   f"conf={confidence:.2f}, src={source_reliability:.2f}) - {reason} [Sigmoid衰减]")
+        logger.debug("[TrustManager] %s: %.1f -> %.1f (delta=%+.1f, impact=%+.1f, conf=%.2f, src=%.2f) - %s [Sigmoid衰减]",
+                     player, current_score, new_score, delta, evidence_impact,
+                     confidence, source_reliability, reason)
     
     def get_score(self, player: str) -> float:
         """
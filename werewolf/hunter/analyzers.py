@@ -164,7 +164,7 @@ class ThreatLevelAnalyzer(BaseAnalyzer):
         cache_key = f"threat_{game_id}_{player_name}_{current_day}_{alive_count}"
         
         if self.cache_manager:
-            cached = self.cache_manager.get(cache_key)
+            cached = self.cache_manager.get(cache_key, namespace='decisions')
             if cached is not None:
                 return cached
         
@@ -185,7 +185,7 @@ class ThreatLevelAnalyzer(BaseAnalyzer):
         # 缓存结果（带安全检查）
         if self.cache_manager:
             try:
-                self.cache_manager.set(cache_key, threat_level, ttl=60)
+                self.cache_manager.set(cache_key, threat_level, ttl=60, namespace='decisions')
             except Exception as e:
                 logger.debug(f"Failed to cache threat level: {e}")
         
@@ -51,7 +51,8 @@ class ShootDecisionMaker(BaseDecisionMaker):
         my_name: str, 
         game_phase: str = "mid",
         current_day: int = 1,
-        alive_count: int = 12
+        alive_count: int = 12,
+        ml_wolf_probs: Optional[Dict[str, float]] = None
     ) -> Tuple[str, str, Dict[str, float]]:
         """
         决定开枪目标
@@ -62,6 +63,7 @@ class ShootDecisionMaker(BaseDecisionMaker):
             game_phase: 游戏阶段
             current_day: 当前天数
             alive_count: 存活人数
+            ml_wolf_probs: ML批量预测的狼人概率（可选，按ML_FUSION_RATIO融合）
         
         Returns:
             (目标, 理由, 所有候选人分数)
@@ -100,6 +102,11 @@ class ShootDecisionMaker(BaseDecisionMaker):
             # 计算狼人概率
             wolf_prob = self.wolf_prob_calculator.calculate(candidate, game_phase)
             
+            # 融合ML批量预测结果
+            if ml_wolf_probs and candidate in ml_wolf_probs:
+                fusion_ratio = self.config.ML_FUSION_RATIO
+                wolf_prob = wolf_prob * (1 - fusion_ratio) + ml_wolf_probs[candidate] * fusion_ratio
+            
             # 计算威胁等级
             threat_level = self.threat_analyzer.analyze(candidate, current_day, alive_count)
             
@@ -23,6 +23,7 @@ from agent_build_sdk.model.werewolf_model import (
 from agent_build_sdk.utils.logger import logger
 from agent_build_sdk.sdk.agent import format_prompt
 from werewolf.core.base_good_agent import BaseGoodAgent
+from werewolf.common import tracing
 from werewolf.hunter.prompt import (
     DESC_PROMPT, 
     VOTE_PROMPT,
@@ -178,6 +179,7 @@ class HunterAgent(BaseGoodAgent):
     
     # ==================== 猎人特有方法 ====================
     
+    @tracing.trace_handler("perceive")
     def perceive(self, req: AgentReq) -> AgentResp:
         """
         处理游戏事件（重写父类方法以添加猎人特有处理）
@@ -380,7 +382,8 @@ class HunterAgent(BaseGoodAgent):
                 my_name,
                 game_phase,
                 current_day,
-                alive_count
+                alive_count,
+                ml_wolf_probs=self._predict_ml_wolf_probs(candidates)
             )
             
             logger.info(f"[SHOOT DECISION] Target: {target}, Reason: {reason}, Phase: {game_phase}")
@@ -448,6 +451,7 @@ class HunterAgent(BaseGoodAgent):
     
     # ==================== 交互方法（使用父类方法）====================
     
+    @tracing.trace_handler("interact")
     def interact(self, req: AgentReq) -> AgentResp:
         """
         处理交互请求（使用父类方法简化）
@@ -9,6 +9,7 @@ from typing import Dict, List, Tuple, Optional
 from collections import deque
 import numpy as np
 from agent_build_sdk.utils.logger import logger
+from werewolf.common import game_scope
 
 
 class DecisionOptimizer:
@@ -31,7 +32,10 @@ class DecisionOptimizer:
         self.history_size = history_size
         
         # 决策历史：(决策类型, 目标, 分数, 是否成功)
-        self.decision_history: deque = deque(maxlen=history_size)
+        # 目标是本局玩家，登记到对局作用域每局清空；成功率与阈值跨局保留
+        self.decision_history: deque = game_scope.register(
+            'hunter.decision_history', deque(maxlen=history_size)
+        )
         
         # 成功率统计
         self.success_rates: Dict[str, Dict[str, float]] = {
@@ -206,9 +210,17 @@ class AdaptiveLearner:
     从游戏历史中学习最优策略
     """
     
-    def __init__(self):
-        """初始化自适应学习器"""
-        self.game_outcomes: List[Dict] = []
+    def __init__(self, max_outcomes: int = 500):
+        """
+        初始化自适应学习器
+        
+        Args:
+            max_outcomes: 保留的最近对局记录数
+        """
+        # 对局记录与策略表现统计一样跨局保留（不登记到对局作用域，否则报告的总局数与策略统计对不上），
+        # 只保留最近max_outcomes局；总局数单独计数
+        self.game_outcomes: deque = deque(maxlen=max_outcomes)
+        self.total_games = 0
         self.strategy_performance: Dict[str, Dict] = {}
     
     def record_game_outcome(
@@ -227,6 +239,7 @@ class AdaptiveLearner:
             'result': game_result,
             'strategies': strategies_used
         })
+        self.total_games += 1
         
         # 更新策略性能
         for strategy_name, strategy_value in strategies_used.items():
@@ -268,7 +281,7 @@ class AdaptiveLearner:
             return "No learning data available"
         
         lines = ["=" * 60, "Adaptive Learning Report", "=" * 60]
-        lines.append(f"Total games: {len(self.game_outcomes)}")
+        lines.append(f"Total games: {self.total_games}")
         lines.append("")
         lines.append("Strategy Performance:")
         lines.append("-" * 60)
@@ -2,33 +2,34 @@
 """
 猎人代理人性能监控模块
 
-提供性能监控、分析和优化功能
+提供性能监控、分析和优化功能，数据统一记录到
+werewolf.common.metrics（role=hunter）
 """
 
 import time
 import functools
 from typing import Callable, Any, Dict
-from collections import defaultdict
-from agent_build_sdk.utils.logger import logger
+from werewolf.common import metrics
+
+
+ROLE = 'hunter'
 
 
 class PerformanceMonitor:
     """
     性能监控器
     
-    跟踪方法执行时间、调用次数、性能瓶颈
+    跟踪方法执行时间、调用次数、性能瓶颈（含p95分位数）
     """
     
     def __init__(self):
-        self.metrics: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
-            'count': 0,
-            'total_time': 0.0,
-            'min_time': float('inf'),
-            'max_time': 0.0,
-            'avg_time': 0.0
-        })
         self.enabled = True
     
+    @property
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """按方法名汇总的统计"""
+        return metrics.summarize_operations(role=ROLE)
+    
     def record(self, method_name: str, execution_time: float):
         """
         记录方法执行时间
@@ -39,13 +40,7 @@ class PerformanceMonitor:
         """
         if not self.enabled:
             return
-        
-        metrics = self.metrics[method_name]
-        metrics['count'] += 1
-        metrics['total_time'] += execution_time
-        metrics['min_time'] = min(metrics['min_time'], execution_time)
-        metrics['max_time'] = max(metrics['max_time'], execution_time)
-        metrics['avg_time'] = metrics['total_time'] / metrics['count']
+        metrics.observe_operation(method_name, execution_time, role=ROLE)
     
     def get_report(self) -> str:
         """
@@ -54,36 +49,40 @@ class PerformanceMonitor:
         Returns:
             格式化的性能报告
         """
-        if not self.metrics:
+        summary = self.metrics
+        if not summary:
             return "No performance data collected"
         
-        lines = ["=" * 80, "Performance Report", "=" * 80]
+        lines = ["=" * 90, "Performance Report", "=" * 90]
         
         # 按平均时间排序
         sorted_metrics = sorted(
-            self.metrics.items(),
-            key=lambda x: x[1]['avg_time'],
+            summary.items(),
+            key=lambda x: x[1]['avg'],
             reverse=True
         )
         
-        lines.append(f"{'Method':<40} {'Calls':>8} {'Avg(ms)':>10} {'Min(ms)':>10} {'Max(ms)':>10}")
-        lines.append("-" * 80)
+        lines.append(
+            f"{'Method':<40} {'Calls':>8} {'Avg(ms)':>10} {'P95(ms)':>10} {'Min(ms)':>10} {'Max(ms)':>10}"
+        )
+        lines.append("-" * 90)
         
-        for method_name, metrics in sorted_metrics:
+        for method_name, stats in sorted_metrics:
             lines.append(
                 f"{method_name:<40} "
-                f"{metrics['count']:>8} "
-                f"{metrics['avg_time']*1000:>10.2f} "
-                f"{metrics['min_time']*1000:>10.2f} "
-                f"{metrics['max_time']*1000:>10.2f}"
+                f"{int(stats['count']):>8} "
+                f"{stats['avg']*1000:>10.2f} "
+                f"{stats['p95']*1000:>10.2f} "
+                f"{stats['min']*1000:>10.2f} "
+                f"{stats['max']*1000:>10.2f}"
             )
         
-        lines.append("=" * 80)
+        lines.append("=" * 90)
         return "\n".join(lines)
     
     def reset(self):
         """重置所有统计数据"""
-        self.metrics.clear()
+        metrics.get_registry().reset(role=ROLE)
     
     def enable(self):
         """启用性能监控"""
@@ -102,7 +101,7 @@ def monitor_performance(method: Callable) -> Callable:
     """
     性能监控装饰器
     
-    自动记录方法执行时间
+    自动记录方法执行时间（超过阈值时由metrics模块输出慢操作告警）
     
     Args:
         method: 要监控的方法
@@ -110,23 +109,18 @@ def monitor_performance(method: Callable) -> Callable:
     Returns:
         包装后的方法
     """
+    method_name = f"{method.__module__}.{method.__qualname__}"
+    
     @functools.wraps(method)
     def wrapper(*args, **kwargs):
         start_time = time.perf_counter()
         try:
-            result = method(*args, **kwargs)
-            return result
+            return method(*args, **kwargs)
+        except Exception:
+            metrics.record_error(method_name, role=ROLE)
+            raise
         finally:
-            execution_time = time.perf_counter() - start_time
-            method_name = f"{method.__module__}.{method.__qualname__}"
-            _performance_monitor.record(method_name, execution_time)
-            
-            # 如果执行时间超过100ms，记录警告
-            if execution_time > 0.1:
-                logger.warning(
-                    f"[PERFORMANCE] {method_name} took {execution_time*1000:.2f}ms "
-                    f"(threshold: 100ms)"
-                )
+            _performance_monitor.record(method_name, time.perf_counter() - start_time)
     
     return wrapper
 
@@ -159,4 +153,3 @@ __all__ = [
     'enable_performance_monitoring',
     'disable_performance_monitoring'
 ]
-
@@ -352,19 +352,23 @@ class PerformanceValidator:
     
     @staticmethod
     def validate_memory_usage(
-        current_usage: int,
+        current_usage: Optional[int] = None,
         max_usage: int = 100 * 1024 * 1024  # 100MB
     ) -> Tuple[bool, Optional[str]]:
         """
         验证内存使用
         
         Args:
-            current_usage: 当前内存使用（字节）
+            current_usage: 当前内存使用（字节），None时读取进程RSS
             max_usage: 最大内存使用（字节）
             
         Returns:
             (是否在限制内, 警告信息)
         """
+        if current_usage is None:
+            from werewolf.common.memory_profiler import rss_bytes
+            current_usage = rss_bytes()
+        
         if current_usage > max_usage:
             warning = (
                 f"Memory warning: Current usage {current_usage / 1024 / 1024:.2f}MB "
@@ -373,6 +377,38 @@ class PerformanceValidator:
             return (False, warning)
         
         return (True, None)
+    
+    @staticmethod
+    def validate_memory_growth(
+        growth_per_game: Optional[float] = None,
+        max_growth: int = 64 * 1024  # 64KB/局
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        验证每局内存增长（泄漏检测）
+        
+        Args:
+            growth_per_game: 每局增长量（字节），None时读取全局内存剖析器
+                             （MEMORY_PROFILE未开启时视为通过）
+            max_growth: 每局允许的最大增长（字节）
+            
+        Returns:
+            (是否在限制内, 警告信息)
+        """
+        if growth_per_game is None:
+            from werewolf.common.memory_profiler import get_profiler
+            profiler = get_profiler()
+            if profiler is None:
+                return (True, None)
+            growth_per_game = profiler.growth_per_game()
+        
+        if growth_per_game > max_growth:
+            warning = (
+                f"Memory warning: Growing {growth_per_game / 1024:.1f}KB per game "
+                f"(limit: {max_growth / 1024:.1f}KB per game)"
+            )
+            return (False, warning)
+        
+        return (True, None)
 
 
 __all__ = [
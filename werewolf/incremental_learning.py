@@ -1,11 +1,16 @@
 # -*- coding: utf-8 -*-
 """
 增量学习系统 - 实现游戏结束后自动训练模型
+
+两种模式：
+- 增量模式（默认，ML_INCREMENTAL=true）：每局结束用新样本 + 回放缓冲区采样
+  做一次partial_fit，单局代价与新样本数成正比
+- 全量模式：每N局在全部历史数据上重训练（线性时间衰减权重）
 """
 
 import os
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 import json
 from werewolf.optimization.utils.safe_math import safe_divide
 
@@ -15,25 +20,37 @@ logger = logging.getLogger(__name__)
 class IncrementalLearningSystem:
     """增量学习系统 - 收集数据并定期重训练模型"""
     
-    def __init__(self, ml_agent, retrain_interval=5):
+    def __init__(self, ml_agent, retrain_interval=5, incremental=None):
         """
         Args:
             ml_agent: LightweightMLAgent实例
-            retrain_interval: 每N局游戏重训练一次模型
+            retrain_interval: 每N局游戏重训练一次模型（增量模式下为异常检测器重拟合间隔）
+            incremental: 是否使用增量模式，默认读取环境变量 ML_INCREMENTAL
         """
         self.ml_agent = ml_agent
         self.retrain_interval = retrain_interval
         self.game_count = 0
         self.collected_data = []
         
+        if incremental is None:
+            incremental = os.getenv('ML_INCREMENTAL', 'true').lower() == 'true'
+        self.incremental = incremental
+        self.replay_capacity = int(os.getenv('ML_REPLAY_CAPACITY', '2000'))
+        self.replay_decay = float(os.getenv('ML_REPLAY_DECAY', '0.05'))
+        self.replay_batch_size = int(os.getenv('ML_REPLAY_BATCH', '64'))
+        self.replay_buffer = None
+        
         # 数据存储目录
         self.data_dir = os.getenv('DATA_DIR', './game_data')
         os.makedirs(self.data_dir, exist_ok=True)
         
         # 加载已有数据
         self._load_existing_data()
+        if self.incremental and self.ml_agent and self.ml_agent.enabled:
+            self._load_replay_buffer()
         
-        logger.info(f"✓ IncrementalLearningSystem initialized (retrain every {retrain_interval} games)")
+        mode = 'incremental' if self.incremental else f'full refit every {retrain_interval} games'
+        logger.info(f"✓ IncrementalLearningSystem initialized ({mode})")
     
     def _load_existing_data(self):
         """加载已有的游戏数据"""
@@ -75,6 +92,79 @@ class IncrementalLearningSystem:
         except Exception as e:
             logger.error(f"保存数据失败: {e}", exc_info=True)
     
+    def _replay_buffer_path(self) -> str:
+        return os.path.join(self.data_dir, 'replay_buffer.json')
+    
+    def _load_replay_buffer(self, seed_data: Optional[List[Dict]] = None):
+        """
+        加载回放缓冲区（不存在或为空时新建，并用已收集的历史数据填充）
+        
+        Args:
+            seed_data: 填充用的历史数据（默认 collected_data）
+        """
+        from ml_enhanced.replay_buffer import ReservoirReplayBuffer
+        
+        path = self._replay_buffer_path()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.replay_buffer = ReservoirReplayBuffer.from_dict(
+                        json.load(f), capacity=self.replay_capacity, decay_rate=self.replay_decay
+                    )
+                logger.info(f"✓ Loaded replay buffer: {len(self.replay_buffer)} samples")
+            except (json.JSONDecodeError, IOError, OSError, ValueError) as e:
+                logger.warning(f"回放缓冲区加载失败: {e}, 将创建新缓冲区")
+        
+        if self.replay_buffer is None or len(self.replay_buffer) == 0:
+            self.replay_buffer = ReservoirReplayBuffer(
+                capacity=self.replay_capacity, decay_rate=self.replay_decay
+            )
+            self._seed_replay_buffer(self.collected_data if seed_data is None else seed_data)
+    
+    def _seed_replay_buffer(self, items: List[Dict]):
+        """
+        用 collected_data 中的历史样本按局填充回放缓冲区
+        
+        部署增量模式前已收集的数据不能丢：否则第一局结束后增量模型只见过十几个样本
+        
+        Args:
+            items: collected_data 格式的数据项
+        """
+        games: Dict[str, List[Dict]] = {}
+        for item in items:
+            if (not isinstance(item, dict) or not isinstance(item.get('data'), dict)
+                    or not isinstance(item.get('role'), str)):
+                continue
+            games.setdefault(str(item.get('game_id', '')), []).append(item)
+        if not games:
+            return
+        
+        try:
+            from ml_enhanced.feature_extractor import StandardFeatureExtractor
+            
+            for game_items in games.values():
+                rows = StandardFeatureExtractor.extract_batch([item['data'] for item in game_items])
+                self.replay_buffer.add_game(rows, [1 if item['role'] == 'wolf' else 0 for item in game_items])
+            logger.info(
+                f"✓ Replay buffer seeded from collected data: {len(self.replay_buffer)} samples "
+                f"from {len(games)} games"
+            )
+        except Exception as e:
+            logger.warning(f"回放缓冲区填充失败: {e}", exc_info=True)
+    
+    def _save_replay_buffer(self):
+        """保存回放缓冲区（先写临时文件再替换，避免中途崩溃损坏文件）"""
+        if self.replay_buffer is None:
+            return
+        path = self._replay_buffer_path()
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.replay_buffer.to_dict(), f)
+            os.replace(tmp_path, path)
+        except (IOError, OSError, TypeError) as e:
+            logger.error(f"回放缓冲区保存失败: {e}")
+    
     def on_game_end(self, game_id: str, players_data: List[Dict]) -> Dict:
         """
         游戏结束时调用
@@ -105,6 +195,8 @@ class IncrementalLearningSystem:
         
         # 收集数据（带验证）
         valid_players = 0
+        new_rows = []
+        new_labels = []
         for player in players_data:
             # 验证player是字典
             if not isinstance(player, dict):
@@ -136,6 +228,8 @@ class IncrementalLearningSystem:
                 'role': player['role'],
                 'data': player['data']
             })
+            new_rows.append(player['data'])
+            new_labels.append(1 if player['role'] == 'wolf' else 0)
             valid_players += 1
         
         self.game_count += 1
@@ -146,7 +240,9 @@ class IncrementalLearningSystem:
         
         # 检查是否需要重训练
         retrain_triggered = False
-        if self.game_count % self.retrain_interval == 0:
+        if self.incremental:
+            retrain_triggered = self._incremental_update(new_rows, new_labels)
+        elif self.game_count % self.retrain_interval == 0:
             logger.info(f"🎯 Reached {self.game_count} games, triggering model retraining...")
             retrain_triggered = self._retrain_models()
         
@@ -159,6 +255,65 @@ class IncrementalLearningSystem:
             'next_retrain_at': ((safe_divide(self.game_count, self.retrain_interval, default=0) + 1) * self.retrain_interval)
         }
     
+    def _incremental_update(self, new_rows: List[Dict], new_labels: List[int]) -> bool:
+        """
+        增量更新模型：本局新样本（权重1.0）+ 回放缓冲区采样（指数衰减权重）
+        
+        Args:
+            new_rows: 本局玩家特征数据
+            new_labels: 本局标签
+        
+        Returns:
+            bool: 是否完成更新
+        """
+        if not new_rows:
+            return False
+        if self.replay_buffer is None:
+            # 本局数据已写入 collected_data，填充时排除，避免重复计入
+            self._load_replay_buffer(seed_data=self.collected_data[:-len(new_rows)])
+        
+        try:
+            import numpy as np
+            from ml_enhanced.feature_extractor import StandardFeatureExtractor
+            
+            new_X = StandardFeatureExtractor.extract_batch(new_rows)
+            # 增量模型样本数未达到接替全量模型的下限时，用整个缓冲区（有界）预热，否则只混入少量采样
+            ensemble = getattr(self.ml_agent, 'ensemble', None)
+            if ensemble is not None and ensemble.incremental_samples < ensemble.min_incremental_samples:
+                replay_X, replay_y, replay_w = self.replay_buffer.all()
+            else:
+                replay_X, replay_y, replay_w = self.replay_buffer.sample(self.replay_batch_size)
+            
+            training_data = {
+                'player_data_list': np.vstack([new_X, replay_X]),
+                'labels': np.concatenate([np.asarray(new_labels, dtype=int), replay_y]),
+                'sample_weights': np.concatenate([np.ones(len(new_labels)), replay_w]),
+            }
+            
+            # 先用旧缓冲区采样训练，再把新样本写入缓冲区
+            self.replay_buffer.add_game(new_X, new_labels)
+            
+            # IsolationForest不支持partial_fit：定期在缓冲区（有界）的好人样本上重拟合
+            if self.game_count % self.retrain_interval == 0:
+                buffer_X, buffer_y, _ = self.replay_buffer.all()
+                training_data['anomaly_data'] = buffer_X[buffer_y == 0]
+            
+            updated = self.ml_agent.partial_train(training_data)
+            self._save_replay_buffer()
+            
+            if updated and self.game_count % self.retrain_interval == 0:
+                model_dir = os.getenv('ML_MODEL_DIR', './ml_models')
+                self.ml_agent.save_models(model_dir)
+            
+            logger.info(
+                f"✓ Incremental update: {len(new_labels)} new + {len(replay_y)} replay samples "
+                f"(buffer {len(self.replay_buffer)}/{self.replay_buffer.capacity})"
+            )
+            return bool(updated)
+        except Exception as e:
+            logger.error(f"✗ Incremental update failed: {e}", exc_info=True)
+            return False
+    
     def _retrain_models(self) -> bool:
         """重训练模型"""
         if not self.collected_data:
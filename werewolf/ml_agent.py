@@ -7,6 +7,7 @@ import sys
 import logging
 import numpy as np
 from werewolf.optimization.utils.safe_math import safe_divide
+from werewolf.common import metrics, tracing
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +71,8 @@ class LightweightMLAgent:
         """
         预测狼人概率 - 增强版错误处理
         
+        单条预测委托给批量接口，保证与批量结果完全一致
+        
         Args:
             player_data: 玩家特征数据字典
             
@@ -89,88 +92,72 @@ class LightweightMLAgent:
             logger.error(f"Invalid player_data type: {type(player_data)}, expected dict")
             return 0.5
         
+        return float(self.predict_wolf_probabilities([player_data])[0])
+    
+    @tracing.traced("ml.predict_wolf_probabilities")
+    def predict_wolf_probabilities(self, players: list) -> np.ndarray:
+        """
+        批量预测狼人概率
+        
+        所有候选人一次性送入每个模型（一次ensemble、一次异常检测、一次贝叶斯），
+        避免sklearn在单行输入上的重复校验与线程池开销
+        
+        Args:
+            players: 玩家特征数据字典列表
+            
+        Returns:
+            np.ndarray: 形状为(len(players),)的狼人概率数组，无效输入位置为0.5
+        """
+        n = len(players) if players else 0
+        result = np.full(n, 0.5, dtype=float)
+        
+        if not self.enabled or n == 0:
+            return result
+        
+        # 1. 输入验证：非字典的行保持默认0.5，不送入模型
+        valid_idx = [i for i, p in enumerate(players) if isinstance(p, dict)]
+        if len(valid_idx) < n:
+            logger.error(f"Invalid player_data rows: {n - len(valid_idx)}/{n}, expected dict")
+        if not valid_idx:
+            return result
+        rows = [players[i] for i in valid_idx]
+        
+        # 2. 每个模型调用一次
         predictions = {}
         failed_models = []  # 记录失败的模型
         
-        # 2. Ensemble预测
-        if hasattr(self.ensemble, 'is_trained') and self.ensemble.is_trained:
-            try:
-                pred = self.ensemble.predict_wolf_probability(player_data)
-                
-                # 验证预测结果
-                if not isinstance(pred, (int, float)):
-                    raise ValueError(f"Invalid prediction type: {type(pred)}, expected float")
-                if not (0 <= pred <= 1):
-                    raise ValueError(f"Prediction out of range: {pred}, expected [0, 1]")
-                
-                predictions['ensemble'] = float(pred)
-                logger.debug(f"Ensemble prediction: {pred:.3f}")
-                
-            except ValueError as e:
-                logger.warning(f"Ensemble prediction value error: {e}")
-                failed_models.append(('ensemble', 'value_error', str(e)))
-            except TypeError as e:
-                logger.warning(f"Ensemble prediction type error: {e}")
-                failed_models.append(('ensemble', 'type_error', str(e)))
-            except AttributeError as e:
-                logger.error(f"Ensemble prediction attribute error: {e}")
-                failed_models.append(('ensemble', 'attribute_error', str(e)))
-            except Exception as e:
-                logger.error(f"Ensemble prediction unexpected error: {e}", exc_info=True)
-                failed_models.append(('ensemble', 'unexpected', str(e)))
+        model_calls = [
+            ('ensemble', self.ensemble, 'is_trained',
+             'predict_wolf_probabilities', 'predict_wolf_probability'),
+            ('anomaly', self.anomaly, 'is_fitted',
+             'get_wolf_probabilities', 'get_wolf_probability'),
+            ('bayesian', self.bayesian, None,
+             'analyze_players', 'analyze_player'),
+        ]
         
-        # 3. 异常检测
-        if hasattr(self.anomaly, 'is_fitted') and self.anomaly.is_fitted:
+        for name, model, ready_attr, batch_method, single_method in model_calls:
+            if ready_attr and not getattr(model, ready_attr, False):
+                continue
             try:
-                pred = self.anomaly.get_wolf_probability(player_data)
-                
-                if not isinstance(pred, (int, float)):
-                    raise ValueError(f"Invalid prediction type: {type(pred)}")
-                if not (0 <= pred <= 1):
-                    raise ValueError(f"Prediction out of range: {pred}")
-                
-                predictions['anomaly'] = float(pred)
-                logger.debug(f"Anomaly prediction: {pred:.3f}")
-                
+                with tracing.span(f"ml.{name}", rows=len(rows)), \
+                        metrics.time_block('ml_predict', model=name):
+                    preds = self._call_model_batch(model, batch_method, single_method, rows)
+                predictions[name] = preds
+                logger.debug(f"{name.capitalize()} batch prediction: mean={preds.mean():.3f}")
             except ValueError as e:
-                logger.warning(f"Anomaly prediction value error: {e}")
-                failed_models.append(('anomaly', 'value_error', str(e)))
+                logger.warning(f"{name.capitalize()} prediction value error: {e}")
+                failed_models.append((name, 'value_error', str(e)))
             except TypeError as e:
-                logger.warning(f"Anomaly prediction type error: {e}")
-                failed_models.append(('anomaly', 'type_error', str(e)))
+                logger.warning(f"{name.capitalize()} prediction type error: {e}")
+                failed_models.append((name, 'type_error', str(e)))
             except AttributeError as e:
-                logger.error(f"Anomaly prediction attribute error: {e}")
-                failed_models.append(('anomaly', 'attribute_error', str(e)))
+                logger.error(f"{name.capitalize()} prediction attribute error: {e}")
+                failed_models.append((name, 'attribute_error', str(e)))
             except Exception as e:
-                logger.error(f"Anomaly prediction unexpected error: {e}", exc_info=True)
-                failed_models.append(('anomaly', 'unexpected', str(e)))
-        
-        # 4. 贝叶斯推理
-        try:
-            pred = self.bayesian.analyze_player(player_data)
-            
-            if not isinstance(pred, (int, float)):
-                raise ValueError(f"Invalid prediction type: {type(pred)}")
-            if not (0 <= pred <= 1):
-                raise ValueError(f"Prediction out of range: {pred}")
-            
-            predictions['bayesian'] = float(pred)
-            logger.debug(f"Bayesian prediction: {pred:.3f}")
-            
-        except ValueError as e:
-            logger.warning(f"Bayesian prediction value error: {e}")
-            failed_models.append(('bayesian', 'value_error', str(e)))
-        except TypeError as e:
-            logger.warning(f"Bayesian prediction type error: {e}")
-            failed_models.append(('bayesian', 'type_error', str(e)))
-        except AttributeError as e:
-            logger.error(f"Bayesian prediction attribute error: {e}")
-            failed_models.append(('bayesian', 'attribute_error', str(e)))
-        except Exception as e:
-            logger.error(f"Bayesian prediction unexpected error: {e}", exc_info=True)
-            failed_models.append(('bayesian', 'unexpected', str(e)))
+                logger.error(f"{name.capitalize()} prediction unexpected error: {e}", exc_info=True)
+                failed_models.append((name, 'unexpected', str(e)))
         
-        # 5. 记录失败情况
+        # 3. 记录失败情况
         if failed_models:
             logger.warning(f"ML prediction failures: {len(failed_models)}/{3} models failed")
             for model_name, error_type, error_msg in failed_models:
@@ -179,14 +166,14 @@ class LightweightMLAgent:
             # 如果所有模型都失败,记录ERROR级别
             if len(failed_models) == 3:
                 logger.error("❌ ALL ML models failed! Returning default 0.5")
-                return 0.5
+                return result
         
-        # 6. 加权融合（优化：使用epsilon阈值判断）
+        # 4. 加权融合（优化：使用epsilon阈值判断）
         if not predictions:
             logger.error("No valid predictions available, returning default 0.5")
-            return 0.5
+            return result
         
-        logger.info(f"✓ ML prediction successful: {len(predictions)}/{3} models")
+        logger.debug(f"✓ ML batch prediction successful: {len(predictions)}/{3} models, {len(rows)} rows")
         
         EPSILON = 1e-10  # 浮点数比较阈值
         total_weight = sum(self.weights[k] for k in predictions.keys())
@@ -203,16 +190,50 @@ class LightweightMLAgent:
                 for k in predictions.keys()
             }
         
-        final_prob = sum(predictions[k] * normalized_weights[k] for k in predictions.keys())
+        final_probs = sum(predictions[k] * normalized_weights[k] for k in predictions.keys())
         
         # 确保结果在有效范围内
-        final_prob = max(0.0, min(1.0, final_prob))
+        result[valid_idx] = np.clip(final_probs, 0.0, 1.0)
         
-        logger.debug(f"Predictions: {predictions}")
         logger.debug(f"Weights: {normalized_weights}")
-        logger.debug(f"Final probability: {final_prob:.3f}")
         
-        return final_prob
+        return result
+    
+    @staticmethod
+    def _call_model_batch(model, batch_method: str, single_method: str, rows: list) -> np.ndarray:
+        """
+        对单个模型执行一次批量预测
+        
+        模型提供批量接口时整批调用一次；否则退化为逐行调用（兼容旧模型）
+        
+        Args:
+            model: 模型对象
+            batch_method: 批量预测方法名
+            single_method: 单条预测方法名
+            rows: 玩家特征数据字典列表
+            
+        Returns:
+            np.ndarray: 每行的狼人概率
+            
+        Raises:
+            ValueError: 预测结果形状错误或超出[0, 1]
+        """
+        batch_fn = getattr(model, batch_method, None)
+        if batch_fn is not None:
+            preds = np.asarray(batch_fn(rows), dtype=float).reshape(-1)
+        else:
+            single_fn = getattr(model, single_method)
+            preds = np.array([float(single_fn(row)) for row in rows], dtype=float)
+        
+        # 验证预测结果
+        if preds.shape[0] != len(rows):
+            raise ValueError(f"Invalid prediction shape: {preds.shape}, expected ({len(rows)},)")
+        if not np.all(np.isfinite(preds)):
+            raise ValueError("Prediction contains NaN or Inf")
+        if np.any(preds < 0) or np.any(preds > 1):
+            raise ValueError(f"Prediction out of range: [{preds.min()}, {preds.max()}], expected [0, 1]")
+        
+        return preds
     
     def train(self, training_data):
         """训练模型 - 优化：支持样本权重"""
@@ -264,6 +285,37 @@ class LightweightMLAgent:
             import traceback
             traceback.print_exc()
     
+    def partial_train(self, training_data):
+        """
+        增量训练 - 代价与本次样本数成正比
+
+        Args:
+            training_data: 同train()，额外可选 'anomaly_data'（好人样本，
+                提供时重新拟合异常检测器，IsolationForest不支持增量更新）
+
+        Returns:
+            bool: 是否完成更新
+        """
+        if not self.enabled:
+            logger.warning("Cannot train - ML not available")
+            return False
+
+        try:
+            updated = self.ensemble.partial_fit(
+                training_data['player_data_list'],
+                training_data['labels'],
+                sample_weights=training_data.get('sample_weights')
+            )
+
+            anomaly_data = training_data.get('anomaly_data')
+            if anomaly_data is not None and len(anomaly_data) > 0:
+                self.anomaly.fit(anomaly_data)
+
+            return bool(updated)
+        except Exception as e:
+            logger.error(f"✗ Incremental training failed: {e}", exc_info=True)
+            return False
+
     def save_models(self, directory):
         """保存模型"""
         if not self.enabled:
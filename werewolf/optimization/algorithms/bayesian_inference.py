@@ -159,7 +159,7 @@ class BayesianInference:
         验证需求: AC-2.2.2, AC-2.2.3
         """
         if not evidences:
-            logger.info("没有证据，返回先验概率")
+            logger.debug("没有证据，返回先验概率")
             return self.prior_probability
         
         # 分组证据
@@ -173,8 +173,8 @@ class BayesianInference:
         ]
         
         logger.debug(
-            f"证据分组: {len(independent_evidences)} 个独立证据, "
-            f"{len(correlated_evidences)} 个相关证据"
+            "证据分组: %d 个独立证据, %d 个相关证据",
+            len(independent_evidences), len(correlated_evidences)
         )
         
         # 独立证据：直接相乘（使用对数空间避免溢出）
@@ -185,7 +185,7 @@ class BayesianInference:
                          for e in independent_evidences)
             # 限制最大值避免溢出
             independent_lr = np.exp(min(log_lr, 100.0))
-            logger.debug(f"独立证据LR: {independent_lr:.2f}")
+            logger.debug("独立证据LR: %.2f", independent_lr)
         
         # 相关证据：使用几何平均（对数空间计算）
         correlated_lr = 1.0
@@ -196,13 +196,13 @@ class BayesianInference:
             mean_log_lr = np.mean(log_lrs)
             # 限制最大值避免溢出
             correlated_lr = np.exp(min(mean_log_lr, 100.0))
-            logger.debug(f"相关证据几何平均LR: {correlated_lr:.2f}")
+            logger.debug("相关证据几何平均LR: %.2f", correlated_lr)
         
         # 组合似然比（限制最大值）
         combined_lr = independent_lr * correlated_lr
         combined_lr = min(combined_lr, 1e6)  # 限制最大值
         logger.debug(
-            f"组合似然比: {independent_lr:.2f} × {correlated_lr:.2f} = {combined_lr:.2f}"
+            "组合似然比: %.2f × %.2f = %.2f", independent_lr, correlated_lr, combined_lr
         )
         
         # 计算后验概率
@@ -226,9 +226,10 @@ class BayesianInference:
         # 限制在合理范围内，避免极端值
         posterior_prob = float(np.clip(posterior_prob, 0.001, 0.999))
         
-        logger.info(
-            f"贝叶斯推理: 先验={self.prior_probability:.2%}, "
-            f"似然比={combined_lr:.2f}, 后验={posterior_prob:.2%}"
+        # 每条证据集合都会调用，使用DEBUG级别和%风格参数（未启用时不格式化）
+        logger.debug(
+            "贝叶斯推理: 先验=%.2f%%, 似然比=%.2f, 后验=%.2f%%",
+            self.prior_probability * 100, combined_lr, posterior_prob * 100
         )
         
         return posterior_prob
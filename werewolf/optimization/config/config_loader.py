@@ -0,0 +1,61 @@
+"""
+配置加载
+
+进程内共享一份 OptimizationConfig（默认值 < YAML < 环境变量），首次使用时加载。
+
+环境变量:
+    OPTIMIZATION_CONFIG: YAML配置文件路径（默认不读文件）
+"""
+
+import os
+import logging
+import threading
+from typing import Optional
+
+from werewolf.optimization.models.config import OptimizationConfig
+
+logger = logging.getLogger(__name__)
+
+_config: Optional[OptimizationConfig] = None
+_lock = threading.Lock()
+
+
+def get_config_path() -> Optional[str]:
+    """
+    YAML配置文件路径
+
+    返回:
+        OPTIMIZATION_CONFIG 指定的路径，未设置时为None
+    """
+    return os.getenv('OPTIMIZATION_CONFIG') or None
+
+
+def load_config(path: Optional[str] = None, reload: bool = False) -> OptimizationConfig:
+    """
+    取进程内共享的优化配置
+
+    配置不合法（文件缺失、格式错误、取值越界）时记录错误并使用默认配置，
+    不让配置问题中断对局。
+
+    参数:
+        path: YAML文件路径（默认 get_config_path()）
+        reload: 重新读取文件与环境变量
+
+    返回:
+        OptimizationConfig
+    """
+    global _config
+    config = _config
+    if config is not None and not reload:
+        return config
+    with _lock:
+        if _config is None or reload:
+            path = path or get_config_path()
+            try:
+                _config = OptimizationConfig.load(path)
+                if path:
+                    logger.info(f"[CONFIG] Optimization config loaded from {path}")
+            except (OSError, ValueError) as e:  # pydantic.ValidationError 是 ValueError 的子类
+                logger.error(f"[CONFIG] Invalid optimization config ({path or 'environment'}): {e}; using defaults")
+                _config = OptimizationConfig()
+        return _config
@@ -7,6 +7,8 @@
 - TrustScoreDimension: 信任分数评分维度
 - WerewolfProbabilityDimension: 狼人概率评分维度
 - VotingAccuracyDimension: 投票准确率评分维度
+- FeatureCountDimension / FlagDimension / SeerCheckDimension / EndgameDimension:
+  行为计数、布尔标记、预言家查验、残局折扣等通用维度
 - DecisionEngine: 决策引擎，聚合多个评分维度
 """
 
@@ -16,6 +18,10 @@ from .scoring_strategy import (
     TrustScoreDimension,
     WerewolfProbabilityDimension,
     VotingAccuracyDimension,
+    FeatureCountDimension,
+    FlagDimension,
+    SeerCheckDimension,
+    EndgameDimension,
 )
 from .decision_engine import DecisionEngine
 
@@ -25,5 +31,9 @@ __all__ = [
     'TrustScoreDimension',
     'WerewolfProbabilityDimension',
     'VotingAccuracyDimension',
+    'FeatureCountDimension',
+    'FlagDimension',
+    'SeerCheckDimension',
+    'EndgameDimension',
     'DecisionEngine',
 ]
@@ -0,0 +1,230 @@
+"""
+决策上下文
+
+包装角色构建的决策上下文字典（player_data / seer_checks / trust_scores / game_state 等），
+为评分维度提供按候选人向量化的取值，并缓存中间结果：
+
+- 同一次决策中多个维度共用的中间结果（信任分数、投票模式、玩家数据、预言家查验）
+  只计算一次，生成决策理由时也直接取用
+- 与候选人一一对应的结果（玩家数据列、特征数组）一次为全部候选人计算
+- 调用方给出阶段标识时，DecisionEngine 在同一阶段、同一上下文字典上的后续决策
+  复用已有的 DecisionContext（例如同一夜的多次打分）
+"""
+
+import math
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+
+def to_number(value: Any, default: float = 0.0) -> float:
+    """
+    把玩家数据中的计数/分数转换为浮点数
+
+    参数:
+        value: 原始值（bool、int、float，其他类型视为缺失）
+        default: 缺失或无法转换时的默认值
+
+    返回:
+        浮点数
+    """
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        result = float(value)
+        return default if math.isnan(result) else result
+    return default
+
+
+class DecisionContext:
+    """
+    一次决策的上下文与中间结果缓存
+
+    属性:
+        raw: 原始上下文字典
+        candidates: 当前评分的候选人
+        phase: 阶段标识（None表示不跨决策复用）
+
+    示例:
+        >>> ctx = DecisionContext(context, ["No.1", "No.2"])
+        >>> trust = ctx.values("trust", lambda c: calculator.analyze(c, ctx.raw))
+        >>> injections = ctx.feature("injection_attempts")
+    """
+
+    def __init__(self, context: Dict[str, Any], candidates: Sequence[str], phase: Optional[Hashable] = None):
+        """
+        初始化决策上下文
+
+        参数:
+            context: 角色构建的决策上下文字典
+            candidates: 候选人列表
+            phase: 阶段标识（例如 (day, status)）
+        """
+        self.raw: Dict[str, Any] = context if isinstance(context, dict) else {}
+        self.candidates: List[str] = list(candidates)
+        self.phase = phase
+        # 与候选人无关的结果 / 与当前候选人一一对应的结果（候选人变化时清空）
+        self._cache: Dict[str, Any] = {}
+        self._columns: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def bind(self, candidates: Sequence[str]) -> 'DecisionContext':
+        """切换当前评分的候选人（候选人变化时清空逐候选人结果，保留整体结果）"""
+        candidates = list(candidates)
+        if candidates != self.candidates:
+            self.candidates = candidates
+            self._columns.clear()
+        return self
+
+    def matches(self, context: Dict[str, Any], phase: Optional[Hashable]) -> bool:
+        """是否可以复用于同一阶段、同一上下文字典上的另一次决策"""
+        return phase is not None and phase == self.phase and context is self.raw
+
+    # ==================== 缓存 ====================
+
+    def cached(self, name: str, compute: Callable[[], Any]) -> Any:
+        """
+        整体中间结果（与候选人无关，例如残局判断、紧急度乘数）
+
+        参数:
+            name: 缓存名
+            compute: 无参计算函数
+
+        返回:
+            缓存的结果
+        """
+        if name in self._cache:
+            self.hits += 1
+            return self._cache[name]
+        self.misses += 1
+        value = compute()
+        self._cache[name] = value
+        return value
+
+    def column(self, name: str, compute: Callable[[], Any]) -> Any:
+        """与当前候选人一一对应的中间结果（列表或数组，compute一次为全部候选人计算）"""
+        if name in self._columns:
+            self.hits += 1
+            return self._columns[name]
+        self.misses += 1
+        value = compute()
+        self._columns[name] = value
+        return value
+
+    def per_candidate(self, name: str, compute: Callable[[str], Any]) -> List[Any]:
+        """
+        逐个候选人计算的中间结果
+
+        参数:
+            name: 缓存名
+            compute: compute(candidate) -> 值
+
+        返回:
+            与 candidates 对应的结果列表
+        """
+        return self.column(name, lambda: [compute(c) for c in self.candidates])
+
+    def values(self, name: str, compute: Callable[[str], float]) -> np.ndarray:
+        """逐个候选人计算的数值结果（float64数组）"""
+        return self.column(name, lambda: np.array([compute(c) for c in self.candidates], dtype=np.float64))
+
+    def value_of(self, name: str, candidate: str, default: Any = None) -> Any:
+        """取已缓存的单个候选人结果（没有时返回默认值）"""
+        column = self._columns.get(name)
+        if column is None or candidate not in self.candidates:
+            return default
+        value = column[self.candidates.index(candidate)]
+        return value.item() if isinstance(value, np.generic) else value
+
+    # ==================== 上下文取值 ====================
+
+    def section(self, key: str) -> Dict[str, Any]:
+        """上下文中的字典字段（缺失或类型不对时为空字典）"""
+        return self.cached(f"section:{key}", lambda: self._as_dict(self.raw.get(key)))
+
+    def players(self) -> List[Dict[str, Any]]:
+        """候选人的玩家数据（player_data[candidate]，缺失为空字典）"""
+        def compute():
+            player_data = self.section('player_data')
+            players = [player_data.get(c) for c in self.candidates]
+            return [p if isinstance(p, dict) else {} for p in players]
+        return self.column('players', compute)
+
+    def player(self, candidate: str) -> Dict[str, Any]:
+        """单个候选人的玩家数据"""
+        return self._as_dict(self.section('player_data').get(candidate))
+
+    def feature(self, field: str, default: float = 0.0) -> np.ndarray:
+        """
+        候选人玩家数据中的数值字段（计数或分数）
+
+        参数:
+            field: player_data 中的字段名
+            default: 缺失时的默认值
+
+        返回:
+            与 candidates 对应的float64数组
+        """
+        return self.column(f"feature:{field}:{default}",
+                           lambda: self._numbers([p.get(field) for p in self.players()], default))
+
+    def features(self, fields: Sequence[str], default: float = 0.0) -> np.ndarray:
+        """
+        一次取出多个数值字段（融合的计数维度使用）
+
+        参数:
+            fields: player_data 中的字段名
+            default: 缺失时的默认值
+
+        返回:
+            形状为 (候选人数, 字段数) 的float64矩阵
+        """
+        fields = tuple(fields)
+        return self.column(f"features:{fields}:{default}",
+                           lambda: self._numbers([p.get(f) for p in self.players() for f in fields],
+                                                 default).reshape(len(self.candidates), len(fields)))
+
+    def flag(self, field: str) -> np.ndarray:
+        """候选人玩家数据中的布尔字段（按真值判断）"""
+        return self.column(f"flag:{field}",
+                           lambda: np.array([bool(p.get(field)) for p in self.players()], dtype=bool))
+
+    def flags(self, fields: Sequence[str]) -> np.ndarray:
+        """一次取出多个布尔字段，形状为 (候选人数, 字段数)"""
+        fields = tuple(fields)
+        return self.column(f"flags:{fields}",
+                           lambda: np.array([bool(p.get(f)) for p in self.players() for f in fields],
+                                            dtype=bool).reshape(len(self.candidates), len(fields)))
+
+    def lookup(self, key: str, default: float = np.nan) -> np.ndarray:
+        """
+        上下文中按玩家索引的数值字典（如 trust_scores、ml_wolf_probs）
+
+        参数:
+            key: 上下文字段名
+            default: 候选人不在字典中时的值（默认NaN，表示缺失）
+
+        返回:
+            与 candidates 对应的float64数组
+        """
+        def compute():
+            section = self.section(key)
+            return self._numbers([section.get(c) for c in self.candidates], default)
+        return self.column(f"lookup:{key}:{default}", compute)
+
+    @staticmethod
+    def _numbers(raw: List[Any], default: float) -> np.ndarray:
+        """转换为float64数组（None与无法转换的值取默认值）"""
+        try:
+            values = np.array(raw, dtype=np.float64)
+        except (TypeError, ValueError):
+            return np.array([to_number(v, default) for v in raw], dtype=np.float64)
+        missing = np.isnan(values)
+        if missing.any():
+            values[missing] = default
+        return values
+
+    @staticmethod
+    def _as_dict(value: Any) -> Dict[str, Any]:
+        return value if isinstance(value, dict) else {}
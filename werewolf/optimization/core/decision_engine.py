@@ -0,0 +1,221 @@
+"""
+决策引擎
+
+聚合多个评分维度，一次为全部候选人打分：
+
+    分数 = Σ ADD维度 * 权重  →  × MULTIPLY维度  →  限制在[lower, upper]  →  OVERRIDE维度替换
+
+权重可在构建时或运行时（set_weights）按维度名配置；权重为0的维度不参与计算。
+revision 在权重每次变化后递增，按实例缓存权重的调用方据此刷新。
+支持 fuse() 的同类ADD维度在配置时合并为一个计算步骤（位于该类第一个维度的位置）。
+"""
+
+import logging
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .decision_context import DecisionContext
+from .scoring_strategy import ADD, MULTIPLY, OVERRIDE, ScoringDimension
+
+logger = logging.getLogger(__name__)
+
+
+class DecisionEngine:
+    """
+    可插拔维度的向量化评分引擎
+
+    示例:
+        >>> engine = DecisionEngine([
+        ...     TrustScoreDimension(),
+        ...     FeatureCountDimension('injection_attempts', per_count=22, cap=45),
+        ...     WerewolfProbabilityDimension(max_bonus=20),
+        ... ], lower=0.0, upper=100.0, name='poison')
+        >>> target, score, scores = engine.best(candidates, context)
+    """
+
+    def __init__(
+        self,
+        dimensions: Sequence[ScoringDimension],
+        weights: Optional[Dict[str, float]] = None,
+        lower: Optional[float] = None,
+        upper: Optional[float] = None,
+        name: str = 'decision'
+    ):
+        """
+        初始化决策引擎
+
+        参数:
+            dimensions: 评分维度（ADD维度按给定顺序累加）
+            weights: 按维度名覆盖默认权重
+            lower: 分数下限（None表示不限）
+            upper: 分数上限（None表示不限）
+            name: 引擎名（日志）
+        """
+        names = [d.name for d in dimensions]
+        duplicates = {n for n in names if names.count(n) > 1}
+        if duplicates:
+            raise ValueError(f"duplicate dimension names: {sorted(duplicates)}")
+        self.dimensions: List[ScoringDimension] = list(dimensions)
+        self.lower = lower
+        self.upper = upper
+        self.name = name
+        self._weights: Dict[str, float] = {d.name: d.weight for d in self.dimensions}
+        self.revision = 0
+        self._last: Optional[DecisionContext] = None
+        self._plan: List[Tuple[str, Callable[[DecisionContext], np.ndarray], float]] = []
+        if weights:
+            self.set_weights(weights)
+        else:
+            self._compile()
+
+    # ==================== 配置 ====================
+
+    def set_weights(self, weights: Dict[str, float], strict: bool = True) -> None:
+        """
+        设置维度权重
+
+        参数:
+            weights: {维度名: 权重}
+            strict: 未知维度名抛出ValueError；False时记录错误并忽略（外部配置文件）
+        """
+        unknown = set(weights) - set(self._weights)
+        if unknown:
+            if strict:
+                raise ValueError(f"unknown dimensions for {self.name}: {sorted(unknown)}")
+            logger.error(f"[DECISION ENGINE] Ignoring unknown dimensions for {self.name}: {sorted(unknown)}")
+        self._weights.update({k: float(v) for k, v in weights.items() if k not in unknown})
+        self._compile()
+
+    def _compile(self) -> None:
+        """按当前权重生成计算步骤: [(组合方式, 计算函数, 权重)]"""
+        plan: List[Tuple[str, Callable[[DecisionContext], np.ndarray], float]] = []
+        groups: Dict[type, List[ScoringDimension]] = {}
+        for dim in self.dimensions:
+            if self._weights[dim.name] == 0.0:
+                continue
+            if dim.combine == ADD and dim.fusable:
+                if type(dim) not in groups:
+                    groups[type(dim)] = []
+                    plan.append((ADD, type(dim), 1.0))
+                groups[type(dim)].append(dim)
+            else:
+                plan.append((dim.combine, dim.score, self._weights[dim.name]))
+        for index, (combine, step, weight) in enumerate(plan):
+            if isinstance(step, type):
+                members = groups[step]
+                plan[index] = (combine, step.fuse(members, [self._weights[d.name] for d in members]), weight)
+        self._plan = plan
+        self.revision += 1
+
+    @property
+    def weights(self) -> Dict[str, float]:
+        return dict(self._weights)
+
+    def dimension(self, name: str) -> ScoringDimension:
+        for dim in self.dimensions:
+            if dim.name == name:
+                return dim
+        raise KeyError(name)
+
+    # ==================== 评分 ====================
+
+    def context(self, context: Any, candidates: Sequence[str], phase: Optional[Hashable] = None) -> DecisionContext:
+        """
+        取决策上下文（同一阶段、同一上下文字典上的后续决策复用上一次的缓存）
+
+        参数:
+            context: 上下文字典或已有的 DecisionContext
+            candidates: 候选人
+            phase: 阶段标识（None表示不复用）
+
+        返回:
+            DecisionContext
+        """
+        if isinstance(context, DecisionContext):
+            return context.bind(candidates)
+        last = self._last
+        if last is not None and last.matches(context, phase):
+            return last.bind(candidates)
+        ctx = DecisionContext(context, candidates, phase)
+        if phase is not None:
+            self._last = ctx
+        return ctx
+
+    def score_array(self, ctx: DecisionContext) -> np.ndarray:
+        """为 ctx.candidates 打分，返回float64数组"""
+        total = np.zeros(len(ctx.candidates), dtype=np.float64)
+        overrides = []
+        for combine, step, weight in self._plan:
+            if combine == ADD:
+                values = step(ctx)
+                total += values if weight == 1.0 else values * weight
+            elif combine == MULTIPLY:
+                factor = step(ctx)
+                total *= factor if weight == 1.0 else 1.0 + (factor - 1.0) * weight
+            elif combine == OVERRIDE:
+                overrides.append(step)
+        # np.clip 对小数组的固定开销明显高于 maximum/minimum
+        if self.lower is not None:
+            np.maximum(total, self.lower, out=total)
+        if self.upper is not None:
+            np.minimum(total, self.upper, out=total)
+        for step in overrides:
+            values = step(ctx)
+            total = np.where(np.isnan(values), total, values)
+        return total
+
+    def score(self, candidates: Sequence[str], context: Any, phase: Optional[Hashable] = None) -> Dict[str, float]:
+        """
+        为全部候选人打分
+
+        参数:
+            candidates: 候选人
+            context: 上下文字典或 DecisionContext
+            phase: 阶段标识
+
+        返回:
+            {候选人: 分数}（保持候选人顺序）
+        """
+        candidates = list(candidates)
+        if not candidates:
+            return {}
+        ctx = self.context(context, candidates, phase)
+        totals = self.score_array(ctx).tolist()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[DECISION ENGINE] {self.name}: " +
+                         ", ".join(f"{c}={s:.1f}" for c, s in zip(candidates, totals)))
+        return dict(zip(candidates, totals))
+
+    def breakdown(self, candidates: Sequence[str], context: Any,
+                  phase: Optional[Hashable] = None) -> Dict[str, Dict[str, float]]:
+        """
+        各维度的加权分数分解（调试与决策理由）
+
+        返回:
+            {维度名: {候选人: 该维度的加权分数（MULTIPLY为系数，OVERRIDE为替换值或NaN）}}
+        """
+        candidates = list(candidates)
+        ctx = self.context(context, candidates, phase)
+        result = {}
+        for dim in self.dimensions:
+            weight = self._weights[dim.name]
+            values = dim.score(ctx)
+            if dim.combine == ADD:
+                values = values * weight
+            result[dim.name] = dict(zip(candidates, values.tolist()))
+        return result
+
+    def best(self, candidates: Sequence[str], context: Any,
+             phase: Optional[Hashable] = None) -> Tuple[Optional[str], float, Dict[str, float]]:
+        """
+        分数最高的候选人（并列取先出现者）
+
+        返回:
+            (目标, 分数, {候选人: 分数})，没有候选人时为 (None, 0.0, {})
+        """
+        scores = self.score(candidates, context, phase)
+        if not scores:
+            return None, 0.0, {}
+        target = max(scores, key=scores.get)
+        return target, scores[target], scores
@@ -0,0 +1,345 @@
+"""
+评分维度
+
+每个评分维度一次为全部候选人打分（numpy向量化），返回与 DecisionContext.candidates
+对应的float64数组。DecisionEngine 按维度的组合方式聚合：
+
+- ADD: 加权求和（多数维度）
+- MULTIPLY: 对加权和整体相乘（如残局折扣）
+- OVERRIDE: 非NaN处直接替换最终分数（如预言家确认狼人）
+
+通用维度:
+    TrustScoreDimension: 信任分数越低得分越高
+    WerewolfProbabilityDimension: ML狼人概率修正（以0.5为中性点）
+    VotingAccuracyDimension: 投票模式加成（护狼/冲票/摇摆/弃票/准确）
+    FeatureCountDimension: 行为计数加成（注入、虚假引用、矛盾等，按次数累加并封顶）
+    FlagDimension: 布尔标记加减分（声称猎人、疑似狼王等）
+    SeerCheckDimension: 预言家查验结果加减分或直接定分
+    EndgameDimension: 存活人数不超过阈值时整体乘以系数
+
+角色特有的维度继承 ScoringDimension 实现 score(ctx) 即可。
+
+候选人较少时numpy每次运算的固定开销占主导，因此只读取玩家数据字段的维度
+（FeatureCountDimension、FlagDimension）提供 fuse()：引擎把同类维度合并为
+一次矩阵运算，结果与逐个维度累加相同。
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .decision_context import DecisionContext, to_number
+
+ADD = 'add'
+MULTIPLY = 'multiply'
+OVERRIDE = 'override'
+
+
+class ScoringDimension(ABC):
+    """
+    评分维度抽象基类
+
+    属性:
+        name: 维度名（权重配置与分数分解的键，同一引擎内唯一）
+        weight: 默认权重
+        combine: 组合方式（ADD / MULTIPLY / OVERRIDE）
+        fusable: 同类ADD维度是否可以由 fuse() 合并计算
+    """
+
+    name: str = ''
+    combine: str = ADD
+    fusable: bool = False
+
+    def __init__(self, weight: float = 1.0, name: Optional[str] = None):
+        """
+        参数:
+            weight: 默认权重（可被 DecisionEngine 的权重配置覆盖）
+            name: 维度名（默认使用类属性name）
+        """
+        self.weight = weight
+        if name:
+            self.name = name
+        if not self.name:
+            raise ValueError(f"{type(self).__name__} requires a name")
+
+    @abstractmethod
+    def score(self, ctx: DecisionContext) -> np.ndarray:
+        """
+        为 ctx.candidates 中的全部候选人打分
+
+        参数:
+            ctx: 决策上下文
+
+        返回:
+            float64数组（OVERRIDE维度中NaN表示不替换）
+        """
+
+    @classmethod
+    def fuse(cls, dims: List['ScoringDimension'],
+             weights: List[float]) -> Callable[[DecisionContext], np.ndarray]:
+        """
+        把同类ADD维度合并为一次计算（fusable=True 的维度实现）
+
+        参数:
+            dims: 同类维度
+            weights: 对应的权重
+
+        返回:
+            fused(ctx) -> 加权分数之和
+        """
+        raise NotImplementedError(f"{cls.__name__} cannot be fused")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name='{self.name}', weight={self.weight}, combine={self.combine})"
+
+
+class TrustScoreDimension(ScoringDimension):
+    """
+    信任分数维度: 信任越低得分越高
+
+    - normalize=False: scale - trust
+    - normalize=True:  scale * (1 - trust / 100)
+    - extreme_threshold: |trust| 超过阈值的部分按 extreme_gain 额外增减
+      （trust < -阈值时加分，trust > 阈值时减分）
+
+    信任分数来源: trust_fn(candidate, context)（如角色的信任分数计算器），
+    否则读取上下文中的 key 字典（默认 trust_scores，缺失时为default）
+    """
+
+    name = 'trust'
+
+    def __init__(
+        self,
+        trust_fn: Optional[Callable[[str, Dict[str, Any]], float]] = None,
+        key: str = 'trust_scores',
+        default: float = 50.0,
+        scale: float = 100.0,
+        normalize: bool = False,
+        extreme_threshold: Optional[float] = None,
+        extreme_gain: float = 0.0,
+        weight: float = 1.0,
+        name: Optional[str] = None
+    ):
+        super().__init__(weight, name)
+        self.trust_fn = trust_fn
+        self.key = key
+        self.default = default
+        self.scale = scale
+        self.normalize = normalize
+        self.extreme_threshold = extreme_threshold
+        self.extreme_gain = extreme_gain
+
+    def trust(self, ctx: DecisionContext) -> np.ndarray:
+        """候选人的信任分数（缓存在ctx中，其他维度与决策理由共用）"""
+        if self.trust_fn is not None:
+            return ctx.values(f"{self.name}:trust", lambda c: self.trust_fn(c, ctx.raw))
+        return ctx.lookup(self.key, self.default)
+
+    def score(self, ctx: DecisionContext) -> np.ndarray:
+        trust = self.trust(ctx)
+        if self.normalize:
+            base = self.scale * (1.0 - trust / 100.0)
+        else:
+            base = self.scale - trust
+        if self.extreme_threshold is not None:
+            threshold = self.extreme_threshold
+            adjust = np.where(trust < -threshold, (np.abs(trust) - threshold) * self.extreme_gain,
+                              np.where(trust > threshold, -((trust - threshold) * self.extreme_gain), 0.0))
+            base = base + adjust
+        return base
+
+
+class WerewolfProbabilityDimension(ScoringDimension):
+    """
+    ML狼人概率维度: (p - neutral) * 2 * max_bonus，没有预测的候选人为0
+
+    概率读取自上下文中的 key 字典（默认 ml_wolf_probs，由角色的批量ML预测填充）
+    """
+
+    name = 'wolf_probability'
+
+    def __init__(self, max_bonus: float = 20.0, key: str = 'ml_wolf_probs', neutral: float = 0.5,
+                 weight: float = 1.0, name: Optional[str] = None):
+        super().__init__(weight, name)
+        self.max_bonus = max_bonus
+        self.key = key
+        self.neutral = neutral
+
+    def score(self, ctx: DecisionContext) -> np.ndarray:
+        probs = ctx.lookup(self.key)
+        return np.where(np.isnan(probs), 0.0, (probs - self.neutral) * 2 * self.max_bonus)
+
+
+class VotingAccuracyDimension(ScoringDimension):
+    """
+    投票模式维度: 按投票模式（pattern_fn 的结果）查表加分，可乘以紧急度等乘数
+
+    示例:
+        >>> VotingAccuracyDimension(analyzer.analyze,
+        ...                         {'protect_wolf': 28, 'accurate': -22},
+        ...                         multiplier=lambda ctx: 1.5)
+    """
+
+    name = 'voting_accuracy'
+
+    def __init__(
+        self,
+        pattern_fn: Callable[[str, Dict[str, Any]], str],
+        bonuses: Dict[str, float],
+        multiplier: Optional[Callable[[DecisionContext], float]] = None,
+        weight: float = 1.0,
+        name: Optional[str] = None
+    ):
+        super().__init__(weight, name)
+        self.pattern_fn = pattern_fn
+        self.bonuses = dict(bonuses)
+        self.multiplier = multiplier
+
+    def patterns(self, ctx: DecisionContext) -> Sequence[str]:
+        """候选人的投票模式（缓存在ctx中，决策理由共用）"""
+        return ctx.per_candidate(f"{self.name}:pattern", lambda c: self.pattern_fn(c, ctx.raw))
+
+    def score(self, ctx: DecisionContext) -> np.ndarray:
+        bonus = np.array([self.bonuses.get(p, 0.0) for p in self.patterns(ctx)], dtype=np.float64)
+        if self.multiplier is not None:
+            bonus = bonus * self.multiplier(ctx)
+        return bonus
+
+
+class FeatureCountDimension(ScoringDimension):
+    """
+    行为计数维度: 计数 >= min_count 时加 min(计数 * per_count, cap)
+
+    示例:
+        >>> FeatureCountDimension('injection_attempts', per_count=22, cap=45)
+    """
+
+    fusable = True
+
+    def __init__(self, field: str, per_count: float, cap: float, min_count: float = 1.0,
+                 weight: float = 1.0, name: Optional[str] = None):
+        super().__init__(weight, name or field)
+        self.field = field
+        self.per_count = per_count
+        self.cap = cap
+        self.min_count = min_count
+
+    def score(self, ctx: DecisionContext) -> np.ndarray:
+        counts = ctx.feature(self.field)
+        return np.where(counts >= self.min_count, np.minimum(counts * self.per_count, self.cap), 0.0)
+
+    @classmethod
+    def fuse(cls, dims, weights):
+        fields = [d.field for d in dims]
+        per_count = np.array([d.per_count for d in dims], dtype=np.float64)
+        cap = np.array([d.cap for d in dims], dtype=np.float64)
+        min_count = np.array([d.min_count for d in dims], dtype=np.float64)
+        weight = np.array(weights, dtype=np.float64)
+
+        def fused(ctx: DecisionContext) -> np.ndarray:
+            counts = ctx.features(fields)
+            return np.where(counts >= min_count, np.minimum(counts * per_count, cap), 0.0) @ weight
+        return fused
+
+
+class FlagDimension(ScoringDimension):
+    """布尔标记维度: 标记为真时加 value（负数为减分）"""
+
+    fusable = True
+
+    def __init__(self, field: str, value: float, weight: float = 1.0, name: Optional[str] = None):
+        super().__init__(weight, name or field)
+        self.field = field
+        self.value = value
+
+    def score(self, ctx: DecisionContext) -> np.ndarray:
+        return np.where(ctx.flag(self.field), float(self.value), 0.0)
+
+    @classmethod
+    def fuse(cls, dims, weights):
+        fields = [d.field for d in dims]
+        values = np.array([d.value * w for d, w in zip(dims, weights)], dtype=np.float64)
+        return lambda ctx: ctx.flags(fields) @ values
+
+
+class SeerCheckDimension(ScoringDimension):
+    """
+    预言家查验维度
+
+    查验结果包含"wolf"视为狼人；good_markers 为None时其余结果都视为好人，
+    否则只有包含其中某个标记的结果视为好人。strings_only=True 时忽略非字符串结果。
+    wolf_override 不为None时该维度为OVERRIDE：查验为狼人的候选人最终分数直接取该值。
+    """
+
+    name = 'seer_check'
+
+    def __init__(
+        self,
+        wolf: float = 0.0,
+        good: float = 0.0,
+        good_markers: Optional[Sequence[str]] = None,
+        strings_only: bool = False,
+        wolf_override: Optional[float] = None,
+        key: str = 'seer_checks',
+        weight: float = 1.0,
+        name: Optional[str] = None
+    ):
+        super().__init__(weight, name)
+        self.wolf = wolf
+        self.good = good
+        self.good_markers = tuple(good_markers) if good_markers is not None else None
+        self.strings_only = strings_only
+        self.wolf_override = wolf_override
+        self.key = key
+        if wolf_override is not None:
+            self.combine = OVERRIDE
+
+    def verdicts(self, ctx: DecisionContext) -> Sequence[str]:
+        """候选人的查验结论: 'wolf' / 'good' / ''（未查验或无法判断）"""
+        def compute():
+            markers = self.good_markers
+            return ['' if text is None else 'wolf' if "wolf" in text else
+                    'good' if markers is None or any(m in text for m in markers) else ''
+                    for text in self._texts(ctx)]
+        return ctx.column(f"seer:{self.key}:{self.strings_only}:{self.good_markers}", compute)
+
+    def _texts(self, ctx: DecisionContext) -> List[Optional[str]]:
+        """候选人查验结果的小写文本（未查验或被忽略时为None，同一上下文的查验维度共用）"""
+        def compute():
+            checks = ctx.section(self.key)
+            texts = [None] * len(ctx.candidates)
+            for index, candidate in enumerate(ctx.candidates):
+                if candidate in checks:
+                    result = checks[candidate]
+                    if not self.strings_only or isinstance(result, str):
+                        texts[index] = str(result).lower()
+            return texts
+        return ctx.column(f"seer:{self.key}:{self.strings_only}", compute)
+
+    def score(self, ctx: DecisionContext) -> np.ndarray:
+        verdicts = self.verdicts(ctx)
+        if self.wolf_override is not None:
+            return np.array([self.wolf_override if v == 'wolf' else np.nan for v in verdicts], dtype=np.float64)
+        return np.array([self.wolf if v == 'wolf' else self.good if v == 'good' else 0.0 for v in verdicts],
+                        dtype=np.float64)
+
+
+class EndgameDimension(ScoringDimension):
+    """残局维度（MULTIPLY）: 存活人数（上下文中的 key）不超过 max_alive 时全部分数乘以 factor"""
+
+    name = 'endgame'
+    combine = MULTIPLY
+
+    def __init__(self, factor: float, max_alive: int = 6, key: str = 'alive_players', default: int = 12,
+                 weight: float = 1.0, name: Optional[str] = None):
+        super().__init__(weight, name)
+        self.factor = factor
+        self.max_alive = max_alive
+        self.key = key
+        self.default = default
+
+    def score(self, ctx: DecisionContext) -> np.ndarray:
+        endgame = ctx.cached(f"endgame:{self.key}",
+                            lambda: to_number(ctx.raw.get(self.key, self.default), self.default) <= self.max_alive)
+        return np.full(len(ctx.candidates), self.factor if endgame else 1.0)
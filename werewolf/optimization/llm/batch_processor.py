@@ -0,0 +1,480 @@
+"""
+LLM异步批处理器
+
+把检测器的LLM请求放入异步优先级队列，在很短的时间窗口内攒成微批次后按优先级派发，
+并限制同时在途的请求数：
+
+- 微批次: 第一个请求到达后等待 batch_window 秒（或攒满 max_batch_size 个）再派发，
+  同一条发言的多个检测请求在同一批内按优先级排序
+- 有界并发: 同时在途的请求不超过 max_concurrency，其余留在队列中（上游限流时不会
+  一次打出几十个请求）；后端提供 complete_batch 时整批作为一次调用
+- 优先级: 数值越小越先派发（PRIORITY_HIGH / PRIORITY_NORMAL / PRIORITY_LOW）
+- 截止时间: 派发前已过期的请求不再调用后端，执行中超时的请求被取消，均返回EXPIRED
+- 取消: cancel(request_id) 或等待方被取消时撤回请求，返回CANCELLED
+- 返回类型化的 LLMResponse（状态、文本、错误、排队与执行耗时、批次大小）
+
+处理器绑定创建它的事件循环；后端可以是带 complete(request) 协程方法的对象，
+也可以是 async def backend(request) -> str 的可调用对象。
+
+测试: python -m pytest tests/test_llm_batch.py（伪后端上的行为校验）
+突发延迟对比: python benchmarks/llm_batch.py
+"""
+
+import time
+import uuid
+import heapq
+import asyncio
+import logging
+import itertools
+from enum import Enum
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+
+def deadline_in(seconds: Optional[float]) -> Optional[float]:
+    """
+    从现在起 seconds 秒后的截止时间（time.monotonic时钟）
+
+    参数:
+        seconds: 秒数，None或<=0表示没有截止时间
+
+    返回:
+        截止时间或None
+    """
+    if not seconds or seconds <= 0:
+        return None
+    return time.monotonic() + seconds
+
+
+@dataclass
+class LLMRequest:
+    """
+    一次LLM请求
+
+    属性:
+        prompt: 提示词（作为单条user消息发送）
+        model: 模型名称
+        temperature: 温度参数
+        caller: 调用方（检测器名，记入LLM账本）
+        priority: 优先级，数值越小越先派发
+        deadline: 截止时间（time.monotonic时钟，None表示不限）
+        request_id: 请求ID（用于取消）
+        metadata: 附加信息（后端可读取）
+    """
+    prompt: str
+    model: str = ''
+    temperature: float = 0.1
+    caller: str = ''
+    priority: int = PRIORITY_NORMAL
+    deadline: Optional[float] = None
+    request_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def remaining(self, now: Optional[float] = None) -> Optional[float]:
+        """距截止时间的剩余秒数（没有截止时间时为None）"""
+        if self.deadline is None:
+            return None
+        return self.deadline - (time.monotonic() if now is None else now)
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        remaining = self.remaining(now)
+        return remaining is not None and remaining <= 0
+
+
+class ResponseStatus(str, Enum):
+    """响应状态"""
+    OK = "ok"
+    ERROR = "error"
+    EXPIRED = "expired"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class LLMResponse:
+    """
+    LLM请求的结果
+
+    属性:
+        request_id: 对应的请求ID
+        status: 响应状态
+        content: LLM返回的文本（仅OK时有值）
+        error: 错误描述（ERROR时为异常信息）
+        queue_ms: 排队耗时（毫秒）
+        latency_ms: 后端执行耗时（毫秒，未派发时为0）
+        batch_size: 所在批次的请求数
+    """
+    request_id: str
+    status: ResponseStatus
+    content: Optional[str] = None
+    error: Optional[str] = None
+    queue_ms: float = 0.0
+    latency_ms: float = 0.0
+    batch_size: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == ResponseStatus.OK
+
+    def text(self, default: str = "{}") -> str:
+        """成功时返回文本，否则返回默认值（检测器约定的空JSON）"""
+        return self.content if self.ok and self.content is not None else default
+
+
+class LLMBackend:
+    """
+    批处理器后端接口
+
+    子类实现 complete(request)；支持一次调用处理多个提示词的后端可以额外实现
+    complete_batch(requests)，返回与请求一一对应的文本或异常
+    """
+
+    async def complete(self, request: LLMRequest) -> str:
+        raise NotImplementedError
+
+    complete_batch: Optional[Callable[[List[LLMRequest]], Awaitable[List[Any]]]] = None
+
+
+class OpenAIBackend(LLMBackend):
+    """AsyncOpenAI客户端后端（经过LLM账本记录）"""
+
+    def __init__(self, client: Any):
+        """
+        参数:
+            client: AsyncOpenAI客户端
+        """
+        self.client = client
+
+    async def complete(self, request: LLMRequest) -> str:
+        from werewolf.common import llm_ledger
+
+        response = await llm_ledger.acreate_completion(
+            self.client,
+            caller=request.caller,
+            model=request.model,
+            messages=[{"role": "user", "content": request.prompt}],
+            temperature=request.temperature
+        )
+        return response.choices[0].message.content
+
+
+@dataclass
+class _Pending:
+    """队列中/执行中的请求"""
+    request: LLMRequest
+    future: asyncio.Future
+    enqueued: float
+    task: Optional[asyncio.Task] = None
+    started: float = 0.0
+    batch_size: int = 0
+
+
+class LLMBatchProcessor:
+    """
+    LLM请求的异步微批处理队列
+
+    示例:
+        >>> processor = LLMBatchProcessor(OpenAIBackend(client), max_concurrency=8)
+        >>> response = await processor.process(LLMRequest("...", model="deepseek-chat",
+        ...                                                priority=PRIORITY_HIGH, deadline=deadline_in(10)))
+        >>> text = response.text()
+        >>> await processor.close()
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        batch_window: float = 0.005,
+        max_batch_size: int = 16,
+        max_concurrency: int = 8,
+        name: str = 'llm'
+    ):
+        """
+        初始化批处理器
+
+        参数:
+            backend: LLMBackend 或 async def backend(request) -> str
+            batch_window: 微批次等待窗口（秒，0表示不等待）
+            max_batch_size: 单批最大请求数
+            max_concurrency: 同时在途的最大请求数（complete_batch后端按批计）
+            name: 名称（日志与统计）
+        """
+        self._complete = getattr(backend, 'complete', backend)
+        self._complete_batch = getattr(backend, 'complete_batch', None)
+        self.batch_window = max(0.0, batch_window)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.name = name
+
+        self._heap: List[Tuple[int, float, int, str]] = []
+        self._pending: Dict[str, _Pending] = {}
+        self._sequence = itertools.count()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False
+        self._stats = {'submitted': 0, 'ok': 0, 'error': 0, 'expired': 0, 'cancelled': 0,
+                       'batches': 0, 'batched_requests': 0, 'peak_in_flight': 0}
+        self._in_flight = 0
+
+    # ==================== 提交与取消 ====================
+
+    def submit(self, request: LLMRequest) -> asyncio.Future:
+        """
+        提交请求（必须在处理器所属的事件循环中调用）
+
+        参数:
+            request: LLM请求
+
+        返回:
+            结果为 LLMResponse 的Future（不会以异常结束）
+        """
+        self._ensure_started()
+        loop = self._loop
+        future = loop.create_future()
+        if self._closed:
+            future.set_result(LLMResponse(request.request_id, ResponseStatus.CANCELLED, error="processor closed"))
+            return future
+        if request.request_id in self._pending:
+            raise ValueError(f"duplicate request_id: {request.request_id}")
+
+        self._pending[request.request_id] = _Pending(request, future, time.monotonic())
+        deadline = request.deadline if request.deadline is not None else float('inf')
+        heapq.heappush(self._heap, (request.priority, deadline, next(self._sequence), request.request_id))
+        self._stats['submitted'] += 1
+        self._wakeup.set()
+        return future
+
+    async def process(self, request: LLMRequest) -> LLMResponse:
+        """
+        提交请求并等待结果（等待方被取消时撤回请求）
+
+        参数:
+            request: LLM请求
+
+        返回:
+            LLMResponse
+        """
+        future = self.submit(request)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.cancel(request.request_id)
+            raise
+
+    async def process_many(self, requests: List[LLMRequest]) -> List[LLMResponse]:
+        """并发提交多个请求，按原顺序返回结果"""
+        return list(await asyncio.gather(*(self.process(r) for r in requests)))
+
+    def cancel(self, request_id: str) -> bool:
+        """
+        取消请求（排队中直接撤回，执行中取消后端调用）
+
+        参数:
+            request_id: 请求ID
+
+        返回:
+            是否取消了尚未完成的请求
+        """
+        pending = self._pending.get(request_id)
+        if pending is None or pending.future.done():
+            return False
+        if pending.task is not None:
+            # 整批调用（complete_batch）中的单个请求无法单独中止，只撤回结果
+            if pending.batch_size <= 1 or self._complete_batch is None:
+                pending.task.cancel()
+        self._finish(pending, ResponseStatus.CANCELLED, error="cancelled")
+        return True
+
+    async def close(self) -> None:
+        """停止派发，取消排队中的请求并等待执行中的请求结束"""
+        if self._closed:
+            return
+        self._closed = True
+        for pending in list(self._pending.values()):
+            if pending.task is None:
+                self._finish(pending, ResponseStatus.CANCELLED, error="processor closed")
+        self._heap.clear()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        running = [p.task for p in self._pending.values() if p.task is not None]
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    async def __aenter__(self) -> 'LLMBatchProcessor':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        统计信息
+
+        返回:
+            各状态请求数、批次数、平均批次大小、当前排队/在途数、在途峰值
+        """
+        stats = dict(self._stats)
+        stats['avg_batch_size'] = stats['batched_requests'] / stats['batches'] if stats['batches'] else 0.0
+        stats['queued'] = sum(1 for p in self._pending.values() if p.task is None)
+        stats['in_flight'] = self._in_flight
+        return stats
+
+    # ==================== 派发 ====================
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._wakeup = asyncio.Event()
+        elif self._loop is not loop:
+            raise RuntimeError(f"LLMBatchProcessor '{self.name}' is bound to another event loop")
+        if self._worker is None and not self._closed:
+            self._worker = loop.create_task(self._run(), name=f"llm-batch-{self.name}")
+
+    async def _run(self) -> None:
+        while not self._closed:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await self._collect_window()
+            size = min(len(self._heap), self.max_batch_size)
+            if self._complete_batch is not None:
+                await self._slots.acquire()
+                batch = self._pop(size, size)
+                if not batch:
+                    self._slots.release()
+                    continue
+                self._start(batch, self._execute_batch(batch))
+                dispatched = len(batch)
+            else:
+                # 逐个拿到并发槽位后再从队列取出：等待槽位期间新到的高优先级请求先派发
+                dispatched = 0
+                while self._heap and dispatched < size:
+                    await self._slots.acquire()
+                    batch = self._pop(1, size)
+                    if not batch:
+                        self._slots.release()
+                        break
+                    self._start(batch, self._execute(batch[0]))
+                    dispatched += 1
+            if dispatched:
+                self._stats['batches'] += 1
+                self._stats['batched_requests'] += dispatched
+
+    async def _collect_window(self) -> None:
+        """第一个请求到达后等待窗口结束或攒满一批"""
+        if self.batch_window <= 0:
+            return
+        end = time.monotonic() + self.batch_window
+        while len(self._heap) < self.max_batch_size:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    def _pop(self, count: int, batch_size: int) -> List[_Pending]:
+        """按优先级取出至多count个请求（跳过已取消的请求，过期的请求直接返回EXPIRED）"""
+        batch: List[_Pending] = []
+        now = time.monotonic()
+        while self._heap and len(batch) < count:
+            _, _, _, request_id = heapq.heappop(self._heap)
+            pending = self._pending.get(request_id)
+            if pending is None or pending.future.done():
+                continue
+            if pending.request.expired(now):
+                self._finish(pending, ResponseStatus.EXPIRED, error="deadline exceeded before dispatch")
+                continue
+            pending.batch_size = batch_size
+            batch.append(pending)
+        return batch
+
+    def _start(self, batch: List[_Pending], coro: Awaitable) -> None:
+        task = self._loop.create_task(coro)
+        now = time.monotonic()
+        for pending in batch:
+            pending.task = task
+            pending.started = now
+        self._in_flight += len(batch)
+        self._stats['peak_in_flight'] = max(self._stats['peak_in_flight'], self._in_flight)
+
+    async def _execute(self, pending: _Pending) -> None:
+        request = pending.request
+        try:
+            remaining = request.remaining()
+            if remaining is None:
+                content = await self._complete(request)
+            else:
+                content = await asyncio.wait_for(self._complete(request), max(0.0, remaining))
+            self._finish(pending, ResponseStatus.OK, content=content)
+        except asyncio.TimeoutError:
+            self._finish(pending, ResponseStatus.EXPIRED, error="deadline exceeded")
+        except asyncio.CancelledError:
+            self._finish(pending, ResponseStatus.CANCELLED, error="cancelled")
+        except Exception as e:
+            logger.error(f"[LLM BATCH] {self.name}: {request.caller or 'request'} failed: {e}")
+            self._finish(pending, ResponseStatus.ERROR, error=str(e))
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def _execute_batch(self, batch: List[_Pending]) -> None:
+        deadlines = [p.request.remaining() for p in batch if p.request.deadline is not None]
+        timeout = max(0.0, min(deadlines)) if deadlines else None
+        try:
+            results = await asyncio.wait_for(self._complete_batch([p.request for p in batch]), timeout)
+            if len(results) != len(batch):
+                raise ValueError(f"complete_batch returned {len(results)} results for {len(batch)} requests")
+            for pending, result in zip(batch, results):
+                if isinstance(result, BaseException):
+                    self._finish(pending, ResponseStatus.ERROR, error=str(result))
+                else:
+                    self._finish(pending, ResponseStatus.OK, content=result)
+        except asyncio.TimeoutError:
+            for pending in batch:
+                self._finish(pending, ResponseStatus.EXPIRED, error="deadline exceeded")
+        except asyncio.CancelledError:
+            for pending in batch:
+                self._finish(pending, ResponseStatus.CANCELLED, error="cancelled")
+        except Exception as e:
+            logger.error(f"[LLM BATCH] {self.name}: batch of {len(batch)} failed: {e}")
+            for pending in batch:
+                self._finish(pending, ResponseStatus.ERROR, error=str(e))
+        finally:
+            self._in_flight -= len(batch)
+            self._slots.release()
+
+    def _finish(self, pending: _Pending, status: ResponseStatus, content: Optional[str] = None,
+                error: Optional[str] = None) -> None:
+        """设置结果（同一请求只生效一次）"""
+        self._pending.pop(pending.request.request_id, None)
+        if pending.future.done():
+            return
+        now = time.monotonic()
+        started = pending.started or now
+        pending.future.set_result(LLMResponse(
+            request_id=pending.request.request_id,
+            status=status,
+            content=content,
+            error=error,
+            queue_ms=(started - pending.enqueued) * 1000.0,
+            latency_ms=(now - started) * 1000.0 if pending.started else 0.0,
+            batch_size=pending.batch_size,
+        ))
+        self._stats[status.value] += 1
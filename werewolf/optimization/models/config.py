@@ -0,0 +1,249 @@
+"""
+配置模型
+
+评分权重、缓存与LLM批处理的 Pydantic v2 配置模型，可从YAML文件与环境变量加载，
+优先级: 默认值 < YAML < 环境变量（只覆盖已设置的变量）。
+
+环境变量:
+    SCORING_WEIGHTS: JSON {"引擎": {"维度": 权重或{"weight": 权重, "enabled": 布尔}}}，
+        例: {"vote": {"trust": 1.2}, "poison": {"wolf_probability": 0}}
+    CACHE_MAX_ENTRIES / CACHE_MAX_BYTES / CACHE_TTL / CACHE_SHARDS: 缓存条目数与字节数上限、
+        默认过期时间（秒，0=不过期）、分片数
+    CACHE_NAMESPACES: JSON {"命名空间": 配额比例}；CACHE_DETECTOR_TTL: LLM检测结果缓存时间（秒，0=不缓存）
+    LLM_BATCH_ENABLED / LLM_BATCH_WINDOW_MS / LLM_BATCH_MAX_SIZE / LLM_BATCH_CONCURRENCY /
+    LLM_BATCH_DEADLINE: 检测器LLM批处理（见 werewolf.core.async_agent）
+
+YAML格式与模型结构相同，见 werewolf/optimization/config/optimization.example.yaml。
+"""
+
+import os
+import json
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+# 环境变量 -> 配置路径
+ENV_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'SCORING_WEIGHTS': ('scoring',),
+    'CACHE_MAX_ENTRIES': ('cache', 'max_entries'),
+    'CACHE_TTL': ('cache', 'default_ttl'),
+    'CACHE_SHARDS': ('cache', 'shards'),
+    'CACHE_MAX_BYTES': ('cache', 'max_bytes'),
+    'CACHE_NAMESPACES': ('cache', 'namespaces'),
+    'CACHE_DETECTOR_TTL': ('cache', 'detector_ttl'),
+    'LLM_BATCH_ENABLED': ('llm', 'batch_enabled'),
+    'LLM_BATCH_WINDOW_MS': ('llm', 'batch_window_ms'),
+    'LLM_BATCH_MAX_SIZE': ('llm', 'batch_max_size'),
+    'LLM_BATCH_CONCURRENCY': ('llm', 'batch_concurrency'),
+    'LLM_BATCH_DEADLINE': ('llm', 'batch_deadline'),
+}
+# 值为JSON的环境变量
+JSON_ENV_FIELDS = {'SCORING_WEIGHTS', 'CACHE_NAMESPACES'}
+
+# 缓存命名空间的默认配额比例
+DEFAULT_CACHE_NAMESPACES: Dict[str, float] = {
+    'detectors': 0.4,
+    'prompts': 0.3,
+    'decisions': 0.2,
+    'default': 0.1,
+}
+
+
+class DimensionConfig(BaseModel):
+    """
+    单个评分维度的配置（也可以直接写权重数字）
+
+    属性:
+        weight: 权重（覆盖维度的默认权重）
+        enabled: 是否启用（False等价于权重0）
+    """
+
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
+    weight: float = Field(default=1.0, ge=0.0)
+    enabled: bool = True
+
+    @model_validator(mode='before')
+    @classmethod
+    def _from_number(cls, data: Any) -> Any:
+        if isinstance(data, (int, float)) and not isinstance(data, bool):
+            return {'weight': data}
+        return data
+
+    @property
+    def effective_weight(self) -> float:
+        return self.weight if self.enabled else 0.0
+
+
+class ScoringConfig(BaseModel):
+    """
+    评分引擎的维度权重（键为 DecisionEngine 的维度名）
+
+    属性:
+        vote: 投票引擎（werewolf.villager.decision_makers.build_vote_engine）
+        poison: 毒药引擎（werewolf.witch.decision_engine.build_poison_engine）
+    """
+
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
+    vote: Dict[str, DimensionConfig] = Field(default_factory=dict)
+    poison: Dict[str, DimensionConfig] = Field(default_factory=dict)
+
+    def weights(self, engine: str) -> Dict[str, float]:
+        """
+        引擎的权重配置
+
+        参数:
+            engine: 引擎名（vote / poison）
+
+        返回:
+            {维度名: 权重}，未配置的维度不出现
+        """
+        dimensions: Dict[str, DimensionConfig] = getattr(self, engine, None) or {}
+        return {name: dim.effective_weight for name, dim in dimensions.items()}
+
+
+class CacheConfig(BaseModel):
+    """
+    内存缓存配置（werewolf.common.cache.CacheManager）
+
+    属性:
+        max_entries: 最大条目数（按命名空间比例分配，超出时按LRU淘汰）
+        max_bytes: 最大字节数（估算值，按命名空间比例分配）
+        default_ttl: 默认过期时间（秒，0表示不过期）
+        shards: 分片数（每个分片一把锁）
+        namespaces: {命名空间: 配额比例}，必须包含default
+        detector_ttl: LLM检测结果缓存时间（秒，0表示不缓存）
+    """
+
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
+    max_entries: int = Field(default=4096, ge=1)
+    max_bytes: int = Field(default=64 * 1024 * 1024, ge=1024)
+    default_ttl: float = Field(default=0.0, ge=0.0)
+    shards: int = Field(default=16, ge=1, le=256)
+    namespaces: Dict[str, float] = Field(default_factory=lambda: dict(DEFAULT_CACHE_NAMESPACES))
+    detector_ttl: float = Field(default=600.0, ge=0.0)
+
+    @model_validator(mode='after')
+    def _check_namespaces(self) -> 'CacheConfig':
+        if 'default' not in self.namespaces:
+            raise ValueError("cache namespaces must include 'default'")
+        if any(share <= 0 for share in self.namespaces.values()):
+            raise ValueError("cache namespace shares must be positive")
+        return self
+
+
+class LLMConfig(BaseModel):
+    """
+    检测器LLM批处理配置
+
+    属性:
+        batch_enabled: 检测器异步调用是否经过批处理器
+        batch_window_ms: 微批次等待窗口（毫秒）
+        batch_max_size: 单批最大请求数
+        batch_concurrency: 每个客户端同时在途的请求上限
+        batch_deadline: 请求截止时间（秒，0表示不限）
+    """
+
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
+    batch_enabled: bool = False
+    batch_window_ms: float = Field(default=5.0, ge=0.0)
+    batch_max_size: int = Field(default=16, ge=1)
+    batch_concurrency: int = Field(default=8, ge=1)
+    batch_deadline: float = Field(default=0.0, ge=0.0)
+
+
+class OptimizationConfig(BaseModel):
+    """
+    优化模块总配置
+
+    示例:
+        >>> config = OptimizationConfig.load("optimization.yaml")
+        >>> config.scoring.weights("poison")
+        {'wolf_probability': 0.0}
+    """
+
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
+    scoring: ScoringConfig = Field(default_factory=ScoringConfig)
+    cache: CacheConfig = Field(default_factory=CacheConfig)
+    llm: LLMConfig = Field(default_factory=LLMConfig)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None, environ: Optional[Mapping[str, str]] = None) -> 'OptimizationConfig':
+        """
+        加载配置（默认值 < YAML < 环境变量）
+
+        参数:
+            path: YAML文件路径（None表示不读文件）
+            environ: 环境变量（默认os.environ）
+
+        返回:
+            OptimizationConfig
+
+        异常:
+            pydantic.ValidationError: 配置值不合法
+            ValueError: YAML或JSON格式错误
+        """
+        data = read_yaml(path) if path else {}
+        merge(data, env_overrides(environ))
+        return cls.model_validate(data)
+
+    @classmethod
+    def from_yaml(cls, path: str) -> 'OptimizationConfig':
+        """只从YAML文件加载"""
+        return cls.model_validate(read_yaml(path))
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> 'OptimizationConfig':
+        """只从环境变量加载"""
+        return cls.model_validate(env_overrides(environ))
+
+
+def read_yaml(path: str) -> Dict[str, Any]:
+    """读取YAML配置文件（空文件为空配置）"""
+    import yaml
+
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            data = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise ValueError(f"invalid YAML in {path}: {e}") from e
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: top level must be a mapping")
+    return data
+
+
+def env_overrides(environ: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    """已设置（非空）的环境变量转换为嵌套配置字典，值的类型由模型验证时转换"""
+    environ = os.environ if environ is None else environ
+    data: Dict[str, Any] = {}
+    for name, path in ENV_FIELDS.items():
+        raw = environ.get(name, '')
+        if not raw:
+            continue
+        value: Any = raw
+        if name in JSON_ENV_FIELDS:
+            try:
+                value = json.loads(raw)
+            except ValueError as e:
+                raise ValueError(f"{name} is not valid JSON: {e}") from e
+        if len(path) == 1:
+            merge(data, {path[0]: value})
+        else:
+            data.setdefault(path[0], {})[path[1]] = value
+    return data
+
+
+def merge(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """把overrides递归合并进base（字典合并，其他值覆盖）"""
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merge(base[key], value)
+        else:
+            base[key] = value
+    return base
@@ -0,0 +1,158 @@
+"""
+输入验证模型
+
+投票/技能决策输入的 Pydantic v2 模型。验证分两条路径:
+
+- 完整验证（model_validate / VoteDecisionInput.from_sdk）: 只用于SDK边界，
+  即 req.message、req.name 等外部输入
+- 快速路径（VoteDecisionInput.trusted，基于 model_construct）: 智能体内部从记忆构建的
+  player_data、game_state 已由内部代码保证格式，不再逐字段验证，也不复制
+
+玩家数据与游戏状态随角色不同字段很多，模型只声明决策会读取的字段，其余字段原样保留（extra='allow'）。
+可变默认值直接写字面量（pydantic按实例复制）：default_factory=list/dict 会让 model_construct
+每次对内置类型做签名检查，快速路径慢一个数量级。
+"""
+
+from typing import Annotated, Any, Dict, List, Optional, Sequence, Union
+
+from pydantic import BaseModel, ConfigDict, Field, NonNegativeInt, StringConstraints, model_validator
+
+# 与 DataValidator.validate_player_name 相同的格式: "No.1"、"Player1"、"玩家1"
+PLAYER_NAME_PATTERN = r'^(No\.\d+|Player\d+|玩家\d+)$'
+
+PlayerName = Annotated[str, StringConstraints(strip_whitespace=True, pattern=PLAYER_NAME_PATTERN)]
+CandidateList = Annotated[List[PlayerName], Field(min_length=1)]
+
+
+class PlayerState(BaseModel):
+    """
+    单个玩家的行为数据（player_data[玩家]）
+
+    属性:
+        alive: 是否存活
+        malicious_injection: 是否检测到恶意注入
+        injection_attempts: 注入次数
+        false_quotes: 虚假引用次数
+        contradictions: 矛盾次数
+        claimed_role: 声称的身份
+        vote_history: 投票记录
+    """
+
+    model_config = ConfigDict(extra='allow')
+
+    alive: bool = True
+    malicious_injection: bool = False
+    injection_attempts: NonNegativeInt = 0
+    false_quotes: NonNegativeInt = 0
+    contradictions: NonNegativeInt = 0
+    claimed_role: Optional[str] = None
+    vote_history: List[Dict[str, Any]] = []
+
+
+class GameState(BaseModel):
+    """
+    游戏状态（game_state）
+
+    属性:
+        current_day: 当前天数（从1开始）
+        alive_count: 存活人数（未知为None）
+        game_phase: 游戏阶段（early / mid / late）
+        is_endgame: 是否残局
+        sheriff: 警长
+        dead_players: 出局玩家
+    """
+
+    model_config = ConfigDict(extra='allow')
+
+    current_day: int = Field(default=1, ge=1)
+    alive_count: Optional[NonNegativeInt] = None
+    game_phase: Optional[str] = None
+    is_endgame: bool = False
+    sheriff: Optional[str] = None
+    dead_players: List[str] = []
+
+
+class VoteDecisionInput(BaseModel):
+    """
+    投票（及毒药、开枪等选人技能）决策的输入
+
+    属性:
+        candidates: 候选人（去重、去掉自己，至少一人）
+        my_name: 自己的名字
+        game_state: 游戏状态
+        player_data: 玩家行为数据
+        trust_scores: 信任分数
+        seer_checks: 预言家查验结果
+
+    示例:
+        >>> vote_input = VoteDecisionInput.from_sdk(req.message, my_name)   # SDK边界，完整验证
+        >>> vote_input = VoteDecisionInput.trusted(choices, context)        # 内部数据，快速路径
+    """
+
+    candidates: CandidateList
+    my_name: Optional[PlayerName] = None
+    game_state: GameState = Field(default_factory=GameState)
+    player_data: Dict[PlayerName, PlayerState] = {}
+    trust_scores: Dict[PlayerName, float] = {}
+    seer_checks: Dict[PlayerName, Any] = {}
+
+    @model_validator(mode='after')
+    def _normalize_candidates(self) -> 'VoteDecisionInput':
+        """候选人去重并去掉自己"""
+        candidates = [c for c in dict.fromkeys(self.candidates) if c != self.my_name]
+        if not candidates:
+            raise ValueError("no candidates left after removing self")
+        self.candidates = candidates
+        return self
+
+    @classmethod
+    def from_sdk(cls, message: Union[str, Sequence[str], None], my_name: Optional[str] = None) -> 'VoteDecisionInput':
+        """
+        解析并完整验证SDK传入的候选人
+
+        参数:
+            message: 逗号分隔的 req.message（如 "No.1,No.3,No.5"）或 req.choices 列表
+            my_name: 自己的名字（从候选人中去掉）
+
+        返回:
+            VoteDecisionInput
+
+        异常:
+            pydantic.ValidationError: 名字格式不对或没有候选人
+        """
+        if isinstance(message, str) or message is None:
+            names = [name for name in (message or '').split(',') if name.strip()]
+        else:
+            names = list(message)
+        return cls.model_validate({'candidates': names, 'my_name': my_name or None})
+
+    @classmethod
+    def trusted(cls, candidates: Sequence[str], context: Dict[str, Any]) -> 'VoteDecisionInput':
+        """
+        内部数据快速路径（model_construct: 不验证、不复制）
+
+        player_data 的值保持原始字典，需要模型时用 player(name)。
+
+        参数:
+            candidates: 已解析的候选人
+            context: 智能体构建的决策上下文（_build_context 的结果）
+
+        返回:
+            VoteDecisionInput
+        """
+        game_state = context.get('game_state')
+        return cls.model_construct(
+            candidates=list(candidates),
+            my_name=context.get('my_name'),
+            game_state=GameState.model_construct(**game_state) if isinstance(game_state, dict) else GameState(),
+            player_data=context.get('player_data') or {},
+            trust_scores=context.get('trust_scores') or {},
+            seer_checks=context.get('seer_checks') or {},
+        )
+
+    def player(self, name: str) -> PlayerState:
+        """玩家的 PlayerState（快速路径中的原始字典按需构造，不验证）"""
+        data = self.player_data.get(name)
+        if isinstance(data, PlayerState):
+            return data
+        return PlayerState.model_construct(**data) if isinstance(data, dict) else PlayerState()
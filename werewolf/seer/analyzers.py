@@ -10,6 +10,7 @@ SeerAgent继承自BaseGoodAgent，使用villager模块的通用分析器。
 
 from typing import Dict, List, Tuple, Optional, Any
 from agent_build_sdk.utils.logger import logger
+from werewolf.common import game_scope
 from werewolf.core.base_components import BaseAnalyzer
 from .config import SeerConfig
 
@@ -32,8 +33,8 @@ class CheckPriorityCalculator(BaseAnalyzer):
     
     def __init__(self, config: SeerConfig):
         super().__init__(config)
-        # 计算缓存
-        self._priority_cache = {}
+        # 计算缓存（键含玩家名与本局上下文，登记到对局作用域，每局结束时清空）
+        self._priority_cache = game_scope.register('seer.priority_cache', {})
         self._cache_hits = 0
         self._cache_misses = 0
     
@@ -8,6 +8,7 @@
 
 from typing import Dict, List, Tuple, Any
 from agent_build_sdk.utils.logger import logger
+from werewolf.common import game_scope
 from werewolf.core.base_components import BaseDecisionMaker
 from .config import SeerConfig
 
@@ -51,8 +52,8 @@ class CheckDecisionMaker(BaseDecisionMaker):
                 'trust_low': 40,
             }
         
-        # 决策缓存（企业级优化）
-        self._decision_cache = {}
+        # 决策缓存（企业级优化；登记到对局作用域，每局结束时清空）
+        self._decision_cache = game_scope.register('seer.decision_cache', {})
         self._cache_hits = 0
         self._cache_misses = 0
     
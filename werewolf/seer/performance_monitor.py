@@ -6,31 +6,44 @@
 """
 
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, field
-from collections import defaultdict
+from dataclasses import dataclass
+import itertools
 import time
 import json
-from pathlib import Path
 from agent_build_sdk.utils.logger import logger
+from werewolf.common import metrics
+
+
+ROLE = 'seer'
 
 
 @dataclass
 class PerformanceMetrics:
-    """性能指标数据类"""
+    """性能指标数据类（统一指标直方图的只读视图）"""
     operation: str
     count: int = 0
     total_time: float = 0.0
-    min_time: float = float('inf')
+    min_time: float = 0.0
     max_time: float = 0.0
     avg_time: float = 0.0
+    p50_time: float = 0.0
+    p95_time: float = 0.0
+    p99_time: float = 0.0
     
-    def update(self, elapsed_time: float):
-        """更新指标"""
-        self.count += 1
-        self.total_time += elapsed_time
-        self.min_time = min(self.min_time, elapsed_time)
-        self.max_time = max(self.max_time, elapsed_time)
-        self.avg_time = self.total_time / self.count
+    @classmethod
+    def from_snapshot(cls, operation: str, snapshot: Dict[str, float]) -> 'PerformanceMetrics':
+        """从直方图快照构建"""
+        return cls(
+            operation=operation,
+            count=int(snapshot['count']),
+            total_time=snapshot['sum'],
+            min_time=snapshot['min'],
+            max_time=snapshot['max'],
+            avg_time=snapshot['avg'],
+            p50_time=snapshot['p50'],
+            p95_time=snapshot['p95'],
+            p99_time=snapshot['p99'],
+        )
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -40,7 +53,10 @@ class PerformanceMetrics:
             'total_time_ms': round(self.total_time * 1000, 2),
             'min_time_ms': round(self.min_time * 1000, 2),
             'max_time_ms': round(self.max_time * 1000, 2),
-            'avg_time_ms': round(self.avg_time * 1000, 2)
+            'avg_time_ms': round(self.avg_time * 1000, 2),
+            'p50_time_ms': round(self.p50_time * 1000, 2),
+            'p95_time_ms': round(self.p95_time * 1000, 2),
+            'p99_time_ms': round(self.p99_time * 1000, 2)
         }
 
 
@@ -48,8 +64,11 @@ class PerformanceMonitor:
     """
     性能监控器（企业级五星标准）
     
+    数据统一记录到 werewolf.common.metrics（role=seer），本类只负责
+    计时、汇总与优化建议
+    
     功能：
-    - 操作耗时监控
+    - 操作耗时监控（含p50/p95/p99）
     - 缓存命中率统计
     - 性能瓶颈识别
     - 优化建议生成
@@ -57,11 +76,33 @@ class PerformanceMonitor:
     
     def __init__(self):
         """初始化监控器"""
-        self.metrics: Dict[str, PerformanceMetrics] = {}
-        self.cache_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {'hits': 0, 'misses': 0})
         self.start_times: Dict[str, float] = {}
+        self._op_ids = itertools.count()
         self.enabled = True
     
+    @property
+    def metrics(self) -> Dict[str, PerformanceMetrics]:
+        """按操作名汇总的指标"""
+        return {
+            op: PerformanceMetrics.from_snapshot(op, snapshot)
+            for op, snapshot in metrics.summarize_operations(role=ROLE).items()
+        }
+    
+    @property
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """按缓存名汇总的命中统计"""
+        counter = metrics.cache_requests()
+        role_idx = counter.label_names.index('role')
+        op_idx = counter.label_names.index('operation')
+        result_idx = counter.label_names.index('result')
+        stats: Dict[str, Dict[str, int]] = {}
+        for key, value in counter.series():
+            if key[role_idx] != ROLE:
+                continue
+            entry = stats.setdefault(key[op_idx], {'hits': 0, 'misses': 0})
+            entry['hits' if key[result_idx] == 'hit' else 'misses'] += int(value)
+        return stats
+    
     def start_operation(self, operation: str) -> str:
         """
         开始监控操作
@@ -75,8 +116,8 @@ class PerformanceMonitor:
         if not self.enabled:
             return operation
         
-        operation_id = f"{operation}_{id(self)}"
-        self.start_times[operation_id] = time.time()
+        operation_id = f"{operation}_{next(self._op_ids)}"
+        self.start_times[operation_id] = time.perf_counter()
         return operation_id
     
     def end_operation(self, operation_id: str):
@@ -86,34 +127,23 @@ class PerformanceMonitor:
         Args:
             operation_id: 操作ID
         """
-        if not self.enabled or operation_id not in self.start_times:
+        start = self.start_times.pop(operation_id, None)
+        if not self.enabled or start is None:
             return
         
-        elapsed = time.time() - self.start_times[operation_id]
-        del self.start_times[operation_id]
-        
         # 提取操作名称
         operation = operation_id.rsplit('_', 1)[0]
-        
-        # 更新指标
-        if operation not in self.metrics:
-            self.metrics[operation] = PerformanceMetrics(operation)
-        
-        self.metrics[operation].update(elapsed)
-        
-        # 记录慢操作
-        if elapsed > 0.1:  # 超过100ms
-            logger.warning(f"[PERF] 慢操作: {operation} 耗时 {elapsed*1000:.2f}ms")
+        metrics.observe_operation(operation, time.perf_counter() - start, role=ROLE)
     
     def record_cache_hit(self, cache_name: str):
         """记录缓存命中"""
         if self.enabled:
-            self.cache_stats[cache_name]['hits'] += 1
+            metrics.record_cache(cache_name, hit=True, role=ROLE)
     
     def record_cache_miss(self, cache_name: str):
         """记录缓存未命中"""
         if self.enabled:
-            self.cache_stats[cache_name]['misses'] += 1
+            metrics.record_cache(cache_name, hit=False, role=ROLE)
     
     def get_cache_hit_rate(self, cache_name: str) -> float:
         """
@@ -125,7 +155,7 @@ class PerformanceMonitor:
         Returns:
             命中率 (0.0-1.0)
         """
-        stats = self.cache_stats[cache_name]
+        stats = self.cache_stats.get(cache_name, {'hits': 0, 'misses': 0})
         total = stats['hits'] + stats['misses']
         if total == 0:
             return 0.0
@@ -145,12 +175,15 @@ class PerformanceMonitor:
             'recommendations': []
         }
         
+        operation_metrics = self.metrics
+        cache_stats = self.cache_stats
+        
         # 操作统计
-        for operation, metrics in self.metrics.items():
-            summary['operations'][operation] = metrics.to_dict()
+        for operation, op_metrics in operation_metrics.items():
+            summary['operations'][operation] = op_metrics.to_dict()
         
         # 缓存统计
-        for cache_name, stats in self.cache_stats.items():
+        for cache_name, stats in cache_stats.items():
             total = stats['hits'] + stats['misses']
             hit_rate = stats['hits'] / total if total > 0 else 0.0
             summary['cache_stats'][cache_name] = {
@@ -160,12 +193,13 @@ class PerformanceMonitor:
             }
         
         # 识别瓶颈
-        for operation, metrics in self.metrics.items():
-            if metrics.avg_time > 0.05:  # 平均超过50ms
+        for operation, op_metrics in operation_metrics.items():
+            if op_metrics.avg_time > 0.05:  # 平均超过50ms
                 summary['bottlenecks'].append({
                     'operation': operation,
-                    'avg_time_ms': round(metrics.avg_time * 1000, 2),
-                    'count': metrics.count
+                    'avg_time_ms': round(op_metrics.avg_time * 1000, 2),
+                    'p95_time_ms': round(op_metrics.p95_time * 1000, 2),
+                    'count': op_metrics.count
                 })
         
         # 生成优化建议
@@ -192,10 +226,10 @@ class PerformanceMonitor:
                 )
         
         # 检查慢操作
-        for operation, metrics in self.metrics.items():
-            if metrics.avg_time > 0.1:  # 平均超过100ms
+        for operation, op_metrics in self.metrics.items():
+            if op_metrics.avg_time > 0.1:  # 平均超过100ms
                 recommendations.append(
-                    f"操作 '{operation}' 平均耗时较长 ({metrics.avg_time*1000:.2f}ms)，"
+                    f"操作 '{operation}' 平均耗时较长 ({op_metrics.avg_time*1000:.2f}ms)，"
                     f"建议优化算法或添加缓存"
                 )
         
@@ -219,9 +253,8 @@ class PerformanceMonitor:
             logger.error(f"[PERF] 保存性能报告失败: {e}")
     
     def reset(self):
-        """重置所有统计数据"""
-        self.metrics.clear()
-        self.cache_stats.clear()
+        """重置所有统计数据（仅清空role=seer的指标序列）"""
+        metrics.get_registry().reset(role=ROLE)
         self.start_times.clear()
         logger.info("[PERF] 性能监控器已重置")
     
@@ -242,6 +275,7 @@ class PerformanceMonitor:
                 print(f"    平均耗时: {metrics['avg_time_ms']:.2f}ms")
                 print(f"    最小耗时: {metrics['min_time_ms']:.2f}ms")
                 print(f"    最大耗时: {metrics['max_time_ms']:.2f}ms")
+                print(f"    P95耗时: {metrics['p95_time_ms']:.2f}ms")
         
         # 缓存统计
         if summary['cache_stats']:
@@ -286,17 +320,7 @@ def monitor_operation(operation: str):
     def decide(self, candidates, context):
         ...
     """
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            monitor = get_monitor()
-            op_id = monitor.start_operation(operation)
-            try:
-                result = func(*args, **kwargs)
-                return result
-            finally:
-                monitor.end_operation(op_id)
-        return wrapper
-    return decorator
+    return metrics.timed(operation, role=ROLE)
 
 
 __all__ = [
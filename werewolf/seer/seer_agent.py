@@ -28,6 +28,7 @@ from agent_build_sdk.model.werewolf_model import (
 from agent_build_sdk.utils.logger import logger
 from agent_build_sdk.sdk.agent import format_prompt
 from werewolf.core.base_good_agent import BaseGoodAgent
+from werewolf.common import game_scope, tracing
 from .prompt import (
     DESC_PROMPT, 
     SHERIFF_SPEECH_PROMPT, 
@@ -84,8 +85,9 @@ class SeerAgent(BaseGoodAgent):
         # 注意：SeerConfig 继承自 BaseGoodConfig，所以所有父类组件仍然可以正常工作
         self.config = SeerConfig()
         
-        # 重新初始化预言家特有组件（使用新配置）
-        self._init_specific_components()
+        # 重新初始化预言家特有组件（使用新配置；按局缓存替换登记到对局作用域）
+        with game_scope.bind(self.game_scope):
+            self._init_specific_components()
         
         # 初始化DAO（使用预言家的MemoryDAO）
         self.memory_dao = SeerMemoryDAO(self.memory)
@@ -334,6 +336,7 @@ class SeerAgent(BaseGoodAgent):
         logger.warning("无法准确获取存活人数，使用默认值12")
         return 12
     
+    @tracing.trace_handler("perceive")
     def perceive(self, req=AgentReq):
         """
         处理游戏事件（兼容模板接口 + 企业级增强）
@@ -562,6 +565,7 @@ class SeerAgent(BaseGoodAgent):
     
 
     
+    @tracing.trace_handler("interact")
     def interact(self, req=AgentReq) -> AgentResp:
         """处理交互请求（重构版 - 使用决策器）"""
         logger.info(f"seer interact: {req}")
@@ -0,0 +1,720 @@
+"""
+多进程分片部署
+
+单个uvicorn进程受GIL限制，打分/ML推理、JSON、正则和提示词拼装都在
+同一个解释器里执行，第二个vCPU基本闲置。本模块提供一个轻量前置路由进程：
+
+- 启动N个 werewolf/app.py 工作进程（127.0.0.1上的独立端口），每个进程
+  有自己的角色智能体；ML模型以只读mmap加载（ML_MODEL_MMAP=true），
+  各进程共享同一份页缓存
+- 按游戏ID（GAME_SESSION_HEADER请求头，默认X-Game-Id）在一致性哈希环上
+  选择工作进程，并在整局内粘滞：首个请求时绑定，perceive(STATUS_RESULT)
+  且该局没有其他进行中的请求后解绑
+- 滚动重启（向路由进程发送SIGHUP）：逐个槽位启动新进程，就绪后新局路由到
+  新进程；旧进程不再接新局，等绑定在其上的对局结束（或超时）后再终止，
+  在途对局不会丢失
+- 工作进程意外退出时自动拉起替代进程，绑定在其上的对局计为丢失
+
+路由进程不导入角色模块，只做HTTP转发（与工作进程之间保持长连接）。
+
+限制：平台协议不携带游戏ID，请求体里也没有能区分对局的字段。客户端地址不能
+代替游戏ID：平台的所有对局来自同一地址，会全部绑定到一个工作进程（分片没有
+意义），任一局的RESULT还会解除其他在途对局的绑定。因此对局端点
+（/agent/perceive、/agent/interact）缺少游戏ID请求头时路由返回400并告警；
+分片部署只适用于由网关或压测客户端为每局注入该请求头的场景，
+直连平台请保持 SHARD_WORKERS=1。
+
+用法:
+    SHARD_WORKERS=2 python werewolf/shard_router.py
+    kill -HUP <路由进程PID>            # 滚动重启工作进程
+    curl http://127.0.0.1:7860/shard/stats
+
+环境变量:
+    SHARD_WORKERS: 工作进程数（默认2；start.sh在SHARD_WORKERS>1时启动本路由）
+    SHARD_WORKER_BASE_PORT: 工作进程端口起点（默认7900，滚动重启时新进程使用另一组端口）
+    SHARD_STARTUP_TIMEOUT: 工作进程启动超时秒数（默认180）
+    SHARD_DRAIN_TIMEOUT: 滚动重启时旧进程等待在途对局的最长秒数（默认1800）
+    SHARD_PIN_TIMEOUT: 对局绑定的空闲超时秒数（默认同GAME_SESSION_IDLE_TIMEOUT，1800）
+    SHARD_UPSTREAM_TIMEOUT: 单个转发请求的超时秒数（默认600）
+    HOST / PORT: 路由监听地址（默认0.0.0.0:7860）
+"""
+
+import os
+import sys
+import json
+import time
+import bisect
+import signal
+import asyncio
+import hashlib
+import logging
+import subprocess
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from werewolf.common.request_context import STATUS_RESULT
+from werewolf.core.game_sessions import DEFAULT_HEADER
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(PROJECT_ROOT, 'werewolf', 'app.py')
+
+# 逐跳头与由转发方重新生成的头，不透传
+_HOP_HEADERS = frozenset({
+    b'connection', b'keep-alive', b'proxy-connection', b'transfer-encoding', b'te',
+    b'trailer', b'upgrade', b'content-length', b'host',
+})
+
+# 属于对局的端点（首个请求绑定工作进程）；其余端点（健康检查、模型名等）不创建绑定
+_GAME_PATHS = frozenset({'/agent/perceive', '/agent/interact'})
+
+# 空闲长连接的最长保留时间（uvicorn默认keep-alive超时为5秒，提前丢弃避免复用已关闭的连接）
+_IDLE_CONNECTION_SECONDS = 4.0
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class ShardUnavailable(Exception):
+    """没有可接收新对局的工作进程"""
+
+
+@dataclass
+class Pin:
+    """一局游戏到工作进程的绑定"""
+    worker: 'Worker'
+    last_seen: float
+    # 该局正在转发的请求数；RESULT到达时仍有请求在途则延后解绑
+    in_flight: int = 0
+    finished: bool = False
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """
+    一致性哈希环（槽位 + 虚拟节点）
+
+    环上的节点是槽位而不是具体进程：滚动重启替换进程时归属不变，
+    增减槽位时只有约1/N的游戏ID改变归属
+
+    Args:
+        slots: 槽位编号
+        vnodes: 每个槽位的虚拟节点数
+    """
+
+    def __init__(self, slots: List[int], vnodes: int = 64):
+        points = sorted((_hash(f"slot-{slot}#{i}"), slot) for slot in slots for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._slots = [s for _, s in points]
+
+    def lookup(self, key: str, accept: Optional[Callable[[int], bool]] = None) -> Optional[int]:
+        """
+        查找键归属的槽位
+
+        Args:
+            key: 游戏ID
+            accept: 槽位过滤（如只接受有就绪进程的槽位），不接受时沿环顺延
+
+        Returns:
+            槽位编号（没有可接受的槽位时为None）
+        """
+        if not self._slots:
+            return None
+        start = bisect.bisect(self._hashes, _hash(key))
+        rejected = set()
+        for offset in range(len(self._slots)):
+            slot = self._slots[(start + offset) % len(self._slots)]
+            if slot in rejected:
+                continue
+            if accept is None or accept(slot):
+                return slot
+            rejected.add(slot)
+        return None
+
+
+class UpstreamPool:
+    """
+    到单个工作进程的HTTP/1.1长连接池
+
+    只实现转发所需的子集：请求体带Content-Length，响应按Content-Length、
+    chunked或读到连接关闭
+
+    Args:
+        host: 工作进程地址
+        port: 工作进程端口
+        max_idle: 保留的空闲连接数上限
+    """
+
+    def __init__(self, host: str, port: int, max_idle: int = 64):
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter, float]] = []
+
+    async def _connection(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        now = time.monotonic()
+        while self._idle:
+            reader, writer, last_used = self._idle.pop()
+            if now - last_used < _IDLE_CONNECTION_SECONDS and not writer.is_closing():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        return reader, writer, False
+
+    async def request(self, method: str, path: str, headers: Headers, body: bytes,
+                      timeout: float) -> Tuple[int, Headers, bytes]:
+        """
+        发送一个请求
+
+        Args:
+            method: HTTP方法
+            path: 路径（含查询串）
+            headers: 需要透传的请求头（小写名）
+            body: 请求体
+            timeout: 超时秒数
+
+        Returns:
+            (状态码, 响应头, 响应体)
+        """
+        for attempt in range(2):
+            reader, writer, reused = await self._connection()
+            try:
+                result, keep_alive = await asyncio.wait_for(
+                    self._exchange(reader, writer, method, path, headers, body), timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                # 复用的空闲连接可能刚被对端关闭（请求未送达），换新连接重试一次
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive and len(self._idle) < self.max_idle:
+                self._idle.append((reader, writer, time.monotonic()))
+            else:
+                writer.close()
+            return result
+        raise ConnectionError(f"upstream {self.host}:{self.port} unavailable")
+
+    async def _exchange(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str,
+                        path: str, headers: Headers, body: bytes) -> Tuple[Tuple[int, Headers, bytes], bool]:
+        head = [f"{method} {path} HTTP/1.1\r\nhost: {self.host}:{self.port}\r\n"
+                f"content-length: {len(body)}\r\n".encode('latin-1')]
+        head.extend(name + b': ' + value + b'\r\n' for name, value in headers)
+        head.append(b'\r\n')
+        writer.write(b''.join(head) + body)
+        await writer.drain()
+
+        status_line = await reader.readuntil(b'\r\n')
+        status = int(status_line.split(None, 2)[1])
+        response_headers: Headers = []
+        length: Optional[int] = None
+        chunked = False
+        keep_alive = True
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line[:-2].partition(b':')
+            name = name.strip().lower()
+            value = value.strip()
+            if name == b'content-length':
+                length = int(value)
+            elif name == b'transfer-encoding':
+                chunked = b'chunked' in value.lower()
+            elif name == b'connection':
+                keep_alive = value.lower() != b'close'
+            if name not in _HOP_HEADERS:
+                response_headers.append((name, value))
+
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            data = b''
+        elif chunked:
+            data = await self._read_chunked(reader)
+        elif length is not None:
+            data = await reader.readexactly(length)
+        else:
+            data = await reader.read()
+            keep_alive = False
+        return (status, response_headers, data), keep_alive
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        parts = []
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+            if size == 0:
+                # 跳过trailer直到空行
+                while await reader.readuntil(b'\r\n') != b'\r\n':
+                    pass
+                return b''.join(parts)
+            parts.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    def close(self) -> None:
+        for _, writer, _ in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+class Worker:
+    """
+    一个工作进程（槽位 + 代次）
+
+    Args:
+        slot: 槽位编号
+        generation: 该槽位的第几代进程（滚动重启/崩溃拉起时递增）
+        port: 监听端口
+    """
+
+    def __init__(self, slot: int, generation: int, port: int):
+        self.slot = slot
+        self.generation = generation
+        self.port = port
+        self.process: Optional[subprocess.Popen] = None
+        self.pool = UpstreamPool('127.0.0.1', port)
+        self.state = 'starting'  # starting / ready / draining / stopped
+        self.in_flight = 0
+        self.requests = 0
+        self.drain_deadline = 0.0
+        self.started_at = time.time()
+
+    @property
+    def name(self) -> str:
+        return f"worker-{self.slot}.{self.generation}"
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'slot': self.slot,
+            'generation': self.generation,
+            'pid': self.process.pid if self.process else None,
+            'port': self.port,
+            'state': self.state,
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'uptime_s': round(time.time() - self.started_at, 1),
+        }
+
+
+class ShardRouter:
+    """
+    工作进程管理与粘滞路由（所有方法在路由进程的事件循环中调用）
+
+    Args:
+        workers: 工作进程数
+        base_port: 工作进程端口起点
+        pin_timeout: 对局绑定的空闲超时秒数
+        drain_timeout: 滚动重启时旧进程等待在途对局的最长秒数
+        startup_timeout: 工作进程启动超时秒数
+        upstream_timeout: 单个转发请求的超时秒数
+        env: 工作进程环境变量（默认继承当前进程）
+        command: 工作进程命令（默认 python werewolf/app.py）
+    """
+
+    def __init__(self, workers: int = 2, base_port: int = 7900, pin_timeout: float = 1800.0,
+                 drain_timeout: float = 1800.0, startup_timeout: float = 180.0,
+                 upstream_timeout: float = 600.0, env: Optional[Dict[str, str]] = None,
+                 command: Optional[List[str]] = None):
+        self.slots = list(range(max(1, workers)))
+        self.ring = HashRing(self.slots)
+        self.base_port = base_port
+        self.pin_timeout = pin_timeout
+        self.drain_timeout = drain_timeout
+        self.startup_timeout = startup_timeout
+        self.upstream_timeout = upstream_timeout
+        self.env = env
+        self.command = command or [sys.executable, APP_PATH]
+        self.current: Dict[int, Worker] = {}
+        self.draining: List[Worker] = []
+        # 游戏ID -> 绑定
+        self.pins: Dict[str, Pin] = {}
+        self.counters = {'pinned': 0, 'finished': 0, 'expired': 0, 'lost': 0, 'restarts': 0, 'respawns': 0,
+                         'rejected': 0}
+        self._generations: Dict[int, int] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._supervisor: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> 'ShardRouter':
+        """按环境变量创建"""
+        return cls(
+            workers=int(os.getenv('SHARD_WORKERS', '2')),
+            base_port=int(os.getenv('SHARD_WORKER_BASE_PORT', '7900')),
+            pin_timeout=float(os.getenv('SHARD_PIN_TIMEOUT', os.getenv('GAME_SESSION_IDLE_TIMEOUT', '1800'))),
+            drain_timeout=float(os.getenv('SHARD_DRAIN_TIMEOUT', '1800')),
+            startup_timeout=float(os.getenv('SHARD_STARTUP_TIMEOUT', '180')),
+            upstream_timeout=float(os.getenv('SHARD_UPSTREAM_TIMEOUT', '600')),
+        )
+
+    # ---------- 进程管理 ----------
+
+    def _live_workers(self) -> List[Worker]:
+        return [w for w in list(self.current.values()) + self.draining if w.state != 'stopped']
+
+    def _free_port(self, slot: int) -> int:
+        # 同一槽位的新旧进程可能同时存在（排空期间），依次尝试 base+slot, base+slot+N, ...
+        used = {w.port for w in self._live_workers()}
+        port = self.base_port + slot
+        while port in used:
+            port += len(self.slots)
+        return port
+
+    def _worker_env(self, slot: int, port: int) -> Dict[str, str]:
+        env = dict(os.environ if self.env is None else self.env)
+        env.update({'HOST': '127.0.0.1', 'PORT': str(port), 'SHARD_WORKER_INDEX': str(slot)})
+        env.setdefault('ML_MODEL_MMAP', 'true')
+        metrics_port = int(env.get('METRICS_PORT') or 0)
+        if metrics_port:
+            env['METRICS_PORT'] = str(metrics_port + 1 + port - self.base_port)
+        if env.get('METRICS_FILE'):
+            root, ext = os.path.splitext(env['METRICS_FILE'])
+            env['METRICS_FILE'] = f"{root}.worker{slot}{ext}"
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get('PYTHONPATH', '')]))
+        return env
+
+    def spawn(self, slot: int) -> Worker:
+        """启动槽位的新一代工作进程（不等待就绪）"""
+        generation = self._generations.get(slot, -1) + 1
+        self._generations[slot] = generation
+        worker = Worker(slot, generation, self._free_port(slot))
+        worker.process = subprocess.Popen(self.command, cwd=PROJECT_ROOT, env=self._worker_env(slot, worker.port))
+        logger.info(f"[SHARD] Started {worker.name} (pid {worker.process.pid}, port {worker.port})")
+        return worker
+
+    async def wait_ready(self, worker: Worker) -> None:
+        """
+        等待工作进程通过健康检查
+
+        Raises:
+            RuntimeError: 进程退出或超时
+        """
+        started = time.monotonic()
+        while time.monotonic() - started < self.startup_timeout:
+            if not worker.alive():
+                raise RuntimeError(f"{worker.name} exited with code {worker.process.poll()}")
+            try:
+                status, _, _ = await worker.pool.request(
+                    'POST', '/agent/checkHealth', [(b'content-type', b'application/json')], b'{}', 5.0)
+                if status == 200:
+                    worker.state = 'ready'
+                    logger.info(f"[SHARD] {worker.name} ready in {time.monotonic() - started:.2f}s")
+                    return
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                pass
+            await asyncio.sleep(0.2)
+        raise RuntimeError(f"{worker.name} not ready after {self.startup_timeout:.0f}s")
+
+    async def stop_worker(self, worker: Worker, timeout: float = 30.0) -> None:
+        """终止工作进程（SIGTERM让uvicorn处理完当前请求，超时后SIGKILL）"""
+        worker.state = 'stopped'
+        worker.pool.close()
+        if not worker.alive():
+            return
+        worker.process.terminate()
+        try:
+            await asyncio.to_thread(worker.process.wait, timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"[SHARD] {worker.name} did not exit in {timeout:.0f}s, killing")
+            worker.process.kill()
+        logger.info(f"[SHARD] Stopped {worker.name}")
+
+    async def start(self) -> None:
+        """启动全部工作进程并等待就绪"""
+        self._lock = asyncio.Lock()
+        workers = [self.spawn(slot) for slot in self.slots]
+        try:
+            await asyncio.gather(*(self.wait_ready(w) for w in workers))
+        except Exception:
+            await asyncio.gather(*(self.stop_worker(w) for w in workers))
+            raise
+        self.current = {w.slot: w for w in workers}
+        self._supervisor = asyncio.create_task(self._supervise())
+        logger.info(f"[SHARD] {len(workers)} workers ready")
+
+    async def shutdown(self) -> None:
+        """停止监督任务与全部工作进程"""
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            self._supervisor = None
+        await asyncio.gather(*(self.stop_worker(w) for w in self._live_workers()))
+        self.current.clear()
+        self.draining.clear()
+
+    async def rolling_restart(self) -> None:
+        """
+        逐个槽位替换工作进程
+
+        新进程就绪后接管该槽位的新对局，旧进程进入排空状态，
+        由监督任务在其绑定的对局全部结束（或超过SHARD_DRAIN_TIMEOUT）后终止。
+        新进程启动失败时保留旧进程
+        """
+        async with self._lock:
+            logger.info(f"[SHARD] Rolling restart of {len(self.slots)} workers")
+            for slot in self.slots:
+                old = self.current.get(slot)
+                new = self.spawn(slot)
+                try:
+                    await self.wait_ready(new)
+                except RuntimeError as e:
+                    logger.error(f"[SHARD] Restart of slot {slot} aborted, keeping "
+                                 f"{old.name if old else 'nothing'}: {e}")
+                    await self.stop_worker(new)
+                    continue
+                self.current[slot] = new
+                self.counters['restarts'] += 1
+                if old is not None and old.state != 'stopped':
+                    old.state = 'draining'
+                    old.drain_deadline = time.monotonic() + self.drain_timeout
+                    self.draining.append(old)
+                    logger.info(f"[SHARD] {old.name} draining ({self._pinned_to(old)} games in flight)")
+
+    async def _respawn(self, slot: int) -> None:
+        delay = 1.0
+        while True:
+            async with self._lock:
+                if self.current.get(slot) is not None and self.current[slot].state == 'ready':
+                    return
+                worker = self.spawn(slot)
+                try:
+                    await self.wait_ready(worker)
+                    self.current[slot] = worker
+                    self.counters['respawns'] += 1
+                    return
+                except RuntimeError as e:
+                    logger.error(f"[SHARD] Respawn of slot {slot} failed: {e}")
+                    await self.stop_worker(worker)
+            await asyncio.sleep(delay)
+            delay = min(30.0, delay * 2)
+
+    def _pinned_to(self, worker: Worker) -> int:
+        return sum(1 for pin in self.pins.values() if pin.worker is worker)
+
+    def _drop_pins(self, worker: Worker) -> int:
+        keys = [key for key, pin in self.pins.items() if pin.worker is worker]
+        for key in keys:
+            del self.pins[key]
+        return len(keys)
+
+    def check(self, now: Optional[float] = None) -> None:
+        """
+        一次监督检查：拉起崩溃的进程、终止排空完成的进程、过期空闲绑定
+
+        Args:
+            now: 当前单调时间（默认time.monotonic()）
+        """
+        now = time.monotonic() if now is None else now
+        for slot, worker in list(self.current.items()):
+            if worker.state == 'ready' and not worker.alive():
+                worker.state = 'stopped'
+                lost = self._drop_pins(worker)
+                self.counters['lost'] += lost
+                logger.error(f"[SHARD] {worker.name} exited with code {worker.process.poll()}, "
+                             f"{lost} games lost; respawning")
+                asyncio.ensure_future(self._respawn(slot))
+
+        for worker in list(self.draining):
+            pinned = self._pinned_to(worker)
+            if not worker.alive() or (pinned == 0 and worker.in_flight == 0) or now >= worker.drain_deadline:
+                if pinned:
+                    self.counters['lost'] += self._drop_pins(worker)
+                    logger.warning(f"[SHARD] {worker.name} stopped with {pinned} games still pinned")
+                self.draining.remove(worker)
+                asyncio.ensure_future(self.stop_worker(worker))
+
+        expired = [key for key, pin in self.pins.items()
+                   if pin.in_flight == 0 and now - pin.last_seen > self.pin_timeout]
+        for key in expired:
+            del self.pins[key]
+        if expired:
+            self.counters['expired'] += len(expired)
+            logger.info(f"[SHARD] Expired {len(expired)} idle game pins")
+
+    async def _supervise(self, interval: float = 1.0) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"[SHARD] Supervisor check failed: {e}")
+
+    # ---------- 路由 ----------
+
+    def route(self, key: str, pin: bool = True) -> Worker:
+        """
+        选择处理该对局的工作进程（已绑定的对局保持原进程，包括排空中的旧进程）
+
+        Args:
+            key: 粘滞键
+            pin: 未绑定时是否创建绑定（非对局端点为False）
+
+        Raises:
+            ShardUnavailable: 没有就绪的工作进程
+        """
+        now = time.monotonic()
+        pinned = self.pins.get(key)
+        if pinned is not None and pinned.worker.state in ('ready', 'draining'):
+            pinned.last_seen = now
+            return pinned.worker
+        slot = self.ring.lookup(key, lambda s: s in self.current and self.current[s].state == 'ready')
+        if slot is None:
+            raise ShardUnavailable("no ready worker")
+        worker = self.current[slot]
+        if pin:
+            self.pins[key] = Pin(worker, now)
+            self.counters['pinned'] += 1
+        return worker
+
+    def finish(self, key: str) -> None:
+        """对局结束：该局没有其他在途请求时解除绑定，否则由最后一个请求结束时解除"""
+        pin = self.pins.get(key)
+        if pin is None or pin.finished:
+            return
+        pin.finished = True
+        self._release_pin(key, pin)
+
+    def _release_pin(self, key: str, pin: Pin) -> None:
+        if pin.finished and pin.in_flight == 0 and self.pins.get(key) is pin:
+            del self.pins[key]
+            self.counters['finished'] += 1
+
+    @staticmethod
+    def is_game_end(path: str, body: bytes) -> bool:
+        """请求是否为本局最后一个请求（perceive且status为结果）"""
+        if path != '/agent/perceive' or STATUS_RESULT.encode() not in body:
+            return False
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return False
+        return isinstance(payload, dict) and payload.get('status') == STATUS_RESULT
+
+    async def forward(self, method: str, path: str, headers: Headers, body: bytes,
+                      key: str) -> Tuple[int, Headers, bytes]:
+        """
+        把请求转发给该对局的工作进程
+
+        Args:
+            method: HTTP方法
+            path: 路径（含查询串）
+            headers: 透传的请求头
+            body: 请求体
+            key: 游戏ID
+
+        Returns:
+            (状态码, 响应头, 响应体)
+        """
+        worker = self.route(key, pin=path.split('?', 1)[0] in _GAME_PATHS)
+        pin = self.pins.get(key)
+        if pin is not None:
+            pin.in_flight += 1
+        worker.in_flight += 1
+        worker.requests += 1
+        try:
+            return await worker.pool.request(method, path, headers, body, self.upstream_timeout)
+        finally:
+            worker.in_flight -= 1
+            if pin is not None:
+                pin.in_flight -= 1
+                self._release_pin(key, pin)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': [w.stats() for w in self.current.values()],
+            'draining': [dict(w.stats(), pinned=self._pinned_to(w)) for w in self.draining],
+            'pinned_games': len(self.pins),
+            'counters': dict(self.counters),
+        }
+
+
+def create_app(router: ShardRouter, header: str = DEFAULT_HEADER):
+    """
+    创建路由进程的ASGI应用
+
+    Args:
+        router: 分片路由
+        header: 游戏ID请求头
+
+    Returns:
+        Starlette应用（生命周期内启动/停止工作进程，SIGHUP触发滚动重启）
+    """
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    header_name = header.lower()
+    warned_clients = set()
+
+    async def proxy(request):
+        body = await request.body()
+        key = (request.headers.get(header_name) or '').strip()
+        if not key and request.url.path in _GAME_PATHS:
+            # 没有游戏ID无法按局粘滞（见模块说明），拒绝而不是把同一来源的对局都绑到一个进程
+            client = request.client.host if request.client else ''
+            if client not in warned_clients:
+                warned_clients.add(client)
+                logger.warning(f"[SHARD] Rejecting game requests from {client or '<unknown>'} without {header} "
+                               f"header; sharding needs a per-game id (use SHARD_WORKERS=1 for direct platform traffic)")
+            router.counters['rejected'] += 1
+            return JSONResponse({'error': f"missing {header} header"}, status_code=400)
+        headers = [(name, value) for name, value in request.headers.raw if name not in _HOP_HEADERS]
+        path = request.url.path + (f"?{request.url.query}" if request.url.query else '')
+        try:
+            status, response_headers, data = await router.forward(request.method, path, headers, body, key)
+        except ShardUnavailable:
+            return Response(status_code=503)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.warning(f"[SHARD] Forwarding {request.url.path} for {key!r} failed: {type(e).__name__}: {e}")
+            return Response(status_code=502)
+        if router.is_game_end(request.url.path, body):
+            router.finish(key)
+        response = Response(content=data, status_code=status)
+        response.raw_headers = response_headers + [(b'content-length', str(len(data)).encode('latin-1'))]
+        return response
+
+    async def shard_stats(request):
+        return JSONResponse(router.stats())
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await router.start()
+        loop = asyncio.get_running_loop()
+        if hasattr(signal, 'SIGHUP'):
+            loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(router.rolling_restart()))
+        try:
+            yield
+        finally:
+            if hasattr(signal, 'SIGHUP'):
+                loop.remove_signal_handler(signal.SIGHUP)
+            await router.shutdown()
+
+    return Starlette(
+        routes=[
+            Route('/shard/stats', shard_stats, methods=['GET']),
+            Route('/{path:path}', proxy, methods=['GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'OPTIONS']),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def main() -> None:
+    import uvicorn
+    from werewolf.common.structured_logging import configure_logging
+    configure_logging()
+
+    router = ShardRouter.from_env()
+    header = os.getenv('GAME_SESSION_HEADER') or DEFAULT_HEADER
+    logger.info(f"[SHARD] Routing by {header} across {len(router.slots)} workers")
+    uvicorn.run(create_app(router, header), host=os.getenv('HOST', '0.0.0.0'),
+                port=int(os.getenv('PORT', '7860')), log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
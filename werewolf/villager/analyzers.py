@@ -6,6 +6,7 @@
 
 from typing import Dict, List, Tuple, Optional
 from agent_build_sdk.utils.logger import logger
+from werewolf.common import game_scope, metrics
 from werewolf.core.base_components import BaseAnalyzer
 from werewolf.common.utils import DataValidator
 from .config import VillagerConfig
@@ -20,13 +21,14 @@ from werewolf.optimization.algorithms.trust_score import (
 
 
 def safe_execute(default_return=None):
-    """装饰器：安全执行函数，捕获异常并返回默认值"""
+    """装饰器：安全执行函数，捕获异常并返回默认值（错误计入统一指标，role=villager）"""
     def decorator(func):
         def wrapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
             except Exception as e:
                 logger.error(f"Error in {func.__name__}: {e}")
+                metrics.record_error(func.__qualname__, role='villager')
                 return default_return if default_return is not None else None
         return wrapper
     return decorator
@@ -37,7 +39,8 @@ class TrustScoreManager(BaseAnalyzer):
     
     def __init__(self, config: VillagerConfig):
         super().__init__(config)
-        self.trust_history: Dict[str, List[Dict]] = {}
+        # 本局玩家的信任变化记录（登记到对局作用域，每局结束时清空）
+        self.trust_history: Dict[str, List[Dict]] = game_scope.register('trust_score_manager.history', {})
     
     def _get_default_result(self) -> int:
         """获取默认信任分数"""
@@ -132,7 +135,7 @@ class TrustScoreManager(BaseAnalyzer):
                 )
                 new_score = int(new_score)
                 trust_scores[player] = new_score
-                logger.debug(f"Trust trend reversal detected for {player}, weakening delta by 50%")
+                logger.debug("Trust trend reversal detected for %s, weakening delta by 50%%", player)
         
         # 4. 记录历史（保留最近10次）
         player_history.append({
@@ -151,8 +154,8 @@ class TrustScoreManager(BaseAnalyzer):
             for old_player in oldest_players:
                 self.trust_history.pop(old_player, None)
         
-        logger.debug(f"Trust score updated: {player} {current_score} -> {new_score} "
-                    f"(base_delta: {delta:+d}, weighted: {weighted_delta:+.1f})")
+        logger.debug("Trust score updated: %s %s -> %s (base_delta: %+d, weighted: %+.1f)",
+                     player, current_score, new_score, delta, weighted_delta)
         return new_score
 
 
@@ -6,35 +6,169 @@
 
 from typing import Dict, List, Tuple, Optional, Any
 from agent_build_sdk.utils.logger import logger
+from werewolf.common import metrics, decision_recorder
 from werewolf.core.base_components import BaseDecisionMaker
 from werewolf.common.utils import DataValidator
 from .config import VillagerConfig
 from .analyzers import TrustScoreCalculator, VotingPatternAnalyzer
-from werewolf.optimization.utils.safe_math import safe_divide
+from werewolf.optimization.config import load_config
+from werewolf.optimization.core import (
+    DecisionContext, DecisionEngine, ScoringDimension, TrustScoreDimension,
+    VotingAccuracyDimension, SeerCheckDimension,
+)
+import numpy as np
 import re
 
 
 def safe_execute(default_return=None):
-    """装饰器：安全执行函数，捕获异常并返回默认值"""
+    """装饰器：安全执行函数，捕获异常并返回默认值（错误计入统一指标，role=villager）"""
     def decorator(func):
         def wrapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
             except Exception as e:
                 logger.error(f"Error in {func.__name__}: {e}")
+                metrics.record_error(func.__qualname__, role='villager')
                 return default_return if default_return is not None else None
         return wrapper
     return decorator
 
 
+# ==================== 投票评分维度 ====================
+
+VOTE_TRUST = 'trust'
+VOTE_PATTERN = 'voting_pattern'
+VOTE_SEER = 'seer_check'
+
+# 信任分数|trust|超过阈值的部分按增益额外增减；预言家查验 狼/好 加减分
+VOTE_TRUST_EXTREME = 50
+VOTE_TRUST_EXTREME_GAIN = 0.5
+VOTE_SEER_WOLF = 200
+VOTE_SEER_GOOD = -200
+
+# 投票模式加成（乘以紧急度乘数）
+VOTE_PATTERN_BONUSES = {
+    "protect_wolf": 28,
+    "charge": 18,
+    "swing": 12,
+    "abstain": 15,
+    "accurate": -22,
+}
+
+
+def _vote_stage(ctx: DecisionContext) -> Tuple[int, int]:
+    """(当前天数, 存活人数)"""
+    def compute():
+        game_state = DataValidator.safe_get_dict(ctx.raw.get("game_state"))
+        return (DataValidator.safe_get_int(game_state.get("current_day", 0)),
+                DataValidator.safe_get_int(game_state.get("alive_count", 12), 12))
+    return ctx.cached("vote:stage", compute)
+
+
+def _urgency_multiplier(config: VillagerConfig, alive_count: int) -> float:
+    """投票模式加成的紧急度乘数"""
+    if alive_count <= 6:
+        return config.VOTE_URGENCY_MULTIPLIER_ENDGAME
+    if alive_count <= 8:
+        return config.VOTE_URGENCY_MULTIPLIER_MIDLATE
+    return 1.0
+
+
+def _early_injection_bonus(player_data: Dict[str, Any]) -> float:
+    """早期注入攻击加成: 35 + min(20, 次数*12)"""
+    if not player_data.get("malicious_injection"):
+        return 0.0
+    injection_count = DataValidator.safe_get_int(player_data.get("injection_count", 1), 1)
+    return 35 + min(20, injection_count * 12)
+
+
+class VoteUrgencyDimension(ScoringDimension):
+    """紧急度加成: 残局（≤6人）信任为负时 +|trust|*0.4；中后期（≤8人）信任<-20时 +|trust+20|*0.2"""
+    
+    name = 'urgency'
+    
+    def __init__(self, config: VillagerConfig, trust: TrustScoreDimension, weight: float = 1.0):
+        super().__init__(weight)
+        self.config = config
+        self.trust = trust
+    
+    def multiplier(self, ctx: DecisionContext) -> float:
+        """投票模式加成的紧急度乘数"""
+        _, alive_count = _vote_stage(ctx)
+        return _urgency_multiplier(self.config, alive_count)
+    
+    def score(self, ctx: DecisionContext) -> np.ndarray:
+        _, alive_count = _vote_stage(ctx)
+        trust = self.trust.trust(ctx)
+        if alive_count <= 6:
+            return np.where(trust < 0, np.abs(trust) * 0.4, 0.0)
+        if alive_count <= 8:
+            return np.where(trust < -20, np.abs(trust + 20) * 0.2, 0.0)
+        return np.zeros(len(ctx.candidates))
+
+
+class EarlyInjectionDimension(ScoringDimension):
+    """早期（前两天）注入攻击加成: 35 + min(20, 次数*12)"""
+    
+    name = 'early_injection'
+    
+    def score(self, ctx: DecisionContext) -> np.ndarray:
+        current_day, _ = _vote_stage(ctx)
+        if current_day > 2:
+            return np.zeros(len(ctx.candidates))
+        return ctx.values("vote:early_injection", lambda c: _early_injection_bonus(ctx.player(c)))
+
+
+def build_vote_engine(config: VillagerConfig, trust_calculator: TrustScoreCalculator,
+                      pattern_analyzer: VotingPatternAnalyzer) -> DecisionEngine:
+    """
+    投票优先级评分引擎
+    
+    分数 = 100*(1-信任/100)（|信任|>50的部分再按0.5增减） + 紧急度加成 + 早期注入加成
+          + 预言家查验(狼+200/好-200) + 投票模式加成*紧急度乘数，下限0
+    
+    引擎定义维度与权重配置；VoteDecisionMaker 按引擎的权重逐候选人计算（见 _vote_scores）。
+    
+    Args:
+        config: 好人阵营配置（VOTE_DIMENSION_WEIGHTS 覆盖 OPTIMIZATION_CONFIG/SCORING_WEIGHTS 中的 vote 权重）
+        trust_calculator: 信任分数计算器
+        pattern_analyzer: 投票模式分析器
+    
+    Returns:
+        DecisionEngine
+    """
+    trust = TrustScoreDimension(trust_calculator.analyze, normalize=True, extreme_threshold=VOTE_TRUST_EXTREME,
+                                extreme_gain=VOTE_TRUST_EXTREME_GAIN, name=VOTE_TRUST)
+    urgency = VoteUrgencyDimension(config, trust)
+    engine = DecisionEngine(
+        [
+            trust,
+            urgency,
+            EarlyInjectionDimension(),
+            SeerCheckDimension(wolf=VOTE_SEER_WOLF, good=VOTE_SEER_GOOD, strings_only=True, name=VOTE_SEER),
+            VotingAccuracyDimension(pattern_analyzer.analyze, VOTE_PATTERN_BONUSES,
+                                    multiplier=urgency.multiplier, name=VOTE_PATTERN),
+        ],
+        lower=0.0,
+        name='vote',
+    )
+    # 配置文件/环境变量中的权重（未知维度名只记录错误），角色配置中的权重优先
+    engine.set_weights(load_config().scoring.weights('vote'), strict=False)
+    engine.set_weights(getattr(config, 'VOTE_DIMENSION_WEIGHTS', None) or {})
+    return engine
+
+
 class VoteDecisionMaker(BaseDecisionMaker):
-    """投票决策器"""
+    """投票决策器（评分见 build_vote_engine）"""
     
     def __init__(self, config: VillagerConfig, trust_calculator: TrustScoreCalculator,
                  pattern_analyzer: VotingPatternAnalyzer):
         super().__init__(config)
         self.trust_calculator = trust_calculator
         self.pattern_analyzer = pattern_analyzer
+        self.scoring_engine = build_vote_engine(config, trust_calculator, pattern_analyzer)
+        # (引擎权重版本, 权重)，见 _vote_weights
+        self._vote_weights_cache: Tuple[int, Dict[str, float]] = (-1, {})
     
     def _get_default_result(self) -> Dict[str, Any]:
         """获取默认决策结果"""
@@ -67,112 +201,109 @@ class VoteDecisionMaker(BaseDecisionMaker):
         if not valid_candidates:
             return (candidates[0], "No valid candidates", {})
         
-        # Calculate vote priority for each candidate
-        vote_scores = {}
-        for candidate in valid_candidates:
-            score = self._calculate_vote_priority(candidate, context)
-            vote_scores[candidate] = score
-        
-        # Sort and select highest score
-        sorted_candidates = sorted(vote_scores.items(), key=lambda x: x[1], reverse=True)
-        if not sorted_candidates:
+        # 一次为全部候选人打分（打分时的信任分数与投票模式记入analysis，生成理由时复用）
+        analysis: Dict[str, Tuple[float, Optional[str]]] = {}
+        vote_scores = self._calculate_vote_priorities(valid_candidates, context, analysis)
+        if not vote_scores:
             return (valid_candidates[0] if valid_candidates else my_name, "No scores calculated", {})
         
-        target = sorted_candidates[0][0]
-        score = sorted_candidates[0][1]
+        # 分数最高者（并列取先出现者）
+        target = max(vote_scores, key=vote_scores.get)
+        score = vote_scores[target]
         
         # Generate reason
-        reason = self._generate_vote_reason(target, score, context)
+        reason = self._generate_vote_reason(target, score, context, analysis)
         
         logger.info(f"[DECISION TREE] Vote target: {target} (score: {score:.1f})")
         return (target, reason, vote_scores)
     
+    @decision_recorder.recorded_scores("vote.priority")
+    def _calculate_vote_priorities(self, candidates: List[str], context: Dict,
+                                   analysis: Optional[Dict[str, Tuple[float, Optional[str]]]] = None
+                                   ) -> Dict[str, float]:
+        """一次计算全部候选人的投票优先级分数"""
+        return self._vote_scores(candidates, context, analysis)
+    
+    @decision_recorder.recorded("vote.priority")
     def _calculate_vote_priority(self, player_name: str, context: Dict) -> float:
-        """计算投票优先级分数"""
-        # 1. 基础优先级：基于信任分数
-        trust_score = self.trust_calculator.analyze(player_name, context)
+        """计算单个候选人的投票优先级分数"""
+        return self._vote_scores([player_name], context)[player_name]
+    
+    def _vote_weights(self) -> Dict[str, float]:
+        """投票维度权重（按实例缓存，引擎权重变化时刷新）"""
+        revision, weights = self._vote_weights_cache
+        if revision != self.scoring_engine.revision:
+            weights = self.scoring_engine.weights
+            self._vote_weights_cache = (self.scoring_engine.revision, weights)
+        return weights
+    
+    def _vote_scores(self, candidates: List[str], context: Dict,
+                     analysis: Optional[Dict[str, Tuple[float, Optional[str]]]] = None) -> Dict[str, float]:
+        """
+        逐候选人计算投票优先级（与 scoring_engine.score 结果一致）
         
-        # 非线性转换（使用safe_divide）
-        normalized_trust = safe_divide(trust_score, 100.0, default=0.5)
-        base_priority = 100.0 * (1.0 - normalized_trust)
+        候选人只有十来个时，numpy每次运算的固定开销高于逐个计算，
+        这里沿用标量循环，权重取自引擎（见 benchmarks/bench_scoring_engine.py）。
         
-        # 对极端值进行增强
-        if trust_score < -50:
-            base_priority += (abs(trust_score) - 50) * 0.5
-        elif trust_score > 50:
-            base_priority -= (trust_score - 50) * 0.5
+        Args:
+            candidates: 候选人
+            context: 决策上下文
+            analysis: 传入时记录 {候选人: (信任分数, 投票模式)}，投票模式维度权重为0时为None
         
-        # 2. 投票特定加成
-        vote_bonus = 0.0
+        Returns:
+            {候选人: 分数}
+        """
+        weights = self._vote_weights()
+        trust_weight = weights[VOTE_TRUST]
+        urgency_weight = weights[VoteUrgencyDimension.name]
+        injection_weight = weights[EarlyInjectionDimension.name]
+        seer_weight = weights[VOTE_SEER]
+        pattern_weight = weights[VOTE_PATTERN]
         
-        player_data_dict = DataValidator.safe_get_dict(context.get("player_data"))
-        player_data = DataValidator.safe_get_dict(player_data_dict.get(player_name))
         game_state = DataValidator.safe_get_dict(context.get("game_state"))
-        
         current_day = DataValidator.safe_get_int(game_state.get("current_day", 0))
         alive_count = DataValidator.safe_get_int(game_state.get("alive_count", 12), 12)
-        
-        # A. 紧急程度加成
-        urgency_multiplier = 1.0
-        if alive_count <= 6:
-            urgency_multiplier = self.config.VOTE_URGENCY_MULTIPLIER_ENDGAME
-            if trust_score < 0:
-                urgency_bonus = abs(trust_score) * 0.4
-                vote_bonus += urgency_bonus
-        elif alive_count <= 8:
-            urgency_multiplier = self.config.VOTE_URGENCY_MULTIPLIER_MIDLATE
-            if trust_score < -20:
-                urgency_bonus = abs(trust_score + 20) * 0.2
-                vote_bonus += urgency_bonus
-        
-        # B. 早期注入攻击加成
-        if current_day <= 2 and player_data.get("malicious_injection"):
-            injection_count = DataValidator.safe_get_int(player_data.get("injection_count", 1), 1)
-            early_injection_bonus = 35 + min(20, injection_count * 12)
-            vote_bonus += early_injection_bonus
-        
-        # C. 预言家查杀加成
+        multiplier = _urgency_multiplier(self.config, alive_count)
+        player_data = DataValidator.safe_get_dict(context.get("player_data"))
         seer_checks = DataValidator.safe_get_dict(context.get("seer_checks"))
-        if player_name in seer_checks:
-            result = seer_checks[player_name]
-            if isinstance(result, str):
-                if "wolf" in result.lower():
-                    vote_bonus += 200
-                else:
-                    vote_bonus -= 200
-        
-        # D. 投票模式加成
-        vote_pattern = self.pattern_analyzer.analyze(player_name, context)
-        pattern_bonus = 0.0
         
-        if vote_pattern == "protect_wolf":
-            pattern_bonus = 28
-        elif vote_pattern == "charge":
-            pattern_bonus = 18
-        elif vote_pattern == "swing":
-            pattern_bonus = 12
-        elif vote_pattern == "abstain":
-            pattern_bonus = 15
-        elif vote_pattern == "accurate":
-            pattern_bonus = -22
-        
-        pattern_bonus *= urgency_multiplier
-        vote_bonus += pattern_bonus
-        
-        # 3. 计算最终优先级
-        final_priority = base_priority + vote_bonus
-        final_priority = max(final_priority, 0.0)
-        
-        logger.debug(f"[VOTE PRIORITY] {player_name}: "
-                    f"Base={base_priority:.1f} (trust={trust_score:.1f}), "
-                    f"Bonus={vote_bonus:.1f}, Urgency={urgency_multiplier:.1f}x, "
-                    f"Final={final_priority:.1f}")
-        
-        return final_priority
-    
-    def _generate_vote_reason(self, target: str, score: float, context: Dict) -> str:
-        """生成投票理由"""
-        trust_score = self.trust_calculator.analyze(target, context)
+        scores = {}
+        for candidate in candidates:
+            trust = float(self.trust_calculator.analyze(candidate, context))
+            score = 0.0
+            if trust_weight:
+                base = 100.0 * (1.0 - trust / 100.0)
+                if trust < -VOTE_TRUST_EXTREME:
+                    base += (abs(trust) - VOTE_TRUST_EXTREME) * VOTE_TRUST_EXTREME_GAIN
+                elif trust > VOTE_TRUST_EXTREME:
+                    base += -((trust - VOTE_TRUST_EXTREME) * VOTE_TRUST_EXTREME_GAIN)
+                score += base * trust_weight
+            if urgency_weight:
+                if alive_count <= 6:
+                    urgency = abs(trust) * 0.4 if trust < 0 else 0.0
+                elif alive_count <= 8:
+                    urgency = abs(trust + 20) * 0.2 if trust < -20 else 0.0
+                else:
+                    urgency = 0.0
+                score += urgency * urgency_weight
+            if injection_weight and current_day <= 2:
+                score += _early_injection_bonus(DataValidator.safe_get_dict(player_data.get(candidate))) * injection_weight
+            if seer_weight and isinstance(seer_checks.get(candidate), str):
+                seer = VOTE_SEER_WOLF if "wolf" in seer_checks[candidate].lower() else VOTE_SEER_GOOD
+                score += seer * seer_weight
+            pattern = None
+            if pattern_weight:
+                pattern = self.pattern_analyzer.analyze(candidate, context)
+                score += VOTE_PATTERN_BONUSES.get(pattern, 0.0) * multiplier * pattern_weight
+            scores[candidate] = max(score, 0.0)
+            if analysis is not None:
+                analysis[candidate] = (trust, pattern)
+        return scores
+    
+    def _generate_vote_reason(self, target: str, score: float, context: Dict,
+                              analysis: Optional[Dict[str, Tuple[float, Optional[str]]]] = None) -> str:
+        """生成投票理由（优先使用打分时记录的信任分数与投票模式）"""
+        trust_score, vote_pattern = self._cached_analysis(target, context, analysis)
         reasons = []
         
         if score >= 150:
@@ -193,13 +324,22 @@ class VoteDecisionMaker(BaseDecisionMaker):
         if player_data.get("false_quotes"):
             reasons.append("false quotation detected")
         
-        vote_pattern = self.pattern_analyzer.analyze(target, context)
         if vote_pattern == "protect_wolf":
             reasons.append("wolf-protecting voting pattern")
         elif vote_pattern == "charge":
             reasons.append("charging voting pattern")
         
         return ", ".join(reasons)
+    
+    def _cached_analysis(self, target: str, context: Dict,
+                         analysis: Optional[Dict[str, Tuple[float, Optional[str]]]]) -> Tuple[float, str]:
+        """目标的信任分数与投票模式（打分时已记录则不重复分析）"""
+        trust_score, pattern = (analysis or {}).get(target, (None, None))
+        if trust_score is None:
+            trust_score = self.trust_calculator.analyze(target, context)
+        if pattern is None:
+            pattern = self.pattern_analyzer.analyze(target, context)
+        return trust_score, pattern
 
 
 class SheriffElectionDecisionMaker(BaseDecisionMaker):
@@ -12,6 +12,7 @@
 
 from typing import Dict, List, Tuple, Optional, Any
 from agent_build_sdk.utils.logger import logger
+from werewolf.common import metrics, tracing, llm_ledger
 from werewolf.core.base_components import BaseDetector
 from .config import VillagerConfig
 from werewolf.optimization.utils.safe_math import safe_divide
@@ -21,13 +22,14 @@ import os
 
 
 def safe_execute(default_return=None):
-    """装饰器：安全执行函数，捕获异常并返回默认值"""
+    """装饰器：安全执行函数，捕获异常并返回默认值（错误计入统一指标，role=villager）"""
     def decorator(func):
         def wrapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
             except Exception as e:
                 logger.error(f"Error in {func.__name__}: {e}")
+                metrics.record_error(func.__qualname__, role='villager')
                 return default_return if default_return is not None else None
         return wrapper
     return decorator
@@ -50,11 +52,14 @@ class LLMDetectorBase(BaseDetector):
             'llm_failures': 0
         }
     
+    @tracing.traced("llm.detect")
     def _call_llm(self, prompt: str, temperature: float = 0.2, 
                   max_tokens: int = 300, timeout: int = 10) -> Optional[str]:
         """统一的LLM调用方法（调用DeepSeek Reasoner进行推理分析）"""
         try:
-            response = self.llm_client.chat.completions.create(
+            response = llm_ledger.create_completion(
+                self.llm_client,
+                caller=type(self).__name__,
                 model=self.detection_model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=temperature,
@@ -203,7 +208,7 @@ class InjectionDetector(LLMDetectorBase):
                 self.stats['llm_failures'] += 1
                 raise RuntimeError("LLM returned empty response for injection detection")
             
-            logger.debug(f"[LLM Detection] Raw response: {result_text[:200]}")
+            logger.debug("[LLM Detection] Raw response: %.200s", result_text)
             
             # 解析JSON结果
             result = self._parse_json_response(result_text)
@@ -222,8 +227,8 @@ class InjectionDetector(LLMDetectorBase):
                 
                 self.stats['llm_detections'] += 1
                 
-                logger.info(f"[LLM Detection] Type: {detection_type}, Subtype: {subtype}, "
-                          f"Confidence: {confidence:.2f}, Penalty: {penalty}, Reason: {reasoning}")
+                logger.info("[LLM Detection] Type: %s, Subtype: %s, Confidence: %.2f, Penalty: %s, Reason: %s",
+                            detection_type, subtype, confidence, penalty, reasoning)
                 
                 return (detection_type, subtype, confidence, penalty)
             else:
@@ -385,7 +390,9 @@ class FalseQuoteDetector(LLMDetectorBase):
 - 置信度要准确反映判断的确定性"""
 
             # 调用LLM API
-            response = self.llm_client.chat.completions.create(
+            response = llm_ledger.create_completion(
+                self.llm_client,
+                caller=type(self).__name__,
                 model=self.detection_model,
                 messages=[{"role": "user", "content": detection_prompt}],
                 temperature=0.2,
@@ -394,7 +401,7 @@ class FalseQuoteDetector(LLMDetectorBase):
             )
             
             result_text = response.choices[0].message.content.strip()
-            logger.debug(f"[LLM False Quote Detection] Raw response: {result_text[:200]}")
+            logger.debug("[LLM False Quote Detection] Raw response: %.200s", result_text)
             
             # 解析JSON结果
             json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
@@ -426,8 +433,8 @@ class FalseQuoteDetector(LLMDetectorBase):
                     self.stats['llm_detections'] += 1
                     self.stats['false_quotes_found'] += 1
                     
-                    logger.info(f"[LLM False Quote] {player_name} falsely quoted {details['quoted_player']}, "
-                              f"Confidence: {confidence:.2f}, Reason: {details['reasoning']}")
+                    logger.info("[LLM False Quote] %s falsely quoted %s, Confidence: %.2f, Reason: %s",
+                                player_name, details['quoted_player'], confidence, details['reasoning'])
                     
                     return True, confidence, details
                 else:
@@ -641,7 +648,9 @@ class MessageParser(LLMDetectorBase):
 - 置信度反映提取信息的确定性"""
 
             # 调用LLM API
-            response = self.llm_client.chat.completions.create(
+            response = llm_ledger.create_completion(
+                self.llm_client,
+                caller=type(self).__name__,
                 model=self.detection_model,
                 messages=[{"role": "user", "content": parse_prompt}],
                 temperature=0.2,
@@ -650,7 +659,7 @@ class MessageParser(LLMDetectorBase):
             )
             
             result_text = response.choices[0].message.content.strip()
-            logger.debug(f"[LLM Parse] Raw response: {result_text[:200]}")
+            logger.debug("[LLM Parse] Raw response: %.200s", result_text)
             
             # 解析JSON结果
             json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
@@ -669,10 +678,11 @@ class MessageParser(LLMDetectorBase):
                 
                 self.stats['llm_parses'] += 1
                 
-                logger.info(f"[LLM Parse] {player_name}: Role={parsed_result['claimed_role']}, "
-                          f"Support={len(parsed_result['support_players'])}, "
-                          f"Suspect={len(parsed_result['suspect_players'])}, "
-                          f"Vote={parsed_result['vote_intention']}")
+                logger.info("[LLM Parse] %s: Role=%s, Support=%d, Suspect=%d, Vote=%s",
+                            player_name, parsed_result['claimed_role'],
+                            len(parsed_result['support_players']),
+                            len(parsed_result['suspect_players']),
+                            parsed_result['vote_intention'])
                 
                 return parsed_result
             else:
@@ -868,7 +878,9 @@ class SpeechQualityEvaluator(LLMDetectorBase):
 }}"""
 
             # 调用LLM API
-            response = self.llm_client.chat.completions.create(
+            response = llm_ledger.create_completion(
+                self.llm_client,
+                caller=type(self).__name__,
                 model=self.detection_model,
                 messages=[{"role": "user", "content": eval_prompt}],
                 temperature=0.2,
@@ -877,7 +889,7 @@ class SpeechQualityEvaluator(LLMDetectorBase):
             )
             
             result_text = response.choices[0].message.content.strip()
-            logger.debug(f"[LLM Quality Eval] Raw response: {result_text[:200]}")
+            logger.debug("[LLM Quality Eval] Raw response: %.200s", result_text)
             
             # 解析JSON结果
             json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
@@ -888,10 +900,9 @@ class SpeechQualityEvaluator(LLMDetectorBase):
                 
                 self.stats['llm_evaluations'] += 1
                 
-                logger.info(f"[LLM Quality] Score: {quality_score}, "
-                          f"Logic: {result.get('logic_score', 0)}, "
-                          f"Info: {result.get('information_score', 0)}, "
-                          f"Reason: {result.get('reasoning', '')[:50]}")
+                logger.info("[LLM Quality] Score: %s, Logic: %s, Info: %s, Reason: %.50s",
+                            quality_score, result.get('logic_score', 0),
+                            result.get('information_score', 0), result.get('reasoning', ''))
                 
                 return quality_score
             else:
@@ -4,6 +4,7 @@
 使用继承机制减少代码重复，提高可维护性
 """
 
+import asyncio
 from typing import Dict, List, Optional
 from .prompt import (
     DESC_PROMPT,
@@ -42,6 +43,7 @@ from agent_build_sdk.sdk.agent import format_prompt
 
 # 导入基类
 from werewolf.core.base_good_agent import BaseGoodAgent
+from werewolf.common import tracing
 from werewolf.common.utils import DataValidator
 from .config import VillagerConfig
 
@@ -242,6 +244,7 @@ class VillagerAgent(BaseGoodAgent):
 
     # ==================== 感知方法 ====================
     
+    @tracing.trace_handler("perceive")
     def perceive(self, req=AgentReq):
         """处理游戏事件，更新内部状态"""
         if req.status == STATUS_START:
@@ -552,8 +555,113 @@ class VillagerAgent(BaseGoodAgent):
         else:
             raise NotImplementedError
 
+    # ==================== 讨论发言 ====================
+
+    def _discussion_prompt(self, context: Dict) -> str:
+        """构建讨论发言提示词（发言位置、游戏阶段、残局与检测警告；同时更新game_state）"""
+        # 确定发言位置
+        speech_position = self.speech_position_analyzer.analyze(
+            self.memory.load_variable("name")
+        )
+        
+        # 评估游戏阶段
+        game_phase = self.game_phase_analyzer.analyze(context)
+        
+        # 检查是否残局
+        is_endgame = self.game_phase_analyzer.is_endgame(context)
+        
+        # 更新游戏状态
+        game_state = self.memory.load_variable("game_state")
+        game_state["game_phase"] = game_phase
+        game_state["is_endgame"] = is_endgame
+        game_state["current_day"] = self._get_current_day()
+        self.memory.set_variable("game_state", game_state)
+        
+        # 添加位置、阶段和残局上下文到提示
+        position_hint = ""
+        if speech_position == "early":
+            position_hint = "\n[POSITION: Early speaker (1-4). Use observational speech strategy.]"
+        elif speech_position == "middle":
+            position_hint = "\n[POSITION: Middle speaker (5-8). Use analytical speech strategy.]"
+        else:
+            position_hint = "\n[POSITION: Late speaker (9-12). Use summary speech strategy.]"
+        
+        # 添加游戏阶段指导
+        if game_phase == "early":
+            position_hint += "\n[GAME PHASE: Early (Day 1-2). Focus on speech logic, avoid hasty conclusions.]"
+        elif game_phase == "mid":
+            position_hint += "\n[GAME PHASE: Mid (Day 3-5). Weight voting patterns, verify神职 claims.]"
+        else:
+            position_hint += "\n[GAME PHASE: Late (Day 6+). Complete behavior chain analysis.]"
+        
+        if is_endgame:
+            position_hint += "\n[ENDGAME: ≤6 players alive. Every vote is critical.]"
+        
+        # 添加注入检测警告
+        injection_warnings = ""
+        player_data = self.memory.load_variable("player_data")
+        for player, data in player_data.items():
+            if data.get("malicious_injection"):
+                subtype = data.get("injection_subtype", "UNKNOWN")
+                injection_warnings += f"\n[INJECTION WARNING] {player}: {subtype} detected - strong wolf signal"
+            if data.get("false_quotes"):
+                injection_warnings += f"\n[FALSE QUOTE WARNING] {player}: False quotation detected - wolf signal"
+        
+        if injection_warnings:
+            position_hint += injection_warnings
+
+        prompt = format_prompt(
+            DESC_PROMPT,
+            {
+                "name": self.memory.load_variable("name"),
+                "history": "\n".join(self.memory.load_history()) + position_hint,
+            },
+        )
+        logger.info("prompt:" + prompt)
+        return prompt
+
+    def _discussion_response(self, result: str) -> AgentResp:
+        """讨论发言的长度控制与响应"""
+        # 长度控制
+        original_length = len(result)
+        if original_length > self.config.MAX_SPEECH_LENGTH:
+            truncated = result[:self.config.MAX_SPEECH_LENGTH]
+            last_period = max(truncated.rfind('。'), truncated.rfind('.'), truncated.rfind('！'), truncated.rfind('!'))
+            if last_period > self.config.MIN_SPEECH_LENGTH:
+                result = truncated[:last_period + 1]
+            else:
+                result = truncated
+            logger.info(f"Speech truncated from {original_length} to {len(result)} chars")
+        elif original_length < self.config.MIN_SPEECH_LENGTH:
+            logger.warning(f"Speech too short: {original_length} chars")
+        
+        logger.info("VillagerAgent interact result: {}".format(result))
+        return AgentResp(success=True, result=result, errMsg=None)
+
+    async def interact_async(self, req):
+        """
+        异步路径：讨论发言（非遗言）的生成在事件循环上等待LLM，不占线程；
+        其余交互沿用基类（同步处理逻辑在线程池中执行）
+        """
+        if req.status != STATUS_DISCUSS or self.memory.load_variable("giving_last_words"):
+            return await super().interact_async(req)
+
+        with tracing.handler_scope(self, req, "interact"):
+            logger.info("VillagerAgent interact_async: {}".format(req))
+            prompt = await asyncio.to_thread(self._prepare_discussion, req)
+            result = await self.llm_caller_async(prompt)
+            return self._discussion_response(result)
+
+    def _prepare_discussion(self, req) -> str:
+        """记录发言并构建讨论提示词（与同步interact顺序一致；异步路径在线程池中执行）"""
+        context = self._build_context()
+        if req.message:
+            self.memory.append_history(req.message)
+        return self._discussion_prompt(context)
+
     # ==================== 交互方法 ====================
     
+    @tracing.trace_handler("interact")
     def interact(self, req=AgentReq) -> AgentResp:
         """处理游戏交互，做出决策"""
         logger.info("VillagerAgent interact: {}".format(req))
@@ -598,92 +706,15 @@ class VillagerAgent(BaseGoodAgent):
                 logger.info("VillagerAgent last words result: {}".format(result))
                 return AgentResp(success=True, result=result, errMsg=None)
 
-            # 确定发言位置
-            speech_position = self.speech_position_analyzer.analyze(
-                self.memory.load_variable("name")
-            )
-            
-            # 评估游戏阶段
-            game_phase = self.game_phase_analyzer.analyze(context)
-            
-            # 检查是否残局
-            is_endgame = self.game_phase_analyzer.is_endgame(context)
-            
-            # 更新游戏状态
-            game_state = self.memory.load_variable("game_state")
-            game_state["game_phase"] = game_phase
-            game_state["is_endgame"] = is_endgame
-            game_state["current_day"] = self._get_current_day()
-            self.memory.set_variable("game_state", game_state)
-            
-            # 添加位置、阶段和残局上下文到提示
-            position_hint = ""
-            if speech_position == "early":
-                position_hint = "\n[POSITION: Early speaker (1-4). Use observational speech strategy.]"
-            elif speech_position == "middle":
-                position_hint = "\n[POSITION: Middle speaker (5-8). Use analytical speech strategy.]"
-            else:
-                position_hint = "\n[POSITION: Late speaker (9-12). Use summary speech strategy.]"
-            
-            # 添加游戏阶段指导
-            if game_phase == "early":
-                position_hint += "\n[GAME PHASE: Early (Day 1-2). Focus on speech logic, avoid hasty conclusions.]"
-            elif game_phase == "mid":
-                position_hint += "\n[GAME PHASE: Mid (Day 3-5). Weight voting patterns, verify神职 claims.]"
-            else:
-                position_hint += "\n[GAME PHASE: Late (Day 6+). Complete behavior chain analysis.]"
-            
-            if is_endgame:
-                position_hint += "\n[ENDGAME: ≤6 players alive. Every vote is critical.]"
-            
-            # 添加注入检测警告
-            injection_warnings = ""
-            player_data = self.memory.load_variable("player_data")
-            for player, data in player_data.items():
-                if data.get("malicious_injection"):
-                    subtype = data.get("injection_subtype", "UNKNOWN")
-                    injection_warnings += f"\n[INJECTION WARNING] {player}: {subtype} detected - strong wolf signal"
-                if data.get("false_quotes"):
-                    injection_warnings += f"\n[FALSE QUOTE WARNING] {player}: False quotation detected - wolf signal"
-            
-            if injection_warnings:
-                position_hint += injection_warnings
-
-            prompt = format_prompt(
-                DESC_PROMPT,
-                {
-                    "name": self.memory.load_variable("name"),
-                    "history": "\n".join(self.memory.load_history()) + position_hint,
-                },
-            )
-            logger.info("prompt:" + prompt)
+            prompt = self._discussion_prompt(context)
             result = self.llm_caller(prompt)
-            
-            # 长度控制
-            original_length = len(result)
-            if original_length > self.config.MAX_SPEECH_LENGTH:
-                truncated = result[:self.config.MAX_SPEECH_LENGTH]
-                last_period = max(truncated.rfind('。'), truncated.rfind('.'), truncated.rfind('！'), truncated.rfind('!'))
-                if last_period > self.config.MIN_SPEECH_LENGTH:
-                    result = truncated[:last_period + 1]
-                else:
-                    result = truncated
-                logger.info(f"Speech truncated from {original_length} to {len(result)} chars")
-            elif original_length < self.config.MIN_SPEECH_LENGTH:
-                logger.warning(f"Speech too short: {original_length} chars")
-            
-            logger.info("VillagerAgent interact result: {}".format(result))
-            return AgentResp(success=True, result=result, errMsg=None)
+            return self._discussion_response(result)
 
         elif req.status == STATUS_VOTE:
             self.memory.append_history(
                 "Host: It's time to vote. Everyone, please point to the person you think might be a werewolf."
             )
-            choices = [
-                name
-                for name in req.message.split(",")
-                if name != self.memory.load_variable("name")
-            ]
+            choices = self._parse_choices(req.message, self.memory.load_variable("name"))
             self.memory.set_variable("choices", choices)
 
             # 使用基类的投票决策方法（包含决策树和ML融合）
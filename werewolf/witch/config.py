@@ -5,7 +5,8 @@
 提供女巫角色的所有配置参数
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict
 from agent_build_sdk.utils.logger import logger
 from werewolf.core.base_good_config import BaseGoodConfig
 
@@ -28,6 +29,9 @@ class WitchConfig(BaseGoodConfig):
     # ==================== 毒药使用阈值 ====================
     POISON_SCORE_THRESHOLD: int = 70  # 毒药使用最低分数
     POISON_ENDGAME_THRESHOLD: int = 80  # 残局毒药使用阈值（更谨慎）
+    POISON_ML_BONUS_MAX: int = 20  # ML狼人概率修正的最大幅度（±）
+    # 毒药评分维度权重覆盖（维度名 -> 权重，见 decision_engine.build_poison_engine；空=全部1.0）
+    POISON_DIMENSION_WEIGHTS: Dict[str, float] = field(default_factory=dict)
     
     # ==================== 信任分数阈值（继承父类）====================
     # TRUST_VERY_LOW: int = 20  # 极低信任（继承）
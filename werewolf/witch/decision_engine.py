@@ -5,11 +5,85 @@ Witch决策引擎
 提供解药和毒药使用决策逻辑，遵循企业级代码标准
 """
 
+import math
+import logging
 from typing import Dict, List, Tuple, Optional, Any
 from agent_build_sdk.utils.logger import logger
+from werewolf.common import decision_recorder
 from werewolf.core.base_components import BaseDecisionMaker
 from werewolf.witch.config import WitchConfig
 from werewolf.witch.base_components import WitchMemoryDAO
+from werewolf.optimization.config import load_config
+from werewolf.optimization.core import (
+    DecisionEngine, TrustScoreDimension, WerewolfProbabilityDimension,
+    FeatureCountDimension, FlagDimension, SeerCheckDimension, EndgameDimension,
+)
+from werewolf.optimization.core.decision_context import to_number
+
+# 毒药行为计数维度: (字段/维度名, 每次加分, 上限, 最少次数)
+POISON_FEATURES = (
+    ("injection_attempts", 22, 45, 1),
+    ("false_quotes", 17, 35, 1),
+    ("contradictions", 15, 30, 1),
+    ("protect_suspicious_count", 12, 25, 1),
+    ("vote_good_count", 8, 20, 2),
+)
+# 毒药布尔标记维度: (字段/维度名, 加减分)
+POISON_FLAGS = (
+    ("claimed_hunter", -50),
+    ("suspected_wolf_king", 35),
+)
+POISON_SEER_GOOD = -60
+POISON_SEER_WOLF = 100
+POISON_ENDGAME_FACTOR = 0.9
+POISON_ENDGAME_ALIVE = 6
+
+
+def build_poison_engine(config: WitchConfig) -> DecisionEngine:
+    """
+    毒药评分引擎（企业级五星决策树算法 - 优化版）
+    
+    评分维度：
+    1. 基础分数：100 - 信任度（信任度越低，分数越高）
+    2. 预言家确认狼人：直接100分（必毒，最高优先级）
+    3. 注入攻击：每次+22，最多+45（严重恶意行为）
+    4. 虚假引用：每次+17，最多+35（欺骗行为）
+    5. 前后矛盾：每次+15，最多+30（逻辑漏洞）
+    6. 狼人保护行为：每次+12，最多+25（阵营暴露）
+    7. 投票好人（至少2次）：每次+8，最多+20
+    8. 猎人声称：-50分（避免毒猎人，猎人被毒不能开枪）
+    9. 狼王嫌疑：+35分（优先毒狼王，狼王被毒不能开枪）
+    10. 预言家验证好人：-60分（避免毒好人）
+    11. ML狼人概率：±POISON_ML_BONUS_MAX分（context["ml_wolf_probs"]）
+    12. 残局调整：分数*0.9（更谨慎），最终限制在0-100
+    
+    引擎定义维度与权重配置；WitchDecisionEngine 按引擎的权重逐候选人计算（见 _poison_scores）。
+    
+    Args:
+        config: 女巫配置（POISON_DIMENSION_WEIGHTS 覆盖 OPTIMIZATION_CONFIG/SCORING_WEIGHTS 中的 poison 权重）
+        
+    Returns:
+        DecisionEngine
+    """
+    engine = DecisionEngine(
+        [
+            TrustScoreDimension(key="trust_scores", default=50),
+            *(FeatureCountDimension(field, per_count=per_count, cap=cap, min_count=min_count)
+              for field, per_count, cap, min_count in POISON_FEATURES),
+            *(FlagDimension(field, value) for field, value in POISON_FLAGS),
+            SeerCheckDimension(good=POISON_SEER_GOOD, good_markers=("good", "villager"), name="seer_good"),
+            WerewolfProbabilityDimension(max_bonus=config.POISON_ML_BONUS_MAX),
+            EndgameDimension(POISON_ENDGAME_FACTOR, max_alive=POISON_ENDGAME_ALIVE, key="alive_players"),
+            SeerCheckDimension(wolf_override=POISON_SEER_WOLF, name="seer_wolf"),
+        ],
+        lower=0.0,
+        upper=100.0,
+        name='poison',
+    )
+    # 配置文件/环境变量中的权重（未知维度名只记录错误），角色配置中的权重优先
+    engine.set_weights(load_config().scoring.weights('poison'), strict=False)
+    engine.set_weights(getattr(config, 'POISON_DIMENSION_WEIGHTS', None) or {})
+    return engine
 
 
 class WitchDecisionEngine(BaseDecisionMaker):
@@ -37,6 +111,9 @@ class WitchDecisionEngine(BaseDecisionMaker):
         super().__init__(config)
         self.config = config
         self.memory_dao = memory_dao
+        self.poison_engine = build_poison_engine(config)
+        # (引擎权重版本, 权重)，见 _poison_weights
+        self._poison_weights_cache: Tuple[int, Dict[str, float]] = (-1, {})
     
     def decide(self, *args, **kwargs) -> Dict[str, Any]:
         """
@@ -329,11 +406,8 @@ class WitchDecisionEngine(BaseDecisionMaker):
         context: Dict[str, Any]
     ) -> Tuple[Optional[str], str, float]:
         """计算分数并做出决策"""
-        # 计算每个候选人的分数
-        scores = {
-            candidate: self._calculate_poison_score(candidate, context)
-            for candidate in candidates
-        }
+        # 一次为全部候选人打分
+        scores = self._calculate_poison_scores(candidates, context)
         
         if not scores:
             return None, "No valid scores", 0.0
@@ -378,25 +452,35 @@ class WitchDecisionEngine(BaseDecisionMaker):
         
         return True
     
+    @decision_recorder.recorded_scores("witch.poison_score")
+    def _calculate_poison_scores(
+        self,
+        candidates: List[str],
+        context: Dict[str, Any]
+    ) -> Dict[str, float]:
+        """
+        计算全部候选人的毒药使用分数（评分维度见 build_poison_engine）
+        
+        Args:
+            candidates: 候选人列表
+            context: 决策上下文
+            
+        Returns:
+            {候选人: 毒药分数(0-100)}
+        """
+        scores = self._poison_scores(candidates, context)
+        if scores and logger.isEnabledFor(logging.INFO):
+            logger.info("[POISON SCORE] " + ", ".join(f"{c}={s:.1f}" for c, s in scores.items()))
+        return scores
+    
+    @decision_recorder.recorded("witch.poison_score")
     def _calculate_poison_score(
         self,
         target: str,
         context: Dict[str, Any]
     ) -> float:
         """
-        计算毒药使用分数（企业级五星决策树算法 - 优化版）
-        
-        评分维度（8大类，权重优化）：
-        1. 基础分数：100 - 信任度（信任度越低，分数越高）
-        2. 预言家确认狼人：直接100分（必毒，最高优先级）
-        3. 注入攻击：+45分（严重恶意行为）
-        4. 虚假引用：+35分（欺骗行为）
-        5. 前后矛盾：+30分（逻辑漏洞）
-        6. 狼人保护行为：+25分（阵营暴露）
-        7. 猎人声称：-50分（避免毒猎人，猎人被毒不能开枪）
-        8. 狼王嫌疑：+35分（优先毒狼王，狼王被毒不能开枪）
-        9. 预言家验证好人：-60分（避免毒好人）
-        10. 残局调整：分数*0.9（更谨慎）
+        计算单个候选人的毒药使用分数
         
         Args:
             target: 目标玩家
@@ -405,108 +489,76 @@ class WitchDecisionEngine(BaseDecisionMaker):
         Returns:
             毒药分数(0-100)
         """
-        trust_scores = context.get("trust_scores", {})
-        seer_checks = context.get("seer_checks", {})
-        player_data = context.get("player_data", {})
-        
-        trust = trust_scores.get(target, 50)
-        
-        # ========== 基础分数：100 - 信任度 ==========
-        score = 100 - trust
-        
-        # 获取玩家数据
-        target_data = player_data.get(target, {})
-        
-        # ========== 1. 预言家确认（最强证据，最高优先级）==========
-        
-        if target in seer_checks:
-            result = str(seer_checks[target]).lower()
-            if "wolf" in result or "werewolf" in result:
-                score = 100  # 确认狼人，必毒
-                logger.debug(f"[POISON] {target} confirmed WOLF by Seer, score=100 (MUST POISON)")
-                return 100  # 直接返回，不需要其他计算
-        
-        # ========== 2. 行为异常检测（权重优化）==========
-        
-        # 注入攻击（最严重的恶意行为）
-        injection_count = target_data.get("injection_attempts", 0)
-        if injection_count > 0:
-            bonus = min(injection_count * 22, 45)  # 每次+22，最多+45
-            score += bonus
-            logger.debug(f"[POISON] {target} injection attacks ({injection_count}), +{bonus}")
-        
-        # 虚假引用（欺骗行为）
-        false_quote_count = target_data.get("false_quotes", 0)
-        if false_quote_count > 0:
-            bonus = min(false_quote_count * 17, 35)  # 每次+17，最多+35
-            score += bonus
-            logger.debug(f"[POISON] {target} false quotes ({false_quote_count}), +{bonus}")
-        
-        # 前后矛盾（逻辑漏洞）
-        contradiction_count = target_data.get("contradictions", 0)
-        if contradiction_count > 0:
-            bonus = min(contradiction_count * 15, 30)  # 每次+15，最多+30
-            score += bonus
-            logger.debug(f"[POISON] {target} contradictions ({contradiction_count}), +{bonus}")
-        
-        # 狼人保护行为（阵营暴露）
-        wolf_protect_count = target_data.get("protect_suspicious_count", 0)
-        if wolf_protect_count > 0:
-            bonus = min(wolf_protect_count * 12, 25)  # 每次+12，最多+25
-            score += bonus
-            logger.debug(f"[POISON] {target} protects wolves ({wolf_protect_count}), +{bonus}")
-        
-        # ========== 3. 投票行为分析 ==========
-        
-        # 投票好人次数（狼人特征）
-        vote_good_count = target_data.get("vote_good_count", 0)
-        if vote_good_count >= 2:  # 至少2次投票好人
-            bonus = min(vote_good_count * 8, 20)  # 每次+8，最多+20
-            score += bonus
-            logger.debug(f"[POISON] {target} voted good players ({vote_good_count} times), +{bonus}")
-        
-        # ========== 4. 角色声称处理（风险控制）==========
-        
-        # 猎人声称：避免毒猎人（猎人被毒不能开枪）
-        if target_data.get("claimed_hunter", False):
-            penalty = 50
-            score -= penalty
-            logger.debug(f"[POISON] {target} claimed Hunter, -{penalty} (avoid poisoning hunter)")
-        
-        # 狼王嫌疑：优先毒狼王（狼王被毒不能开枪）
-        if target_data.get("suspected_wolf_king", False):
-            bonus = 35
-            score += bonus
-            logger.debug(f"[POISON] {target} suspected Wolf King, +{bonus} (priority target)")
-        
-        # ========== 5. 预言家验证好人：大幅降低分数 ==========
-        
-        if target in seer_checks:
-            result = str(seer_checks[target]).lower()
-            if "good" in result or "villager" in result:
-                penalty = 60  # 验证好人，大幅降低分数
-                score -= penalty
-                logger.debug(f"[POISON] {target} verified GOOD by Seer, -{penalty} (avoid poisoning good)")
-        
-        # ========== 6. 游戏阶段调整 ==========
-        
-        alive_players = context.get("alive_players", 12)
-        
-        # 残局（≤6人存活）：提高毒药使用标准
-        if alive_players <= 6:
-            # 残局必须更谨慎，降低所有分数10%
-            score *= 0.9
-            logger.debug(f"[POISON] {target} endgame adjustment, score *= 0.9")
-        
-        # ========== 7. 限制在0-100范围内 ==========
-        final_score = max(0, min(100, score))
+        return self._poison_scores([target], context)[target]
+    
+    def _poison_weights(self) -> Dict[str, float]:
+        """毒药维度权重（按实例缓存，引擎权重变化时刷新）"""
+        revision, weights = self._poison_weights_cache
+        if revision != self.poison_engine.revision:
+            weights = self.poison_engine.weights
+            self._poison_weights_cache = (self.poison_engine.revision, weights)
+        return weights
+    
+    def _poison_scores(
+        self,
+        candidates: List[str],
+        context: Dict[str, Any]
+    ) -> Dict[str, float]:
+        """
+        逐候选人计算毒药分数（与 poison_engine.score 结果一致）
         
-        logger.info(
-            f"[POISON SCORE] {target}: trust={trust:.1f}, "
-            f"base={100-trust:.1f}, adjustments={final_score-(100-trust):.1f}, final={final_score:.1f}"
-        )
+        候选人只有十来个时，numpy每次运算的固定开销高于逐个计算，
+        这里沿用标量循环，维度参数与权重取自引擎（见 benchmarks/bench_scoring_engine.py）。
         
-        return final_score
+        Args:
+            candidates: 候选人列表
+            context: 决策上下文
+            
+        Returns:
+            {候选人: 毒药分数(0-100)}
+        """
+        weights = self._poison_weights()
+        trust_weight = weights["trust"]
+        features = [(field, per_count, cap, min_count, weights[field])
+                    for field, per_count, cap, min_count in POISON_FEATURES if weights[field]]
+        flags = [(field, value * weights[field]) for field, value in POISON_FLAGS if weights[field]]
+        seer_good = POISON_SEER_GOOD * weights["seer_good"]
+        ml_bonus_max = self.config.POISON_ML_BONUS_MAX
+        ml_weight = weights["wolf_probability"]
+        seer_wolf = weights["seer_wolf"] != 0.0
+        factor = 1.0
+        endgame_weight = weights["endgame"]
+        if endgame_weight and to_number(context.get("alive_players", 12), 12) <= POISON_ENDGAME_ALIVE:
+            factor = (POISON_ENDGAME_FACTOR if endgame_weight == 1.0
+                      else 1.0 + (POISON_ENDGAME_FACTOR - 1.0) * endgame_weight)
+        
+        trust_scores = _as_dict(context.get("trust_scores"))
+        seer_checks = _as_dict(context.get("seer_checks"))
+        player_data = _as_dict(context.get("player_data"))
+        ml_probs = _as_dict(context.get("ml_wolf_probs"))
+        
+        scores = {}
+        for candidate in candidates:
+            data = _as_dict(player_data.get(candidate))
+            score = (100.0 - to_number(trust_scores.get(candidate), 50.0)) * trust_weight
+            for field, per_count, cap, min_count, weight in features:
+                count = to_number(data.get(field))
+                if count >= min_count:
+                    score += min(count * per_count, cap) * weight
+            for field, value in flags:
+                if data.get(field):
+                    score += value
+            verdict = str(seer_checks[candidate]).lower() if candidate in seer_checks else ''
+            if "wolf" not in verdict and ("good" in verdict or "villager" in verdict):
+                score += seer_good
+            prob = to_number(ml_probs.get(candidate), math.nan)
+            if ml_weight and not math.isnan(prob):
+                score += (prob - 0.5) * 2 * ml_bonus_max * ml_weight
+            score = max(0.0, min(100.0, score * factor))
+            if seer_wolf and "wolf" in verdict:
+                score = float(POISON_SEER_WOLF)
+            scores[candidate] = score
+        return scores
     
     def _generate_poison_reason(
         self,
@@ -546,3 +598,7 @@ class WitchDecisionEngine(BaseDecisionMaker):
             return ", ".join(reasons) + f" (score: {score:.1f})"
         else:
             return f"Most suspicious (trust: {trust:.1f}, score: {score:.1f})"
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
@@ -23,6 +23,7 @@ from agent_build_sdk.model.werewolf_model import (
 from agent_build_sdk.utils.logger import logger
 from agent_build_sdk.sdk.agent import format_prompt
 from werewolf.core.base_good_agent import BaseGoodAgent
+from werewolf.common import tracing
 from werewolf.witch.prompt import DESC_PROMPT, LAST_WORDS_PROMPT
 from typing import Dict, List, Tuple, Optional, Any
 import re
@@ -126,6 +127,11 @@ class WitchAgent(BaseGoodAgent):
     
     # ==================== 女巫特有方法 ====================
     
+    def _detects_message(self, req, kind: str) -> bool:
+        """女巫不经过 _process_player_message，异步路径无需预取检测结果"""
+        return False
+    
+    @tracing.trace_handler("perceive")
     def perceive(self, req: AgentReq):
         """
         处理游戏事件（重写父类方法以添加女巫特有处理）
@@ -289,7 +295,10 @@ class WitchAgent(BaseGoodAgent):
             return None
         
         candidates = req.choices if hasattr(req, 'choices') and req.choices else []
+        if candidates:
+            candidates = self._parse_choices(candidates, self.memory_dao.get_my_name())
         context = self._build_context()
+        context["ml_wolf_probs"] = self._predict_ml_wolf_probs(candidates, context)
         target, reason, score = self.decision_engine.decide_poison(
             candidates, context
         )
@@ -415,6 +424,7 @@ class WitchAgent(BaseGoodAgent):
     
     # ==================== 交互方法（使用父类方法）====================
     
+    @tracing.trace_handler("interact")
     def interact(self, req: AgentReq) -> AgentResp:
         """
         处理交互请求（使用父类方法简化）
@@ -740,8 +750,7 @@ class WitchAgent(BaseGoodAgent):
         Returns:
             AgentResp: 投票目标
         """
-        my_name = self.memory_dao.get_my_name()
-        choices = [name for name in req.message.split(",") if name != my_name]
+        choices = self._parse_choices(req.message, self.memory_dao.get_my_name())
         
         # 使用父类的投票决策方法（自动融合ML）
         target = self._make_vote_decision(choices)
@@ -30,6 +30,7 @@ from agent_build_sdk.model.werewolf_model import (
 from agent_build_sdk.utils.logger import logger
 from agent_build_sdk.sdk.agent import format_prompt
 from werewolf.core.base_wolf_agent import BaseWolfAgent
+from werewolf.common import tracing
 from werewolf.wolf.config import WolfConfig
 from werewolf.wolf.prompt import (
     DESC_PROMPT, WOLF_SPEECH_PROMPT, SHERIFF_SPEECH_PROMPT,
@@ -90,6 +91,7 @@ class WolfAgent(BaseWolfAgent):
     
     # ==================== 主要处理方法 ====================
     
+    @tracing.trace_handler("perceive")
     def perceive(self, req: AgentReq) -> AgentResp:
         """
         感知阶段 - 接收游戏信息并更新记忆
@@ -222,6 +224,7 @@ class WolfAgent(BaseWolfAgent):
             logger.error(f"[PERCEIVE] Error: {e}", exc_info=True)
             return AgentResp(success=False, result=None, errMsg=str(e))
     
+    @tracing.trace_handler("interact")
     def interact(self, req: AgentReq) -> AgentResp:
         """
         交互阶段 - 需要Agent做出决策和行动
@@ -31,6 +31,7 @@ from agent_build_sdk.model.werewolf_model import (
 from agent_build_sdk.utils.logger import logger
 from agent_build_sdk.sdk.agent import format_prompt
 from werewolf.core.base_wolf_agent import BaseWolfAgent
+from werewolf.common import tracing
 from werewolf.wolf_king.config import WolfKingConfig
 from werewolf.wolf_king.prompt import (
     DESC_PROMPT, SHERIFF_SPEECH_PROMPT, SHERIFF_PK_PROMPT,
@@ -253,6 +254,14 @@ class WolfKingAgent(BaseWolfAgent):
     
     # ==================== 覆盖父类方法以添加狼王特性 ====================
     
+    def _detects_message(self, req: AgentReq, kind: str) -> bool:
+        """讨论阶段的interact由 _handle_discussion 处理其他玩家发言（异步路径据此预取检测结果）"""
+        if kind != 'interact' or req.status not in (STATUS_DAY, STATUS_DISCUSS):
+            return False
+        my_name = self.memory.load_variable("name") or ""
+        return bool(req.message) and bool(req.name) and req.name != my_name
+    
+    @tracing.trace_handler("perceive")
     def perceive(self, req: AgentReq) -> AgentResp:
         """
         感知阶段（狼王不需要特殊处理）
@@ -266,6 +275,7 @@ class WolfKingAgent(BaseWolfAgent):
         # 狼王的所有逻辑都在interact阶段处理
         return AgentResp(success=True, result=None, errMsg=None)
     
+    @tracing.trace_handler("interact")
     def interact(self, req: AgentReq) -> AgentResp:
         """
         交互阶段（覆盖以添加开枪处理）